@@ -0,0 +1,112 @@
+"""
+Category autocomplete from an in-memory prefix trie.
+
+A CategoryTrie holds every category with its number of entries. Each node
+keeps the most used categories below it, ready to be returned, so a
+completion walks the prefix and copies one short list instead of visiting
+the subtree: its cost depends on the prefix length, not on the number of
+categories. Matching is case-insensitive; categories keep their spelling.
+
+A CategoryIndex is shared by every request. It loads the trie with one
+GROUP BY query, adds the categories of entries recorded through this
+process as they are written, and reloads after ``ttl`` seconds to pick up
+entries written elsewhere (imports, the scheduler, other processes).
+"""
+
+import threading
+import time
+from bisect import insort
+from collections.abc import Callable, Iterable
+
+from app.repository import AbstractRepository
+
+# Most completions returned for one prefix
+MAX_SUGGESTIONS = 20
+
+
+class _Node:
+    __slots__ = ("children", "top")
+
+    def __init__(self):
+        self.children: dict[str, _Node] = {}
+        # (-entries, category) of the most used categories below the node
+        self.top: list[tuple[int, str]] = []
+
+
+class CategoryTrie:
+    """Categories by case-insensitive prefix, most used first."""
+
+    def __init__(self, counts: Iterable[tuple[str, int]] = ()):
+        self._root = _Node()
+        self._counts: dict[str, int] = {}
+        for category, count in counts:
+            self.add(category, count)
+
+    def add(self, category: str, count: int = 1) -> None:
+        """Count ``count`` more entries of ``category``."""
+        total = self._counts.get(category, 0) + count
+        self._counts[category] = total
+        node = self._root
+        self._rank(node, category, total)
+        for char in category.casefold():
+            child = node.children.get(char)
+            if child is None:
+                child = node.children[char] = _Node()
+            node = child
+            self._rank(node, category, total)
+
+    @staticmethod
+    def _rank(node: _Node, category: str, total: int) -> None:
+        # Counts only grow, so a category dropped from a node's top never
+        # needs to come back
+        top = [item for item in node.top if item[1] != category]
+        if len(top) < MAX_SUGGESTIONS or (-total, category) < top[-1]:
+            insort(top, (-total, category))
+            del top[MAX_SUGGESTIONS:]
+        node.top = top
+
+    def complete(self, prefix: str, limit: int = 10) -> list[tuple[str, int]]:
+        """Up to ``limit`` ``(category, entries)`` starting with ``prefix``."""
+        node = self._root
+        for char in prefix.casefold():
+            node = node.children.get(char)
+            if node is None:
+                return []
+        return [(category, -count) for count, category in node.top[:limit]]
+
+    def __len__(self) -> int:
+        return len(self._counts)
+
+
+class CategoryIndex:
+    """The CategoryTrie of all entries, shared by every unit of work."""
+
+    def __init__(self, ttl: float = 60.0, clock: Callable[[], float] = time.monotonic):
+        self.ttl = ttl
+        self.clock = clock
+        self._trie: CategoryTrie | None = None
+        self._expires_at = 0.0
+        # Requests complete and add from several threads
+        self._lock = threading.Lock()
+
+    def complete(
+        self, repo: AbstractRepository, prefix: str, limit: int = 10
+    ) -> list[tuple[str, int]]:
+        with self._lock:
+            trie = self._trie if self._expires_at > self.clock() else None
+        if trie is None:
+            trie = CategoryTrie(repo.category_counts())
+            with self._lock:
+                self._trie = trie
+                self._expires_at = self.clock() + self.ttl
+        with self._lock:
+            return trie.complete(prefix, limit)
+
+    def add(self, categories: Iterable[str | None]) -> None:
+        """Count committed entries of ``categories`` (None is skipped)."""
+        with self._lock:
+            if self._trie is None:
+                return
+            for category in categories:
+                if category is not None:
+                    self._trie.add(category)
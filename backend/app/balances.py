@@ -0,0 +1,217 @@
+"""
+Materialized daily balances.
+
+The ``daily_balance`` table holds the closing balance of an account at the
+end of every day on which it has entries. The balance on any date is the
+row with the latest ``balance_date`` on or before it (or the initial
+balance if there is none), one primary-key lookup instead of a sum over
+the account's entries.
+
+Rows are maintained incrementally: a new entry adds its amount to the row
+of its date and of every later date of the account, creating the row of
+its date from the previous day's balance if needed. Entries flushed by the
+ORM are applied by mapper events (see app.db.start_mappers), bulk inserts
+by the repository, always inside the transaction that writes the entries.
+
+backfill() rebuilds the rows from the entries, for databases that predate
+the table or data written around the app; repair() rebuilds only the
+accounts whose rows have drifted. Both are available from the command line:
+
+    uv run python -m app.balances backfill [--account ID ...]
+    uv run python -m app.balances repair
+"""
+
+import argparse
+from collections.abc import Collection, Mapping
+from datetime import date
+
+from sqlalchemy import (
+    BigInteger,
+    Connection,
+    bindparam,
+    cast,
+    func,
+    insert,
+    select,
+    update,
+)
+
+from app.db import accounts, daily_balances, entries
+from app.model import Entry
+
+
+def apply_balance_deltas(conn: Connection, deltas: Mapping[tuple[str, date], int]):
+    """Add ``deltas`` (minor units per ``(account_id, day)``) to the rows.
+
+    Deltas of an account are applied together: the missing rows of their
+    days are opened first, then each row from one delta's day up to the
+    next is shifted once by the deltas dated on or before it, so a batch
+    spanning many days of an account costs three statements and one
+    update per row instead of one range update per day.
+    """
+    by_account: dict[str, list[tuple[date, int]]] = {}
+    for (account_id, day), delta in sorted(deltas.items()):
+        if delta != 0:
+            by_account.setdefault(account_id, []).append((day, delta))
+    for account_id, days in by_account.items():
+        _apply_account_deltas(conn, account_id, days)
+
+
+def _apply_account_deltas(
+    conn: Connection, account_id: str, days: list[tuple[date, int]]
+) -> None:
+    of_account = daily_balances.c.account_id == account_id
+    day_type = daily_balances.c.balance_date.type
+    existing = set(
+        conn.execute(
+            select(daily_balances.c.balance_date).where(
+                of_account,
+                daily_balances.c.balance_date.between(days[0][0], days[-1][0]),
+            )
+        ).scalars()
+    )
+    missing = [{"day": day} for day, _ in days if day not in existing]
+    if missing:
+        # Open each day with the closing balance of the previous one, all
+        # from the balances before the deltas
+        day = bindparam("day", type_=day_type)
+        previous = (
+            select(daily_balances.c.balance)
+            .where(of_account, daily_balances.c.balance_date < day)
+            .order_by(daily_balances.c.balance_date.desc())
+            .limit(1)
+            .scalar_subquery()
+        )
+        conn.execute(
+            insert(daily_balances).from_select(
+                ["account_id", "balance_date", "balance"],
+                select(
+                    accounts.c.id,
+                    day,
+                    func.coalesce(previous, accounts.c.initial_balance),
+                ).where(accounts.c.id == account_id),
+            ),
+            missing,
+        )
+    shifts = []
+    total = 0
+    for i, (day, delta) in enumerate(days):
+        total += delta
+        until = days[i + 1][0] if i + 1 < len(days) else date.max
+        shifts.append({"from_day": day, "until": until, "shift": total})
+    conn.execute(
+        update(daily_balances)
+        .where(
+            of_account,
+            daily_balances.c.balance_date >= bindparam("from_day", type_=day_type),
+            daily_balances.c.balance_date < bindparam("until", type_=day_type),
+        )
+        .values(balance=daily_balances.c.balance + bindparam("shift")),
+        shifts,
+    )
+
+
+def on_entry_inserted(mapper, connection: Connection, entry: Entry) -> None:
+    apply_balance_deltas(
+        connection, {(entry.account_id, entry.entry_date): entry._amount}
+    )
+
+
+def on_entry_deleted(mapper, connection: Connection, entry: Entry) -> None:
+    apply_balance_deltas(
+        connection, {(entry.account_id, entry.entry_date): -entry._amount}
+    )
+
+
+def _expected_balances():
+    """Closing balance per account and day, computed from the entries."""
+    daily = (
+        select(
+            entries.c.account_id,
+            entries.c.entry_date,
+            func.sum(entries.c.amount).label("net"),
+        )
+        .group_by(entries.c.account_id, entries.c.entry_date)
+        .subquery()
+    )
+    running = func.sum(daily.c.net).over(
+        partition_by=daily.c.account_id, order_by=daily.c.entry_date
+    )
+    # SUM() of BIGINT is NUMERIC on PostgreSQL
+    return select(
+        daily.c.account_id,
+        daily.c.entry_date,
+        cast(accounts.c.initial_balance + running, BigInteger).label("balance"),
+    ).join(accounts, accounts.c.id == daily.c.account_id)
+
+
+def backfill(conn: Connection, account_ids: Collection[str] | None = None) -> int:
+    """Rebuild the rows of ``account_ids`` (all accounts if ``None``).
+
+    Returns the number of rows written.
+    """
+    expected = _expected_balances()
+    delete = daily_balances.delete()
+    written = select(func.count()).select_from(daily_balances)
+    if account_ids is not None:
+        expected = expected.where(accounts.c.id.in_(account_ids))
+        delete = delete.where(daily_balances.c.account_id.in_(account_ids))
+        written = written.where(daily_balances.c.account_id.in_(account_ids))
+    conn.execute(delete)
+    conn.execute(
+        insert(daily_balances).from_select(
+            ["account_id", "balance_date", "balance"], expected
+        )
+    )
+    # rowcount of INSERT ... SELECT is not reported by every driver
+    return conn.execute(written).scalar_one()
+
+
+def repair(conn: Connection) -> list[str]:
+    """Rebuild the accounts whose rows differ from their entries.
+
+    Returns the ids of the repaired accounts.
+    """
+    expected: dict[str, set] = {}
+    for account_id, day, balance in conn.execute(_expected_balances()):
+        expected.setdefault(account_id, set()).add((day, int(balance)))
+    stored: dict[str, set] = {}
+    for account_id, day, balance in conn.execute(select(daily_balances)):
+        stored.setdefault(account_id, set()).add((day, balance))
+    drifted = sorted(
+        account_id
+        for account_id in expected.keys() | stored.keys()
+        if expected.get(account_id) != stored.get(account_id)
+    )
+    if drifted:
+        backfill(conn, drifted)
+    return drifted
+
+
+def main() -> None:
+    from app.config import get_settings
+    from app.dependencies import build_engine
+
+    parser = argparse.ArgumentParser(description="Maintain the daily_balance table")
+    commands = parser.add_subparsers(dest="command", required=True)
+    backfill_parser = commands.add_parser("backfill", help="Rebuild from entries")
+    backfill_parser.add_argument(
+        "--account", action="append", dest="accounts", help="Only this account id"
+    )
+    commands.add_parser("repair", help="Rebuild accounts that have drifted")
+    args = parser.parse_args()
+
+    engine = build_engine(get_settings())
+    try:
+        with engine.begin() as conn:
+            if args.command == "backfill":
+                print(f"{backfill(conn, args.accounts)} daily balances written")
+            else:
+                repaired = repair(conn)
+                print(f"{len(repaired)} accounts repaired: {', '.join(repaired)}")
+    finally:
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
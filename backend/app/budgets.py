@@ -0,0 +1,131 @@
+"""
+Materialized monthly spending per category, for budgets.
+
+The ``budget_spend`` table holds the spending of every category, month and
+currency: the sum of the EXPENSE entries with that category, dated in that
+``YYYY-MM`` month, as a positive amount. Budget status is then read from
+one row per budget instead of summed from the entries.
+
+Rows are maintained incrementally, as in app.balances: entries flushed by
+the ORM are applied by mapper events (see app.db.start_mappers), bulk
+inserts by the repository, always inside the transaction that writes the
+entries. Entries without a category are not budgeted and not counted.
+
+backfill() rebuilds the table from the entries, for databases that predate
+it or data written around the app:
+
+    uv run python -m app.budgets backfill
+"""
+
+import argparse
+from collections.abc import Iterable, Mapping
+from datetime import date
+
+from sqlalchemy import BigInteger, Connection, cast, func, insert, select
+from sqlalchemy.dialects import postgresql, sqlite
+
+from app.db import budget_spend, categories, entries
+from app.model import CategoryType, Entry
+
+# (category, YYYY-MM month, currency) of a budget_spend row
+SpendKey = tuple[str, str, str]
+
+
+def month_of(day: date) -> str:
+    return f"{day.year:04d}-{day.month:02d}"
+
+
+def spend_deltas(new_entries: Iterable[Entry], sign: int = 1) -> dict[SpendKey, int]:
+    """Spending added by ``new_entries`` (removed with ``sign=-1``), per key."""
+    deltas: dict[SpendKey, int] = {}
+    for entry in new_entries:
+        if entry.category_type != CategoryType.EXPENSE or entry.category is None:
+            continue
+        key = (entry.category, month_of(entry.entry_date), entry.currency)
+        # Expenses are stored as negative amounts
+        deltas[key] = deltas.get(key, 0) - sign * entry._amount
+    return deltas
+
+
+def apply_spend_deltas(conn: Connection, deltas: Mapping[SpendKey, int]) -> None:
+    """Add ``deltas`` (minor units per key) to the rows, creating missing ones."""
+    rows = [
+        {"category": category, "month": month, "currency": currency, "spent": delta}
+        for (category, month, currency), delta in sorted(deltas.items())
+        if delta != 0
+    ]
+    if not rows:
+        return
+    dialect = postgresql if conn.dialect.name == "postgresql" else sqlite
+    statement = dialect.insert(budget_spend)
+    conn.execute(
+        statement.on_conflict_do_update(
+            index_elements=[
+                budget_spend.c.category,
+                budget_spend.c.month,
+                budget_spend.c.currency,
+            ],
+            set_={"spent": budget_spend.c.spent + statement.excluded.spent},
+        ),
+        rows,
+    )
+
+
+def on_entry_inserted(mapper, connection: Connection, entry: Entry) -> None:
+    apply_spend_deltas(connection, spend_deltas([entry]))
+
+
+def on_entry_deleted(mapper, connection: Connection, entry: Entry) -> None:
+    apply_spend_deltas(connection, spend_deltas([entry], sign=-1))
+
+
+def _month_column(conn: Connection):
+    if conn.dialect.name == "sqlite":
+        # Dates are stored as ISO strings, cheaper to cut than strftime
+        return func.substr(entries.c.entry_date, 1, 7)
+    return func.to_char(entries.c.entry_date, "YYYY-MM")
+
+
+def backfill(conn: Connection) -> int:
+    """Rebuild every row from the entries. Returns the number of rows written."""
+    month = _month_column(conn)
+    expected = (
+        select(
+            categories.c.name,
+            month,
+            entries.c.currency,
+            # SUM() of BIGINT is NUMERIC on PostgreSQL
+            cast(-func.sum(entries.c.amount), BigInteger),
+        )
+        .join_from(entries, categories)
+        .where(entries.c.category_type == CategoryType.EXPENSE)
+        .group_by(categories.c.name, month, entries.c.currency)
+    )
+    conn.execute(budget_spend.delete())
+    conn.execute(
+        insert(budget_spend).from_select(
+            ["category", "month", "currency", "spent"], expected
+        )
+    )
+    return conn.execute(select(func.count()).select_from(budget_spend)).scalar_one()
+
+
+def main() -> None:
+    from app.config import get_settings
+    from app.dependencies import build_engine
+
+    parser = argparse.ArgumentParser(description="Maintain the budget_spend table")
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("backfill", help="Rebuild from entries")
+    parser.parse_args()
+
+    engine = build_engine(get_settings())
+    try:
+        with engine.begin() as conn:
+            print(f"{backfill(conn)} budget spend rows written")
+    finally:
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+"""
+Dictionary encoding of entry categories.
+
+Entries store the id of their category in the ``category`` table instead
+of repeating its name on every row, which keeps the entry table and its
+indexes small and lets reports group by an integer. Names are resolved to
+ids when entries are written: category_ids() looks them up and adds the
+missing ones, ``ON CONFLICT DO NOTHING`` so concurrent writers of a new
+category agree on one row. Category rows are never deleted.
+
+Ids are looked up again in every transaction rather than cached: a row
+added by a transaction that rolls back would leave a cached id pointing
+at nothing.
+"""
+
+from collections.abc import Iterable
+
+from sqlalchemy import Connection, select
+from sqlalchemy.dialects import postgresql, sqlite
+
+from app.db import categories
+from app.model import Entry
+
+
+def _lookup(conn: Connection, names: set[str]) -> dict[str, int]:
+    rows = conn.execute(
+        select(categories.c.name, categories.c.id).where(categories.c.name.in_(names))
+    )
+    return dict(rows.all())
+
+
+def category_ids(conn: Connection, names: Iterable[str | None]) -> dict[str, int]:
+    """Id of every category in ``names``, adding the missing ones.
+
+    None (no category) is skipped.
+    """
+    wanted = {name for name in names if name is not None}
+    if not wanted:
+        return {}
+    ids = _lookup(conn, wanted)
+    missing = wanted - ids.keys()
+    if missing:
+        dialect = postgresql if conn.dialect.name == "postgresql" else sqlite
+        conn.execute(
+            dialect.insert(categories).on_conflict_do_nothing(
+                index_elements=[categories.c.name]
+            ),
+            [{"name": name} for name in sorted(missing)],
+        )
+        ids.update(_lookup(conn, missing))
+    return ids
+
+
+def on_entry_insert(mapper, connection: Connection, entry: Entry) -> None:
+    """Mapper event: store the id of the category of a flushed entry."""
+    entry._category_id = category_ids(connection, [entry.category]).get(entry.category)
@@ -0,0 +1,158 @@
+"""
+Application settings read from the environment.
+
+Settings are resolved once per process (see get_settings()). Every value has
+a default suitable for local development, so running the app without any
+environment variables keeps working.
+"""
+
+import functools
+import os
+from dataclasses import dataclass
+
+
+def _env_bool(name: str, default: bool) -> bool:
+    value = os.environ.get(name)
+    if value is None:
+        return default
+    return value.strip().lower() in {"1", "true", "yes", "on"}
+
+
+def _env_int(name: str, default: int | None) -> int | None:
+    value = os.environ.get(name)
+    if value is None or not value.strip():
+        return default
+    return int(value)
+
+
+@dataclass(frozen=True)
+class SqlitePragmas:
+    """Connection pragmas applied to every SQLite connection.
+
+    The defaults favour concurrent readers and cheap commits on a single
+    node: WAL lets readers proceed while a write is in progress, and
+    ``synchronous=NORMAL`` only syncs at checkpoints (a power loss may drop
+    the last transactions but never corrupts the database).
+    """
+
+    journal_mode: str = "WAL"
+    synchronous: str = "NORMAL"
+    # Bytes of the database file mapped into memory
+    mmap_size: int = 256 * 1024 * 1024
+    # Negative values are KiB: 64 MiB of page cache per connection
+    cache_size: int = -64 * 1024
+    temp_store: str = "MEMORY"
+    # Wait this long for a lock instead of failing with "database is locked"
+    busy_timeout_ms: int = 5000
+
+    @classmethod
+    def from_env(cls) -> "SqlitePragmas":
+        return cls(
+            journal_mode=os.environ.get("SQLITE_JOURNAL_MODE", cls.journal_mode),
+            synchronous=os.environ.get("SQLITE_SYNCHRONOUS", cls.synchronous),
+            mmap_size=_env_int("SQLITE_MMAP_SIZE", cls.mmap_size),
+            cache_size=_env_int("SQLITE_CACHE_SIZE", cls.cache_size),
+            temp_store=os.environ.get("SQLITE_TEMP_STORE", cls.temp_store),
+            busy_timeout_ms=_env_int("SQLITE_BUSY_TIMEOUT_MS", cls.busy_timeout_ms),
+        )
+
+    def statements(self) -> list[str]:
+        return [
+            f"PRAGMA journal_mode={self.journal_mode}",
+            f"PRAGMA synchronous={self.synchronous}",
+            f"PRAGMA mmap_size={self.mmap_size}",
+            f"PRAGMA cache_size={self.cache_size}",
+            f"PRAGMA temp_store={self.temp_store}",
+            f"PRAGMA busy_timeout={self.busy_timeout_ms}",
+        ]
+
+
+@dataclass(frozen=True)
+class Settings:
+    database_url: str = "sqlite:///budget.db"
+    # Serve requests through an AsyncEngine/AsyncSession instead of running
+    # the synchronous stack on the threadpool.
+    async_database: bool = False
+    # Connection pool sizing; ignored for SQLite, whose connections are cheap
+    # and which allows a single writer anyway.
+    pool_size: int = 5
+    max_overflow: int = 10
+    # Test connections on checkout so restarts of the server are survived
+    pool_pre_ping: bool = True
+    # Server-side limit for a single statement (PostgreSQL only)
+    statement_timeout_ms: int | None = None
+    # Process-wide cache of account names and currencies; 0 disables it
+    account_cache_size: int = 1024
+    account_cache_ttl_seconds: float = 30.0
+    # Currency pairs whose exchange rates are kept in memory (see app.fx)
+    fx_cache_size: int = 256
+    fx_cache_ttl_seconds: float = 300.0
+    # Lifetime of the category autocomplete index (see app.autocomplete)
+    category_index_ttl_seconds: float = 60.0
+    # How long responses to requests with an Idempotency-Key are replayed
+    idempotency_ttl_seconds: float = 24 * 60 * 60
+    # Statement lines imported and committed per transaction
+    import_chunk_size: int = 1000
+    # "task" records due recurring entries in a background task of the app,
+    # "external" leaves it to a worker process (python -m app.scheduler)
+    recurring_scheduler: str = "task"
+    recurring_interval_seconds: float = 3600.0
+    # Recurring rules caught up and committed per transaction
+    recurring_batch_size: int = 500
+    # "auto" creates and upgrades the schema on startup; "external" leaves
+    # it to a separate deployment step (python -m app.migrations)
+    schema_management: str = "auto"
+    # Pragma profile for SQLite databases; None keeps SQLite's defaults
+    sqlite_pragmas: SqlitePragmas | None = SqlitePragmas()
+
+    @classmethod
+    def from_env(cls) -> "Settings":
+        return cls(
+            database_url=os.environ.get("DATABASE_URL", cls.database_url),
+            async_database=_env_bool("ASYNC_DATABASE", cls.async_database),
+            pool_size=_env_int("DATABASE_POOL_SIZE", cls.pool_size),
+            max_overflow=_env_int("DATABASE_MAX_OVERFLOW", cls.max_overflow),
+            pool_pre_ping=_env_bool("DATABASE_POOL_PRE_PING", cls.pool_pre_ping),
+            statement_timeout_ms=_env_int(
+                "DATABASE_STATEMENT_TIMEOUT_MS", cls.statement_timeout_ms
+            ),
+            account_cache_size=_env_int("ACCOUNT_CACHE_SIZE", cls.account_cache_size),
+            account_cache_ttl_seconds=float(
+                os.environ.get(
+                    "ACCOUNT_CACHE_TTL_SECONDS", cls.account_cache_ttl_seconds
+                )
+            ),
+            fx_cache_size=_env_int("FX_CACHE_SIZE", cls.fx_cache_size),
+            fx_cache_ttl_seconds=float(
+                os.environ.get("FX_CACHE_TTL_SECONDS", cls.fx_cache_ttl_seconds)
+            ),
+            category_index_ttl_seconds=float(
+                os.environ.get(
+                    "CATEGORY_INDEX_TTL_SECONDS", cls.category_index_ttl_seconds
+                )
+            ),
+            idempotency_ttl_seconds=float(
+                os.environ.get("IDEMPOTENCY_TTL_SECONDS", cls.idempotency_ttl_seconds)
+            ),
+            import_chunk_size=_env_int("IMPORT_CHUNK_SIZE", cls.import_chunk_size),
+            recurring_scheduler=os.environ.get(
+                "RECURRING_SCHEDULER", cls.recurring_scheduler
+            ),
+            recurring_interval_seconds=float(
+                os.environ.get(
+                    "RECURRING_INTERVAL_SECONDS", cls.recurring_interval_seconds
+                )
+            ),
+            recurring_batch_size=_env_int(
+                "RECURRING_BATCH_SIZE", cls.recurring_batch_size
+            ),
+            schema_management=os.environ.get("DATABASE_SCHEMA", cls.schema_management),
+            sqlite_pragmas=(
+                SqlitePragmas.from_env() if _env_bool("SQLITE_PRAGMAS", True) else None
+            ),
+        )
+
+
+@functools.cache
+def get_settings() -> Settings:
+    return Settings.from_env()
@@ -1,19 +1,62 @@
-from sqlalchemy import Table, Column, ForeignKey
-from sqlalchemy import String, Numeric, Date
-from sqlalchemy.orm import registry, relationship
+from sqlalchemy import Table, Column, ForeignKey, Index
+from sqlalchemy import BigInteger, Integer, SmallInteger, String, Date, DateTime, Text
+from sqlalchemy import DDL, TypeDecorator, event, select
+from sqlalchemy.orm import class_mapper, column_property, registry, relationship
+from sqlalchemy.orm.attributes import instance_state
 
 from app import model
 
 mapper_registry = registry()
 metadata = mapper_registry.metadata
 
+# Money is stored as an integer count of minor units of the row's currency
+# (see app.money), so amounts are never converted to or from floats.
+MONEY = BigInteger()
+
 accounts = Table(
     "account",
     metadata,
     Column("id", String, primary_key=True),
     Column("name", String, nullable=False, unique=True),
     Column("currency", String, nullable=False),
-    Column("initial_balance", Numeric, nullable=False),
+    Column("initial_balance", MONEY, nullable=False),
+    # Denormalized running balance, written in the same flush as the entries
+    # that change it. NULL for rows created before the column existed.
+    Column("current_balance", MONEY, nullable=True),
+    # Optimistic concurrency counter, see the version_id_col of the mapper
+    Column("version", Integer, nullable=False, server_default="1"),
+)
+
+# Codes of CategoryType in the entry table. They are stored, so a member
+# keeps its code forever and new members take new ones.
+CATEGORY_TYPE_CODES = {
+    model.CategoryType.EXPENSE: 1,
+    model.CategoryType.INCOME: 2,
+    model.CategoryType.TRANSFER: 3,
+}
+_CATEGORY_TYPES = {code: member for member, code in CATEGORY_TYPE_CODES.items()}
+
+
+class CategoryTypeCode(TypeDecorator):
+    """CategoryType stored as its small-int code (see CATEGORY_TYPE_CODES)."""
+
+    impl = SmallInteger
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        return None if value is None else CATEGORY_TYPE_CODES[model.CategoryType(value)]
+
+    def process_result_value(self, value, dialect):
+        return None if value is None else _CATEGORY_TYPES[value]
+
+
+# Every distinct entry category, stored once; entries refer to it by id
+# (see app.categories). Rows are only ever added.
+categories = Table(
+    "category",
+    metadata,
+    Column("id", Integer, primary_key=True),
+    Column("name", String, nullable=False, unique=True),
 )
 
 entries = Table(
@@ -21,18 +64,211 @@ entries = Table(
     metadata,
     Column("id", String, primary_key=True),
     Column("account_id", String, ForeignKey("account.id"), nullable=False),
-    Column("amount", Numeric, nullable=False),
+    Column("amount", MONEY, nullable=False),
+    # Copied from the account, so amounts can be read without a join
+    Column("currency", String, nullable=False),
     Column("entry_date", Date, nullable=False),
+    Column("category_id", Integer, ForeignKey("category.id"), nullable=True),
+    Column("category_type", CategoryTypeCode(), nullable=False),
+    # model.content_hash() of the entry, matched by statement imports to skip
+    # lines imported before. NULL for rows written around the app.
+    Column("content_hash", String, nullable=True),
+    # The composite index also serves lookups by account_id alone, such as
+    # loading Account._entries, so no separate account_id index is needed.
+    Index("ix_entry_account_id_entry_date", "account_id", "entry_date"),
+    Index("ix_entry_entry_date", "entry_date"),
+    # Covers the spending report: expense rows in a date range are grouped
+    # and summed from the index alone, without reading the table. It also
+    # serves filters on category_type, so that column needs no index of its own.
+    Index(
+        "ix_entry_report",
+        "category_type",
+        "entry_date",
+        "category_id",
+        "account_id",
+        "currency",
+        "amount",
+    ),
+    Index("ix_entry_category_id", "category_id"),
+    Index("ix_entry_content_hash", "account_id", "content_hash"),
+)
+
+# Full-text index of category names (see app.search), maintained by the
+# database itself so categories added by bulk inserts and around the app
+# are indexed too. On SQLite it is an FTS5 table over the category rows,
+# kept in sync by triggers; on PostgreSQL a GIN index of the name's tsvector.
+CATEGORY_SEARCH_DDL = {
+    "sqlite": [
+        "CREATE VIRTUAL TABLE category_search USING fts5("
+        "name, content='category', content_rowid='id')",
+        "CREATE TRIGGER category_search_insert AFTER INSERT ON category BEGIN "
+        "INSERT INTO category_search (rowid, name) VALUES (new.id, new.name); END",
+        "CREATE TRIGGER category_search_delete AFTER DELETE ON category BEGIN "
+        "INSERT INTO category_search (category_search, rowid, name) "
+        "VALUES ('delete', old.id, old.name); END",
+        "CREATE TRIGGER category_search_update AFTER UPDATE OF name ON category "
+        "BEGIN INSERT INTO category_search (category_search, rowid, name) "
+        "VALUES ('delete', old.id, old.name); "
+        "INSERT INTO category_search (rowid, name) VALUES (new.id, new.name); END",
+    ],
+    "postgresql": [
+        "CREATE INDEX ix_category_search ON category "
+        "USING gin (to_tsvector('simple', name))",
+    ],
+}
+for _dialect, _statements in CATEGORY_SEARCH_DDL.items():
+    for _statement in _statements:
+        event.listen(
+            categories, "after_create", DDL(_statement).execute_if(dialect=_dialect)
+        )
+# The triggers and the index go with the table, the FTS5 table does not
+event.listen(
+    categories,
+    "before_drop",
+    DDL("DROP TABLE IF EXISTS category_search").execute_if(dialect="sqlite"),
+)
+
+# Closing balance of an account at the end of every day that has entries,
+# kept up to date by app.balances in the transaction that writes the entries
+# so balances on past dates are read from one row instead of summed.
+daily_balances = Table(
+    "daily_balance",
+    metadata,
+    Column("account_id", String, ForeignKey("account.id"), primary_key=True),
+    Column("balance_date", Date, primary_key=True),
+    Column("balance", MONEY, nullable=False),
+)
+
+# Entries repeated on an account (see model.RecurringRule). ``next_date`` is
+# derived from the other columns and saved with every checkpoint, so the
+# scheduler finds due rules through its index; it is NULL once a rule has
+# ended.
+recurring_rules = Table(
+    "recurring_rule",
+    metadata,
+    Column("id", String, primary_key=True),
+    Column("account_id", String, ForeignKey("account.id"), nullable=False),
+    Column("amount", MONEY, nullable=False),
+    Column("currency", String, nullable=False),
     Column("category", String, nullable=True),
     Column("category_type", String, nullable=False),
+    Column("frequency", String, nullable=False),
+    Column("interval", Integer, nullable=False),
+    Column("start_date", Date, nullable=False),
+    Column("until", Date, nullable=True),
+    Column("materialized", Integer, nullable=False),
+    Column("next_date", Date, nullable=True),
+    Column("error", Text, nullable=True),
+    Index("ix_recurring_rule_next_date", "next_date"),
+    Index("ix_recurring_rule_account_id", "account_id"),
 )
 
+# Monthly spending limit of a category, in one currency
+budgets = Table(
+    "budget",
+    metadata,
+    Column("category", String, primary_key=True),
+    Column("currency", String, primary_key=True),
+    Column("amount", MONEY, nullable=False),
+)
+
+# Spending per category, YYYY-MM month and currency, kept up to date by
+# app.budgets in the transaction that writes the entries so budget status is
+# read from one row instead of summed from the entries.
+budget_spend = Table(
+    "budget_spend",
+    metadata,
+    Column("category", String, primary_key=True),
+    Column("month", String, primary_key=True),
+    Column("currency", String, primary_key=True),
+    Column("spent", MONEY, nullable=False),
+)
+
+# Outcome of requests sent with an Idempotency-Key header, replayed to
+# retries of the same request until the row expires (see app.main).
+idempotency_keys = Table(
+    "idempotency_key",
+    metadata,
+    Column("key", String, primary_key=True),
+    # Hash of the method, path and body the key was first used with
+    Column("fingerprint", String, nullable=False),
+    # Stored in the transaction of the request, so never without its writes
+    Column("status_code", Integer, nullable=False),
+    Column("response_body", Text, nullable=False),
+    # Naive UTC
+    Column("expires_at", DateTime, nullable=False),
+    Index("ix_idempotency_key_expires_at", "expires_at"),
+)
+
+# Exchange rates per currency pair and day (see app.fx). The rate is kept as
+# its exact decimal text: it is never summed in SQL, and SQLite has no
+# exact decimal type.
+fx_rates = Table(
+    "fx_rate",
+    metadata,
+    Column("base", String, primary_key=True),
+    Column("quote", String, primary_key=True),
+    Column("rate_date", Date, primary_key=True),
+    Column("rate", String, nullable=False),
+)
+
+# Statement imports run in the background (see services.import_statement);
+# the progress columns are committed together with every chunk of entries.
+import_jobs = Table(
+    "import_job",
+    metadata,
+    Column("id", String, primary_key=True),
+    Column("account_id", String, ForeignKey("account.id"), nullable=False),
+    Column("format", String, nullable=False),
+    Column("status", String, nullable=False),
+    Column("bytes_total", BigInteger, nullable=False),
+    Column("bytes_read", BigInteger, nullable=False),
+    Column("lines_read", Integer, nullable=False),
+    Column("imported", Integer, nullable=False),
+    Column("duplicates", Integer, nullable=False),
+    Column("error", Text, nullable=True),
+)
+
+schema_version = Table(
+    "schema_version",
+    metadata,
+    Column("version", Integer, nullable=False),
+)
+
+
+def _on_entry_appended(account: model.Account, entry: model.Entry, initiator):
+    account._entry_added(entry)
+
+
+def _on_entry_removed(account: model.Account, entry: model.Entry, initiator):
+    account._entry_removed(entry)
+
+
+def _on_category_set(entry: model.Entry, value, oldvalue, initiator):
+    # A flush only writes the category id of new entries, and the content
+    # hash and budget spending are derived from the category: entries are
+    # never recategorised in place
+    if instance_state(entry).has_identity:
+        raise AttributeError(f"The category of stored entry {entry.id} is read-only")
+
 
 def start_mappers():
+    # app.balances, app.budgets and app.categories build on the tables
+    # above, so they are imported late
+    from app import balances, budgets
+    from app.categories import on_entry_insert
+
     mapper_registry.map_imperatively(
         model.Account,
         accounts,
+        # Every UPDATE of an account checks and bumps its version, so a
+        # write based on a stale read fails with StaleDataError instead of
+        # silently overwriting a concurrent one.
+        version_id_col=accounts.c.version,
         properties={
+            # Minor units; the model exposes them as Money properties
+            "_initial_balance": accounts.c.initial_balance,
+            "_current_balance": accounts.c.current_balance,
             "_entries": relationship(
                 model.Entry,
                 backref="account",
@@ -40,4 +276,35 @@ def start_mappers():
             ),
         },
     )
-    mapper_registry.map_imperatively(model.Entry, entries)
+    mapper_registry.map_imperatively(
+        model.Entry,
+        entries,
+        properties={
+            "_amount": entries.c.amount,
+            # Resolved from ``category`` when the entry is inserted
+            "_category_id": entries.c.category_id,
+            # Loaded with the entry, kept as set across flushes; read-only
+            # once stored (see _on_category_set)
+            "category": column_property(
+                select(categories.c.name)
+                .where(categories.c.id == entries.c.category_id)
+                .scalar_subquery(),
+                expire_on_flush=False,
+            ),
+        },
+    )
+
+    # Keep the cached balance in step with every change to the collection,
+    # including backref assignments and delete-orphan removals.
+    # (Account declares no _entries of its own: the mapper instruments it)
+    account_entries = class_mapper(model.Account).attrs["_entries"]
+    event.listen(account_entries, "append", _on_entry_appended)
+    event.listen(account_entries, "remove", _on_entry_removed)
+    # Entries written by a flush (Account.record_entry, transfer) refer to
+    # their category by id, and update the daily balances and budget
+    # spending in the same transaction.
+    event.listen(model.Entry, "before_insert", on_entry_insert)
+    event.listen(class_mapper(model.Entry).attrs["category"], "set", _on_category_set)
+    for hooks in (balances, budgets):
+        event.listen(model.Entry, "after_insert", hooks.on_entry_inserted)
+        event.listen(model.Entry, "after_delete", hooks.on_entry_deleted)
@@ -1,15 +1,42 @@
+import abc
+import functools
+from collections.abc import AsyncIterator, Callable, Iterator
+from typing import Any, Concatenate, ParamSpec, TypeVar
+
 from fastapi import Depends
-from sqlalchemy import create_engine
+from sqlalchemy import Engine, create_engine, event, make_url
 from sqlalchemy.exc import ArgumentError
+from sqlalchemy.ext.asyncio import (
+    AsyncEngine,
+    AsyncSession,
+    async_sessionmaker,
+    create_async_engine,
+)
 from sqlalchemy.orm import Session, sessionmaker
 from sqlalchemy.orm.exc import UnmappedClassError
 from sqlalchemy.orm.util import class_mapper
+from starlette.concurrency import iterate_in_threadpool, run_in_threadpool
 
-from app.db import metadata, start_mappers
+from app.autocomplete import CategoryIndex
+from app.cache import TTLCache
+from app.config import Settings, SqlitePragmas, get_settings
+from app.db import start_mappers
+from app.fx import RateBook
+from app.migrations import upgrade
 from app.model import Account
-from app.repository import AbstractRepository, SqlAlchemyRepository
+from app.repository import AccountCache, Repository, SqlAlchemyRepository
+
+P = ParamSpec("P")
+T = TypeVar("T")
+
+settings = get_settings()
+DATABASE_URL = settings.database_url
 
-DATABASE_URL = "sqlite:///budget.db"
+# Async drivers used for each database backend in async mode
+_ASYNC_DRIVERS = {
+    "sqlite": "sqlite+aiosqlite",
+    "postgresql": "postgresql+psycopg",
+}
 
 
 def _ensure_mappers_started() -> None:
@@ -23,28 +50,278 @@ def _ensure_mappers_started() -> None:
         pass
 
 
-_ensure_mappers_started()
+def async_database_url(url: str) -> str:
+    """Return ``url`` with its driver swapped for the backend's async driver."""
+    parsed = make_url(url)
+    return parsed.set(
+        drivername=_ASYNC_DRIVERS[parsed.get_backend_name()]
+    ).render_as_string(hide_password=False)
+
+
+def engine_options(settings: Settings) -> dict[str, Any]:
+    """Keyword arguments for create_engine() derived from the settings."""
+    backend = make_url(settings.database_url).get_backend_name()
+    options: dict[str, Any] = {"pool_pre_ping": settings.pool_pre_ping}
+    if backend != "sqlite":
+        options["pool_size"] = settings.pool_size
+        options["max_overflow"] = settings.max_overflow
+    if backend == "postgresql" and settings.statement_timeout_ms is not None:
+        options["connect_args"] = {
+            "options": f"-c statement_timeout={settings.statement_timeout_ms}"
+        }
+    return options
+
+
+def install_sqlite_pragmas(engine: Engine, pragmas: SqlitePragmas) -> None:
+    """Apply ``pragmas`` to every new DBAPI connection of a SQLite engine."""
+    statements = pragmas.statements()
+
+    @event.listens_for(engine, "connect")
+    def _apply_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for statement in statements:
+            cursor.execute(statement)
+        cursor.close()
+
+
+def build_engine(settings: Settings) -> Engine:
+    engine = create_engine(settings.database_url, **engine_options(settings))
+    if engine.dialect.name == "sqlite" and settings.sqlite_pragmas is not None:
+        install_sqlite_pragmas(engine, settings.sqlite_pragmas)
+    return engine
+
+
+def build_async_engine(settings: Settings) -> AsyncEngine:
+    engine = create_async_engine(
+        async_database_url(settings.database_url), **engine_options(settings)
+    )
+    if engine.dialect.name == "sqlite" and settings.sqlite_pragmas is not None:
+        install_sqlite_pragmas(engine.sync_engine, settings.sqlite_pragmas)
+    return engine
+
+
+# Engines and session factories are created on first use rather than at
+# import time, so importing the app performs no database IO.
+
+
+@functools.cache
+def get_engine() -> Engine:
+    """Engine for the configured database (using 'budget.db' by default)."""
+    return build_engine(settings)
+
 
-# Setup database (using file-based SQLite database 'budget.db';
-# this URL could be made configurable via environment variables)
-engine = create_engine(DATABASE_URL)
-# Create tables (normally done via migration, but for quick start)
-metadata.create_all(engine)
+@functools.cache
+def get_session_factory() -> sessionmaker[Session]:
+    return sessionmaker(bind=get_engine())
 
-session_factory = sessionmaker(bind=engine)
+
+@functools.cache
+def get_async_engine() -> AsyncEngine:
+    return build_async_engine(settings)
+
+
+@functools.cache
+def get_async_session_factory() -> async_sessionmaker[AsyncSession]:
+    # Objects must stay readable after commit without implicit IO, which
+    # AsyncSession cannot perform outside of run_sync()
+    return async_sessionmaker(get_async_engine(), expire_on_commit=False)
+
+
+def init_database(engine: Engine, settings: Settings) -> None:
+    """Prepare the ORM and, unless managed externally, the database schema.
+
+    Called once from the application lifespan. With
+    ``DATABASE_SCHEMA=external`` the schema is expected to be up to date
+    already (see ``python -m app.migrations``) and no DDL is issued.
+    """
+    _ensure_mappers_started()
+    if settings.schema_management == "auto":
+        # Create missing tables and upgrade databases created by older versions
+        upgrade(engine)
+
+
+async def close_database() -> None:
+    """Dispose of the engines that were created during the app's lifetime."""
+    if get_engine.cache_info().currsize:
+        get_engine().dispose()
+    if get_async_engine.cache_info().currsize:
+        await get_async_engine().dispose()
 
 
 def get_db_session():
     """Yield a database session tied to the configured engine."""
-    session = session_factory()
+    session = get_session_factory()()
     try:
         yield session
     finally:
         session.close()
 
 
+async def get_async_db_session():
+    """Yield an async database session tied to the configured async engine."""
+    async with get_async_session_factory()() as session:
+        yield session
+
+
+def make_repository(
+    session: Session, account_cache: AccountCache | None = None
+) -> Repository:
+    """Build the repository for one unit of work on ``session``."""
+    return SqlAlchemyRepository(session, account_cache)
+
+
+@functools.cache
+def get_account_cache() -> AccountCache | None:
+    """Account details cached for the whole process, shared by all requests."""
+    if settings.account_cache_size <= 0:
+        return None
+    return AccountCache(
+        maxsize=settings.account_cache_size, ttl=settings.account_cache_ttl_seconds
+    )
+
+
+@functools.cache
+def get_rate_book() -> RateBook:
+    """Exchange rates cached for the whole process, shared by all requests."""
+    return RateBook(
+        TTLCache(maxsize=settings.fx_cache_size, ttl=settings.fx_cache_ttl_seconds)
+    )
+
+
+@functools.cache
+def get_category_index() -> CategoryIndex:
+    """Category autocomplete index for the whole process, shared by all requests."""
+    return CategoryIndex(ttl=settings.category_index_ttl_seconds)
+
+
 def get_repository(
     session: Session = Depends(get_db_session),
-) -> AbstractRepository:
+    account_cache: AccountCache | None = Depends(get_account_cache),
+) -> Repository:
     """Dependency that provides a repository instance."""
-    return SqlAlchemyRepository(session)
+    return make_repository(session, account_cache)
+
+
+class ServiceRunner(abc.ABC):
+    """Runs repository-bound code on behalf of an ``async def`` handler.
+
+    ``await run(fn, *args, **kwargs)`` calls ``fn(repo, *args, **kwargs)``
+    with a Repository (every aggregate in one unit of work). If the
+    call raises, pending changes are rolled back before the error
+    propagates. Results should be plain data (e.g. response schemas): ORM
+    objects must not be lazy-loaded once the call has returned.
+
+    ``await run.stream(fn, *args, **kwargs)`` is for results too large to
+    build at once: ``fn`` runs as above (and may raise before ``stream``
+    returns) but returns an iterator, which is then advanced on the runner
+    one item at a time as the returned async iterator is consumed, e.g. by
+    a StreamingResponse.
+    """
+
+    @abc.abstractmethod
+    async def __call__(
+        self,
+        fn: Callable[Concatenate[Repository, P], T],
+        *args: P.args,
+        **kwargs: P.kwargs,
+    ) -> T:
+        raise NotImplementedError()
+
+    @abc.abstractmethod
+    async def stream(
+        self,
+        fn: Callable[Concatenate[Repository, P], Iterator[T]],
+        *args: P.args,
+        **kwargs: P.kwargs,
+    ) -> AsyncIterator[T]:
+        raise NotImplementedError()
+
+
+def _next_item(session: Session, iterator: Iterator[T]) -> tuple[T] | None:
+    """The next item of ``iterator`` in a 1-tuple, or None once exhausted."""
+    for item in iterator:
+        return (item,)
+    return None
+
+
+def _call_in_unit_of_work(
+    repo: Repository,
+    fn: Callable[Concatenate[Repository, P], T],
+    *args: P.args,
+    **kwargs: P.kwargs,
+) -> T:
+    try:
+        return fn(repo, *args, **kwargs)
+    except Exception:
+        repo.rollback()
+        raise
+
+
+class SyncServiceRunner(ServiceRunner):
+    """Runs the synchronous stack on Starlette's threadpool."""
+
+    def __init__(self, repo: Repository):
+        self.repo = repo
+
+    async def __call__(self, fn, *args, **kwargs):
+        return await run_in_threadpool(
+            _call_in_unit_of_work, self.repo, fn, *args, **kwargs
+        )
+
+    async def stream(self, fn, *args, **kwargs):
+        return iterate_in_threadpool(await self(fn, *args, **kwargs))
+
+
+class AsyncServiceRunner(ServiceRunner):
+    """Runs on the event loop through an AsyncSession.
+
+    The repository (see make_repository()) is bound to the session's
+    synchronous facade inside ``AsyncSession.run_sync()``, so every statement
+    is executed by the async driver without a worker thread, and the services
+    stay shared between both modes.
+    """
+
+    def __init__(
+        self,
+        session: AsyncSession,
+        account_cache: AccountCache | None = None,
+    ):
+        self.session = session
+        self.account_cache = account_cache
+
+    async def __call__(self, fn, *args, **kwargs):
+        return await self.session.run_sync(
+            lambda session: _call_in_unit_of_work(
+                make_repository(session, self.account_cache), fn, *args, **kwargs
+            )
+        )
+
+    async def stream(self, fn, *args, **kwargs):
+        return self._iterate(await self(fn, *args, **kwargs))
+
+    async def _iterate(self, iterator: Iterator[T]) -> AsyncIterator[T]:
+        # Each step may fetch from the database, so it runs inside run_sync()
+        while True:
+            step = await self.session.run_sync(_next_item, iterator)
+            if step is None:
+                return
+            yield step[0]
+
+
+def get_sync_runner(
+    repo: Repository = Depends(get_repository),
+) -> ServiceRunner:
+    """Dependency that runs services on the synchronous stack."""
+    return SyncServiceRunner(repo)
+
+
+def get_async_runner(
+    session: AsyncSession = Depends(get_async_db_session),
+    account_cache: AccountCache | None = Depends(get_account_cache),
+) -> ServiceRunner:
+    """Dependency that runs services on the asyncio-native stack."""
+    return AsyncServiceRunner(session, account_cache)
+
+
+# Selected once at import time from the ASYNC_DATABASE setting
+get_runner = get_async_runner if settings.async_database else get_sync_runner
@@ -0,0 +1,85 @@
+"""
+Streaming export of entries as CSV or NDJSON.
+
+encode() turns an iterator of EntryRecord into text chunks of a bounded
+number of rows, so an export of any size is produced with constant memory
+as long as the records are streamed as well (see
+AbstractRepository.iter_entries). Amounts are written in major units with
+the currency's decimal places, as in the JSON API.
+"""
+
+import csv
+import io
+import json
+from collections.abc import Iterable, Iterator
+from enum import StrEnum
+
+from app.model import EntryRecord
+
+FIELDS = (
+    "id",
+    "account_id",
+    "entry_date",
+    "amount",
+    "currency",
+    "category",
+    "category_type",
+)
+
+
+class ExportFormat(StrEnum):
+    CSV = "csv"
+    NDJSON = "ndjson"
+
+    @property
+    def media_type(self) -> str:
+        if self == ExportFormat.CSV:
+            return "text/csv"
+        return "application/x-ndjson"
+
+
+def _row(record: EntryRecord) -> tuple:
+    return (
+        record.id,
+        record.account_id,
+        record.entry_date.isoformat(),
+        str(record.amount.amount),
+        record.currency,
+        record.category,
+        str(record.category_type),
+    )
+
+
+def encode(
+    records: Iterable[EntryRecord], export_format: ExportFormat, *, chunk_rows: int
+) -> Iterator[str]:
+    """Yield ``records`` encoded as text, ``chunk_rows`` rows per chunk.
+
+    CSV output starts with a header row; an empty CSV export is just the
+    header. NDJSON output has one JSON object per line and no header.
+    """
+    buffer = io.StringIO()
+    if export_format == ExportFormat.CSV:
+        writer = csv.writer(buffer, lineterminator="\n")
+        writer.writerow(FIELDS)
+
+        def write(record: EntryRecord) -> None:
+            writer.writerow(_row(record))
+
+    else:
+
+        def write(record: EntryRecord) -> None:
+            buffer.write(json.dumps(dict(zip(FIELDS, _row(record)))))
+            buffer.write("\n")
+
+    rows = 0
+    for record in records:
+        write(record)
+        rows += 1
+        if rows == chunk_rows:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+            rows = 0
+    if buffer.tell():
+        yield buffer.getvalue()
@@ -0,0 +1,92 @@
+"""
+Currency conversion with date-indexed, in-memory exchange rates.
+
+Rates are stored per currency pair and day in the ``fx_rate`` table (see
+model.FxRate); the rate of a pair on a date is the latest one on or before
+it. A RateBook loads all rates of a pair with one query into a RateTable,
+parallel sorted lists of dates and rates searched with bisect, and keeps
+the tables of the most recently used pairs in an LRU. Valuing many
+balances on many dates therefore costs one query per pair, not one per
+lookup, until the table expires or the pair's rates change.
+
+A pair without rates of its own uses the inverse of the opposite pair.
+"""
+
+from bisect import bisect_right
+from collections.abc import Collection, Iterable
+from datetime import date
+from decimal import Decimal
+
+from app.cache import TTLCache
+from app.model import RateNotFoundError
+from app.repository import RateRepository
+
+
+class RateTable:
+    """The rates of one currency pair, indexed by date."""
+
+    __slots__ = ("dates", "rates")
+
+    def __init__(self, points: Iterable[tuple[date, Decimal]]):
+        ordered = sorted(points)
+        self.dates = [day for day, _ in ordered]
+        self.rates = [rate for _, rate in ordered]
+
+    def lookup(self, on: date) -> tuple[date, Decimal] | None:
+        """Return ``(rate_date, rate)`` of the latest rate on or before ``on``."""
+        index = bisect_right(self.dates, on)
+        if index == 0:
+            return None
+        return self.dates[index - 1], self.rates[index - 1]
+
+    def __len__(self) -> int:
+        return len(self.dates)
+
+
+class RateBook:
+    """LRU of RateTables by currency pair, shared by every unit of work.
+
+    Tables are loaded through the repository of the unit of work that
+    first needs them. Tables expire after the cache's TTL, so rates
+    written by other processes are picked up; rates written through
+    add_fx_rates() in this process invalidate their pairs right away.
+    """
+
+    def __init__(self, cache: TTLCache[tuple[str, str], RateTable] | None = None):
+        self.cache = cache if cache is not None else TTLCache()
+
+    def table(self, repo: RateRepository, base: str, quote: str) -> RateTable:
+        cached = self.cache.get((base, quote))
+        if cached is not None:
+            return cached
+        direct = repo.fx_rates(base, quote)
+        days = {day for day, _ in direct}
+        inverse = [
+            (day, 1 / rate)
+            for day, rate in repo.fx_rates(quote, base)
+            if day not in days
+        ]
+        table = RateTable(direct + inverse)
+        self.cache.put((base, quote), table)
+        return table
+
+    def rate(
+        self, repo: RateRepository, base: str, quote: str, on: date
+    ) -> tuple[date, Decimal]:
+        """Return ``(rate_date, rate)`` converting ``base`` into ``quote`` on ``on``.
+
+        Raises:
+            RateNotFoundError: If the pair has no rate on or before ``on``
+        """
+        if base == quote:
+            return on, Decimal(1)
+        found = self.table(repo, base, quote).lookup(on)
+        if found is None:
+            raise RateNotFoundError(f"No {base}/{quote} exchange rate on or before {on}")
+        return found
+
+    def invalidate(self, pairs: Collection[tuple[str, str]]) -> None:
+        """Drop the tables of ``pairs``, in both directions."""
+        for base, quote in pairs:
+            self.cache.discard((base, quote))
+            self.cache.discard((quote, base))
@@ -0,0 +1,155 @@
+"""
+Streaming parsers for bank statements in CSV or OFX.
+
+parse() turns the lines of a statement into StatementLine tuples one at a
+time, so a statement of any size is read with constant memory as long as
+its lines are streamed as well (see read_lines()).
+
+CSV statements need a header row with a ``date`` (or ``entry_date``) column
+in ISO format and a signed ``amount``; ``category`` and ``category_type``
+are optional, and other columns are ignored, so files written by app.export
+can be imported again. Without a category type, negative amounts are
+expenses and others income.
+
+OFX statements (SGML 1.x or XML 2.x) contribute the ``DTPOSTED`` date and
+signed ``TRNAMT`` of every ``STMTTRN`` aggregate; they have no category.
+"""
+
+import csv
+import re
+from collections.abc import Iterable, Iterator
+from datetime import date
+from decimal import Decimal, InvalidOperation
+from typing import BinaryIO, NamedTuple
+
+from app.model import CategoryType, StatementFormat
+
+
+class StatementLine(NamedTuple):
+    # Line of the file the transaction was read from (its last line in OFX)
+    line: int
+    entry_date: date
+    amount: Decimal
+    category: str | None
+    category_type: CategoryType
+
+
+def read_lines(statement: BinaryIO) -> Iterator[str]:
+    """Yield the lines of a UTF-8 encoded statement file, one at a time.
+
+    The file is read in binary mode so that its ``tell()`` keeps reporting
+    how far the import has got.
+    """
+    first = True
+    for raw in statement:
+        yield raw.decode("utf-8-sig" if first else "utf-8")
+        first = False
+
+
+def _category_type(value: str | None, amount: Decimal) -> CategoryType:
+    if value:
+        return CategoryType(value.strip().upper())
+    return CategoryType.EXPENSE if amount < 0 else CategoryType.INCOME
+
+
+def _column(columns: dict[str, int], *names: str) -> int | None:
+    return next((columns[name] for name in names if name in columns), None)
+
+
+def parse_csv(lines: Iterable[str]) -> Iterator[StatementLine]:
+    reader = csv.reader(lines)
+    header = next(reader, None)
+    if header is None:
+        return
+    columns = {name.strip().lower(): index for index, name in enumerate(header)}
+    date_column = _column(columns, "date", "entry_date")
+    amount_column = _column(columns, "amount")
+    if date_column is None or amount_column is None:
+        raise ValueError("CSV statement needs a header with date and amount columns")
+    category_column = _column(columns, "category")
+    type_column = _column(columns, "category_type")
+
+    for row in reader:
+        if not any(cell.strip() for cell in row):
+            continue
+        try:
+            amount = Decimal(row[amount_column].strip())
+            category = None
+            if category_column is not None:
+                category = row[category_column].strip() or None
+            category_type = _category_type(
+                row[type_column] if type_column is not None else None, amount
+            )
+            entry_date = date.fromisoformat(row[date_column].strip())
+        except (IndexError, InvalidOperation, ValueError) as exc:
+            raise ValueError(f"Line {reader.line_num}: {exc or 'invalid row'}") from exc
+        yield StatementLine(reader.line_num, entry_date, amount, category, category_type)
+
+
+# Tags with their value up to the next tag or line end; SGML leaves most
+# elements unclosed, so values are never read from closing tags
+_OFX_TAG = re.compile(r"<(/?)([A-Za-z0-9.]+)>([^<\r\n]*)")
+
+
+def _ofx_line(number: int, fields: dict[str, str]) -> StatementLine:
+    try:
+        posted = fields["DTPOSTED"]
+        amount = Decimal(fields["TRNAMT"].replace(",", "."))
+        return StatementLine(
+            number,
+            date(int(posted[:4]), int(posted[4:6]), int(posted[6:8])),
+            amount,
+            None,
+            _category_type(None, amount),
+        )
+    except KeyError as exc:
+        raise ValueError(f"Line {number}: transaction without {exc.args[0]}") from exc
+    except (InvalidOperation, ValueError) as exc:
+        raise ValueError(f"Line {number}: {exc or 'invalid transaction'}") from exc
+
+
+def parse_ofx(lines: Iterable[str]) -> Iterator[StatementLine]:
+    fields: dict[str, str] | None = None
+    for number, line in enumerate(lines, 1):
+        for closing, tag, value in _OFX_TAG.findall(line):
+            tag = tag.upper()
+            if tag == "STMTTRN":
+                if closing and fields is not None:
+                    yield _ofx_line(number, fields)
+                fields = None if closing else {}
+            elif fields is not None and not closing:
+                fields[tag] = value.strip()
+
+
+def parse(
+    lines: Iterable[str], statement_format: StatementFormat
+) -> Iterator[StatementLine]:
+    """Parse ``lines`` as a statement, yielding StatementLine tuples.
+
+    Raises ValueError, naming the line, for malformed input.
+    """
+    if statement_format == StatementFormat.OFX:
+        return parse_ofx(lines)
+    return parse_csv(lines)
+
+
+def number_repeats(
+    lines: Iterable[StatementLine],
+) -> Iterator[tuple[StatementLine, int]]:
+    """Pair each line with its occurrence among identical lines, from 1.
+
+    A statement may list the same transaction twice (two equal purchases on
+    one day); the occurrence tells the second one from a re-import of the
+    first. Statements are ordered by date, so only the lines of the current
+    date are counted, which keeps memory constant; a date that recurs after
+    other dates is counted from 1 again.
+    """
+    seen: dict[tuple, int] = {}
+    current: date | None = None
+    for line in lines:
+        if line.entry_date != current:
+            seen.clear()
+            current = line.entry_date
+        key = (line.amount, line.category, line.category_type)
+        seen[key] = seen.get(key, 0) + 1
+        yield line, seen[key]
@@ -0,0 +1,182 @@
+"""
+Columnar snapshot of the entry table for analytics.
+
+Reports that loop over Entry objects pay for a Python-level addition per
+entry. A Ledger of one currency instead holds one typed NumPy array per
+column:
+
+- ``amounts``: int64 minor units, as stored in the database, so sums are
+  exact integer arithmetic
+- ``dates``: ``datetime64[D]``, plus ``months`` (int32 months since
+  1970-01) precomputed while loading, as converting dates to months is
+  the most expensive step of a monthly report
+- ``account_codes`` / ``category_codes``: int32 indexes into the
+  ``account_ids`` / ``categories`` dictionaries
+
+Aggregations are vectorized and return Money totals that are exactly equal
+to summing the entries' amounts one by one.
+
+Requires the optional ``analytics`` dependencies (NumPy).
+"""
+
+from __future__ import annotations
+
+from collections.abc import Iterable
+from dataclasses import dataclass
+from datetime import date
+
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.db import categories, entries
+from app.money import Money
+
+_EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+# Sums are computed in int64; refuse ledgers whose absolute total could wrap
+_MAX_TOTAL = 2**62
+
+
+@dataclass(frozen=True, eq=False)
+class Ledger:
+    amounts: np.ndarray
+    dates: np.ndarray
+    months: np.ndarray
+    account_codes: np.ndarray
+    category_codes: np.ndarray
+    account_ids: tuple[str, ...]
+    categories: tuple[str | None, ...]
+    currency: str
+
+    @classmethod
+    def from_rows(
+        cls,
+        rows: Iterable[tuple[str, int, date, str | None]],
+        *,
+        currency: str,
+    ) -> Ledger:
+        """Build a ledger from ``(account_id, amount, entry_date, category)``.
+
+        Amounts are integer minor units of ``currency``.
+        """
+        account_index: dict[str, int] = {}
+        category_index: dict[str | None, int] = {}
+        amounts: list[int] = []
+        days: list[int] = []
+        months: list[int] = []
+        account_codes: list[int] = []
+        category_codes: list[int] = []
+        for account_id, amount, entry_date, category in rows:
+            amounts.append(amount)
+            days.append(entry_date.toordinal() - _EPOCH_ORDINAL)
+            months.append((entry_date.year - 1970) * 12 + entry_date.month - 1)
+            account_codes.append(
+                account_index.setdefault(account_id, len(account_index))
+            )
+            category_codes.append(
+                category_index.setdefault(category, len(category_index))
+            )
+
+        amounts_array = np.array(amounts, dtype=np.int64)
+        if np.abs(amounts_array).sum(dtype=np.float64) >= _MAX_TOTAL:
+            raise OverflowError("Ledger totals do not fit into int64")
+        return cls(
+            amounts=amounts_array,
+            dates=np.array(days, dtype=np.int64).astype("datetime64[D]"),
+            months=np.array(months, dtype=np.int32),
+            account_codes=np.array(account_codes, dtype=np.int32),
+            category_codes=np.array(category_codes, dtype=np.int32),
+            account_ids=tuple(account_index),
+            categories=tuple(category_index),
+            currency=currency,
+        )
+
+    def __len__(self) -> int:
+        return len(self.amounts)
+
+    def _to_money(self, minor) -> Money:
+        return Money(int(minor), self.currency)
+
+    def _grouped_sums(self, codes: np.ndarray, groups: int):
+        """Return (totals, counts) per code in ``range(groups)``."""
+        totals = np.zeros(groups, dtype=np.int64)
+        np.add.at(totals, codes, self.amounts)
+        counts = np.bincount(codes, minlength=groups)
+        return totals, counts
+
+    def between(self, date_from: date | None, date_to: date | None) -> Ledger:
+        """Return the entries dated within the inclusive range."""
+        mask = np.ones(len(self), dtype=bool)
+        if date_from is not None:
+            mask &= self.dates >= np.datetime64(date_from, "D")
+        if date_to is not None:
+            mask &= self.dates <= np.datetime64(date_to, "D")
+        return Ledger(
+            amounts=self.amounts[mask],
+            dates=self.dates[mask],
+            months=self.months[mask],
+            account_codes=self.account_codes[mask],
+            category_codes=self.category_codes[mask],
+            account_ids=self.account_ids,
+            categories=self.categories,
+            currency=self.currency,
+        )
+
+    def total(self) -> Money:
+        return self._to_money(self.amounts.sum())
+
+    def sum_by_category(self) -> dict[str | None, Money]:
+        totals, counts = self._grouped_sums(self.category_codes, len(self.categories))
+        return {
+            category: self._to_money(totals[code])
+            for code, category in enumerate(self.categories)
+            if counts[code]
+        }
+
+    def sum_by_account(self) -> dict[str, Money]:
+        totals, counts = self._grouped_sums(self.account_codes, len(self.account_ids))
+        return {
+            account_id: self._to_money(totals[code])
+            for code, account_id in enumerate(self.account_ids)
+            if counts[code]
+        }
+
+    def sum_by_month(self) -> dict[date, Money]:
+        """Totals keyed by the first day of each month with entries."""
+        if not len(self):
+            return {}
+        first = int(self.months.min())
+        codes = self.months - first
+        totals, counts = self._grouped_sums(codes, int(codes.max()) + 1)
+        result: dict[date, Money] = {}
+        for offset in np.flatnonzero(counts):
+            month = first + int(offset)
+            result[date(1970 + month // 12, month % 12 + 1, 1)] = self._to_money(
+                totals[offset]
+            )
+        return result
+
+
+def load_ledger(
+    session: Session,
+    *,
+    currency: str,
+    date_from: date | None = None,
+    date_to: date | None = None,
+) -> Ledger:
+    """Snapshot the entries in ``currency``, optionally for a date range."""
+    query = (
+        select(
+            entries.c.account_id,
+            entries.c.amount,
+            entries.c.entry_date,
+            categories.c.name,
+        )
+        .outerjoin_from(entries, categories)
+        .where(entries.c.currency == currency)
+    )
+    if date_from is not None:
+        query = query.where(entries.c.entry_date >= date_from)
+    if date_to is not None:
+        query = query.where(entries.c.entry_date <= date_to)
+    return Ledger.from_rows(session.execute(query), currency=currency)
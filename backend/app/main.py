@@ -1,15 +1,151 @@
-from fastapi import Depends, FastAPI, HTTPException
+import asyncio
+import contextlib
+import hashlib
+import os
+import tempfile
+from collections.abc import AsyncGenerator, Callable
+from contextlib import asynccontextmanager
+from datetime import date
+
+from fastapi import (
+    BackgroundTasks,
+    Depends,
+    FastAPI,
+    Header,
+    HTTPException,
+    Query,
+    Request,
+)
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+from pydantic import BaseModel
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+from app.autocomplete import MAX_SUGGESTIONS, CategoryIndex
+from app.budgets import month_of
+from app.config import get_settings
+from app.dependencies import (
+    ServiceRunner,
+    close_database,
+    get_category_index,
+    get_db_session,
+    get_engine,
+    get_rate_book,
+    get_repository,
+    get_runner,
+    get_session_factory,
+    init_database,
+    make_repository,
+)
+from app.export import ExportFormat
+from app.fx import RateBook
+from app.model import (
+    AccountNotFoundError,
+    BudgetNotFoundError,
+    BudgetStatus,
+    CategoryType,
+    ConcurrentUpdateError,
+    DuplicateAccountNameError,
+    FxRate,
+    IdempotencyKeyConflictError,
+    IdempotencyKeyMismatchError,
+    IdempotencyRecord,
+    ImportJobNotFoundError,
+    InsufficientFundsError,
+    InvalidInitialBalanceError,
+    RateNotFoundError,
+    RecurringRuleNotFoundError,
+    ReportGrouping,
+    StatementFormat,
+)
+from app.money import Money
+from app.repository import Repository
+from app.scheduler import run_periodically
+from app.schemas import (
+    AccountCreate,
+    AccountResponse,
+    BalanceHistory,
+    BalancePoint,
+    BalanceResponse,
+    BudgetReport,
+    BudgetResponse,
+    BudgetSet,
+    BudgetStatusResponse,
+    CategorySuggestion,
+    EntryBatchCreate,
+    EntryBatchResponse,
+    EntryPage,
+    EntryResponse,
+    FxRateBatch,
+    FxRateBatchResponse,
+    FxRateResponse,
+    ImportJobResponse,
+    NetWorth,
+    NetWorthItem,
+    RecurringRuleCreate,
+    RecurringRuleResponse,
+    SpendingReport,
+    SpendingRow,
+    TransferCreate,
+    TransferResponse,
+)
+from app.services import (
+    add_fx_rates,
+    balance_at,
+    balance_history,
+    begin_idempotent_request,
+    budget_alerts,
+    budget_status,
+    complete_category,
+    create_account,
+    create_import_job,
+    create_recurring_rule,
+    delete_budget,
+    delete_recurring_rule,
+    export_entries,
+    finish_idempotent_request,
+    fx_rate,
+    get_account,
+    get_account_info,
+    get_import_job,
+    get_recurring_rule,
+    import_statement,
+    list_entries,
+    list_recurring_rules,
+    net_worth,
+    record_entries,
+    search_entries,
+    set_budget,
+    spending_report,
+    transfer_funds,
+)
+
+__all__ = ["app", "get_db_session", "get_repository", "get_runner"]
+
 
-from app.dependencies import get_db_session, get_repository
-from app.model import DuplicateAccountNameError, InvalidInitialBalanceError
-from app.repository import AbstractRepository
-from app.schemas import AccountCreate, AccountResponse
-from app.services import create_account
+@asynccontextmanager
+async def lifespan(app: FastAPI) -> AsyncGenerator[None]:
+    settings = get_settings()
+    await run_in_threadpool(init_database, get_engine(), settings)
+    scheduler = None
+    if settings.recurring_scheduler == "task":
+        scheduler = asyncio.create_task(
+            run_periodically(
+                get_session_factory(),
+                interval_seconds=settings.recurring_interval_seconds,
+                batch_size=settings.recurring_batch_size,
+            )
+        )
+    yield
+    if scheduler is not None:
+        scheduler.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await scheduler
+    await close_database()
 
-__all__ = ["app", "get_db_session", "get_repository"]
 
-app = FastAPI()
+app = FastAPI(lifespan=lifespan)
 # Add CORS middleware
 app.add_middleware(
     CORSMiddleware,
@@ -20,27 +156,690 @@ app.add_middleware(
 )
 
 
+# Handlers are coroutines: the repository work of each request is handed to
+# the configured ServiceRunner, which either runs it on the threadpool (sync
+# engine) or on the event loop (async engine). Responses are built inside the
+# runner so that no database IO happens after it returns.
+
+
+class Idempotency:
+    """``Idempotency-Key`` header support for POST endpoints.
+
+    Handlers call ``await idempotency(command)`` instead of
+    ``await run(command)``. The first request with a key runs the command
+    and stores its response in the same transaction, committed once at the
+    end (see UnitOfWork.atomic()): either both are durable or neither is,
+    so a failed request leaves no trace and can simply be retried. Retries
+    with the same key, method, path and body get the stored response
+    replayed, with an ``Idempotent-Replayed: true`` header, without running
+    the command again; a retry that races the first request is rolled back
+    once the first one commits, and gets its response too. A key reused for
+    a different request is answered with 422.
+    Stored responses expire after ``IDEMPOTENCY_TTL_SECONDS``.
+    """
+
+    def __init__(
+        self,
+        request: Request,
+        run: ServiceRunner = Depends(get_runner),
+        idempotency_key: str | None = Header(None, min_length=1, max_length=255),
+    ):
+        self.request = request
+        self.run = run
+        self.key = idempotency_key
+
+    async def _fingerprint(self) -> str:
+        digest = hashlib.sha256()
+        for part in (self.request.method.encode(), self.request.url.path.encode()):
+            digest.update(part + b"\n")
+        digest.update(await self.request.body())
+        return digest.hexdigest()
+
+    async def __call__(
+        self, command: Callable[[Repository], BaseModel]
+    ) -> BaseModel | Response:
+        key = self.key
+        if key is None:
+            return await self.run(command)
+        fingerprint = await self._fingerprint()
+        status_code = self.request.scope["route"].status_code or 200
+        ttl_seconds = get_settings().idempotency_ttl_seconds
+
+        def command_once(repo: Repository) -> BaseModel | IdempotencyRecord:
+            record = begin_idempotent_request(repo, key=key, fingerprint=fingerprint)
+            if record is not None:
+                return record
+            with repo.atomic():
+                result = command(repo)
+                finish_idempotent_request(
+                    repo,
+                    key=key,
+                    fingerprint=fingerprint,
+                    status_code=status_code,
+                    response_body=result.model_dump_json(),
+                    ttl_seconds=ttl_seconds,
+                )
+            return result
+
+        try:
+            try:
+                outcome = await self.run(command_once)
+            except IdempotencyKeyConflictError:
+                # A concurrent request with the key committed first and this
+                # one was rolled back: replay the response of the other one
+                outcome = await self.run(command_once)
+        except IdempotencyKeyMismatchError as exc:
+            return JSONResponse({"detail": str(exc)}, status_code=422)
+        except IdempotencyKeyConflictError as exc:
+            return JSONResponse({"detail": str(exc)}, status_code=409)
+        if isinstance(outcome, IdempotencyRecord):
+            return Response(
+                outcome.response_body,
+                status_code=outcome.status_code,
+                media_type="application/json",
+                headers={"Idempotent-Replayed": "true"},
+            )
+        return outcome
+
+
 @app.get("/accounts", response_model=list[AccountResponse])
-def list_accounts(repo: AbstractRepository = Depends(get_repository)):
-    return repo.list_all()
+async def list_accounts(run: ServiceRunner = Depends(get_runner)):
+    def query(repo: Repository) -> list[AccountResponse]:
+        return [
+            AccountResponse(
+                id=account.id,
+                name=account.name,
+                currency=account.currency,
+                initial_balance=account.initial_balance,
+                balance=balance,
+            )
+            for account, balance in repo.list_with_balances()
+        ]
+
+    return await run(query)
 
 
 @app.post("/accounts", status_code=201, response_model=AccountResponse)
-def create_account_endpoint(
+async def create_account_endpoint(
     account: AccountCreate,
-    repo: AbstractRepository = Depends(get_repository),
+    idempotency: Idempotency = Depends(),
 ):
-    try:
+    def command(repo: Repository) -> AccountResponse:
         new_account = create_account(
             repo=repo,
             **account.model_dump(),
         )
+        return AccountResponse.model_validate(new_account)
+
+    try:
+        return await idempotency(command)
     except DuplicateAccountNameError as exc:
         raise HTTPException(status_code=409, detail=str(exc))
     except InvalidInitialBalanceError as exc:
         raise HTTPException(status_code=400, detail=str(exc))
     except Exception as exc:
-        repo.rollback()
         raise HTTPException(status_code=400, detail=str(exc))
 
-    return new_account
+
+def _budget_status_response(status: BudgetStatus) -> BudgetStatusResponse:
+    return BudgetStatusResponse(
+        category=status.budget.category,
+        currency=status.budget.limit.currency,
+        month=status.month,
+        limit=status.budget.limit,
+        spent=status.spent,
+        remaining=status.remaining,
+        over_budget=status.over_budget,
+    )
+
+
+@app.post(
+    "/accounts/{account_id}/entries:batch",
+    status_code=201,
+    response_model=EntryBatchResponse,
+)
+async def record_entries_endpoint(
+    account_id: str,
+    batch: EntryBatchCreate,
+    idempotency: Idempotency = Depends(),
+    categories: CategoryIndex = Depends(get_category_index),
+):
+    def command(repo: Repository) -> EntryBatchResponse:
+        recorded = record_entries(
+            repo,
+            account_id=account_id,
+            entries=[
+                (entry.amount, entry.entry_date, entry.category, entry.category_type)
+                for entry in batch.entries
+            ],
+            index=categories,
+        )
+        return EntryBatchResponse(
+            account_id=account_id,
+            recorded=len(recorded),
+            balance=get_account(repo, account_id).balance,
+            budget_alerts=[
+                _budget_status_response(status)
+                for status in budget_alerts(repo, new_entries=recorded)
+            ],
+        )
+
+    try:
+        return await idempotency(command)
+    except AccountNotFoundError as exc:
+        raise HTTPException(status_code=404, detail=str(exc))
+    except (InsufficientFundsError, ConcurrentUpdateError) as exc:
+        raise HTTPException(status_code=409, detail=str(exc))
+    except Exception as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+
+
+@app.post("/transfers", status_code=201, response_model=TransferResponse)
+async def transfer_endpoint(
+    transfer: TransferCreate,
+    idempotency: Idempotency = Depends(),
+    rates: RateBook = Depends(get_rate_book),
+):
+    def command(repo: Repository) -> TransferResponse:
+        debit, credit = transfer_funds(repo, rates=rates, **transfer.model_dump())
+        return TransferResponse(
+            debit=EntryResponse.model_validate(debit),
+            credit=EntryResponse.model_validate(credit),
+        )
+
+    try:
+        return await idempotency(command)
+    except AccountNotFoundError as exc:
+        raise HTTPException(status_code=404, detail=str(exc))
+    except (InsufficientFundsError, ConcurrentUpdateError) as exc:
+        raise HTTPException(status_code=409, detail=str(exc))
+    except RateNotFoundError as exc:
+        raise HTTPException(status_code=422, detail=str(exc))
+    except Exception as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+
+
+@app.get("/accounts/{account_id}/entries", response_model=EntryPage)
+async def list_entries_endpoint(
+    account_id: str,
+    limit: int = Query(100, ge=1, le=1000),
+    cursor: str | None = None,
+    date_from: date | None = None,
+    date_to: date | None = None,
+    category: str | None = None,
+    category_type: CategoryType | None = None,
+    run: ServiceRunner = Depends(get_runner),
+):
+    def query(repo: Repository) -> EntryPage:
+        items, next_cursor = list_entries(
+            repo=repo,
+            account_id=account_id,
+            limit=limit,
+            cursor=cursor,
+            date_from=date_from,
+            date_to=date_to,
+            category=category,
+            category_type=category_type,
+        )
+        return EntryPage(
+            items=[EntryResponse.model_validate(entry) for entry in items],
+            next_cursor=next_cursor,
+        )
+
+    try:
+        return await run(query)
+    except AccountNotFoundError as exc:
+        raise HTTPException(status_code=404, detail=str(exc))
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+
+
+@app.get("/entries/search", response_model=EntryPage)
+async def search_entries_endpoint(
+    q: str,
+    account_id: str | None = None,
+    limit: int = Query(100, ge=1, le=1000),
+    cursor: str | None = None,
+    run: ServiceRunner = Depends(get_runner),
+):
+    """Entries whose category matches every word of ``q`` by prefix."""
+
+    def query(repo: Repository) -> EntryPage:
+        items, next_cursor = search_entries(
+            repo, query=q, limit=limit, cursor=cursor, account_id=account_id
+        )
+        return EntryPage(
+            items=[EntryResponse.model_validate(entry) for entry in items],
+            next_cursor=next_cursor,
+        )
+
+    try:
+        return await run(query)
+    except AccountNotFoundError as exc:
+        raise HTTPException(status_code=404, detail=str(exc))
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+
+
+@app.get("/categories/autocomplete", response_model=list[CategorySuggestion])
+async def complete_category_endpoint(
+    prefix: str = "",
+    limit: int = Query(10, ge=1, le=MAX_SUGGESTIONS),
+    run: ServiceRunner = Depends(get_runner),
+    index: CategoryIndex = Depends(get_category_index),
+):
+    """Most used categories starting with ``prefix``, case-insensitively."""
+
+    def query(repo: Repository) -> list[CategorySuggestion]:
+        return [
+            CategorySuggestion(category=category, entries=entries)
+            for category, entries in complete_category(
+                repo, prefix=prefix, limit=limit, index=index
+            )
+        ]
+
+    return await run(query)
+
+
+async def _export_response(
+    run: ServiceRunner, filename: str, export_format: ExportFormat, **kwargs
+) -> StreamingResponse:
+    # Errors are raised before the response starts; the rows are then read
+    # from the database as the body is sent
+    chunks = await run.stream(export_entries, export_format=export_format, **kwargs)
+    return StreamingResponse(
+        chunks,
+        media_type=export_format.media_type,
+        headers={
+            "Content-Disposition": (
+                f'attachment; filename="{filename}.{export_format.value}"'
+            )
+        },
+    )
+
+
+@app.get("/accounts/{account_id}/entries/export", response_class=StreamingResponse)
+async def export_account_entries_endpoint(
+    account_id: str,
+    export_format: ExportFormat = Query(ExportFormat.CSV, alias="format"),
+    date_from: date | None = None,
+    date_to: date | None = None,
+    run: ServiceRunner = Depends(get_runner),
+):
+    try:
+        return await _export_response(
+            run,
+            f"entries-{account_id}",
+            export_format,
+            account_id=account_id,
+            date_from=date_from,
+            date_to=date_to,
+        )
+    except AccountNotFoundError as exc:
+        raise HTTPException(status_code=404, detail=str(exc))
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+
+
+@app.get("/entries/export", response_class=StreamingResponse)
+async def export_entries_endpoint(
+    export_format: ExportFormat = Query(ExportFormat.CSV, alias="format"),
+    date_from: date | None = None,
+    date_to: date | None = None,
+    run: ServiceRunner = Depends(get_runner),
+):
+    try:
+        return await _export_response(
+            run, "entries", export_format, date_from=date_from, date_to=date_to
+        )
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+
+
+async def _spool_body(request: Request) -> tuple[str, int]:
+    """Write the request body to a temporary file; return its path and size."""
+    with tempfile.NamedTemporaryFile(prefix="statement-", delete=False) as spool:
+        try:
+            size = 0
+            async for chunk in request.stream():
+                await run_in_threadpool(spool.write, chunk)
+                size += len(chunk)
+        except BaseException:
+            os.unlink(spool.name)
+            raise
+    return spool.name, size
+
+
+def _run_import_job(
+    sessions: Callable[[], Session], job_id: str, path: str, chunk_size: int
+) -> None:
+    # Runs after the response, so it cannot use the request's session; the
+    # synchronous stack is used in both modes
+    try:
+        with sessions() as session, open(path, "rb") as statement:
+            import_statement(
+                make_repository(session),
+                job_id=job_id,
+                statement=statement,
+                chunk_size=chunk_size,
+            )
+    finally:
+        os.unlink(path)
+
+
+@app.post(
+    "/accounts/{account_id}/imports",
+    status_code=202,
+    response_model=ImportJobResponse,
+)
+async def import_statement_endpoint(
+    account_id: str,
+    request: Request,
+    background_tasks: BackgroundTasks,
+    statement_format: StatementFormat = Query(StatementFormat.CSV, alias="format"),
+    run: ServiceRunner = Depends(get_runner),
+    sessions: Callable[[], Session] = Depends(get_session_factory),
+):
+    """Import a bank statement sent as the raw request body.
+
+    The body is spooled to a temporary file and imported by a background
+    job; poll ``GET /imports/{id}`` for its progress. Lines imported before
+    are skipped, so a retried upload is safe without an Idempotency-Key,
+    which is not supported here because the body is never held in memory.
+    """
+    path, size = await _spool_body(request)
+    try:
+        job = await run(
+            create_import_job,
+            account_id=account_id,
+            statement_format=statement_format,
+            bytes_total=size,
+        )
+    except AccountNotFoundError as exc:
+        os.unlink(path)
+        raise HTTPException(status_code=404, detail=str(exc))
+    background_tasks.add_task(
+        _run_import_job, sessions, job.id, path, get_settings().import_chunk_size
+    )
+    return ImportJobResponse.model_validate(job)
+
+
+@app.get("/imports/{job_id}", response_model=ImportJobResponse)
+async def get_import_job_endpoint(job_id: str, run: ServiceRunner = Depends(get_runner)):
+    def query(repo: Repository) -> ImportJobResponse:
+        return ImportJobResponse.model_validate(get_import_job(repo, job_id))
+
+    try:
+        return await run(query)
+    except ImportJobNotFoundError as exc:
+        raise HTTPException(status_code=404, detail=str(exc))
+
+
+@app.post(
+    "/accounts/{account_id}/recurring-rules",
+    status_code=201,
+    response_model=RecurringRuleResponse,
+)
+async def create_recurring_rule_endpoint(
+    account_id: str,
+    rule: RecurringRuleCreate,
+    idempotency: Idempotency = Depends(),
+):
+    """Register a repeating entry; the scheduler records its occurrences."""
+
+    def command(repo: Repository) -> RecurringRuleResponse:
+        created = create_recurring_rule(
+            repo,
+            account_id=account_id,
+            amount=rule.amount,
+            category=rule.category,
+            category_type=rule.category_type,
+            frequency=rule.frequency,
+            start_date=rule.start_date,
+            interval=rule.interval,
+            until=rule.until,
+        )
+        return RecurringRuleResponse.model_validate(created)
+
+    try:
+        return await idempotency(command)
+    except AccountNotFoundError as exc:
+        raise HTTPException(status_code=404, detail=str(exc))
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+
+
+@app.get(
+    "/accounts/{account_id}/recurring-rules",
+    response_model=list[RecurringRuleResponse],
+)
+async def list_recurring_rules_endpoint(
+    account_id: str, run: ServiceRunner = Depends(get_runner)
+):
+    def query(repo: Repository) -> list[RecurringRuleResponse]:
+        return [
+            RecurringRuleResponse.model_validate(rule)
+            for rule in list_recurring_rules(repo, account_id=account_id)
+        ]
+
+    try:
+        return await run(query)
+    except AccountNotFoundError as exc:
+        raise HTTPException(status_code=404, detail=str(exc))
+
+
+@app.get("/recurring-rules/{rule_id}", response_model=RecurringRuleResponse)
+async def get_recurring_rule_endpoint(
+    rule_id: str, run: ServiceRunner = Depends(get_runner)
+):
+    def query(repo: Repository) -> RecurringRuleResponse:
+        return RecurringRuleResponse.model_validate(get_recurring_rule(repo, rule_id))
+
+    try:
+        return await run(query)
+    except RecurringRuleNotFoundError as exc:
+        raise HTTPException(status_code=404, detail=str(exc))
+
+
+@app.delete("/recurring-rules/{rule_id}", status_code=204)
+async def delete_recurring_rule_endpoint(
+    rule_id: str, run: ServiceRunner = Depends(get_runner)
+):
+    def command(repo: Repository) -> None:
+        delete_recurring_rule(repo, rule_id=rule_id)
+
+    try:
+        await run(command)
+    except RecurringRuleNotFoundError as exc:
+        raise HTTPException(status_code=404, detail=str(exc))
+    return Response(status_code=204)
+
+
+@app.get("/accounts/{account_id}/balance", response_model=BalanceResponse)
+async def balance_at_endpoint(
+    account_id: str,
+    on: date = Query(default_factory=date.today),
+    run: ServiceRunner = Depends(get_runner),
+):
+    def query(repo: Repository) -> BalanceResponse:
+        balance = balance_at(repo, account_id=account_id, on=on)
+        return BalanceResponse(
+            account_id=account_id, on=on, currency=balance.currency, balance=balance
+        )
+
+    try:
+        return await run(query)
+    except AccountNotFoundError as exc:
+        raise HTTPException(status_code=404, detail=str(exc))
+
+
+@app.get("/accounts/{account_id}/balance-history", response_model=BalanceHistory)
+async def balance_history_endpoint(
+    account_id: str,
+    date_from: date | None = None,
+    date_to: date | None = None,
+    run: ServiceRunner = Depends(get_runner),
+):
+    def query(repo: Repository) -> BalanceHistory:
+        points = balance_history(
+            repo, account_id=account_id, date_from=date_from, date_to=date_to
+        )
+        return BalanceHistory(
+            account_id=account_id,
+            currency=get_account_info(repo, account_id).currency,
+            items=[
+                BalancePoint(balance_date=day, balance=balance)
+                for day, balance in points
+            ],
+        )
+
+    try:
+        return await run(query)
+    except AccountNotFoundError as exc:
+        raise HTTPException(status_code=404, detail=str(exc))
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+
+
+@app.post("/fx-rates", status_code=201, response_model=FxRateBatchResponse)
+async def add_fx_rates_endpoint(
+    batch: FxRateBatch,
+    idempotency: Idempotency = Depends(),
+    book: RateBook = Depends(get_rate_book),
+):
+    def command(repo: Repository) -> FxRateBatchResponse:
+        rates = [FxRate(**rate.model_dump()) for rate in batch.rates]
+        return FxRateBatchResponse(stored=add_fx_rates(repo, rates=rates, book=book))
+
+    try:
+        return await idempotency(command)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+
+
+@app.get("/fx-rates/{base}/{quote}", response_model=FxRateResponse)
+async def fx_rate_endpoint(
+    base: str,
+    quote: str,
+    on: date = Query(default_factory=date.today),
+    run: ServiceRunner = Depends(get_runner),
+    book: RateBook = Depends(get_rate_book),
+):
+    def query(repo: Repository) -> FxRateResponse:
+        rate_date, rate = fx_rate(repo, base=base, quote=quote, on=on, book=book)
+        return FxRateResponse(
+            base=base, quote=quote, on=on, rate_date=rate_date, rate=rate
+        )
+
+    try:
+        return await run(query)
+    except RateNotFoundError as exc:
+        raise HTTPException(status_code=404, detail=str(exc))
+
+
+@app.get("/net-worth", response_model=NetWorth)
+async def net_worth_endpoint(
+    currency: str,
+    on: date = Query(default_factory=date.today),
+    run: ServiceRunner = Depends(get_runner),
+    book: RateBook = Depends(get_rate_book),
+):
+    def query(repo: Repository) -> NetWorth:
+        rows = net_worth(repo, currency=currency, on=on, book=book)
+        return NetWorth(
+            currency=currency,
+            on=on,
+            total=sum((converted for *_, converted in rows), Money.zero(currency)),
+            items=[
+                NetWorthItem(
+                    currency=balance.currency,
+                    accounts=accounts,
+                    balance=balance,
+                    rate=rate,
+                    converted=converted,
+                )
+                for balance, accounts, rate, converted in rows
+            ],
+        )
+
+    try:
+        return await run(query)
+    except RateNotFoundError as exc:
+        raise HTTPException(status_code=422, detail=str(exc))
+
+
+@app.put("/budgets/{category}", response_model=BudgetResponse)
+async def set_budget_endpoint(
+    category: str, budget: BudgetSet, run: ServiceRunner = Depends(get_runner)
+):
+    def command(repo: Repository) -> BudgetResponse:
+        stored = set_budget(
+            repo, category=category, currency=budget.currency, limit=budget.limit
+        )
+        return BudgetResponse(
+            category=category, currency=budget.currency, limit=stored.limit
+        )
+
+    try:
+        return await run(command)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+
+
+@app.delete("/budgets/{category}", status_code=204)
+async def delete_budget_endpoint(
+    category: str, currency: str, run: ServiceRunner = Depends(get_runner)
+):
+    def command(repo: Repository) -> None:
+        delete_budget(repo, category=category, currency=currency)
+
+    try:
+        await run(command)
+    except BudgetNotFoundError as exc:
+        raise HTTPException(status_code=404, detail=str(exc))
+    return Response(status_code=204)
+
+
+@app.get("/budgets", response_model=BudgetReport)
+async def budget_status_endpoint(
+    month: str = Query(default_factory=lambda: month_of(date.today())),
+    over_budget: bool = False,
+    run: ServiceRunner = Depends(get_runner),
+):
+    def query(repo: Repository) -> BudgetReport:
+        statuses = budget_status(repo, month=month, over_budget_only=over_budget)
+        return BudgetReport(
+            month=month, items=[_budget_status_response(s) for s in statuses]
+        )
+
+    try:
+        return await run(query)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+
+
+@app.get("/reports/spending", response_model=SpendingReport)
+async def spending_report_endpoint(
+    date_from: date | None = Query(None, alias="from"),
+    date_to: date | None = Query(None, alias="to"),
+    group_by: ReportGrouping = ReportGrouping.CATEGORY,
+    run: ServiceRunner = Depends(get_runner),
+):
+    def query(repo: Repository) -> SpendingReport:
+        rows = spending_report(
+            repo, group_by=group_by, date_from=date_from, date_to=date_to
+        )
+        return SpendingReport(
+            group_by=group_by,
+            date_from=date_from,
+            date_to=date_to,
+            items=[
+                SpendingRow(key=key, currency=total.currency, total=total, entries=n)
+                for key, total, n in rows
+            ],
+        )
+
+    try:
+        return await run(query)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
@@ -0,0 +1,425 @@
+"""
+Schema upgrades for existing databases.
+
+``metadata.create_all`` only creates missing tables; it never alters a table
+that already exists. Databases created by an older version of the app (such
+as an existing ``budget.db``) are brought up to date by the ordered steps in
+``MIGRATIONS``. The number of applied steps is recorded in the
+``schema_version`` table, so every step runs exactly once per database.
+
+A database created from scratch already has the current schema and is
+stamped with the latest version without running any step.
+"""
+
+from collections.abc import Callable
+
+from sqlalchemy import (
+    BigInteger,
+    Connection,
+    Date,
+    Engine,
+    Numeric,
+    Table,
+    bindparam,
+    case,
+    cast,
+    func,
+    insert,
+    inspect,
+    select,
+    sql,
+    text,
+)
+from sqlalchemy.sql.elements import ColumnElement
+
+from app import budgets
+from app.balances import backfill
+from app.db import (
+    CATEGORY_TYPE_CODES,
+    accounts,
+    budget_spend,
+    categories,
+    entries,
+    metadata,
+    schema_version,
+)
+from app.model import CategoryType, content_hash
+from app.money import CURRENCY_EXPONENTS, DEFAULT_EXPONENT, Money
+
+# Entries hashed per statement by _add_entry_content_hash
+_HASH_BATCH = 10_000
+
+
+def _legacy_entries(name: str = "entry"):
+    """The entry table as it was before _normalize_categories."""
+    return sql.table(
+        name,
+        sql.column("id"),
+        sql.column("account_id"),
+        sql.column("amount"),
+        sql.column("currency"),
+        sql.column("entry_date", Date),
+        sql.column("category"),
+        sql.column("category_type"),
+        sql.column("content_hash"),
+    )
+
+
+def _add_column(conn: Connection, table: Table, column_name: str) -> None:
+    """Add a column defined in ``table`` to the database if it is missing."""
+    existing = {column["name"] for column in inspect(conn).get_columns(table.name)}
+    if column_name in existing:
+        return
+    column = table.c[column_name]
+    column_type = column.type.compile(dialect=conn.dialect)
+    conn.execute(
+        text(f"ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}")
+    )
+
+
+def _add_account_current_balance(conn: Connection) -> None:
+    # Left NULL for existing rows: Account.balance sums the entries once on
+    # first access and the result is persisted with the next flush.
+    _add_column(conn, accounts, "current_balance")
+
+
+def _add_entry_indexes(conn: Connection) -> None:
+    # Pinned to the indexes of this version: later ones may cover columns
+    # that do not exist yet at this step
+    for name, columns in (
+        ("ix_entry_account_id_entry_date", "account_id, entry_date"),
+        ("ix_entry_entry_date", "entry_date"),
+        ("ix_entry_category_type", "category_type"),
+    ):
+        conn.execute(text(f"CREATE INDEX IF NOT EXISTS {name} ON entry ({columns})"))
+
+
+def _alter_column_type(conn: Connection, column, column_type: str) -> None:
+    conn.execute(
+        text(
+            f"ALTER TABLE {column.table.name} "
+            f"ALTER COLUMN {column.name} TYPE {column_type}"
+        )
+    )
+
+
+def _set_money_precision(conn: Connection) -> None:
+    # SQLite ignores declared precision, so only PostgreSQL needs the change
+    if conn.dialect.name != "postgresql":
+        return
+    # The type of this step is fixed; the columns have moved on since
+    numeric = Numeric(20, 8).compile(dialect=conn.dialect)
+    for column in (
+        accounts.c.initial_balance,
+        accounts.c.current_balance,
+        entries.c.amount,
+    ):
+        _alter_column_type(conn, column, numeric)
+
+
+def _minor_unit_factor(currency: ColumnElement) -> ColumnElement:
+    """SQL expression for 10 ** exponent of the currency in ``currency``."""
+    return case(
+        {code: 10**exponent for code, exponent in CURRENCY_EXPONENTS.items()},
+        value=currency,
+        else_=10**DEFAULT_EXPONENT,
+    )
+
+
+def _store_money_in_minor_units(conn: Connection) -> None:
+    # Amounts with more decimal places than their currency allows are
+    # rounded to the nearest minor unit.
+    _add_column(conn, entries, "currency")
+    conn.execute(
+        entries.update().values(
+            currency=select(accounts.c.currency)
+            .where(accounts.c.id == entries.c.account_id)
+            .scalar_subquery()
+        )
+    )
+    for table, currency, columns in (
+        (
+            accounts,
+            accounts.c.currency,
+            [accounts.c.initial_balance, accounts.c.current_balance],
+        ),
+        (entries, entries.c.currency, [entries.c.amount]),
+    ):
+        factor = _minor_unit_factor(currency)
+        conn.execute(
+            table.update().values(
+                {
+                    column: cast(func.round(column * factor), BigInteger)
+                    for column in columns
+                }
+            )
+        )
+    # SQLite keeps the declared NUMERIC affinity, which stores integers as
+    # such; PostgreSQL needs the column types changed.
+    if conn.dialect.name == "postgresql":
+        bigint = BigInteger().compile(dialect=conn.dialect)
+        for column in (
+            accounts.c.initial_balance,
+            accounts.c.current_balance,
+            entries.c.amount,
+        ):
+            _alter_column_type(conn, column, f"{bigint} USING {column.name}::{bigint}")
+        conn.execute(text("ALTER TABLE entry ALTER COLUMN currency SET NOT NULL"))
+
+
+def _add_entry_report_index(conn: Connection) -> None:
+    # The covering report index starts with category_type and replaces the
+    # single-column index
+    conn.execute(
+        text(
+            "CREATE INDEX IF NOT EXISTS ix_entry_report ON entry (category_type, "
+            "entry_date, category, account_id, currency, amount)"
+        )
+    )
+    conn.execute(text("DROP INDEX IF EXISTS ix_entry_category_type"))
+
+
+def _backfill_daily_balances(conn: Connection) -> None:
+    # The table itself is created by create_all(); fill it from the entries
+    backfill(conn)
+
+
+def _add_account_version(conn: Connection) -> None:
+    existing = {column["name"] for column in inspect(conn).get_columns("account")}
+    if "version" not in existing:
+        conn.execute(
+            text("ALTER TABLE account ADD COLUMN version INTEGER NOT NULL DEFAULT 1")
+        )
+
+
+def _add_entry_content_hash(conn: Connection) -> None:
+    _add_column(conn, entries, "content_hash")
+    legacy = _legacy_entries()
+    rows = select(
+        legacy.c.id,
+        legacy.c.amount,
+        legacy.c.currency,
+        legacy.c.entry_date,
+        legacy.c.category,
+        legacy.c.category_type,
+    ).order_by(legacy.c.id)
+    # Hashed in Python, a batch at a time, so the statement is the same on
+    # every backend and large tables are not loaded at once
+    last_id = None
+    while True:
+        query = rows if last_id is None else rows.where(legacy.c.id > last_id)
+        batch = conn.execute(query.limit(_HASH_BATCH)).all()
+        if not batch:
+            break
+        conn.execute(
+            legacy.update()
+            .where(legacy.c.id == bindparam("entry_id"))
+            .values(content_hash=bindparam("hash")),
+            [
+                {
+                    "entry_id": id,
+                    "hash": content_hash(
+                        Money(amount, currency),
+                        entry_date,
+                        category,
+                        CategoryType(category_type),
+                    ),
+                }
+                for id, amount, currency, entry_date, category, category_type in batch
+            ],
+        )
+        last_id = batch[-1].id
+    conn.execute(
+        text(
+            "CREATE INDEX IF NOT EXISTS ix_entry_content_hash "
+            "ON entry (account_id, content_hash)"
+        )
+    )
+
+
+def _backfill_budget_spend(conn: Connection) -> None:
+    # The tables themselves are created by create_all(); fill the spending
+    # counters from the entries. Pinned to the entry table of this version,
+    # with category names and types as strings: budgets.backfill() reads
+    # the layout of _normalize_categories.
+    legacy = _legacy_entries()
+    if conn.dialect.name == "sqlite":
+        month = func.substr(legacy.c.entry_date, 1, 7)
+    else:
+        month = func.to_char(legacy.c.entry_date, "YYYY-MM")
+    conn.execute(budget_spend.delete())
+    conn.execute(
+        insert(budget_spend).from_select(
+            ["category", "month", "currency", "spent"],
+            select(
+                legacy.c.category,
+                month,
+                legacy.c.currency,
+                cast(-func.sum(legacy.c.amount), BigInteger),
+            )
+            .where(
+                legacy.c.category_type == CategoryType.EXPENSE.value,
+                legacy.c.category.is_not(None),
+            )
+            .group_by(legacy.c.category, month, legacy.c.currency),
+        )
+    )
+
+
+# The entry search index of the versions before _normalize_categories, on
+# the category column of the entry table (see app.search)
+_ENTRY_SEARCH_DDL = {
+    "sqlite": [
+        "CREATE VIRTUAL TABLE entry_search USING fts5("
+        "category, content='entry', content_rowid='rowid')",
+        "CREATE TRIGGER entry_search_insert AFTER INSERT ON entry BEGIN "
+        "INSERT INTO entry_search (rowid, category) "
+        "VALUES (new.rowid, new.category); END",
+        "CREATE TRIGGER entry_search_delete AFTER DELETE ON entry BEGIN "
+        "INSERT INTO entry_search (entry_search, rowid, category) "
+        "VALUES ('delete', old.rowid, old.category); END",
+        "CREATE TRIGGER entry_search_update AFTER UPDATE OF category ON entry BEGIN "
+        "INSERT INTO entry_search (entry_search, rowid, category) "
+        "VALUES ('delete', old.rowid, old.category); "
+        "INSERT INTO entry_search (rowid, category) "
+        "VALUES (new.rowid, new.category); END",
+    ],
+    "postgresql": [
+        "CREATE INDEX ix_entry_category_search ON entry "
+        "USING gin (to_tsvector('simple', coalesce(category, '')))",
+    ],
+}
+_DROP_ENTRY_SEARCH = {
+    "sqlite": [
+        "DROP TRIGGER IF EXISTS entry_search_insert",
+        "DROP TRIGGER IF EXISTS entry_search_delete",
+        "DROP TRIGGER IF EXISTS entry_search_update",
+        "DROP TABLE IF EXISTS entry_search",
+    ],
+    "postgresql": ["DROP INDEX IF EXISTS ix_entry_category_search"],
+}
+
+
+def _add_entry_search(conn: Connection) -> None:
+    # Pinned to the search index of this version; index the existing rows
+    # as well
+    for statement in _ENTRY_SEARCH_DDL.get(conn.dialect.name, []):
+        conn.execute(text(statement))
+    if conn.dialect.name == "sqlite":
+        conn.execute(text("INSERT INTO entry_search (entry_search) VALUES ('rebuild')"))
+
+
+def _normalize_categories(conn: Connection) -> None:
+    # Category names move to the category table (created by create_all())
+    # and category types to their small-int codes. SQLite cannot change the
+    # type of a column, so on both backends the entry table is rebuilt:
+    # renamed, created anew and refilled.
+    for statement in _DROP_ENTRY_SEARCH.get(conn.dialect.name, []):
+        conn.execute(text(statement))
+    conn.execute(text("ALTER TABLE entry RENAME TO entry_legacy"))
+    # Index and constraint names are unique per schema; the new table
+    # recreates them
+    inspector = inspect(conn)
+    for index in inspector.get_indexes("entry_legacy"):
+        conn.execute(text(f"DROP INDEX {index['name']}"))
+    if conn.dialect.name == "postgresql":
+        names = [inspector.get_pk_constraint("entry_legacy")["name"]]
+        names += [fk["name"] for fk in inspector.get_foreign_keys("entry_legacy")]
+        for name in names:
+            conn.execute(text(f"ALTER TABLE entry_legacy DROP CONSTRAINT {name}"))
+    entries.create(conn)
+
+    legacy = _legacy_entries("entry_legacy")
+    conn.execute(
+        insert(categories).from_select(
+            ["name"],
+            select(legacy.c.category)
+            .where(legacy.c.category.is_not(None))
+            .distinct()
+            .order_by(legacy.c.category),
+        )
+    )
+    code = case(
+        {member.value: code for member, code in CATEGORY_TYPE_CODES.items()},
+        value=legacy.c.category_type,
+    )
+    conn.execute(
+        insert(entries).from_select(
+            [
+                "id",
+                "account_id",
+                "amount",
+                "currency",
+                "entry_date",
+                "category_id",
+                "category_type",
+                "content_hash",
+            ],
+            select(
+                legacy.c.id,
+                legacy.c.account_id,
+                legacy.c.amount,
+                legacy.c.currency,
+                legacy.c.entry_date,
+                categories.c.id,
+                code,
+                legacy.c.content_hash,
+            ).outerjoin_from(legacy, categories, categories.c.name == legacy.c.category),
+        )
+    )
+    conn.execute(text("DROP TABLE entry_legacy"))
+    budgets.backfill(conn)
+
+
+MIGRATIONS: list[Callable[[Connection], None]] = [
+    _add_account_current_balance,
+    _add_entry_indexes,
+    _set_money_precision,
+    _store_money_in_minor_units,
+    _add_entry_report_index,
+    _backfill_daily_balances,
+    _add_account_version,
+    _add_entry_content_hash,
+    _backfill_budget_spend,
+    _add_entry_search,
+    _normalize_categories,
+]
+
+
+def _get_version(conn: Connection) -> int:
+    version = conn.execute(schema_version.select()).scalar()
+    return version or 0
+
+
+def _set_version(conn: Connection, version: int) -> None:
+    conn.execute(schema_version.delete())
+    conn.execute(schema_version.insert().values(version=version))
+
+
+def upgrade(engine: Engine) -> None:
+    """Create missing tables and apply pending migrations in one transaction."""
+    with engine.begin() as conn:
+        fresh = not inspect(conn).has_table(accounts.name)
+        metadata.create_all(conn)
+        version = len(MIGRATIONS) if fresh else _get_version(conn)
+        if version == len(MIGRATIONS) and not fresh:
+            return
+        for migration in MIGRATIONS[version:]:
+            migration(conn)
+        _set_version(conn, len(MIGRATIONS))
+
+
+def main() -> None:
+    """Upgrade the configured database, for ``DATABASE_SCHEMA=external``."""
+    from app.config import get_settings
+    from app.dependencies import build_engine
+
+    engine = build_engine(get_settings())
+    try:
+        upgrade(engine)
+    finally:
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
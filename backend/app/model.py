@@ -2,8 +2,13 @@
 Domain models for budget tracking.
 
 Type Validation Strategy:
-    All monetary values (amounts, balances) must be Decimal instances.
-    This is enforced at runtime in constructors and public methods to:
+    All monetary values (amounts, balances) are Money instances: integer
+    minor units plus a currency (see app.money). Balances are summed and
+    compared as integers, without rounding.
+
+    Constructors and public methods also accept Decimal amounts in major
+    units, converted exactly in the account's currency. Anything else
+    (such as float) is rejected at runtime to:
     - Prevent floating-point precision issues in financial calculations
     - Catch type errors early (fail-fast principle)
     - Ensure domain model integrity regardless of caller
@@ -14,11 +19,18 @@ Type Validation Strategy:
 
 from __future__ import annotations
 
+from dataclasses import dataclass
 from decimal import Decimal
+import hashlib
 from uuid import uuid4
-from datetime import date
+from datetime import date, timedelta
 from enum import StrEnum
+import calendar
 import functools
+import sys
+from collections.abc import Iterable
+
+from app.money import CurrencyMismatchError, Money
 
 
 class CategoryType(StrEnum):
@@ -29,12 +41,51 @@ class CategoryType(StrEnum):
     TRANSFER = "TRANSFER"
 
 
+class ReportGrouping(StrEnum):
+    """Dimensions a spending report can be grouped by."""
+
+    CATEGORY = "category"
+    MONTH = "month"
+    ACCOUNT = "account"
+
+
+class StatementFormat(StrEnum):
+    """File formats of bank statements that can be imported."""
+
+    CSV = "csv"
+    OFX = "ofx"
+
+
+class ImportStatus(StrEnum):
+    """Lifecycle of a statement import job."""
+
+    PENDING = "PENDING"
+    RUNNING = "RUNNING"
+    SUCCEEDED = "SUCCEEDED"
+    FAILED = "FAILED"
+
+
+class Frequency(StrEnum):
+    """How often a recurring rule repeats, in units of its interval."""
+
+    DAILY = "DAILY"
+    WEEKLY = "WEEKLY"
+    MONTHLY = "MONTHLY"
+    YEARLY = "YEARLY"
+
+
 class InsufficientFundsError(Exception):
     """Raised when an operation would result in a negative account balance."""
 
     pass
 
 
+class ConcurrentUpdateError(Exception):
+    """Raised when an account kept being changed by concurrent writers."""
+
+    pass
+
+
 class DuplicateAccountNameError(Exception):
     """Raised when attempting to create an account with a duplicate name."""
 
@@ -47,6 +98,254 @@ class InvalidInitialBalanceError(Exception):
     pass
 
 
+class AccountNotFoundError(Exception):
+    """Raised when an operation refers to an account that does not exist."""
+
+    pass
+
+
+@dataclass(frozen=True, slots=True)
+class AccountInfo:
+    """The details of an account that never change once it is created."""
+
+    id: str
+    name: str
+    currency: str
+
+
+class ImportJobNotFoundError(Exception):
+    """Raised when an operation refers to an import job that does not exist."""
+
+    pass
+
+
+class RecurringRuleNotFoundError(Exception):
+    """Raised when an operation refers to a recurring rule that does not exist."""
+
+    pass
+
+
+class BudgetNotFoundError(Exception):
+    """Raised when an operation refers to a budget that does not exist."""
+
+    pass
+
+
+class RateNotFoundError(Exception):
+    """Raised when there is no exchange rate for a currency pair and date."""
+
+    pass
+
+
+class IdempotencyKeyMismatchError(Exception):
+    """Raised when an idempotency key is reused for a different request."""
+
+    pass
+
+
+class IdempotencyKeyConflictError(Exception):
+    """Raised when a concurrent request stored its response under a key first."""
+
+    pass
+
+
+@dataclass(frozen=True, slots=True)
+class IdempotencyRecord:
+    """A request made with an idempotency key and its response."""
+
+    key: str
+    fingerprint: str
+    status_code: int
+    response_body: str
+
+
+@dataclass(frozen=True, slots=True)
+class FxRate:
+    """On ``rate_date``, one unit of ``base`` buys ``rate`` units of ``quote``."""
+
+    base: str
+    quote: str
+    rate_date: date
+    rate: Decimal
+
+
+@dataclass(frozen=True, slots=True)
+class Budget:
+    """Monthly spending limit of a category, in the currency of ``limit``."""
+
+    category: str
+    limit: Money
+
+
+@dataclass(frozen=True, slots=True)
+class BudgetStatus:
+    """Spending of a category in one ``YYYY-MM`` month against its budget."""
+
+    budget: Budget
+    month: str
+    spent: Money
+
+    @property
+    def remaining(self) -> Money:
+        return self.budget.limit - self.spent
+
+    @property
+    def over_budget(self) -> bool:
+        return self.spent > self.budget.limit
+
+
+@dataclass(slots=True)
+class ImportJob:
+    """A statement import running in the background, and its progress.
+
+    ``lines_read`` counts the statement lines processed so far, each of
+    which was either ``imported`` or skipped as one of the ``duplicates``.
+    ``bytes_read`` of ``bytes_total`` tells how far into the file that is.
+    """
+
+    id: str
+    account_id: str
+    format: StatementFormat
+    status: ImportStatus
+    bytes_total: int
+    bytes_read: int = 0
+    lines_read: int = 0
+    imported: int = 0
+    duplicates: int = 0
+    error: str | None = None
+
+    def __post_init__(self):
+        # Rows read back from the database hold plain strings
+        self.format = StatementFormat(self.format)
+        self.status = ImportStatus(self.status)
+
+
+def _add_months(day: date, months: int) -> date:
+    """``day`` moved by ``months``, clamped to the end of shorter months."""
+    year, month = divmod(day.year * 12 + day.month - 1 + months, 12)
+    last = calendar.monthrange(year, month + 1)[1]
+    return date(year, month + 1, min(day.day, last))
+
+
+@dataclass(slots=True)
+class RecurringRule:
+    """An entry repeated on an account, like RRULE's FREQ, INTERVAL and UNTIL.
+
+    Occurrence ``n`` (from 0) falls ``n * interval`` periods after
+    ``start_date``. Monthly and yearly rules keep the day of the month of
+    ``start_date``, on the last day of shorter months: a rule starting on
+    January 31 recurs on February 28, then March 31.
+
+    ``materialized`` counts the occurrences already recorded as entries, so
+    the next one is ``occurrence(materialized)``; it is the scheduler's
+    checkpoint. ``error`` tells why the last run stopped short of catching
+    up, such as insufficient funds; the next run tries again.
+    """
+
+    id: str
+    account_id: str
+    # Unsigned; the sign follows from category_type as in record_entry()
+    amount: Money
+    category: str | None
+    category_type: CategoryType
+    frequency: Frequency
+    start_date: date
+    interval: int = 1
+    until: date | None = None
+    materialized: int = 0
+    error: str | None = None
+
+    def __post_init__(self):
+        # Rows read back from the database hold plain strings
+        self.category_type = CategoryType(self.category_type)
+        self.frequency = Frequency(self.frequency)
+
+    @property
+    def currency(self) -> str:
+        return self.amount.currency
+
+    def occurrence(self, n: int) -> date:
+        step = n * self.interval
+        if self.frequency == Frequency.DAILY:
+            return self.start_date + timedelta(days=step)
+        if self.frequency == Frequency.WEEKLY:
+            return self.start_date + timedelta(weeks=step)
+        if self.frequency == Frequency.YEARLY:
+            step *= 12
+        return _add_months(self.start_date, step)
+
+    @property
+    def next_date(self) -> date | None:
+        """Date of the next occurrence to record, or None once past ``until``."""
+        day = self.occurrence(self.materialized)
+        if self.until is not None and day > self.until:
+            return None
+        return day
+
+    def due(self, on: date) -> list[date]:
+        """Dates of the occurrences not recorded yet, up to and including ``on``."""
+        dates = []
+        n = self.materialized
+        while True:
+            day = self.occurrence(n)
+            if day > on or (self.until is not None and day > self.until):
+                return dates
+            dates.append(day)
+            n += 1
+
+
+def _require_decimal(name: str, value: object) -> None:
+    if not isinstance(value, Decimal):
+        raise TypeError(
+            f"{name} must be Decimal, got {type(value).__name__}. "
+            f"Use Decimal(str(value)) to convert."
+        )
+
+
+def _require_money(name: str, value: object, currency: str) -> Money:
+    """Return ``value`` as Money in ``currency``, converting a Decimal."""
+    if isinstance(value, Money):
+        if value.currency != currency:
+            raise CurrencyMismatchError(
+                f"{name} must be in {currency}, got {value.currency}"
+            )
+        return value
+    _require_decimal(name, value)
+    return Money.from_decimal(value, currency)  # type: ignore[arg-type]
+
+
+def _signed_amount(amount: Money, category_type: CategoryType) -> Money:
+    """Apply the sign convention of ``category_type`` to ``amount``."""
+    if category_type == CategoryType.EXPENSE:
+        return -abs(amount)
+    if category_type == CategoryType.INCOME:
+        return abs(amount)
+    # TRANSFER - preserve caller-provided amount
+    return amount
+
+
+def content_hash(
+    amount: Money, entry_date: date, category: str | None, category_type: CategoryType
+) -> str:
+    """Fingerprint of what an entry records, regardless of its id.
+
+    Entries with the same date, signed amount, category and type share it,
+    which is how a statement line that was imported before is recognised.
+    ``amount`` may be given unsigned, as to Account.record_entry().
+    """
+    amount = _signed_amount(amount, category_type)
+    key = "|".join(
+        (
+            entry_date.isoformat(),
+            str(amount.minor),
+            amount.currency,
+            category or "",
+            category_type,
+        )
+    )
+    return hashlib.blake2b(key.encode(), digest_size=16).hexdigest()
+
+
 @functools.total_ordering
 class Entry:
     """Represents a financial entry on an account.
@@ -57,26 +356,34 @@ class Entry:
     apply sign logic.
     """
 
+    # The id of ``category`` in the category table, set by the mapping when
+    # the entry is inserted (see app.categories)
+    _category_id: int | None
+
     def __init__(
         self,
         id: str | None,
         account_id: str,
-        amount: Decimal,
+        amount: Money,
         entry_date: date,
         category: str | None,
         category_type: CategoryType,
     ):
-        if not isinstance(amount, Decimal):
-            raise TypeError(
-                f"amount must be Decimal, got {type(amount).__name__}. "
-                f"Use Decimal(str(value)) to convert."
-            )
+        if not isinstance(amount, Money):
+            raise TypeError(f"amount must be Money, got {type(amount).__name__}")
         self.id = id or str(uuid4())
-        self.amount = amount
+        # Persisted as minor units; ``amount`` assembles the Money value
+        self._amount = amount.minor
+        self.currency = amount.currency
         self.account_id = account_id
         self.entry_date = entry_date
         self.category = category
         self.category_type = category_type
+        self.content_hash = content_hash(amount, entry_date, category, category_type)
+
+    @property
+    def amount(self) -> Money:
+        return Money(self._amount, self.currency)
 
     def __repr__(self) -> str:
         return (
@@ -85,7 +392,84 @@ class Entry:
         )
 
     def __eq__(self, other):
-        if not isinstance(other, Entry):
+        if not isinstance(other, (Entry, EntryRecord)):
+            return False
+        else:
+            return self.id == other.id
+
+    def __hash__(self):
+        return hash(self.id)
+
+    def __lt__(self, other: Entry | EntryRecord):
+        return self.entry_date < other.entry_date
+
+
+@functools.total_ordering
+class EntryRecord:
+    """Memory-compact, read-only view of a persisted entry.
+
+    Entry cannot use ``__slots__``: SQLAlchemy instruments mapped attributes
+    with class-level descriptors and keeps their values in the instance
+    ``__dict__``, next to a per-instance InstanceState. EntryRecord has the
+    same attributes as Entry but no ``__dict__`` and no ORM state, and it
+    shares repeated values: ``category`` strings are interned and
+    ``category_type`` is always the CategoryType member.
+
+    Records are built from rows of the mapped ``entry`` table (see
+    SqlAlchemyRepository.list_entries) and compare equal to the Entry with
+    the same id.
+    """
+
+    __slots__ = (
+        "id",
+        "account_id",
+        "_amount",
+        "currency",
+        "entry_date",
+        "category",
+        "category_type",
+    )
+
+    def __init__(
+        self,
+        id: str,
+        account_id: str,
+        amount: Money,
+        entry_date: date,
+        category: str | None,
+        category_type: CategoryType | str,
+    ):
+        self.id = id
+        self.account_id = account_id
+        self._amount = amount.minor
+        self.currency = sys.intern(amount.currency)
+        self.entry_date = entry_date
+        self.category = None if category is None else sys.intern(category)
+        self.category_type = CategoryType(category_type)
+
+    @property
+    def amount(self) -> Money:
+        return Money(self._amount, self.currency)
+
+    @classmethod
+    def from_entry(cls, entry: Entry) -> EntryRecord:
+        return cls(
+            entry.id,
+            entry.account_id,
+            entry.amount,
+            entry.entry_date,
+            entry.category,
+            entry.category_type,
+        )
+
+    def __repr__(self) -> str:
+        return (
+            f"EntryRecord({self.id!r}, {self.account_id!r}, {self.amount!r}, "
+            f"{self.entry_date!r}, {self.category!r}, {self.category_type!r})"
+        )
+
+    def __eq__(self, other):
+        if not isinstance(other, (Entry, EntryRecord)):
             return False
         else:
             return self.id == other.id
@@ -93,7 +477,7 @@ class Entry:
     def __hash__(self):
         return hash(self.id)
 
-    def __lt__(self, other: Entry):
+    def __lt__(self, other: Entry | EntryRecord):
         return self.entry_date < other.entry_date
 
 
@@ -103,23 +487,61 @@ class Account:
         id: str | None,
         name: str,
         currency: str,
-        initial_balance: Decimal = Decimal(0),
+        initial_balance: Money | Decimal = Decimal(0),
     ):
-        if not isinstance(initial_balance, Decimal):
-            raise TypeError(
-                f"initial_balance must be Decimal, "
-                f"got {type(initial_balance).__name__}. "
-                f"Use Decimal(str(value)) to convert."
-            )
+        initial = _require_money("initial_balance", initial_balance, currency)
         self.id = id or str(uuid4())
         self.name = name
         self.currency = currency
-        self.initial_balance = initial_balance
+        # Balances are kept (and persisted) as minor units of ``currency``
+        self._initial_balance: int = initial.minor
+        self._current_balance: int | None = initial.minor
         self._entries: list[Entry] = []
 
     @property
-    def balance(self) -> Decimal:
-        return self.initial_balance + sum(entry.amount for entry in self._entries)
+    def initial_balance(self) -> Money:
+        return Money(self._initial_balance, self.currency)
+
+    @property
+    def current_balance(self) -> Money | None:
+        if self._current_balance is None:
+            return None
+        return Money(self._current_balance, self.currency)
+
+    @current_balance.setter
+    def current_balance(self, value: Money | None) -> None:
+        if value is None:
+            self._current_balance = None
+        else:
+            self._current_balance = _require_money(
+                "current_balance", value, self.currency
+            ).minor
+
+    @property
+    def balance(self) -> Money:
+        """Current balance of the account.
+
+        The balance is cached in ``current_balance`` and kept up to date
+        incrementally as entries are added or removed, so reading it never
+        iterates over the entries. ``current_balance`` is only ``None`` for
+        accounts persisted before the cache existed; the first read then
+        sums the entries once and caches the result.
+        """
+        if self._current_balance is None:
+            self._current_balance = self._initial_balance + sum(
+                entry._amount for entry in self._entries
+            )
+        return Money(self._current_balance, self.currency)
+
+    def _entry_added(self, entry: Entry) -> None:
+        """Adjust the cached balance after an entry joined ``_entries``."""
+        if self._current_balance is not None:
+            self._current_balance += entry._amount
+
+    def _entry_removed(self, entry: Entry) -> None:
+        """Adjust the cached balance after an entry left ``_entries``."""
+        if self._current_balance is not None:
+            self._current_balance -= entry._amount
 
     def __repr__(self) -> str:
         return f"Account({self.id!r}, {self.name!r}, {self.currency!r}, {self.balance})"
@@ -135,7 +557,7 @@ class Account:
 
     def record_entry(
         self,
-        amount: Decimal,
+        amount: Money | Decimal,
         entry_date: date,
         *,
         category: str | None,
@@ -144,7 +566,8 @@ class Account:
         """Record an entry on this account.
 
         Args:
-            amount: The entry amount. For EXPENSE and INCOME, the
+            amount: The entry amount, as Money in the account's currency
+                or as a Decimal in major units. For EXPENSE and INCOME, the
                 absolute value is used and the sign is applied automatically.
                 For TRANSFER (or when category_type is None), the caller is
                 responsible for providing a correctly signed amount (negative
@@ -162,28 +585,19 @@ class Account:
             - TRANSFER or None: amount preserved as provided (caller must
               ensure correct sign)
         """
-        if not isinstance(amount, Decimal):
-            raise TypeError(
-                f"amount must be Decimal, got {type(amount).__name__}. "
-                f"Use Decimal(str(value)) to convert."
-            )
-        # Apply sign based on category_type
-        if category_type == CategoryType.EXPENSE:
-            effective_amount = -abs(amount)
-        elif category_type == CategoryType.INCOME:
-            effective_amount = abs(amount)
-        else:
-            # TRANSFER - preserve caller-provided amount
-            effective_amount = amount
+        effective_amount = _signed_amount(
+            _require_money("amount", amount, self.currency), category_type
+        )
 
         # Check if entry would result in negative balance
-        new_balance = self.balance + effective_amount
-        if new_balance < 0:
+        current_balance = self.balance
+        new_balance = current_balance + effective_amount
+        if new_balance.minor < 0:
             raise InsufficientFundsError(
                 f"Insufficient funds in account '{self.name}' (id={self.id}): "
-                f"current balance {self.balance} {self.currency}, "
-                f"attempted entry {effective_amount} {self.currency}, "
-                f"would result in balance {new_balance} {self.currency}"
+                f"current balance {current_balance}, "
+                f"attempted entry {effective_amount}, "
+                f"would result in balance {new_balance}"
             )
 
         entry: Entry = Entry(
@@ -195,16 +609,86 @@ class Account:
             category_type,
         )
         self._entries.append(entry)
+        # Assign rather than increment: on mapped accounts the collection
+        # event has already applied the amount, on plain ones it has not.
+        self.current_balance = new_balance
         return entry
 
+    def record_entries(
+        self,
+        entries: Iterable[tuple[Money | Decimal, date, str | None, CategoryType]],
+    ) -> list[Entry]:
+        """Validate and record a batch of entries in a single pass.
+
+        Entries are applied in date order (ties keep their input order) and
+        the running balance is checked after each one, with the same sign
+        rules and ``InsufficientFundsError`` semantics as record_entry().
+        The batch is all-or-nothing: if any entry fails, the account is left
+        unchanged.
+
+        Unlike record_entry(), the new entries are not added to
+        ``_entries``. They are meant to be persisted in bulk by the caller
+        (see AbstractRepository.add_entries), so loading the existing
+        entries is never required. Only the cached balance is updated.
+
+        Args:
+            entries: ``(amount, entry_date, category, category_type)`` tuples
+
+        Returns:
+            The created entries with properly signed amounts, in date order.
+        """
+        ordered = sorted(entries, key=lambda item: item[1])
+        balance = self.balance
+        recorded: list[Entry] = []
+        for amount, entry_date, category, category_type in ordered:
+            effective_amount = _signed_amount(
+                _require_money("amount", amount, self.currency), category_type
+            )
+            new_balance = balance + effective_amount
+            if new_balance.minor < 0:
+                raise InsufficientFundsError(
+                    f"Insufficient funds in account '{self.name}' (id={self.id}): "
+                    f"balance on {entry_date} {balance}, "
+                    f"attempted entry {effective_amount}, "
+                    f"would result in balance {new_balance}"
+                )
+            balance = new_balance
+            recorded.append(
+                Entry(
+                    None,
+                    self.id,
+                    effective_amount,
+                    entry_date,
+                    category,
+                    category_type,
+                )
+            )
+        self.current_balance = balance
+        return recorded
+
+
+def _transfer_amounts(
+    src: Account,
+    dst: Account,
+    debit_amt: Money | Decimal,
+    credit_amt: Money | Decimal,
+) -> tuple[Money, Money]:
+    debit = _require_money("debit_amt", debit_amt, src.currency)
+    credit = _require_money("credit_amt", credit_amt, dst.currency)
+    if debit.minor <= 0 or credit.minor <= 0:
+        raise ValueError("Amounts must be greater than zero")
+    if src == dst:
+        raise ValueError("Cannot transfer to the same account")
+    return debit, credit
+
 
 def transfer(
     src: Account,
     dst: Account,
     entry_date: date,
     *,
-    debit_amt: Decimal,
-    credit_amt: Decimal,
+    debit_amt: Money | Decimal,
+    credit_amt: Money | Decimal,
 ) -> tuple[Entry, Entry]:
     """Transfer funds between two accounts.
 
@@ -224,8 +708,9 @@ def transfer(
         Tuple of (debit_entry, credit_entry)
 
     Raises:
-        TypeError: If debit_amt or credit_amt is not a Decimal
-        ValueError: If either amount is not positive
+        TypeError: If debit_amt or credit_amt is not Money or Decimal
+        ValueError: If either amount is not positive or is in the wrong
+            currency, or if both accounts are the same
 
     Note:
         Both parameters expect positive values for user convenience.
@@ -233,32 +718,46 @@ def transfer(
         because TRANSFER entries use amounts as-is, and debits
         must be negative to decrease the source account balance.
     """
-    if not isinstance(debit_amt, Decimal):
-        raise TypeError(
-            f"debit_amt must be Decimal, got {type(debit_amt).__name__}. "
-            f"Use Decimal(str(value)) to convert."
-        )
-    if not isinstance(credit_amt, Decimal):
-        raise TypeError(
-            f"credit_amt must be Decimal, got {type(credit_amt).__name__}. "
-            f"Use Decimal(str(value)) to convert."
-        )
-    if debit_amt <= 0 or credit_amt <= 0:
-        raise ValueError("Amounts must be greater than zero")
+    debit, credit = _transfer_amounts(src, dst, debit_amt, credit_amt)
 
     # Negate debit_amt because TRANSFER entries use amounts as-is,
     # and debits must be negative to decrease the source account balance
     debit_entry = src.record_entry(
-        -debit_amt,
+        -debit,
         entry_date,
         category=None,
         category_type=CategoryType.TRANSFER,
     )
     credit_entry = dst.record_entry(
-        credit_amt,
+        credit,
         entry_date,
         category=None,
         category_type=CategoryType.TRANSFER,
     )
 
     return debit_entry, credit_entry
+
+
+def transfer_entries(
+    src: Account,
+    dst: Account,
+    entry_date: date,
+    *,
+    debit_amt: Money | Decimal,
+    credit_amt: Money | Decimal,
+) -> tuple[Entry, Entry]:
+    """Transfer funds between two accounts without loading their entries.
+
+    Same rules and result as transfer(), but the entries are recorded with
+    Account.record_entries(): only the cached balances are updated and the
+    entries are left for the caller to persist in bulk (see
+    AbstractRepository.add_entries).
+    """
+    debit, credit = _transfer_amounts(src, dst, debit_amt, credit_amt)
+    (debit_entry,) = src.record_entries(
+        [(-debit, entry_date, None, CategoryType.TRANSFER)]
+    )
+    (credit_entry,) = dst.record_entries(
+        [(credit, entry_date, None, CategoryType.TRANSFER)]
+    )
+    return debit_entry, credit_entry
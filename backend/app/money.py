@@ -0,0 +1,151 @@
+"""
+Exact money amounts stored as integer minor units.
+
+A Money value is an ``int`` count of the currency's minor unit (cents for
+EUR, yen for JPY) plus the ISO 4217 currency code, so adding and comparing
+amounts is integer arithmetic and nothing is ever rounded, except when
+converting between currencies (Money.convert()). Decimal amounts entered
+by users are converted with Money.from_decimal(), which rejects amounts
+that are more precise than the currency's minor unit.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from decimal import ROUND_HALF_EVEN, Decimal
+
+# ISO 4217 currencies whose minor unit is not 1/100 of the major unit
+CURRENCY_EXPONENTS: dict[str, int] = {
+    "BHD": 3,
+    "BIF": 0,
+    "CLF": 4,
+    "CLP": 0,
+    "DJF": 0,
+    "GNF": 0,
+    "IQD": 3,
+    "ISK": 0,
+    "JOD": 3,
+    "JPY": 0,
+    "KMF": 0,
+    "KRW": 0,
+    "KWD": 3,
+    "LYD": 3,
+    "OMR": 3,
+    "PYG": 0,
+    "RWF": 0,
+    "TND": 3,
+    "UGX": 0,
+    "UYI": 0,
+    "UYW": 4,
+    "VND": 0,
+    "VUV": 0,
+    "XAF": 0,
+    "XOF": 0,
+    "XPF": 0,
+    # Code listed for the Japanese yen in docs/SPECIFICATION.md
+    "YEN": 0,
+}
+DEFAULT_EXPONENT = 2
+
+
+def currency_exponent(currency: str) -> int:
+    """Number of decimal places of the minor unit of ``currency``."""
+    return CURRENCY_EXPONENTS.get(currency, DEFAULT_EXPONENT)
+
+
+class CurrencyMismatchError(ValueError):
+    """Raised when amounts in different currencies are combined."""
+
+    pass
+
+
+@dataclass(frozen=True, slots=True)
+class Money:
+    minor: int
+    currency: str
+
+    def __post_init__(self):
+        if not isinstance(self.minor, int) or isinstance(self.minor, bool):
+            raise TypeError(
+                f"minor must be int, got {type(self.minor).__name__}. "
+                f"Use Money.from_decimal() to convert."
+            )
+
+    @classmethod
+    def zero(cls, currency: str) -> Money:
+        return cls(0, currency)
+
+    @classmethod
+    def from_decimal(cls, amount: Decimal, currency: str) -> Money:
+        """Convert ``amount`` in major units, e.g. ``Decimal("12.50")``.
+
+        Raises:
+            ValueError: If ``amount`` is not finite or has more decimal
+                places than the currency's minor unit.
+        """
+        exponent = currency_exponent(currency)
+        if not amount.is_finite():
+            raise ValueError(f"Amount must be finite, got {amount}")
+        scaled = amount.scaleb(exponent)
+        if scaled != scaled.to_integral_value():
+            raise ValueError(
+                f"Amount {amount} has more than {exponent} decimal places, "
+                f"the precision of {currency}"
+            )
+        return cls(int(scaled), currency)
+
+    @property
+    def amount(self) -> Decimal:
+        """The amount in major units, with the currency's decimal places."""
+        return Decimal(self.minor).scaleb(-currency_exponent(self.currency))
+
+    def convert(self, currency: str, rate: Decimal) -> Money:
+        """Value in ``currency``, where one unit of this currency buys ``rate``.
+
+        This is the one place where money is rounded: to the nearest minor
+        unit of ``currency``, ties to even.
+        """
+        shift = currency_exponent(currency) - currency_exponent(self.currency)
+        converted = (Decimal(self.minor) * rate).scaleb(shift)
+        return Money(int(converted.to_integral_value(ROUND_HALF_EVEN)), currency)
+
+    def _check(self, other: Money) -> None:
+        if not isinstance(other, Money):
+            raise TypeError(f"Expected Money, got {type(other).__name__}")
+        if other.currency != self.currency:
+            raise CurrencyMismatchError(
+                f"Cannot combine {self.currency} and {other.currency} amounts"
+            )
+
+    def __add__(self, other: Money) -> Money:
+        self._check(other)
+        return Money(self.minor + other.minor, self.currency)
+
+    def __sub__(self, other: Money) -> Money:
+        self._check(other)
+        return Money(self.minor - other.minor, self.currency)
+
+    def __neg__(self) -> Money:
+        return Money(-self.minor, self.currency)
+
+    def __abs__(self) -> Money:
+        return Money(abs(self.minor), self.currency)
+
+    def __lt__(self, other: Money) -> bool:
+        self._check(other)
+        return self.minor < other.minor
+
+    def __le__(self, other: Money) -> bool:
+        self._check(other)
+        return self.minor <= other.minor
+
+    def __gt__(self, other: Money) -> bool:
+        self._check(other)
+        return self.minor > other.minor
+
+    def __ge__(self, other: Money) -> bool:
+        self._check(other)
+        return self.minor >= other.minor
+
+    def __str__(self) -> str:
+        return f"{self.amount} {self.currency}"
@@ -1,56 +1,1021 @@
 import abc
+import contextlib
+from collections.abc import Callable, Collection, Generator, Iterator
+from dataclasses import asdict, fields
+from datetime import date, datetime
+from decimal import Decimal
 
+from sqlalchemy import delete, func, insert, select, tuple_, update
+from sqlalchemy.dialects import postgresql, sqlite
 from sqlalchemy.orm import Session
 
-from app.model import Account
+from app import search
+from app.balances import apply_balance_deltas
+from app.budgets import apply_spend_deltas, spend_deltas
+from app.cache import TTLCache
+from app.categories import category_ids
+from app.db import (
+    accounts,
+    budget_spend,
+    budgets,
+    categories,
+    daily_balances,
+    entries,
+    fx_rates,
+    idempotency_keys,
+    import_jobs,
+    recurring_rules,
+)
+from app.model import (
+    Account,
+    AccountInfo,
+    Budget,
+    BudgetStatus,
+    CategoryType,
+    Entry,
+    EntryRecord,
+    FxRate,
+    IdempotencyRecord,
+    ImportJob,
+    RecurringRule,
+    ReportGrouping,
+)
+from app.money import Money
 
 
-class AbstractRepository(abc.ABC):
+class UnitOfWork(abc.ABC):
+    """The transaction that the repositories below read and write in.
+
+    Each repository covers one aggregate, so that a service depends only on
+    the aggregates it uses; SqlAlchemyRepository implements all of them on
+    one session (see Repository).
+    """
+
+    @abc.abstractmethod
+    def commit(self):
+        """Persist all pending changes."""
+        raise NotImplementedError()
+
+    @abc.abstractmethod
+    def rollback(self):
+        """Discard all pending changes."""
+        raise NotImplementedError()
+
+    @abc.abstractmethod
+    def after_commit(self, callback: Callable[[], None]) -> None:
+        """Call ``callback`` once the pending changes are committed.
+
+        For in-process caches that must not see uncommitted data: the
+        callback is forgotten if the changes are rolled back instead.
+        """
+        raise NotImplementedError()
+
+    @abc.abstractmethod
+    def atomic(self) -> contextlib.AbstractContextManager[None]:
+        """Commit the work done in the block once, when the block ends.
+
+        Inside the block commit() only sends pending changes to the
+        database, so services that commit their own work can be combined
+        with further writes into a single transaction. Nothing is committed
+        if the block raises. Blocks may be nested: only the outermost one
+        commits.
+        """
+        raise NotImplementedError()
+
+
+class AbstractRepository(UnitOfWork):
+    """Accounts and their entries, balances and reports."""
+
     @abc.abstractmethod
     def add(self, account: Account):
         raise NotImplementedError()
 
     @abc.abstractmethod
-    def get(self, account_id) -> Account:
+    def get(self, account_id) -> Account | None:
         raise NotImplementedError()
 
     @abc.abstractmethod
     def get_by_name(self, name: str) -> Account | None:
         raise NotImplementedError()
 
+    @abc.abstractmethod
+    def get_info(self, account_id: str) -> AccountInfo | None:
+        """The id, name and currency of an account, without loading it.
+
+        These never change, so implementations may serve them from a cache
+        shared by every unit of work; balances are never read from one.
+        """
+        raise NotImplementedError()
+
+    @abc.abstractmethod
+    def get_info_by_name(self, name: str) -> AccountInfo | None:
+        raise NotImplementedError()
+
+    @abc.abstractmethod
+    def lock_accounts(self, account_ids: Collection[str]) -> dict[str, Account]:
+        """Load accounts and lock them until the end of the transaction.
+
+        Concurrent writers that lock the same accounts wait for this unit of
+        work to commit or roll back, so balances read here stay current.
+        Locks are taken in ascending id order, which keeps two units of
+        work locking overlapping accounts from deadlocking. Missing
+        accounts are left out of the result.
+        """
+        raise NotImplementedError()
+
     @abc.abstractmethod
     def list_all(self) -> list[Account]:
         raise NotImplementedError()
 
     @abc.abstractmethod
-    def commit(self):
-        """Persist all pending changes."""
+    def list_with_balances(self) -> list[tuple[Account, Money]]:
+        """Return every account with its balance, without loading entries."""
         raise NotImplementedError()
 
     @abc.abstractmethod
-    def rollback(self):
-        """Discard all pending changes."""
+    def add_entries(self, new_entries: list[Entry]):
+        """Persist many new entries at once, bypassing per-object flushes."""
+        raise NotImplementedError()
+
+    @abc.abstractmethod
+    def list_entries(
+        self,
+        account_id: str,
+        *,
+        limit: int,
+        after: tuple[date, str] | None = None,
+        date_from: date | None = None,
+        date_to: date | None = None,
+        category: str | None = None,
+        category_type: CategoryType | None = None,
+    ) -> list[EntryRecord]:
+        """Return up to ``limit`` entries of an account ordered by (date, id).
+
+        ``after`` is the ``(entry_date, id)`` key of the last entry already
+        seen; only entries strictly after it are returned (keyset paging).
+        The date range is inclusive on both ends. Entries are returned as
+        EntryRecord read models, not as ORM objects.
+        """
+        raise NotImplementedError()
+
+    @abc.abstractmethod
+    def iter_entries(
+        self,
+        account_id: str | None = None,
+        *,
+        date_from: date | None = None,
+        date_to: date | None = None,
+        batch_size: int = 1000,
+    ) -> Iterator[EntryRecord]:
+        """Stream the entries of an account, or of all accounts if ``None``.
+
+        Entries are ordered by account, date and id, and read from the
+        database ``batch_size`` rows at a time while the iterator is
+        consumed, so memory use does not grow with the number of entries.
+        The date range is inclusive.
+        """
         raise NotImplementedError()
 
+    @abc.abstractmethod
+    def search_entries(
+        self,
+        terms: list[str],
+        *,
+        limit: int,
+        after: tuple[date, str] | None = None,
+        account_id: str | None = None,
+    ) -> list[EntryRecord]:
+        """Entries whose category matches every term (see app.search).
+
+        Ordered and paged by ``(entry_date, id)`` like list_entries(), of
+        one account or of all accounts if ``account_id`` is ``None``.
+        """
+        raise NotImplementedError()
 
-class SqlAlchemyRepository(AbstractRepository):
-    def __init__(self, session: Session):
+    @abc.abstractmethod
+    def category_counts(self) -> list[tuple[str, int]]:
+        """Number of entries per category, for the autocomplete index."""
+        raise NotImplementedError()
+
+    @abc.abstractmethod
+    def count_entries_by_hash(
+        self, account_id: str, hashes: Collection[str]
+    ) -> dict[str, int]:
+        """Count the entries of an account with each of the content ``hashes``.
+
+        See model.content_hash(). Hashes without entries are left out.
+        """
+        raise NotImplementedError()
+
+    @abc.abstractmethod
+    def spending_totals(
+        self,
+        *,
+        group_by: ReportGrouping,
+        date_from: date | None = None,
+        date_to: date | None = None,
+    ) -> list[tuple[str | None, Money, int]]:
+        """Sum EXPENSE entries per group and currency.
+
+        Returns ``(key, spent, count)`` rows ordered by key and currency,
+        where ``spent`` is positive and ``key`` is the category, the
+        ``YYYY-MM`` month or the account id. The date range is inclusive.
+        """
+        raise NotImplementedError()
+
+    @abc.abstractmethod
+    def balance_at(self, account_id: str, on: date) -> Money | None:
+        """Closing balance of an account on ``on``, or None if it does not exist.
+
+        Read from the materialized daily balances (see app.balances): the
+        latest row on or before ``on``, or the initial balance if there is
+        none. The entries are never summed.
+        """
+        raise NotImplementedError()
+
+    @abc.abstractmethod
+    def daily_balances(
+        self,
+        account_id: str,
+        *,
+        date_from: date | None = None,
+        date_to: date | None = None,
+    ) -> list[tuple[date, Money]]:
+        """Closing balance of every day with entries in the inclusive range."""
+        raise NotImplementedError()
+
+    @abc.abstractmethod
+    def balances_by_currency(self, on: date) -> list[tuple[Money, int]]:
+        """Sum of the closing balances of all accounts on ``on``, per currency.
+
+        Returns ``(total, accounts)`` pairs ordered by currency. Balances are
+        read as in balance_at(), for all accounts in one statement.
+        """
+        raise NotImplementedError()
+
+
+class RateRepository(UnitOfWork):
+    """Exchange rates (see app.fx)."""
+
+    @abc.abstractmethod
+    def fx_rates(self, base: str, quote: str) -> list[tuple[date, Decimal]]:
+        """All ``(rate_date, rate)`` of one currency pair, ordered by date."""
+        raise NotImplementedError()
+
+    @abc.abstractmethod
+    def add_fx_rates(self, rates: Collection[FxRate]) -> None:
+        """Store ``rates``, replacing any rate of the same pair and date."""
+        raise NotImplementedError()
+
+
+class ValuationRepository(AbstractRepository, RateRepository):
+    """Accounts and the exchange rates to value them in another currency."""
+
+
+class BudgetRepository(UnitOfWork):
+    """Monthly budgets and the spending counted against them."""
+
+    @abc.abstractmethod
+    def set_budget(self, budget: Budget) -> None:
+        """Store ``budget``, replacing the one of its category and currency."""
+        raise NotImplementedError()
+
+    @abc.abstractmethod
+    def delete_budget(self, category: str, currency: str) -> bool:
+        """Delete a budget. Returns False if there was none."""
+        raise NotImplementedError()
+
+    @abc.abstractmethod
+    def budget_statuses(
+        self, month: str, keys: Collection[tuple[str, str]] | None = None
+    ) -> list[BudgetStatus]:
+        """Spending of ``month`` (``YYYY-MM``) against every budget.
+
+        Restricted to the budgets of the ``(category, currency)`` keys if
+        given, ordered by category and currency. Spending is read from the
+        materialized counters (see app.budgets), one row per budget; the
+        entries are never summed.
+        """
+        raise NotImplementedError()
+
+
+class ImportJobRepository(AbstractRepository):
+    """Statement import jobs, with the accounts they import into."""
+
+    @abc.abstractmethod
+    def add_import_job(self, job: ImportJob) -> None:
+        raise NotImplementedError()
+
+    @abc.abstractmethod
+    def get_import_job(self, job_id: str) -> ImportJob | None:
+        raise NotImplementedError()
+
+    @abc.abstractmethod
+    def save_import_job(self, job: ImportJob) -> None:
+        """Store the status and progress of an existing job."""
+        raise NotImplementedError()
+
+
+class RecurringRuleRepository(AbstractRepository):
+    """Recurring rules, with the accounts they record entries on."""
+
+    @abc.abstractmethod
+    def add_recurring_rule(self, rule: RecurringRule) -> None:
+        raise NotImplementedError()
+
+    @abc.abstractmethod
+    def get_recurring_rule(self, rule_id: str) -> RecurringRule | None:
+        raise NotImplementedError()
+
+    @abc.abstractmethod
+    def list_recurring_rules(self, account_id: str) -> list[RecurringRule]:
+        """The rules of an account, ordered by start date."""
+        raise NotImplementedError()
+
+    @abc.abstractmethod
+    def delete_recurring_rule(self, rule_id: str) -> bool:
+        """Delete a rule. Returns False if there was none."""
+        raise NotImplementedError()
+
+    @abc.abstractmethod
+    def due_recurring_rules(
+        self, on: date, *, after: str | None = None, limit: int
+    ) -> list[RecurringRule]:
+        """Up to ``limit`` rules with an occurrence due on or before ``on``.
+
+        Ordered by id and starting after the rule id ``after``, so that a
+        run can page through all due rules, including those it could not
+        catch up.
+        """
+        raise NotImplementedError()
+
+    @abc.abstractmethod
+    def save_recurring_rule(self, rule: RecurringRule, *, materialized: int) -> bool:
+        """Store the progress of a rule whose checkpoint is still ``materialized``.
+
+        Returns False, storing nothing, if the rule has moved on since it
+        was read: another run recorded its occurrences first.
+        """
+        raise NotImplementedError()
+
+
+class IdempotencyRepository(UnitOfWork):
+    """Requests made with an Idempotency-Key header and their responses."""
+
+    @abc.abstractmethod
+    def get_idempotency_record(self, key: str) -> IdempotencyRecord | None:
+        raise NotImplementedError()
+
+    @abc.abstractmethod
+    def add_idempotency_record(
+        self, record: IdempotencyRecord, expires_at: datetime
+    ) -> bool:
+        """Store ``record`` unless its key is taken.
+
+        Returns False, storing nothing, if another request stored a record
+        under the key first. Concurrent inserts of one key are decided by
+        the database: exactly one of them succeeds.
+        """
+        raise NotImplementedError()
+
+    @abc.abstractmethod
+    def delete_expired_idempotency_keys(self, now: datetime) -> None:
+        raise NotImplementedError()
+
+
+class Repository(
+    ImportJobRepository,
+    RecurringRuleRepository,
+    ValuationRepository,
+    BudgetRepository,
+    IdempotencyRepository,
+):
+    """Every aggregate in one unit of work, as given to request handlers."""
+
+
+def _select_entry_records():
+    return select(
+        entries.c.id,
+        entries.c.account_id,
+        entries.c.amount,
+        entries.c.currency,
+        entries.c.entry_date,
+        categories.c.name,
+        entries.c.category_type,
+    ).select_from(entries.outerjoin(categories))
+
+
+def _entry_record(row) -> EntryRecord:
+    id, account_id, amount, currency, entry_date, category, category_type = row
+    return EntryRecord(
+        id, account_id, Money(amount, currency), entry_date, category, category_type
+    )
+
+
+_IMPORT_JOB_COLUMNS = [import_jobs.c[field.name] for field in fields(ImportJob)]
+
+_RECURRING_RULE_COLUMNS = [
+    recurring_rules.c[column]
+    for column in (
+        "id",
+        "account_id",
+        "amount",
+        "category",
+        "category_type",
+        "frequency",
+        "start_date",
+        "interval",
+        "until",
+        "materialized",
+        "error",
+        "currency",
+    )
+]
+
+
+def _recurring_rule(row) -> RecurringRule:
+    *values, currency = row
+    values[2] = Money(values[2], currency)
+    return RecurringRule(*values)
+
+
+def _recurring_rule_values(rule: RecurringRule) -> dict:
+    values = asdict(rule)
+    values.update(
+        amount=rule.amount.minor,
+        currency=rule.amount.currency,
+        next_date=rule.next_date,
+    )
+    return values
+
+
+# AccountInfo by ("id", account id) and by ("name", account name)
+AccountCache = TTLCache[tuple[str, str], AccountInfo]
+
+
+class SqlAlchemyRepository(Repository):
+    """Repository on a session, for one unit of work.
+
+    ``account_cache``, if given, holds the AccountInfo of accounts by id and
+    by name for every unit of work in the process. Only committed accounts
+    are cached: those added by this unit of work are left out until it
+    commits, so a rollback cannot leave an account in the cache that does
+    not exist.
+    """
+
+    def __init__(
+        self,
+        session: Session,
+        account_cache: AccountCache | None = None,
+    ):
         self.session = session
+        self.account_cache = account_cache
+        self._added: set[str] = set()
+        self._atomic_depth = 0
+        self._after_commit: list[Callable[[], None]] = []
 
     def add(self, account: Account):
         self.session.add(account)
+        self._added.add(account.id)
+        if self.account_cache is not None:
+            self.account_cache.discard(("id", account.id))
+            self.account_cache.discard(("name", account.name))
 
-    def get(self, account_id) -> Account:
-        return self.session.query(Account).filter_by(id=account_id).one()
+    def get(self, account_id) -> Account | None:
+        return self.session.query(Account).filter_by(id=account_id).one_or_none()
 
     def get_by_name(self, name: str) -> Account | None:
         return self.session.query(Account).filter_by(name=name).first()
 
+    def get_info(self, account_id: str) -> AccountInfo | None:
+        return self._account_info("id", account_id)
+
+    def get_info_by_name(self, name: str) -> AccountInfo | None:
+        return self._account_info("name", name)
+
+    def _account_info(self, column: str, value: str) -> AccountInfo | None:
+        cache = self.account_cache
+        if cache is not None:
+            cached = cache.get((column, value))
+            if cached is not None:
+                return cached
+        row = self.session.execute(
+            select(accounts.c.id, accounts.c.name, accounts.c.currency).where(
+                accounts.c[column] == value
+            )
+        ).one_or_none()
+        if row is None:
+            return None
+        info = AccountInfo(*row)
+        if cache is not None and info.id not in self._added:
+            cache.put(("id", info.id), info)
+            cache.put(("name", info.name), info)
+        return info
+
+    def lock_accounts(self, account_ids: Collection[str]) -> dict[str, Account]:
+        connection = self.session.connection()
+        if connection.dialect.name == "sqlite":
+            # No row locks: take the database write lock up front, before
+            # any balance is read. A transaction that has already written
+            # holds it anyway.
+            driver_connection = connection.connection.driver_connection
+            if driver_connection is not None and not driver_connection.in_transaction:
+                connection.exec_driver_sql("BEGIN IMMEDIATE")
+        locked = {}
+        for account_id in sorted(set(account_ids)):
+            # FOR UPDATE is omitted on SQLite; populate_existing refreshes
+            # an account already loaded by this session with the locked row
+            account = self.session.execute(
+                select(Account)
+                .where(accounts.c.id == account_id)
+                .with_for_update()
+                .execution_options(populate_existing=True)
+            ).scalar_one_or_none()
+            if account is not None:
+                locked[account_id] = account
+        return locked
+
     def list_all(self) -> list[Account]:
         return self.session.query(Account).all()
 
+    def list_with_balances(self) -> list[tuple[Account, Money]]:
+        # Accounts with a cached balance are answered from the account row;
+        # the rest are summed in the same statement with one GROUP BY, so
+        # no account ever lazy-loads its entries.
+        uncached = select(accounts.c.id).where(accounts.c.current_balance.is_(None))
+        totals = (
+            select(entries.c.account_id, func.sum(entries.c.amount).label("total"))
+            .where(entries.c.account_id.in_(uncached))
+            .group_by(entries.c.account_id)
+            .subquery()
+        )
+        balance = func.coalesce(
+            accounts.c.current_balance,
+            accounts.c.initial_balance + func.coalesce(totals.c.total, 0),
+        )
+        query = select(Account, balance).outerjoin(
+            totals, totals.c.account_id == accounts.c.id
+        )
+        # SUM() of BIGINT is NUMERIC on PostgreSQL, hence int()
+        return [
+            (account, Money(int(total), account.currency))
+            for account, total in self.session.execute(query)
+        ]
+
+    def add_entries(self, new_entries: list[Entry]):
+        if not new_entries:
+            return
+        # One executemany against the table; the entries never enter the
+        # identity map, so large imports do not pay for ORM bookkeeping.
+        ids = category_ids(
+            self.session.connection(), (entry.category for entry in new_entries)
+        )
+        self.session.execute(
+            insert(entries),
+            [
+                {
+                    "id": entry.id,
+                    "account_id": entry.account_id,
+                    "amount": entry.amount.minor,
+                    "currency": entry.currency,
+                    "entry_date": entry.entry_date,
+                    "category_id": ids.get(entry.category),
+                    "category_type": entry.category_type,
+                    "content_hash": entry.content_hash,
+                }
+                for entry in new_entries
+            ],
+        )
+        deltas: dict[tuple[str, date], int] = {}
+        for entry in new_entries:
+            key = (entry.account_id, entry.entry_date)
+            deltas[key] = deltas.get(key, 0) + entry._amount
+        apply_balance_deltas(self.session.connection(), deltas)
+        apply_spend_deltas(self.session.connection(), spend_deltas(new_entries))
+
+    def list_entries(
+        self,
+        account_id: str,
+        *,
+        limit: int,
+        after: tuple[date, str] | None = None,
+        date_from: date | None = None,
+        date_to: date | None = None,
+        category: str | None = None,
+        category_type: CategoryType | None = None,
+    ) -> list[EntryRecord]:
+        query = _select_entry_records().where(entries.c.account_id == account_id)
+        if after is not None:
+            # Seek past the last key instead of OFFSET, so every page is an
+            # index range scan on (account_id, entry_date) of the same cost.
+            query = query.where(
+                tuple_(entries.c.entry_date, entries.c.id) > tuple_(*after)
+            )
+        if date_from is not None:
+            query = query.where(entries.c.entry_date >= date_from)
+        if date_to is not None:
+            query = query.where(entries.c.entry_date <= date_to)
+        if category is not None:
+            query = query.where(categories.c.name == category)
+        if category_type is not None:
+            query = query.where(entries.c.category_type == category_type)
+        query = query.order_by(entries.c.entry_date, entries.c.id).limit(limit)
+        # Plain rows skip the identity map and per-object InstanceState
+        return [_entry_record(row) for row in self.session.execute(query)]
+
+    def iter_entries(
+        self,
+        account_id: str | None = None,
+        *,
+        date_from: date | None = None,
+        date_to: date | None = None,
+        batch_size: int = 1000,
+    ) -> Iterator[EntryRecord]:
+        query = _select_entry_records()
+        if account_id is not None:
+            query = query.where(entries.c.account_id == account_id)
+        if date_from is not None:
+            query = query.where(entries.c.entry_date >= date_from)
+        if date_to is not None:
+            query = query.where(entries.c.entry_date <= date_to)
+        query = query.order_by(entries.c.account_id, entries.c.entry_date, entries.c.id)
+        # yield_per fetches batch_size rows at a time from a server-side
+        # cursor (stream_results), so the result is never held in memory
+        result = self.session.execute(query.execution_options(yield_per=batch_size))
+        for row in result:
+            yield _entry_record(row)
+
+    def search_entries(
+        self,
+        terms: list[str],
+        *,
+        limit: int,
+        after: tuple[date, str] | None = None,
+        account_id: str | None = None,
+    ) -> list[EntryRecord]:
+        dialect = self.session.get_bind().dialect.name
+        query = _select_entry_records().where(search.matches(dialect, terms))
+        if account_id is not None:
+            query = query.where(entries.c.account_id == account_id)
+        if after is not None:
+            query = query.where(
+                tuple_(entries.c.entry_date, entries.c.id) > tuple_(*after)
+            )
+        query = query.order_by(entries.c.entry_date, entries.c.id).limit(limit)
+        return [_entry_record(row) for row in self.session.execute(query)]
+
+    def category_counts(self) -> list[tuple[str, int]]:
+        counts = (
+            select(entries.c.category_id, func.count().label("entries"))
+            .where(entries.c.category_id.is_not(None))
+            .group_by(entries.c.category_id)
+            .subquery()
+        )
+        query = select(categories.c.name, counts.c.entries).join(
+            counts, counts.c.category_id == categories.c.id
+        )
+        return [(category, count) for category, count in self.session.execute(query)]
+
+    def spending_totals(
+        self,
+        *,
+        group_by: ReportGrouping,
+        date_from: date | None = None,
+        date_to: date | None = None,
+    ) -> list[tuple[str | None, Money, int]]:
+        if group_by == ReportGrouping.CATEGORY:
+            # Grouped by id; the name of each resulting group is looked up
+            # by its primary key, never joined to the grouped rows
+            key = entries.c.category_id
+            label = (
+                select(categories.c.name)
+                .where(categories.c.id == entries.c.category_id)
+                .scalar_subquery()
+                .label("category")
+            )
+        elif group_by == ReportGrouping.ACCOUNT:
+            key = label = entries.c.account_id
+        elif self.session.get_bind().dialect.name == "sqlite":
+            # Dates are stored as ISO strings, cheaper to cut than strftime
+            key = label = func.substr(entries.c.entry_date, 1, 7)
+        else:
+            key = label = func.to_char(entries.c.entry_date, "YYYY-MM")
+        # Aggregated by the database: only one row per group is transferred
+        query = select(
+            label, entries.c.currency, func.sum(entries.c.amount), func.count()
+        ).where(entries.c.category_type == CategoryType.EXPENSE)
+        if date_from is not None:
+            query = query.where(entries.c.entry_date >= date_from)
+        if date_to is not None:
+            query = query.where(entries.c.entry_date <= date_to)
+        query = query.group_by(key, entries.c.currency).order_by(
+            label, entries.c.currency
+        )
+        # Expenses are stored as negative amounts
+        return [
+            (group, Money(-int(total), currency), count)
+            for group, currency, total, count in self.session.execute(query)
+        ]
+
+    def balance_at(self, account_id: str, on: date) -> Money | None:
+        latest = (
+            select(daily_balances.c.balance)
+            .where(
+                daily_balances.c.account_id == account_id,
+                daily_balances.c.balance_date <= on,
+            )
+            .order_by(daily_balances.c.balance_date.desc())
+            .limit(1)
+            .scalar_subquery()
+        )
+        row = self.session.execute(
+            select(
+                accounts.c.currency, func.coalesce(latest, accounts.c.initial_balance)
+            ).where(accounts.c.id == account_id)
+        ).one_or_none()
+        if row is None:
+            return None
+        currency, balance = row
+        return Money(balance, currency)
+
+    def daily_balances(
+        self,
+        account_id: str,
+        *,
+        date_from: date | None = None,
+        date_to: date | None = None,
+    ) -> list[tuple[date, Money]]:
+        query = (
+            select(
+                daily_balances.c.balance_date,
+                daily_balances.c.balance,
+                accounts.c.currency,
+            )
+            .join(accounts, accounts.c.id == daily_balances.c.account_id)
+            .where(daily_balances.c.account_id == account_id)
+        )
+        if date_from is not None:
+            query = query.where(daily_balances.c.balance_date >= date_from)
+        if date_to is not None:
+            query = query.where(daily_balances.c.balance_date <= date_to)
+        query = query.order_by(daily_balances.c.balance_date)
+        return [
+            (day, Money(balance, currency))
+            for day, balance, currency in self.session.execute(query)
+        ]
+
+    def set_budget(self, budget: Budget) -> None:
+        dialect = (
+            postgresql
+            if self.session.get_bind().dialect.name == "postgresql"
+            else sqlite
+        )
+        statement = dialect.insert(budgets).values(
+            category=budget.category,
+            currency=budget.limit.currency,
+            amount=budget.limit.minor,
+        )
+        self.session.execute(
+            statement.on_conflict_do_update(
+                index_elements=[budgets.c.category, budgets.c.currency],
+                set_={"amount": statement.excluded.amount},
+            )
+        )
+
+    def delete_budget(self, category: str, currency: str) -> bool:
+        deleted = self.session.execute(
+            delete(budgets)
+            .where(budgets.c.category == category, budgets.c.currency == currency)
+            .returning(budgets.c.category)
+        ).first()
+        return deleted is not None
+
+    def budget_statuses(
+        self, month: str, keys: Collection[tuple[str, str]] | None = None
+    ) -> list[BudgetStatus]:
+        # Joined on the whole primary key of budget_spend: one row per budget
+        query = (
+            select(
+                budgets.c.category,
+                budgets.c.currency,
+                budgets.c.amount,
+                func.coalesce(budget_spend.c.spent, 0),
+            )
+            .outerjoin(
+                budget_spend,
+                (budget_spend.c.category == budgets.c.category)
+                & (budget_spend.c.month == month)
+                & (budget_spend.c.currency == budgets.c.currency),
+            )
+            .order_by(budgets.c.category, budgets.c.currency)
+        )
+        if keys is not None:
+            if not keys:
+                return []
+            query = query.where(tuple_(budgets.c.category, budgets.c.currency).in_(keys))
+        return [
+            BudgetStatus(
+                Budget(category, Money(amount, currency)), month, Money(spent, currency)
+            )
+            for category, currency, amount, spent in self.session.execute(query)
+        ]
+
+    def balances_by_currency(self, on: date) -> list[tuple[Money, int]]:
+        latest = (
+            select(daily_balances.c.balance)
+            .where(
+                daily_balances.c.account_id == accounts.c.id,
+                daily_balances.c.balance_date <= on,
+            )
+            .order_by(daily_balances.c.balance_date.desc())
+            .limit(1)
+            .correlate(accounts)
+            .scalar_subquery()
+        )
+        balances = select(
+            accounts.c.currency,
+            func.coalesce(latest, accounts.c.initial_balance).label("balance"),
+        ).subquery()
+        query = (
+            select(balances.c.currency, func.sum(balances.c.balance), func.count())
+            .group_by(balances.c.currency)
+            .order_by(balances.c.currency)
+        )
+        # SUM() of BIGINT is NUMERIC on PostgreSQL, hence int()
+        return [
+            (Money(int(total), currency), count)
+            for currency, total, count in self.session.execute(query)
+        ]
+
+    def fx_rates(self, base: str, quote: str) -> list[tuple[date, Decimal]]:
+        query = (
+            select(fx_rates.c.rate_date, fx_rates.c.rate)
+            .where(fx_rates.c.base == base, fx_rates.c.quote == quote)
+            .order_by(fx_rates.c.rate_date)
+        )
+        return [(day, Decimal(rate)) for day, rate in self.session.execute(query)]
+
+    def add_fx_rates(self, rates: Collection[FxRate]) -> None:
+        if not rates:
+            return
+        dialect = (
+            postgresql
+            if self.session.get_bind().dialect.name == "postgresql"
+            else sqlite
+        )
+        statement = dialect.insert(fx_rates)
+        self.session.execute(
+            statement.on_conflict_do_update(
+                index_elements=[fx_rates.c.base, fx_rates.c.quote, fx_rates.c.rate_date],
+                set_={"rate": statement.excluded.rate},
+            ),
+            [
+                {
+                    "base": rate.base,
+                    "quote": rate.quote,
+                    "rate_date": rate.rate_date,
+                    "rate": str(rate.rate),
+                }
+                for rate in rates
+            ],
+        )
+
+    def count_entries_by_hash(
+        self, account_id: str, hashes: Collection[str]
+    ) -> dict[str, int]:
+        if not hashes:
+            return {}
+        query = (
+            select(entries.c.content_hash, func.count())
+            .where(
+                entries.c.account_id == account_id,
+                entries.c.content_hash.in_(hashes),
+            )
+            .group_by(entries.c.content_hash)
+        )
+        return {hash: count for hash, count in self.session.execute(query)}
+
+    def add_import_job(self, job: ImportJob) -> None:
+        self.session.execute(insert(import_jobs).values(asdict(job)))
+
+    def get_import_job(self, job_id: str) -> ImportJob | None:
+        row = self.session.execute(
+            select(*_IMPORT_JOB_COLUMNS).where(import_jobs.c.id == job_id)
+        ).one_or_none()
+        return None if row is None else ImportJob(*row)
+
+    def save_import_job(self, job: ImportJob) -> None:
+        self.session.execute(
+            update(import_jobs).where(import_jobs.c.id == job.id).values(asdict(job))
+        )
+
+    def add_recurring_rule(self, rule: RecurringRule) -> None:
+        self.session.execute(
+            insert(recurring_rules).values(_recurring_rule_values(rule))
+        )
+
+    def get_recurring_rule(self, rule_id: str) -> RecurringRule | None:
+        row = self.session.execute(
+            select(*_RECURRING_RULE_COLUMNS).where(recurring_rules.c.id == rule_id)
+        ).one_or_none()
+        return None if row is None else _recurring_rule(row)
+
+    def list_recurring_rules(self, account_id: str) -> list[RecurringRule]:
+        query = (
+            select(*_RECURRING_RULE_COLUMNS)
+            .where(recurring_rules.c.account_id == account_id)
+            .order_by(recurring_rules.c.start_date, recurring_rules.c.id)
+        )
+        return [_recurring_rule(row) for row in self.session.execute(query)]
+
+    def delete_recurring_rule(self, rule_id: str) -> bool:
+        deleted = self.session.execute(
+            delete(recurring_rules)
+            .where(recurring_rules.c.id == rule_id)
+            .returning(recurring_rules.c.id)
+        ).first()
+        return deleted is not None
+
+    def due_recurring_rules(
+        self, on: date, *, after: str | None = None, limit: int
+    ) -> list[RecurringRule]:
+        query = select(*_RECURRING_RULE_COLUMNS).where(recurring_rules.c.next_date <= on)
+        if after is not None:
+            query = query.where(recurring_rules.c.id > after)
+        query = query.order_by(recurring_rules.c.id).limit(limit)
+        return [_recurring_rule(row) for row in self.session.execute(query)]
+
+    def save_recurring_rule(self, rule: RecurringRule, *, materialized: int) -> bool:
+        # Compare-and-set on the checkpoint: a concurrent run that saved the
+        # rule first makes this UPDATE match no row
+        saved = self.session.execute(
+            update(recurring_rules)
+            .where(
+                recurring_rules.c.id == rule.id,
+                recurring_rules.c.materialized == materialized,
+            )
+            .values(_recurring_rule_values(rule))
+            .returning(recurring_rules.c.id)
+        ).first()
+        return saved is not None
+
+    def get_idempotency_record(self, key: str) -> IdempotencyRecord | None:
+        row = self.session.execute(
+            select(
+                idempotency_keys.c.key,
+                idempotency_keys.c.fingerprint,
+                idempotency_keys.c.status_code,
+                idempotency_keys.c.response_body,
+            ).where(idempotency_keys.c.key == key)
+        ).one_or_none()
+        return None if row is None else IdempotencyRecord(*row)
+
+    def add_idempotency_record(
+        self, record: IdempotencyRecord, expires_at: datetime
+    ) -> bool:
+        dialect = (
+            postgresql
+            if self.session.get_bind().dialect.name == "postgresql"
+            else sqlite
+        )
+        # ON CONFLICT DO NOTHING instead of catching an IntegrityError, which
+        # would abort the whole transaction on PostgreSQL
+        added = self.session.execute(
+            dialect.insert(idempotency_keys)
+            .values(**asdict(record), expires_at=expires_at)
+            .on_conflict_do_nothing(index_elements=[idempotency_keys.c.key])
+            .returning(idempotency_keys.c.key)
+        ).scalar_one_or_none()
+        return added is not None
+
+    def delete_expired_idempotency_keys(self, now: datetime) -> None:
+        self.session.execute(
+            delete(idempotency_keys).where(idempotency_keys.c.expires_at <= now)
+        )
+
     def commit(self):
+        if self._atomic_depth:
+            self.session.flush()
+            return
         self.session.commit()
+        self._added.clear()
+        callbacks, self._after_commit = self._after_commit, []
+        for callback in callbacks:
+            callback()
 
     def rollback(self):
         self.session.rollback()
+        self._added.clear()
+        self._after_commit.clear()
+
+    def after_commit(self, callback: Callable[[], None]) -> None:
+        self._after_commit.append(callback)
+
+    @contextlib.contextmanager
+    def atomic(self) -> Generator[None]:
+        self._atomic_depth += 1
+        try:
+            yield
+        finally:
+            self._atomic_depth -= 1
+        self.commit()
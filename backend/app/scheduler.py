@@ -0,0 +1,86 @@
+"""
+Background materialization of recurring rules.
+
+The scheduler records the due occurrences of every recurring rule as
+entries (see services.run_recurring_rules), outside of request handlers:
+every ``RECURRING_INTERVAL_SECONDS``, either in an asyncio task started
+with the application or, with ``RECURRING_SCHEDULER=external``, in a
+separate worker process:
+
+    uv run python -m app.scheduler [--once]
+
+Runs are idempotent and checkpointed per batch of rules, so several
+workers may run at once, and after downtime the first run catches up on
+everything that fell due meanwhile.
+"""
+
+import argparse
+import asyncio
+import logging
+import time
+from collections.abc import Callable
+from datetime import date
+
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+from app.repository import SqlAlchemyRepository
+from app.services import run_recurring_rules
+
+logger = logging.getLogger(__name__)
+
+
+def run_once(
+    sessions: Callable[[], Session], *, batch_size: int, on: date | None = None
+) -> int:
+    """Record the occurrences due by ``on`` (today). Returns the entry count."""
+    with sessions() as session:
+        return run_recurring_rules(
+            SqlAlchemyRepository(session),
+            on=on or date.today(),
+            batch_size=batch_size,
+        )
+
+
+async def run_periodically(
+    sessions: Callable[[], Session], *, interval_seconds: float, batch_size: int
+) -> None:
+    """Run the scheduler every ``interval_seconds`` until cancelled.
+
+    A failed run is logged and retried at the next interval.
+    """
+    while True:
+        try:
+            recorded = await run_in_threadpool(run_once, sessions, batch_size=batch_size)
+            if recorded:
+                logger.info("Recorded %d recurring entries", recorded)
+        except Exception:
+            logger.exception("Recurring rules run failed")
+        await asyncio.sleep(interval_seconds)
+
+
+def main() -> None:
+    from app.config import get_settings
+    from app.dependencies import get_engine, get_session_factory, init_database
+
+    parser = argparse.ArgumentParser(description="Record due recurring entries")
+    parser.add_argument("--once", action="store_true", help="Run once and exit")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    settings = get_settings()
+    init_database(get_engine(), settings)
+    sessions = get_session_factory()
+    try:
+        while True:
+            recorded = run_once(sessions, batch_size=settings.recurring_batch_size)
+            logger.info("Recorded %d recurring entries", recorded)
+            if args.once:
+                break
+            time.sleep(settings.recurring_interval_seconds)
+    finally:
+        get_engine().dispose()
+
+
+if __name__ == "__main__":
+    main()
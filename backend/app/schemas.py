@@ -1,6 +1,26 @@
+from datetime import date
 from decimal import Decimal
+from typing import Annotated
 
-from pydantic import BaseModel, Field, ConfigDict
+from pydantic import BaseModel, BeforeValidator, Field, ConfigDict, computed_field
+
+from app.model import (
+    CategoryType,
+    Frequency,
+    ImportStatus,
+    ReportGrouping,
+    StatementFormat,
+)
+from app.money import Money
+
+
+def _major_units(value: object) -> object:
+    return value.amount if isinstance(value, Money) else value
+
+
+# Money rendered as an exact decimal in major units, e.g. "12.50" for 1250
+# EUR cents; the currency is reported alongside it.
+MoneyAmount = Annotated[Decimal, BeforeValidator(_major_units)]
 
 
 class AccountCreate(BaseModel):
@@ -21,4 +41,211 @@ class AccountResponse(BaseModel):
     id: str
     name: str
     currency: str
-    initial_balance: Decimal = Decimal("0.0")
+    initial_balance: MoneyAmount = Decimal("0.0")
+    balance: MoneyAmount
+
+
+class EntryCreate(BaseModel):
+    amount: Decimal
+    entry_date: date
+    category: str | None = None
+    category_type: CategoryType
+
+
+class EntryBatchCreate(BaseModel):
+    entries: list[EntryCreate] = Field(..., min_length=1)
+
+
+class RecurringRuleCreate(BaseModel):
+    amount: Decimal
+    category: str | None = None
+    category_type: CategoryType
+    frequency: Frequency
+    start_date: date
+    interval: int = Field(1, ge=1)
+    until: date | None = None
+
+
+class RecurringRuleResponse(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    id: str
+    account_id: str
+    amount: MoneyAmount
+    currency: str
+    category: str | None
+    category_type: CategoryType
+    frequency: Frequency
+    interval: int
+    start_date: date
+    until: date | None
+    # Date of the next occurrence to record; None once the rule has ended
+    next_date: date | None
+    materialized: int
+    error: str | None
+
+
+class BudgetSet(BaseModel):
+    currency: str
+    limit: Decimal
+
+
+class BudgetResponse(BaseModel):
+    category: str
+    currency: str
+    limit: MoneyAmount
+
+
+class BudgetStatusResponse(BaseModel):
+    category: str
+    currency: str
+    month: str
+    limit: MoneyAmount
+    spent: MoneyAmount
+    remaining: MoneyAmount
+    over_budget: bool
+
+
+class BudgetReport(BaseModel):
+    month: str
+    items: list[BudgetStatusResponse]
+
+
+class EntryBatchResponse(BaseModel):
+    account_id: str
+    recorded: int
+    balance: MoneyAmount
+    # Budgets the batch spent from that are now exceeded
+    budget_alerts: list[BudgetStatusResponse] = []
+
+
+class EntryResponse(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    id: str
+    account_id: str
+    amount: MoneyAmount
+    currency: str
+    entry_date: date
+    category: str | None
+    category_type: CategoryType
+
+
+class TransferCreate(BaseModel):
+    from_account_id: str
+    to_account_id: str
+    entry_date: date
+    debit_amount: Decimal
+    # Defaults to debit_amount for accounts in the same currency, and to
+    # debit_amount converted at the rate of entry_date otherwise
+    credit_amount: Decimal | None = None
+
+
+class TransferResponse(BaseModel):
+    debit: EntryResponse
+    credit: EntryResponse
+
+
+class EntryPage(BaseModel):
+    items: list[EntryResponse]
+    next_cursor: str | None = None
+
+
+class CategorySuggestion(BaseModel):
+    category: str
+    entries: int
+
+
+class SpendingRow(BaseModel):
+    key: str | None
+    currency: str
+    total: MoneyAmount
+    entries: int
+
+
+class SpendingReport(BaseModel):
+    group_by: ReportGrouping
+    date_from: date | None = None
+    date_to: date | None = None
+    items: list[SpendingRow]
+
+
+class BalanceResponse(BaseModel):
+    account_id: str
+    on: date
+    currency: str
+    balance: MoneyAmount
+
+
+class BalancePoint(BaseModel):
+    balance_date: date
+    balance: MoneyAmount
+
+
+class BalanceHistory(BaseModel):
+    account_id: str
+    currency: str
+    items: list[BalancePoint]
+
+
+class FxRateCreate(BaseModel):
+    base: str
+    quote: str
+    rate_date: date
+    # Units of quote bought by one unit of base
+    rate: Decimal
+
+
+class FxRateBatch(BaseModel):
+    rates: list[FxRateCreate] = Field(..., min_length=1)
+
+
+class FxRateBatchResponse(BaseModel):
+    stored: int
+
+
+class FxRateResponse(BaseModel):
+    base: str
+    quote: str
+    on: date
+    # Date of the rate used: the latest one on or before ``on``
+    rate_date: date
+    rate: Decimal
+
+
+class NetWorthItem(BaseModel):
+    currency: str
+    accounts: int
+    balance: MoneyAmount
+    rate: Decimal
+    converted: MoneyAmount
+
+
+class NetWorth(BaseModel):
+    currency: str
+    on: date
+    total: MoneyAmount
+    items: list[NetWorthItem]
+
+
+class ImportJobResponse(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    id: str
+    account_id: str
+    format: StatementFormat
+    status: ImportStatus
+    bytes_total: int
+    bytes_read: int
+    lines_read: int
+    imported: int
+    duplicates: int
+    error: str | None
+
+    @computed_field
+    @property
+    def progress(self) -> float:
+        """Share of the file processed so far, from 0 to 1."""
+        if self.bytes_total == 0:
+            return float(self.status == ImportStatus.SUCCEEDED)
+        return round(self.bytes_read / self.bytes_total, 4)
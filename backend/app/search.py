@@ -0,0 +1,86 @@
+"""
+Full-text search over entry categories.
+
+Categories are free-form, so finding "all coffee purchases" would otherwise
+take a ``LIKE '%coffee%'`` scan of every entry. The names in the category
+table are indexed instead (see db.CATEGORY_SEARCH_DDL): by an FTS5 table on
+SQLite, by a GIN index of ``to_tsvector('simple', name)`` on PostgreSQL,
+and entries are found by the ids of the matching categories. Categories are split
+into words at anything but letters and digits, so ``COFFEE_SHOP`` is found
+by ``coffee`` and by ``shop``, case-insensitively.
+
+A query matches the entries whose category contains a word starting with
+each of its words, so ``cof sh`` finds ``COFFEE_SHOP`` too.
+
+rebuild() reindexes every category, e.g. for databases whose index was
+restored from a backup or written around the triggers:
+
+    uv run python -m app.search rebuild
+"""
+
+import argparse
+import re
+
+from sqlalchemy import ColumnElement, Connection, column, func, literal_column
+from sqlalchemy import select, table, text
+
+from app.db import categories, entries
+
+_WORD = re.compile(r"[^\W_]+")
+
+_category_search = table("category_search", column("rowid"), column("category_search"))
+
+
+def search_terms(query: str) -> list[str]:
+    """The words of ``query``, lowercased, each matched as a prefix."""
+    return [word.lower() for word in _WORD.findall(query)]
+
+
+def matches(dialect_name: str, terms: list[str]) -> ColumnElement[bool]:
+    """Condition on ``entries`` matching every term of search_terms()."""
+    if dialect_name == "postgresql":
+        # The same expression as the GIN index, so the planner can use it
+        document = func.to_tsvector(literal_column("'simple'"), categories.c.name)
+        query = " & ".join(f"{term}:*" for term in terms)
+        matching = select(categories.c.id).where(
+            document.op("@@")(func.to_tsquery(literal_column("'simple'"), query))
+        )
+    else:
+        # Terms are letters and digits only, so quoting them is enough
+        query = " ".join(f'"{term}"*' for term in terms)
+        matching = select(_category_search.c.rowid).where(
+            _category_search.c.category_search.op("MATCH")(query)
+        )
+    return entries.c.category_id.in_(matching)
+
+
+def rebuild(conn: Connection) -> None:
+    """Reindex every category."""
+    if conn.dialect.name == "postgresql":
+        conn.execute(text("REINDEX INDEX ix_category_search"))
+    else:
+        conn.execute(
+            text("INSERT INTO category_search (category_search) VALUES ('rebuild')")
+        )
+
+
+def main() -> None:
+    from app.config import get_settings
+    from app.dependencies import build_engine
+
+    parser = argparse.ArgumentParser(description="Maintain the category search index")
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("rebuild", help="Reindex every category")
+    parser.parse_args()
+
+    engine = build_engine(get_settings())
+    try:
+        with engine.begin() as conn:
+            rebuild(conn)
+        print("Category search index rebuilt")
+    finally:
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,11 +1,109 @@
+import base64
+import binascii
+import functools
+import random
+import time
+from collections.abc import Callable, Iterable, Iterator
+from dataclasses import replace
+from datetime import UTC, date, datetime, timedelta
 from decimal import Decimal
+from itertools import islice
+from typing import BinaryIO, Concatenate, ParamSpec, TypeVar
+from uuid import uuid4
 
+from sqlalchemy.orm.exc import StaleDataError
+
+from app.autocomplete import CategoryIndex
+from app.budgets import month_of, spend_deltas
+from app.export import ExportFormat, encode
+from app.fx import RateBook
+from app.importer import StatementLine, number_repeats, parse, read_lines
 from app.model import (
     Account,
+    AccountInfo,
+    AccountNotFoundError,
+    Budget,
+    BudgetNotFoundError,
+    BudgetStatus,
+    CategoryType,
+    ConcurrentUpdateError,
     DuplicateAccountNameError,
+    Entry,
+    EntryRecord,
+    Frequency,
+    FxRate,
+    IdempotencyKeyConflictError,
+    IdempotencyKeyMismatchError,
+    IdempotencyRecord,
+    ImportJob,
+    ImportJobNotFoundError,
+    ImportStatus,
+    InsufficientFundsError,
     InvalidInitialBalanceError,
+    RecurringRule,
+    RecurringRuleNotFoundError,
+    ReportGrouping,
+    StatementFormat,
+    content_hash,
+    transfer_entries,
+)
+from app.money import Money
+from app.repository import (
+    AbstractRepository,
+    BudgetRepository,
+    IdempotencyRepository,
+    ImportJobRepository,
+    RateRepository,
+    RecurringRuleRepository,
+    UnitOfWork,
+    ValuationRepository,
 )
-from app.repository import AbstractRepository
+from app.search import search_terms
+
+P = ParamSpec("P")
+T = TypeVar("T")
+R = TypeVar("R", bound=UnitOfWork)
+
+# Attempts of a unit of work that keeps losing the race for an account
+CONFLICT_ATTEMPTS = 10
+# The randomized pause before retry n is at most this times 2**n
+CONFLICT_BACKOFF_SECONDS = 0.005
+# Rows per chunk of a streamed export, also fetched per round trip
+EXPORT_CHUNK_ROWS = 1000
+
+
+def retry_on_conflict(
+    service: Callable[Concatenate[R, P], T],
+) -> Callable[Concatenate[R, P], T]:
+    """Run ``service`` again when a concurrent writer changed the same account.
+
+    Accounts carry a version that every UPDATE checks (see app.db), so a
+    unit of work that read an account before another one committed a change
+    to it fails with StaleDataError instead of overwriting that change. The
+    work is then rolled back and repeated on fresh rows, after a short
+    randomized pause, up to CONFLICT_ATTEMPTS times in total; after that
+    ConcurrentUpdateError is raised. No lock is held while waiting.
+
+    Services wrapped with it must commit their own work, so that a retry
+    starts from a clean session.
+    """
+
+    @functools.wraps(service)
+    def wrapper(repo: R, *args: P.args, **kwargs: P.kwargs) -> T:
+        attempt = 1
+        while True:
+            try:
+                return service(repo, *args, **kwargs)
+            except StaleDataError as exc:
+                repo.rollback()
+                if attempt == CONFLICT_ATTEMPTS:
+                    raise ConcurrentUpdateError(
+                        f"Gave up after {attempt} conflicting concurrent updates"
+                    ) from exc
+                time.sleep(random.uniform(0, CONFLICT_BACKOFF_SECONDS * 2**attempt))
+                attempt += 1
+
+    return wrapper
 
 
 def create_account(
@@ -22,7 +120,7 @@ def create_account(
         )
 
     # Check for duplicate account name
-    existing_account = repo.get_by_name(name)
+    existing_account = repo.get_info_by_name(name)
     if existing_account:
         raise DuplicateAccountNameError(f"Account with name '{name}' already exists")
 
@@ -36,3 +134,668 @@ def create_account(
     repo.commit()
 
     return new_account
+
+
+def get_account(repo: AbstractRepository, account_id: str) -> Account:
+    account = repo.get(account_id)
+    if account is None:
+        raise AccountNotFoundError(f"Account with id '{account_id}' does not exist")
+    return account
+
+
+def get_account_info(repo: AbstractRepository, account_id: str) -> AccountInfo:
+    """Like get_account(), without the balance; possibly served from a cache."""
+    info = repo.get_info(account_id)
+    if info is None:
+        raise AccountNotFoundError(f"Account with id '{account_id}' does not exist")
+    return info
+
+
+@retry_on_conflict
+def record_entries(
+    repo: AbstractRepository,
+    *,
+    account_id: str,
+    entries: Iterable[tuple[Money | Decimal, date, str | None, CategoryType]],
+    index: CategoryIndex | None = None,
+) -> list[Entry]:
+    """Validate a batch of entries against the running balance and store it.
+
+    The whole batch is checked in one pass (see Account.record_entries) and
+    written with a single bulk insert; nothing is stored if any entry fails.
+    The categories are counted in ``index``, if given, once the entries are
+    committed.
+    """
+    account = get_account(repo, account_id)
+    new_entries = account.record_entries(entries)
+    repo.add_entries(new_entries)
+    if index is not None:
+        repo.after_commit(lambda: index.add(entry.category for entry in new_entries))
+    repo.commit()
+
+    return new_entries
+
+
+@retry_on_conflict
+def transfer_funds(
+    repo: ValuationRepository,
+    *,
+    from_account_id: str,
+    to_account_id: str,
+    entry_date: date,
+    debit_amount: Decimal,
+    credit_amount: Decimal | None = None,
+    rates: RateBook | None = None,
+) -> tuple[Entry, Entry]:
+    """Move funds between two accounts in one transaction.
+
+    Both accounts are locked (see AbstractRepository.lock_accounts) before
+    the source balance is checked, so concurrent transfers are serialized
+    per account and cannot overdraw it. ``credit_amount`` defaults to
+    ``debit_amount``; between currencies, it defaults to ``debit_amount``
+    converted at the rate of ``entry_date`` from ``rates``, and is required
+    without them.
+    """
+    if from_account_id == to_account_id:
+        raise ValueError("Cannot transfer to the same account")
+    locked = repo.lock_accounts([from_account_id, to_account_id])
+    for account_id in (from_account_id, to_account_id):
+        if account_id not in locked:
+            raise AccountNotFoundError(f"Account with id '{account_id}' does not exist")
+    src, dst = locked[from_account_id], locked[to_account_id]
+    if credit_amount is None:
+        credit_amount = debit_amount
+        if src.currency != dst.currency:
+            if rates is None:
+                raise ValueError(
+                    f"credit_amount is required for a transfer from {src.currency} "
+                    f"to {dst.currency}"
+                )
+            _, rate = rates.rate(repo, src.currency, dst.currency, entry_date)
+            debit = Money.from_decimal(debit_amount, src.currency)
+            credit_amount = debit.convert(dst.currency, rate).amount
+    debit_entry, credit_entry = transfer_entries(
+        src, dst, entry_date, debit_amt=debit_amount, credit_amt=credit_amount
+    )
+    repo.add_entries([debit_entry, credit_entry])
+    repo.commit()
+
+    return debit_entry, credit_entry
+
+
+def _encode_cursor(entry: Entry | EntryRecord) -> str:
+    key = f"{entry.entry_date.isoformat()}|{entry.id}"
+    return base64.urlsafe_b64encode(key.encode()).decode()
+
+
+def _decode_cursor(cursor: str) -> tuple[date, str]:
+    try:
+        entry_date, entry_id = (
+            base64.urlsafe_b64decode(cursor.encode()).decode().split("|", 1)
+        )
+        return date.fromisoformat(entry_date), entry_id
+    except (binascii.Error, UnicodeDecodeError, ValueError) as exc:
+        raise ValueError(f"Invalid cursor: {cursor!r}") from exc
+
+
+def list_entries(
+    repo: AbstractRepository,
+    *,
+    account_id: str,
+    limit: int,
+    cursor: str | None = None,
+    date_from: date | None = None,
+    date_to: date | None = None,
+    category: str | None = None,
+    category_type: CategoryType | None = None,
+) -> tuple[list[EntryRecord], str | None]:
+    """Return one page of an account's entries and the cursor of the next page.
+
+    The cursor is an opaque token encoding the ``(entry_date, id)`` key of
+    the last entry on the page; it is ``None`` when there are no more pages.
+    """
+    get_account_info(repo, account_id)
+    page = repo.list_entries(
+        account_id,
+        # Fetch one extra row to learn whether another page exists
+        limit=limit + 1,
+        after=_decode_cursor(cursor) if cursor else None,
+        date_from=date_from,
+        date_to=date_to,
+        category=category,
+        category_type=category_type,
+    )
+    return _next_page(page, limit)
+
+
+def _next_page(
+    page: list[EntryRecord], limit: int
+) -> tuple[list[EntryRecord], str | None]:
+    # The page was fetched with one extra row to learn whether another exists
+    if len(page) <= limit:
+        return page, None
+    page = page[:limit]
+    return page, _encode_cursor(page[-1])
+
+
+def search_entries(
+    repo: AbstractRepository,
+    *,
+    query: str,
+    limit: int,
+    cursor: str | None = None,
+    account_id: str | None = None,
+) -> tuple[list[EntryRecord], str | None]:
+    """Return one page of the entries whose category matches ``query``.
+
+    Words of the query match words of the category by prefix, all of them
+    (see app.search). Pages and cursors work as in list_entries().
+    """
+    terms = search_terms(query)
+    if not terms:
+        raise ValueError(f"Search query has no words: {query!r}")
+    if account_id is not None:
+        get_account_info(repo, account_id)
+    page = repo.search_entries(
+        terms,
+        limit=limit + 1,
+        after=_decode_cursor(cursor) if cursor else None,
+        account_id=account_id,
+    )
+    return _next_page(page, limit)
+
+
+def complete_category(
+    repo: AbstractRepository, *, prefix: str, limit: int, index: CategoryIndex
+) -> list[tuple[str, int]]:
+    """Return up to ``limit`` ``(category, entries)`` starting with ``prefix``."""
+    return index.complete(repo, prefix, limit)
+
+
+def export_entries(
+    repo: AbstractRepository,
+    *,
+    export_format: ExportFormat,
+    account_id: str | None = None,
+    date_from: date | None = None,
+    date_to: date | None = None,
+) -> Iterator[str]:
+    """Export the entries of one account, or of all accounts, as text chunks.
+
+    The account and date range are checked right away, but the entries are
+    only read as the returned iterator is consumed, a batch per chunk, so
+    an export of any size uses constant memory.
+    """
+    if date_from is not None and date_to is not None and date_from > date_to:
+        raise ValueError(f"Invalid date range: from {date_from} is after to {date_to}")
+    if account_id is not None:
+        get_account_info(repo, account_id)
+    records = repo.iter_entries(
+        account_id, date_from=date_from, date_to=date_to, batch_size=EXPORT_CHUNK_ROWS
+    )
+    return encode(records, export_format, chunk_rows=EXPORT_CHUNK_ROWS)
+
+
+def create_import_job(
+    repo: ImportJobRepository,
+    *,
+    account_id: str,
+    statement_format: StatementFormat,
+    bytes_total: int,
+) -> ImportJob:
+    """Register a pending import of a statement file into an account."""
+    get_account_info(repo, account_id)
+    job = ImportJob(
+        str(uuid4()), account_id, statement_format, ImportStatus.PENDING, bytes_total
+    )
+    repo.add_import_job(job)
+    repo.commit()
+    return job
+
+
+def get_import_job(repo: ImportJobRepository, job_id: str) -> ImportJob:
+    job = repo.get_import_job(job_id)
+    if job is None:
+        raise ImportJobNotFoundError(f"Import job with id '{job_id}' does not exist")
+    return job
+
+
+@retry_on_conflict
+def _import_chunk(
+    repo: ImportJobRepository,
+    *,
+    job: ImportJob,
+    chunk: list[tuple[StatementLine, int]],
+    bytes_read: int,
+) -> ImportJob:
+    """Record the new lines of ``chunk`` and commit them with the progress.
+
+    Returns the job as committed.
+    """
+    account = get_account(repo, job.account_id)
+    hashes = []
+    for line, _ in chunk:
+        try:
+            amount = Money.from_decimal(line.amount, account.currency)
+        except ValueError as exc:
+            raise ValueError(f"Line {line.line}: {exc}") from exc
+        hashes.append(
+            content_hash(amount, line.entry_date, line.category, line.category_type)
+        )
+    counts = repo.count_entries_by_hash(account.id, set(hashes))
+    new_lines = []
+    for (line, occurrence), hash in zip(chunk, hashes):
+        # The n-th of identical lines is new unless n such entries exist,
+        # counting those recorded by this import so far
+        existing = counts.get(hash, 0)
+        if existing < occurrence:
+            counts[hash] = existing + 1
+            new_lines.append(line)
+    new_entries = account.record_entries(
+        (line.amount, line.entry_date, line.category, line.category_type)
+        for line in new_lines
+    )
+    repo.add_entries(new_entries)
+    progress = replace(
+        job,
+        bytes_read=bytes_read,
+        lines_read=job.lines_read + len(chunk),
+        imported=job.imported + len(new_entries),
+        duplicates=job.duplicates + len(chunk) - len(new_entries),
+    )
+    repo.save_import_job(progress)
+    repo.commit()
+    return progress
+
+
+def import_statement(
+    repo: ImportJobRepository, *, job_id: str, statement: BinaryIO, chunk_size: int
+) -> ImportJob:
+    """Run an import job: record the lines of a statement file as entries.
+
+    The file is parsed while it is read (see app.importer) and processed
+    ``chunk_size`` lines at a time. Each chunk is deduplicated, written with
+    one bulk insert and committed together with the job's progress, so
+    memory use does not grow with the file and other sessions can follow
+    the progress.
+
+    Lines the account already has an entry for (same model.content_hash)
+    are skipped as duplicates; repeated identical lines are told apart by
+    their occurrence (see importer.number_repeats). Importing overlapping
+    statements therefore records each transaction once, and a failed
+    import can simply be run again. On error the job is marked FAILED with
+    the message; the chunks committed before are kept. That includes
+    interruptions such as a shutdown, which are raised again once the job
+    is saved. Running a job again with the same file resumes it after the
+    lines it has committed.
+    """
+    job = get_import_job(repo, job_id)
+    job.status = ImportStatus.RUNNING
+    job.error = None
+    repo.save_import_job(job)
+    repo.commit()
+    lines = islice(
+        number_repeats(parse(read_lines(statement), job.format)), job.lines_read, None
+    )
+    try:
+        while chunk := list(islice(lines, chunk_size)):
+            job = _import_chunk(repo, job=job, chunk=chunk, bytes_read=statement.tell())
+    except BaseException as exc:
+        repo.rollback()
+        job.status = ImportStatus.FAILED
+        job.error = str(exc) or type(exc).__name__
+        repo.save_import_job(job)
+        repo.commit()
+        if not isinstance(exc, Exception):
+            raise
+        return job
+    job.status = ImportStatus.SUCCEEDED
+    job.bytes_read = job.bytes_total
+    repo.save_import_job(job)
+    repo.commit()
+    return job
+
+
+def create_recurring_rule(
+    repo: RecurringRuleRepository,
+    *,
+    account_id: str,
+    amount: Decimal,
+    category: str | None,
+    category_type: CategoryType,
+    frequency: Frequency,
+    start_date: date,
+    interval: int = 1,
+    until: date | None = None,
+) -> RecurringRule:
+    """Register an entry that repeats on an account.
+
+    Nothing is recorded here: occurrences are materialized by the scheduler
+    (see run_recurring_rules), including those already due.
+    """
+    account = get_account_info(repo, account_id)
+    money = Money.from_decimal(amount, account.currency)
+    if money.minor <= 0:
+        raise ValueError(f"Amount must be greater than zero, got {amount}")
+    if interval < 1:
+        raise ValueError(f"Interval must be at least 1, got {interval}")
+    if until is not None and until < start_date:
+        raise ValueError(f"Rule ends on {until}, before it starts on {start_date}")
+    rule = RecurringRule(
+        str(uuid4()),
+        account_id,
+        money,
+        category,
+        category_type,
+        frequency,
+        start_date,
+        interval,
+        until,
+    )
+    repo.add_recurring_rule(rule)
+    repo.commit()
+    return rule
+
+
+def get_recurring_rule(repo: RecurringRuleRepository, rule_id: str) -> RecurringRule:
+    rule = repo.get_recurring_rule(rule_id)
+    if rule is None:
+        raise RecurringRuleNotFoundError(
+            f"Recurring rule with id '{rule_id}' does not exist"
+        )
+    return rule
+
+
+def list_recurring_rules(
+    repo: RecurringRuleRepository, *, account_id: str
+) -> list[RecurringRule]:
+    get_account_info(repo, account_id)
+    return repo.list_recurring_rules(account_id)
+
+
+def delete_recurring_rule(repo: RecurringRuleRepository, *, rule_id: str) -> None:
+    """Stop a rule. Entries it has already recorded are kept."""
+    if not repo.delete_recurring_rule(rule_id):
+        raise RecurringRuleNotFoundError(
+            f"Recurring rule with id '{rule_id}' does not exist"
+        )
+    repo.commit()
+
+
+@retry_on_conflict
+def _materialize_batch(
+    repo: RecurringRuleRepository, *, on: date, after: str | None, batch_size: int
+) -> tuple[str | None, int]:
+    """Catch up one batch of due rules; return (last rule id, entries recorded).
+
+    The entries of every rule in the batch are inserted together and its
+    checkpoint is saved in the same transaction, so a batch is recorded
+    exactly once or not at all.
+    """
+    rules = repo.due_recurring_rules(on, after=after, limit=batch_size)
+    if not rules:
+        return None, 0
+    accounts = repo.lock_accounts({rule.account_id for rule in rules})
+    progress = {rule.id: replace(rule, error=None) for rule in rules}
+    # Occurrences of all rules of an account apply in date order, so an
+    # income due before an expense can pay for it
+    occurrences = sorted(
+        ((day, rule.id, rule) for rule in rules for day in rule.due(on)),
+        key=lambda occurrence: occurrence[:2],
+    )
+    new_entries: list[Entry] = []
+    for day, _, rule in occurrences:
+        rule_progress = progress[rule.id]
+        if rule_progress.error is not None:
+            # Stopped at an earlier occurrence, retried by the next run
+            continue
+        try:
+            new_entries += accounts[rule.account_id].record_entries(
+                [(rule.amount, day, rule.category, rule.category_type)]
+            )
+        except InsufficientFundsError as exc:
+            rule_progress.error = str(exc)
+        else:
+            rule_progress.materialized += 1
+    repo.add_entries(new_entries)
+    for rule in rules:
+        if not repo.save_recurring_rule(
+            progress[rule.id], materialized=rule.materialized
+        ):
+            # Treated like a version conflict on an account: the batch is
+            # rolled back and retried against the rules as saved by the
+            # other run
+            raise StaleDataError(f"Recurring rule '{rule.id}' was updated concurrently")
+    repo.commit()
+    return rules[-1].id, len(new_entries)
+
+
+def run_recurring_rules(
+    repo: RecurringRuleRepository, *, on: date, batch_size: int
+) -> int:
+    """Record every occurrence of every rule due on or before ``on``.
+
+    Rules are caught up ``batch_size`` at a time, each batch in its own
+    transaction (see _materialize_batch), so an interrupted run keeps the
+    batches it committed and the next run resumes from their checkpoints.
+    Runs are idempotent: occurrences already recorded are never recorded
+    again, whether by an earlier run or a concurrent one. Returns the
+    number of entries recorded.
+    """
+    recorded = 0
+    after = None
+    while True:
+        after, batch = _materialize_batch(
+            repo, on=on, after=after, batch_size=batch_size
+        )
+        if after is None:
+            return recorded
+        recorded += batch
+
+
+def spending_report(
+    repo: AbstractRepository,
+    *,
+    group_by: ReportGrouping,
+    date_from: date | None = None,
+    date_to: date | None = None,
+) -> list[tuple[str | None, Money, int]]:
+    """Total spending per group and currency over an inclusive date range.
+
+    The totals are aggregated by the repository (GROUP BY in the database),
+    so the cost does not depend on loading entries into Python.
+    """
+    if date_from is not None and date_to is not None and date_from > date_to:
+        raise ValueError(f"Invalid date range: from {date_from} is after to {date_to}")
+    return repo.spending_totals(group_by=group_by, date_from=date_from, date_to=date_to)
+
+
+def balance_at(repo: AbstractRepository, *, account_id: str, on: date) -> Money:
+    """Balance of an account at the end of ``on``."""
+    balance = repo.balance_at(account_id, on)
+    if balance is None:
+        raise AccountNotFoundError(f"Account with id '{account_id}' does not exist")
+    return balance
+
+
+def set_budget(
+    repo: BudgetRepository, *, category: str, currency: str, limit: Decimal
+) -> Budget:
+    """Set the monthly spending limit of a category in one currency."""
+    budget = Budget(category, Money.from_decimal(limit, currency))
+    if budget.limit.minor <= 0:
+        raise ValueError(f"Budget must be positive, got {limit}")
+    repo.set_budget(budget)
+    repo.commit()
+    return budget
+
+
+def delete_budget(repo: BudgetRepository, *, category: str, currency: str) -> None:
+    if not repo.delete_budget(category, currency):
+        raise BudgetNotFoundError(f"No {currency} budget for category '{category}'")
+    repo.commit()
+
+
+def _check_month(month: str) -> None:
+    try:
+        valid = month_of(date.fromisoformat(f"{month}-01")) == month
+    except ValueError:
+        valid = False
+    if not valid:
+        raise ValueError(f"Invalid month {month!r}, expected YYYY-MM")
+
+
+def budget_status(
+    repo: BudgetRepository, *, month: str, over_budget_only: bool = False
+) -> list[BudgetStatus]:
+    """Spending of every budgeted category in ``month`` (``YYYY-MM``).
+
+    Read from the spending counters kept with the entries, so the cost
+    depends on the number of budgets, not of entries.
+    """
+    _check_month(month)
+    statuses = repo.budget_statuses(month)
+    if over_budget_only:
+        return [status for status in statuses if status.over_budget]
+    return statuses
+
+
+def budget_alerts(
+    repo: BudgetRepository, *, new_entries: Iterable[Entry]
+) -> list[BudgetStatus]:
+    """Budgets that ``new_entries`` spent from and that are now exceeded."""
+    keys_by_month: dict[str, set[tuple[str, str]]] = {}
+    for category, month, currency in spend_deltas(new_entries):
+        keys_by_month.setdefault(month, set()).add((category, currency))
+    return [
+        status
+        for month, keys in sorted(keys_by_month.items())
+        for status in repo.budget_statuses(month, keys)
+        if status.over_budget
+    ]
+
+
+def add_fx_rates(repo: RateRepository, *, rates: list[FxRate], book: RateBook) -> int:
+    """Store exchange rates and return how many were stored.
+
+    A rate for a pair and date that is already stored replaces it. The
+    cached tables of the affected pairs are dropped once the rates are
+    committed, which may be after this returns (see UnitOfWork.atomic()).
+    """
+    for rate in rates:
+        if rate.base == rate.quote:
+            raise ValueError(f"Exchange rate from {rate.base} to itself")
+        if rate.rate <= 0:
+            raise ValueError(f"Exchange rate must be positive, got {rate.rate}")
+    repo.add_fx_rates(rates)
+    pairs = {(rate.base, rate.quote) for rate in rates}
+    repo.after_commit(lambda: book.invalidate(pairs))
+    repo.commit()
+    return len(rates)
+
+
+def fx_rate(
+    repo: RateRepository, *, base: str, quote: str, on: date, book: RateBook
+) -> tuple[date, Decimal]:
+    """Return ``(rate_date, rate)`` of the rate from ``base`` to ``quote`` on ``on``."""
+    return book.rate(repo, base, quote, on)
+
+
+def net_worth(
+    repo: ValuationRepository, *, currency: str, on: date, book: RateBook
+) -> list[tuple[Money, int, Decimal, Money]]:
+    """Closing balances of all accounts on ``on``, valued in ``currency``.
+
+    Returns ``(balance, accounts, rate, converted)`` per account currency.
+    Balances are summed per currency by the database, so each currency is
+    converted once, with one rate lookup, however many accounts hold it.
+
+    Raises:
+        RateNotFoundError: If a currency has no rate to ``currency`` on ``on``
+    """
+    valued = []
+    for balance, accounts in repo.balances_by_currency(on):
+        _, rate = book.rate(repo, balance.currency, currency, on)
+        valued.append((balance, accounts, rate, balance.convert(currency, rate)))
+    return valued
+
+
+def balance_history(
+    repo: AbstractRepository,
+    *,
+    account_id: str,
+    date_from: date | None = None,
+    date_to: date | None = None,
+) -> list[tuple[date, Money]]:
+    """Closing balances over time, for charting an account's balance.
+
+    Returns one point per day with entries in the inclusive range. With
+    ``date_from``, the series always starts on that day, so the chart
+    starts at the balance carried into the range.
+    """
+    if date_from is not None and date_to is not None and date_from > date_to:
+        raise ValueError(f"Invalid date range: from {date_from} is after to {date_to}")
+    get_account_info(repo, account_id)
+    points = repo.daily_balances(account_id, date_from=date_from, date_to=date_to)
+    if date_from is not None and (not points or points[0][0] != date_from):
+        # No entries that day: its balance is the one carried into the range
+        points.insert(
+            0, (date_from, balance_at(repo, account_id=account_id, on=date_from))
+        )
+    return points
+
+
+def begin_idempotent_request(
+    repo: IdempotencyRepository,
+    *,
+    key: str,
+    fingerprint: str,
+    now: datetime | None = None,
+) -> IdempotencyRecord | None:
+    """Return the stored response to replay for ``key``, or None if there is none.
+
+    Keys past their TTL are deleted first, so a key can be reused once it
+    has expired. Nothing is committed: if None is returned, the caller runs
+    the request and stores its response with finish_idempotent_request()
+    inside the same repo.atomic() block, so that the request's writes and
+    its response are committed together or not at all.
+
+    Raises:
+        IdempotencyKeyMismatchError: If the key was used for another request
+    """
+    # Stored as naive UTC, which every backend compares the same way
+    now = now or datetime.now(UTC).replace(tzinfo=None)
+    repo.delete_expired_idempotency_keys(now)
+    record = repo.get_idempotency_record(key)
+    if record is None:
+        return None
+    if record.fingerprint != fingerprint:
+        raise IdempotencyKeyMismatchError(
+            f"Idempotency key '{key}' was already used for a different request"
+        )
+    return record
+
+
+def finish_idempotent_request(
+    repo: IdempotencyRepository,
+    *,
+    key: str,
+    fingerprint: str,
+    status_code: int,
+    response_body: str,
+    ttl_seconds: float,
+    now: datetime | None = None,
+) -> None:
+    """Store the response of a request made with ``key``, without committing.
+
+    Raises:
+        IdempotencyKeyConflictError: If a concurrent request with the same
+            key stored its response first. The caller must roll back, then
+            replay that response (see begin_idempotent_request())
+    """
+    now = now or datetime.now(UTC).replace(tzinfo=None)
+    record = IdempotencyRecord(key, fingerprint, status_code, response_body)
+    if not repo.add_idempotency_record(record, now + timedelta(seconds=ttl_seconds)):
+        raise IdempotencyKeyConflictError(
+            f"A request with idempotency key '{key}' was processed concurrently"
+        )
@@ -0,0 +1,90 @@
+"""
+Time balance-on-date lookups from the daily_balance table against summing
+the account's entries up to the date, and check that both agree.
+
+Generates a dataset (see benchmarks.dataset) in a temporary SQLite file,
+unless --url points at an existing database, and times the backfill that
+builds daily_balance from the entries.
+
+Usage:
+    uv run python -m benchmarks.balance_at [--entries N] [--lookups N] [--url URL]
+"""
+
+import argparse
+import random
+import tempfile
+import time
+from datetime import date, timedelta
+from pathlib import Path
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from app import balances
+from app.config import Settings
+from app.db import accounts, entries
+from app.dependencies import build_engine
+from app.repository import SqlAlchemyRepository
+from benchmarks.dataset import generate
+
+
+def _summed_balance(session: Session, account_id: str, on: date) -> int:
+    total = session.execute(
+        select(func.coalesce(func.sum(entries.c.amount), 0)).where(
+            entries.c.account_id == account_id, entries.c.entry_date <= on
+        )
+    ).scalar_one()
+    initial = session.execute(
+        select(accounts.c.initial_balance).where(accounts.c.id == account_id)
+    ).scalar_one()
+    return initial + int(total)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--entries", type=int, default=1_000_000)
+    parser.add_argument("--lookups", type=int, default=200)
+    parser.add_argument("--url", help="Use an existing database instead")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        url = args.url or f"sqlite:///{Path(tmp) / 'bench.db'}"
+        engine = build_engine(Settings(database_url=url))
+        if args.url is None:
+            generate(engine, entry_count=args.entries)
+        with engine.begin() as conn:
+            started = time.perf_counter()
+            rows = balances.backfill(conn)
+            elapsed = time.perf_counter() - started
+        print(f"Backfilled {rows} daily balances in {elapsed:.2f} s")
+
+        rng = random.Random(0)
+        with Session(engine) as session:
+            account_ids = list(session.execute(select(accounts.c.id)).scalars())
+            first, last = session.execute(
+                select(func.min(entries.c.entry_date), func.max(entries.c.entry_date))
+            ).one()
+            span = (last - first).days
+            lookups = [
+                (rng.choice(account_ids), first + timedelta(days=rng.randrange(span)))
+                for _ in range(args.lookups)
+            ]
+            repo = SqlAlchemyRepository(session)
+
+            started = time.perf_counter()
+            stored = [repo.balance_at(account_id, on) for account_id, on in lookups]
+            stored_ms = (time.perf_counter() - started) * 1000 / len(lookups)
+
+            started = time.perf_counter()
+            summed = [_summed_balance(session, *lookup) for lookup in lookups]
+            summed_ms = (time.perf_counter() - started) * 1000 / len(lookups)
+
+        minors = [None if balance is None else balance.minor for balance in stored]
+        assert minors == summed, "daily_balance differs from the summed entries"
+        print(f"balance on date: daily_balance {stored_ms:8.3f} ms/lookup")
+        print(f"                 sum of entries {summed_ms:8.3f} ms/lookup")
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+"""
+Time budget status from the budget_spend counters against summing the
+month's entries, and check that both agree.
+
+Generates a dataset (see benchmarks.dataset) in a temporary SQLite file,
+unless --url points at an existing database, sets a budget for every
+category and currency, and times the status of random months both ways.
+Also times recording a batch of expenses, which now updates the counters
+in the same transaction.
+
+Usage:
+    uv run python -m benchmarks.budget_status [--entries N] [--lookups N] [--url URL]
+"""
+
+import argparse
+import random
+import tempfile
+import time
+from datetime import date, timedelta
+from decimal import Decimal
+from pathlib import Path
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from app.config import Settings
+from app.db import entries, start_mappers
+from app.dependencies import build_engine
+from app.model import Budget, BudgetStatus, CategoryType, ReportGrouping
+from app.money import Money
+from app.repository import SqlAlchemyRepository
+from app.services import record_entries
+from benchmarks.dataset import CATEGORIES, CURRENCIES, generate
+
+
+def _summed_status(repo: SqlAlchemyRepository, month: str) -> list[BudgetStatus]:
+    """Budget status as computed without counters: a sum over the month."""
+    first = date.fromisoformat(f"{month}-01")
+    last = (first + timedelta(days=31)).replace(day=1) - timedelta(days=1)
+    spent = {
+        (category, total.currency): total
+        for category, total, _ in repo.spending_totals(
+            group_by=ReportGrouping.CATEGORY, date_from=first, date_to=last
+        )
+    }
+    return [
+        BudgetStatus(
+            status.budget,
+            month,
+            spent.get(
+                (status.budget.category, status.budget.limit.currency),
+                Money.zero(status.budget.limit.currency),
+            ),
+        )
+        for status in repo.budget_statuses(month)
+    ]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--entries", type=int, default=1_000_000)
+    parser.add_argument("--lookups", type=int, default=50)
+    parser.add_argument("--url", help="Use an existing database instead")
+    args = parser.parse_args()
+
+    start_mappers()
+    with tempfile.TemporaryDirectory() as tmp:
+        url = args.url or f"sqlite:///{Path(tmp) / 'bench.db'}"
+        engine = build_engine(Settings(database_url=url))
+        if args.url is None:
+            generate(engine, entry_count=args.entries)
+
+        rng = random.Random(0)
+        with Session(engine) as session:
+            repo = SqlAlchemyRepository(session)
+            for category in CATEGORIES:
+                for currency in sorted(set(CURRENCIES)):
+                    repo.set_budget(Budget(category, Money(500_000, currency)))
+            session.commit()
+            first, last = session.execute(
+                select(func.min(entries.c.entry_date), func.max(entries.c.entry_date))
+            ).one()
+            span = (last - first).days
+            months = [
+                (first + timedelta(days=rng.randrange(span))).strftime("%Y-%m")
+                for _ in range(args.lookups)
+            ]
+
+            started = time.perf_counter()
+            counted = [repo.budget_statuses(month) for month in months]
+            counted_ms = (time.perf_counter() - started) * 1000 / len(months)
+
+            started = time.perf_counter()
+            summed = [_summed_status(repo, month) for month in months]
+            summed_ms = (time.perf_counter() - started) * 1000 / len(months)
+
+            account_id = session.execute(
+                select(entries.c.account_id).limit(1)
+            ).scalar_one()
+            batch = [
+                (Decimal(1), last, rng.choice(CATEGORIES), CategoryType.EXPENSE)
+                for _ in range(1000)
+            ]
+            started = time.perf_counter()
+            record_entries(repo, account_id=account_id, entries=batch)
+            write_ms = (time.perf_counter() - started) * 1000
+
+        assert counted == summed, "budget_spend differs from the summed entries"
+        budgets = len(counted[0])
+        print(f"budget status, {budgets} budgets: counters {counted_ms:8.2f} ms/month")
+        print(f"                         sum of entries {summed_ms:8.2f} ms/month")
+        print(f"record 1000 expenses with counters:     {write_ms:8.2f} ms")
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
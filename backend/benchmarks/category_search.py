@@ -0,0 +1,155 @@
+"""
+Time category search and autocomplete against scanning the entries.
+
+Generates a dataset (see benchmarks.dataset) with thousands of distinct
+categories of two words and a number in a temporary SQLite file. Searches
+for a word prefix, matching about 4% of the entries, and for all the words
+of one category go through the full-text index (services.search_entries)
+and, for comparison, through a ``LIKE '%word%'`` scan in page order,
+filtered to whole-word prefixes; both must return the same first page of
+100 entries. Completions of short prefixes are served by a CategoryIndex
+and, for comparison, by a ``LIKE 'prefix%'`` GROUP BY over the entries.
+
+Usage:
+    uv run python -m benchmarks.category_search [--entries N] [--categories N]
+"""
+
+import argparse
+import random
+import tempfile
+import time
+from pathlib import Path
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from app.autocomplete import CategoryIndex
+from app.config import Settings
+from app.db import categories, entries, start_mappers
+from app.dependencies import build_engine
+from app.repository import SqlAlchemyRepository
+from app.search import search_terms
+from app.services import complete_category, search_entries
+from benchmarks.dataset import generate
+
+WORDS = (
+    "coffee tea bakery grocery market fuel parking taxi train flight hotel "
+    "rent power water internet phone gym pharmacy dentist doctor cinema "
+    "books music games toys garden hardware pets vet school course gifts "
+    "charity insurance tax bank fees clothes shoes laundry beauty barber "
+    "restaurant bar pizza sushi burger lunch dinner snacks wine beer sports"
+).split()
+PAGE = 100
+
+
+def _categories(count: int, rng: random.Random) -> list[str]:
+    names: set[str] = set()
+    while len(names) < count:
+        first, second = rng.sample(WORDS, 2)
+        names.add(f"{first}_{second}_{rng.randrange(100)}".upper())
+    return sorted(names)
+
+
+def _scanned(repo: SqlAlchemyRepository, query: str) -> list[str]:
+    """First page of matches found without the index."""
+    terms = search_terms(query)
+    rows = repo.session.execute(
+        select(entries.c.id, categories.c.name)
+        .join_from(entries, categories)
+        .where(categories.c.name.like(f"%{terms[0]}%"))
+        .order_by(entries.c.entry_date, entries.c.id)
+    )
+    page = []
+    for entry_id, category in rows:
+        words = search_terms(category)
+        if all(any(word.startswith(term) for word in words) for term in terms):
+            page.append(entry_id)
+            if len(page) == PAGE:
+                break
+    return page
+
+
+def _grouped(repo: SqlAlchemyRepository, prefix: str) -> list[tuple[str, int]]:
+    count = func.count()
+    rows = repo.session.execute(
+        select(categories.c.name, count)
+        .join_from(entries, categories)
+        .where(categories.c.name.like(f"{prefix}%"))
+        .group_by(categories.c.name)
+        .order_by(count.desc(), categories.c.name)
+        .limit(10)
+    )
+    return [tuple(row) for row in rows]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--entries", type=int, default=1_000_000)
+    parser.add_argument("--categories", type=int, default=5000)
+    parser.add_argument("--lookups", type=int, default=50)
+    args = parser.parse_args()
+
+    start_mappers()
+    rng = random.Random(0)
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = build_engine(Settings(database_url=f"sqlite:///{Path(tmp) / 'b.db'}"))
+        categories = _categories(args.categories, rng)
+        generate(engine, entry_count=args.entries, categories=categories)
+        # A word prefix matches about 4% of the entries, all the words of a
+        # category about 1 / --categories
+        searches = {
+            "one word": [
+                rng.choice(WORDS)[: rng.randrange(3, 7)] for _ in range(args.lookups)
+            ],
+            "a category": [
+                " ".join(search_terms(rng.choice(categories)))
+                for _ in range(args.lookups)
+            ],
+        }
+        prefixes = [
+            rng.choice(WORDS)[: rng.randrange(1, 4)] for _ in range(args.lookups)
+        ]
+
+        with Session(engine) as session:
+            repo = SqlAlchemyRepository(session)
+            for label, queries in searches.items():
+                started = time.perf_counter()
+                found = [
+                    [e.id for e in search_entries(repo, query=q, limit=PAGE)[0]]
+                    for q in queries
+                ]
+                search_ms = (time.perf_counter() - started) * 1000 / len(queries)
+
+                started = time.perf_counter()
+                scanned = [_scanned(repo, q) for q in queries]
+                scan_ms = (time.perf_counter() - started) * 1000 / len(queries)
+
+                assert found == scanned, "indexed search differs from the scan"
+                print(f"search {label + ':':12} index     {search_ms:8.2f} ms/query")
+                print(f"{'':20} LIKE scan {scan_ms:8.2f} ms/query")
+
+            index = CategoryIndex(ttl=3600)
+            started = time.perf_counter()
+            complete_category(repo, prefix="", limit=10, index=index)
+            load_ms = (time.perf_counter() - started) * 1000
+
+            started = time.perf_counter()
+            completed = [
+                complete_category(repo, prefix=p, limit=10, index=index)
+                for p in prefixes
+            ]
+            complete_ms = (time.perf_counter() - started) * 1000 / len(prefixes)
+
+            started = time.perf_counter()
+            grouped = [_grouped(repo, p.upper()) for p in prefixes]
+            grouped_ms = (time.perf_counter() - started) * 1000 / len(prefixes)
+
+        assert completed == grouped, "completions differ from the GROUP BY"
+        print(f"autocomplete, {args.categories} categories: load {load_ms:8.2f} ms")
+        print(f"{'':20} trie      {complete_ms:8.3f} ms/prefix")
+        print(f"{'':20} GROUP BY  {grouped_ms:8.2f} ms/prefix")
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
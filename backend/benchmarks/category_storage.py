@@ -0,0 +1,195 @@
+"""
+Compare database size and the GROUP BY category report before and after
+categories were moved to their own table.
+
+Generates a dataset (see benchmarks.dataset) in a temporary SQLite file and
+rewrites its entry table in the previous layout: category names and
+category types as strings on every row, with the indexes and the entry
+search table of that version. A copy is then upgraded by the migration
+(see migrations._normalize_categories), which is timed. Both files are
+vacuumed and their size is broken down per object, and the spending report
+grouped by category is timed on both: the query of the previous version on
+the old layout, SqlAlchemyRepository.spending_totals on the new one. Both
+must return the same totals.
+
+Usage:
+    uv run python -m benchmarks.category_storage [--entries N] [--runs N]
+"""
+
+import argparse
+import shutil
+import statistics
+import tempfile
+import time
+from datetime import date
+from pathlib import Path
+
+from sqlalchemy import Engine, text
+from sqlalchemy.orm import Session
+
+from app.config import Settings
+from app.db import CATEGORY_TYPE_CODES, start_mappers
+from app.dependencies import build_engine
+from app.migrations import MIGRATIONS, upgrade
+from app.model import ReportGrouping
+from app.money import Money
+from app.repository import SqlAlchemyRepository
+from benchmarks.dataset import generate
+
+# The entry table, its indexes and its search table before the migration
+_LEGACY_DDL = [
+    "CREATE TABLE entry (id VARCHAR NOT NULL, account_id VARCHAR NOT NULL, "
+    "amount BIGINT NOT NULL, currency VARCHAR NOT NULL, entry_date DATE NOT NULL, "
+    "category VARCHAR, category_type VARCHAR NOT NULL, content_hash VARCHAR, "
+    "PRIMARY KEY (id), FOREIGN KEY (account_id) REFERENCES account (id))",
+    "CREATE INDEX ix_entry_account_id_entry_date ON entry (account_id, entry_date)",
+    "CREATE INDEX ix_entry_entry_date ON entry (entry_date)",
+    "CREATE INDEX ix_entry_report ON entry (category_type, entry_date, category, "
+    "account_id, currency, amount)",
+    "CREATE INDEX ix_entry_content_hash ON entry (account_id, content_hash)",
+    "CREATE VIRTUAL TABLE entry_search USING fts5("
+    "category, content='entry', content_rowid='rowid')",
+]
+
+# The report query of the previous version (see spending_totals)
+_LEGACY_REPORT = (
+    "SELECT category, currency, sum(amount), count(*) FROM entry "
+    "WHERE category_type = 'EXPENSE' AND entry_date >= :date_from "
+    "GROUP BY category, currency ORDER BY category, currency"
+)
+
+
+def _to_legacy_layout(engine: Engine) -> None:
+    names = " ".join(
+        f"WHEN {code} THEN '{member.value}'"
+        for member, code in CATEGORY_TYPE_CODES.items()
+    )
+    with engine.begin() as conn:
+        conn.execute(text("ALTER TABLE entry RENAME TO entry_new"))
+        for (name,) in conn.execute(
+            text(
+                "SELECT name FROM sqlite_schema WHERE type = 'index' AND sql IS NOT NULL"
+            )
+        ).all():
+            if name.startswith("ix_entry_"):
+                conn.execute(text(f"DROP INDEX {name}"))
+        for statement in _LEGACY_DDL:
+            conn.execute(text(statement))
+        conn.execute(
+            text(
+                "INSERT INTO entry SELECT e.id, e.account_id, e.amount, e.currency, "
+                f"e.entry_date, c.name, CASE e.category_type {names} END, "
+                "e.content_hash FROM entry_new e "
+                "LEFT JOIN category c ON c.id = e.category_id"
+            )
+        )
+        conn.execute(text("INSERT INTO entry_search (entry_search) VALUES ('rebuild')"))
+        for table in ("entry_new", "category_search", "category"):
+            conn.execute(text(f"DROP TABLE {table}"))
+        conn.execute(
+            text("UPDATE schema_version SET version = :version"),
+            {"version": len(MIGRATIONS) - 1},
+        )
+
+
+def _vacuum(engine: Engine) -> None:
+    with engine.connect() as conn:
+        conn.execution_options(isolation_level="AUTOCOMMIT").execute(text("VACUUM"))
+
+
+def _part(name: str) -> str:
+    if name.startswith(("entry_search", "category_search")):
+        return "search index"
+    if name == "entry":
+        return "entry table"
+    if name.startswith(("ix_entry_", "sqlite_autoindex_entry_")):
+        return "entry indexes"
+    if name in ("category", "sqlite_autoindex_category_1"):
+        return "category table"
+    return "other tables"
+
+
+def _sizes(engine: Engine) -> dict[str, int]:
+    sizes: dict[str, int] = {}
+    with engine.connect() as conn:
+        rows = conn.execute(text("SELECT name, sum(pgsize) FROM dbstat GROUP BY name"))
+        for name, size in rows:
+            sizes[_part(name)] = sizes.get(_part(name), 0) + size
+    sizes["file"] = sum(sizes.values())
+    return sizes
+
+
+def _timed(report, runs: int) -> tuple[float, list]:
+    timings = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        totals = report()
+        timings.append(time.perf_counter() - started)
+    return statistics.median(timings) * 1000, totals
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--entries", type=int, default=1_000_000)
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    start_mappers()
+    with tempfile.TemporaryDirectory() as tmp:
+        before_path, after_path = Path(tmp) / "before.db", Path(tmp) / "after.db"
+        before = build_engine(Settings(database_url=f"sqlite:///{before_path}"))
+        generate(before, entry_count=args.entries)
+        _to_legacy_layout(before)
+        _vacuum(before)
+        before.dispose()
+        shutil.copy(before_path, after_path)
+
+        after = build_engine(Settings(database_url=f"sqlite:///{after_path}"))
+        started = time.perf_counter()
+        upgrade(after)
+        migrate_s = time.perf_counter() - started
+        _vacuum(after)
+        print(f"migrated {args.entries} entries in {migrate_s:.1f} s")
+
+        sizes = _sizes(before), _sizes(after)
+        for part in ("entry table", "entry indexes", "search index", "category table"):
+            print(
+                f"{part:15} {sizes[0].get(part, 0) / 2**20:8.1f} MiB before "
+                f"{sizes[1].get(part, 0) / 2**20:8.1f} MiB after"
+            )
+        print(
+            f"{'database':15} {sizes[0]['file'] / 2**20:8.1f} MiB before "
+            f"{sizes[1]['file'] / 2**20:8.1f} MiB after"
+        )
+
+        today = date.today()
+        periods = {"all time": date.min, "last year": today.replace(year=today.year - 1)}
+        with before.connect() as conn, Session(after) as session:
+            repo = SqlAlchemyRepository(session)
+            for label, date_from in periods.items():
+                legacy_ms, legacy = _timed(
+                    lambda: [
+                        (category, Money(-int(total), currency), count)
+                        for category, currency, total, count in conn.execute(
+                            text(_LEGACY_REPORT), {"date_from": date_from.isoformat()}
+                        )
+                    ],
+                    args.runs,
+                )
+                current_ms, current = _timed(
+                    lambda: repo.spending_totals(
+                        group_by=ReportGrouping.CATEGORY, date_from=date_from
+                    ),
+                    args.runs,
+                )
+                assert legacy == current, "the report differs after the migration"
+                print(
+                    f"GROUP BY category, {label:9} {legacy_ms:8.1f} ms before "
+                    f"{current_ms:8.1f} ms after"
+                )
+        before.dispose()
+        after.dispose()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+"""
+Generate a synthetic budget dataset for benchmarks.
+
+Accounts in a few currencies receive a monthly salary and many small
+expenses spread over several years, written with bulk inserts in batches.
+Account balances, daily balances and budget spending are stored as the app
+would maintain them. The output is deterministic for a given seed.
+
+Usage:
+    uv run python -m benchmarks.dataset --url sqlite:///bench.db \
+        [--entries N] [--accounts N] [--years N]
+"""
+
+import argparse
+import random
+import time
+from datetime import date, timedelta
+from uuid import UUID
+
+from sqlalchemy import Engine, insert, update
+
+from app import budgets
+from app.balances import backfill
+from app.categories import category_ids
+from app.config import Settings
+from app.db import accounts, entries
+from app.dependencies import build_engine
+from app.migrations import upgrade
+from app.model import CategoryType
+
+CURRENCIES = ["EUR", "EUR", "USD", "JPY", "RUB"]
+CATEGORIES = [
+    "FOOD",
+    "RENT",
+    "TAXI",
+    "UTILITIES",
+    "HEALTH",
+    "TRAVEL",
+    "CLOTHES",
+    "RESTAURANTS",
+    "SUBSCRIPTIONS",
+    "GIFTS",
+]
+_BATCH = 20_000
+# One salary for every this many entries keeps the balances positive
+_INCOME_EVERY = 25
+
+
+def generate(
+    engine: Engine,
+    *,
+    entry_count: int,
+    account_count: int = 10,
+    years: int = 5,
+    seed: int = 0,
+    categories: list[str] = CATEGORIES,
+) -> None:
+    """Create the schema if needed and insert the dataset into ``engine``.
+
+    Expenses are spread evenly over ``categories``.
+    """
+    upgrade(engine)
+    rng = random.Random(seed)
+    start = date.today().replace(month=1, day=1) - timedelta(days=365 * years)
+    days = 365 * years
+    account_rows = [
+        {
+            "id": f"bench-{i}",
+            "name": f"Benchmark {i}",
+            "currency": CURRENCIES[i % len(CURRENCIES)],
+            "initial_balance": 0,
+            "current_balance": 0,
+        }
+        for i in range(account_count)
+    ]
+    balances = [0] * account_count
+    with engine.begin() as conn:
+        conn.execute(insert(accounts), account_rows)
+        ids = category_ids(conn, ["SALARY", *categories])
+        for offset in range(0, entry_count, _BATCH):
+            batch = []
+            for i in range(offset, min(offset + _BATCH, entry_count)):
+                slot = rng.randrange(account_count)
+                account = account_rows[slot]
+                if i % _INCOME_EVERY == 0:
+                    amount, category, category_type = (
+                        rng.randrange(200_000, 500_000),
+                        "SALARY",
+                        CategoryType.INCOME,
+                    )
+                else:
+                    amount, category, category_type = (
+                        -rng.randrange(100, 10_000),
+                        rng.choice(categories),
+                        CategoryType.EXPENSE,
+                    )
+                balances[slot] += amount
+                batch.append(
+                    {
+                        "id": str(UUID(int=rng.getrandbits(128), version=4)),
+                        "account_id": account["id"],
+                        "amount": amount,
+                        "currency": account["currency"],
+                        "entry_date": start + timedelta(days=rng.randrange(days)),
+                        "category_id": ids[category],
+                        "category_type": category_type,
+                    }
+                )
+            conn.execute(insert(entries), batch)
+        for account, balance in zip(account_rows, balances):
+            conn.execute(
+                update(accounts)
+                .where(accounts.c.id == account["id"])
+                .values(current_balance=balance)
+            )
+        backfill(conn)
+        budgets.backfill(conn)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--url", required=True, help="SQLAlchemy database URL")
+    parser.add_argument("--entries", type=int, default=1_000_000)
+    parser.add_argument("--accounts", type=int, default=10)
+    parser.add_argument("--years", type=int, default=5)
+    args = parser.parse_args()
+
+    engine = build_engine(Settings(database_url=args.url))
+    started = time.perf_counter()
+    generate(
+        engine,
+        entry_count=args.entries,
+        account_count=args.accounts,
+        years=args.years,
+    )
+    engine.dispose()
+    print(f"{args.entries} entries in {time.perf_counter() - started:.1f} s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""
+Compare the memory held per loaded entry: ORM Entry vs slotted EntryRecord.
+
+Both variants are loaded from the same SQLite table, so every value (ids,
+dates, amounts, category strings) is a fresh object produced by the driver,
+as in the app. Memory is measured with tracemalloc while the loaded list is
+alive and includes the session's identity map and instance state.
+
+Usage:
+    uv run python -m benchmarks.entry_memory [--entries N]
+"""
+
+import argparse
+import gc
+import tempfile
+import time
+import tracemalloc
+from collections.abc import Callable
+from datetime import date, timedelta
+from pathlib import Path
+from uuid import uuid4
+
+from sqlalchemy import Engine, create_engine, insert, select
+from sqlalchemy.orm import Session
+
+from app.categories import category_ids
+from app.db import accounts, entries, metadata, start_mappers
+from app.model import CategoryType, Entry
+from app.repository import SqlAlchemyRepository
+
+_CATEGORIES = ["FOOD", "RENT", "TAXI", "SALARY", "UTILITIES", "HEALTH"]
+_BATCH = 50_000
+
+
+def _populate(engine: Engine, count: int) -> None:
+    metadata.create_all(engine)
+    start = date(2015, 1, 1)
+    with engine.begin() as conn:
+        conn.execute(
+            accounts.insert().values(
+                id="bench", name="bench", currency="EUR", initial_balance=0
+            )
+        )
+        ids = category_ids(conn, _CATEGORIES)
+        for offset in range(0, count, _BATCH):
+            conn.execute(
+                insert(entries),
+                [
+                    {
+                        "id": str(uuid4()),
+                        "account_id": "bench",
+                        "amount": i % 10_000,
+                        "currency": "EUR",
+                        "entry_date": start + timedelta(days=i % 3650),
+                        "category_id": ids[_CATEGORIES[i % len(_CATEGORIES)]],
+                        "category_type": CategoryType.EXPENSE,
+                    }
+                    for i in range(offset, min(offset + _BATCH, count))
+                ],
+            )
+
+
+def _load_entries(session: Session) -> list:
+    return list(session.execute(select(Entry)).scalars())
+
+
+def _load_records(session: Session) -> list:
+    return SqlAlchemyRepository(session).list_entries("bench", limit=2**31)
+
+
+def _measure(engine: Engine, load: Callable[[Session], list]) -> tuple[float, float]:
+    """Return (bytes per entry, load seconds) for one loading strategy."""
+    with Session(engine) as session:
+        gc.collect()
+        tracemalloc.start()
+        baseline, _ = tracemalloc.get_traced_memory()
+        started = time.perf_counter()
+        loaded = load(session)
+        elapsed = time.perf_counter() - started
+        gc.collect()
+        current, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        per_entry = (current - baseline) / len(loaded)
+        del loaded
+    return per_entry, elapsed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--entries", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    start_mappers()
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{Path(tmp) / 'bench.db'}")
+        _populate(engine, args.entries)
+        print(f"{args.entries} entries")
+        for label, load in (
+            ("Entry (ORM)", _load_entries),
+            ("EntryRecord", _load_records),
+        ):
+            per_entry, elapsed = _measure(engine, load)
+            print(
+                f"{label:12} {per_entry:8.0f} bytes/entry"
+                f"  (loaded in {elapsed:.2f} s, traced)"
+            )
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
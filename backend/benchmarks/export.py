@@ -0,0 +1,86 @@
+"""
+Measure the peak memory of a streamed CSV export against building it whole.
+
+The streamed export is the one served by the export endpoints: entries are
+read from the cursor in batches (see SqlAlchemyRepository.iter_entries) and
+encoded one chunk at a time, each chunk dropped once written. The
+materialized variant loads every entry first and joins the whole document,
+as a naive endpoint would. Peak memory is traced with tracemalloc.
+
+Usage:
+    uv run python -m benchmarks.export [--entries N] [--url URL]
+"""
+
+import argparse
+import gc
+import tempfile
+import time
+import tracemalloc
+from collections.abc import Callable
+from pathlib import Path
+
+from sqlalchemy import Engine
+from sqlalchemy.orm import Session
+
+from app.config import Settings
+from app.dependencies import build_engine
+from app.export import ExportFormat, encode
+from app.repository import SqlAlchemyRepository
+from app.services import export_entries
+from benchmarks.dataset import generate
+
+
+def _streamed(repo: SqlAlchemyRepository) -> int:
+    size = 0
+    for chunk in export_entries(repo, export_format=ExportFormat.CSV):
+        size += len(chunk)
+    return size
+
+
+def _materialized(repo: SqlAlchemyRepository) -> int:
+    records = list(repo.iter_entries())
+    document = "".join(encode(records, ExportFormat.CSV, chunk_rows=len(records)))
+    return len(document)
+
+
+def _measure(
+    engine: Engine, export: Callable[[SqlAlchemyRepository], int]
+) -> tuple[int, float, int]:
+    """Return (peak bytes, seconds, characters exported) for one variant."""
+    with Session(engine) as session:
+        repo = SqlAlchemyRepository(session)
+        gc.collect()
+        tracemalloc.start()
+        started = time.perf_counter()
+        size = export(repo)
+        elapsed = time.perf_counter() - started
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    return peak, elapsed, size
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--entries", type=int, default=1_000_000)
+    parser.add_argument("--url", help="Use an existing database instead")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        url = args.url or f"sqlite:///{Path(tmp) / 'bench.db'}"
+        engine = build_engine(Settings(database_url=url))
+        if args.url is None:
+            generate(engine, entry_count=args.entries)
+        for label, export in (
+            ("streamed", _streamed),
+            ("materialized", _materialized),
+        ):
+            peak, elapsed, size = _measure(engine, export)
+            print(
+                f"{label:12} peak {peak / 2**20:8.1f} MiB"
+                f"  ({size / 2**20:.0f} MiB of CSV in {elapsed:.2f} s, traced)"
+            )
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""
+Time monthly/category/account totals on a columnar Ledger against a Python
+loop over Decimal amounts, and check that both give identical results.
+
+Amounts are generated as EUR cents, the way they are stored.
+
+Usage:
+    uv run python -m benchmarks.ledger [--entries N]
+"""
+
+import argparse
+import random
+import time
+from collections.abc import Callable
+from datetime import date, timedelta
+from decimal import Decimal
+
+from app.ledger import Ledger
+
+_CATEGORIES = ["FOOD", "RENT", "TAXI", "SALARY", "UTILITIES", "HEALTH", None]
+
+
+def _rows(count: int) -> list[tuple[str, int, date, str | None]]:
+    rng = random.Random(0)
+    start = date(2015, 1, 1)
+    return [
+        (
+            f"account-{rng.randrange(20)}",
+            rng.randrange(-500_000, 500_000),
+            start + timedelta(days=rng.randrange(3650)),
+            rng.choice(_CATEGORIES),
+        )
+        for _ in range(count)
+    ]
+
+
+def _decimal_totals(rows, key: Callable) -> dict:
+    totals: dict = {}
+    for row in rows:
+        group = key(row)
+        totals[group] = totals.get(group, Decimal(0)) + Decimal(row[1]).scaleb(-2)
+    return totals
+
+
+def _timed(fn: Callable):
+    started = time.perf_counter()
+    result = fn()
+    return result, (time.perf_counter() - started) * 1000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--entries", type=int, default=2_000_000)
+    args = parser.parse_args()
+
+    rows = _rows(args.entries)
+    ledger, build_ms = _timed(lambda: Ledger.from_rows(rows, currency="EUR"))
+    print(f"{args.entries} entries, snapshot built in {build_ms:.0f} ms")
+    for label, columnar, key in (
+        ("by month", ledger.sum_by_month, lambda row: row[2].replace(day=1)),
+        ("by category", ledger.sum_by_category, lambda row: row[3]),
+        ("by account", ledger.sum_by_account, lambda row: row[0]),
+    ):
+        fast, fast_ms = _timed(columnar)
+        slow, slow_ms = _timed(lambda: _decimal_totals(rows, key))
+        totals = {group: money.amount for group, money in fast.items()}
+        assert totals == slow, f"{label}: columnar totals differ from Decimal totals"
+        print(f"{label:12} ledger {fast_ms:8.1f} ms   Decimal loop {slow_ms:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,155 @@
+"""
+Time the net worth valuation against valuing every account on its own.
+
+Generates a dataset (see benchmarks.dataset) with many accounts in a
+temporary SQLite file, plus a daily exchange rate to EUR for every other
+currency over its years. services.net_worth() is timed with a cold and a
+warm RateBook for many dates; the naive variant reads each account's
+balance and then queries the rate of its currency, per account and date.
+Statements sent to the database are counted for both.
+
+Usage:
+    uv run python -m benchmarks.net_worth [--accounts N] [--entries N] [--dates N]
+"""
+
+import argparse
+import random
+import tempfile
+import time
+from datetime import date, timedelta
+from decimal import Decimal
+from pathlib import Path
+
+from sqlalchemy import event, func, insert, select
+from sqlalchemy.orm import Session
+
+from app.config import Settings
+from app.db import accounts, entries, fx_rates, start_mappers
+from app.dependencies import build_engine
+from app.fx import RateBook
+from app.money import Money
+from app.repository import SqlAlchemyRepository
+from app.services import net_worth
+from benchmarks.dataset import CURRENCIES, generate
+
+BASE = "EUR"
+
+
+def _insert_rates(engine, first: date, last: date) -> int:
+    rng = random.Random(0)
+    rows = []
+    for currency in sorted(set(CURRENCIES) - {BASE}):
+        rate = Decimal(rng.randrange(5, 200))
+        for offset in range((last - first).days + 1):
+            # A random walk of a few basis points a day
+            rate *= 1 + Decimal(rng.randrange(-30, 31)) / 10_000
+            rows.append(
+                {
+                    "base": currency,
+                    "quote": BASE,
+                    "rate_date": first + timedelta(days=offset),
+                    "rate": str(1 / rate.quantize(Decimal("0.0001"))),
+                }
+            )
+    with engine.begin() as conn:
+        conn.execute(insert(fx_rates), rows)
+    return len(rows)
+
+
+def _naive(repo: SqlAlchemyRepository, on: date) -> Money:
+    total = Money.zero(BASE)
+    for account in repo.list_all():
+        balance = repo.balance_at(account.id, on)
+        assert balance is not None
+        rate = Decimal(1)
+        if account.currency != BASE:
+            rate = Decimal(
+                repo.session.execute(
+                    select(fx_rates.c.rate)
+                    .where(
+                        fx_rates.c.base == account.currency,
+                        fx_rates.c.quote == BASE,
+                        fx_rates.c.rate_date <= on,
+                    )
+                    .order_by(fx_rates.c.rate_date.desc())
+                    .limit(1)
+                ).scalar_one()
+            )
+        total += balance.convert(BASE, rate)
+    return total
+
+
+def _valued(repo: SqlAlchemyRepository, on: date, book: RateBook) -> list[Money]:
+    return [
+        converted for *_, converted in net_worth(repo, currency=BASE, on=on, book=book)
+    ]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--accounts", type=int, default=500)
+    parser.add_argument("--entries", type=int, default=200_000)
+    parser.add_argument("--dates", type=int, default=50)
+    args = parser.parse_args()
+
+    start_mappers()
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = build_engine(Settings(database_url=f"sqlite:///{Path(tmp) / 'b.db'}"))
+        generate(engine, entry_count=args.entries, account_count=args.accounts)
+        statements = 0
+
+        @event.listens_for(engine, "before_cursor_execute")
+        def count(*_):
+            nonlocal statements
+            statements += 1
+
+        with Session(engine) as session:
+            first, last = session.execute(
+                select(func.min(entries.c.entry_date), func.max(entries.c.entry_date))
+            ).one()
+            account_count = session.execute(
+                select(func.count(accounts.c.id))
+            ).scalar_one()
+        rates = _insert_rates(engine, first, last)
+        rng = random.Random(1)
+        dates = [
+            first + timedelta(days=rng.randrange((last - first).days))
+            for _ in range(args.dates)
+        ]
+        print(f"{account_count} accounts, {rates} rates, {len(dates)} dates")
+
+        warm = RateBook()
+        with Session(engine) as session:
+            repo = SqlAlchemyRepository(session)
+            _valued(repo, dates[0], warm)
+            # Cold: every date starts with an empty cache and loads each pair
+            for label, book in (("cold cache", None), ("warm cache", warm)):
+                statements = 0
+                started = time.perf_counter()
+                valued = [
+                    sum(_valued(repo, on, book or RateBook()), Money.zero(BASE))
+                    for on in dates
+                ]
+                elapsed = (time.perf_counter() - started) * 1000 / len(dates)
+                print(
+                    f"net worth, {label}: {elapsed:8.2f} ms/date"
+                    f"  {statements / len(dates):8.1f} statements/date"
+                )
+
+            statements = 0
+            started = time.perf_counter()
+            naive = [_naive(repo, on) for on in dates]
+            elapsed = (time.perf_counter() - started) * 1000 / len(dates)
+            print(
+                f"per-account queries:   {elapsed:8.2f} ms/date"
+                f"  {statements / len(dates):8.1f} statements/date"
+            )
+        # Rounded once per currency instead of once per account
+        assert all(
+            abs(a.minor - b.minor) <= account_count for a, b in zip(valued, naive)
+        ), "net worth differs from the per-account valuation"
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""
+Time the scheduler catching up on recurring rules after downtime against
+recording each occurrence in its own transaction.
+
+Creates the same accounts and rules (daily, weekly and monthly, all
+starting on the same day) in two temporary SQLite files, then records
+every occurrence due over the downtime. services.run_recurring_rules()
+inserts the entries of a batch of rules at once and checkpoints them in
+the same transaction; the naive variant calls services.record_entries()
+once per occurrence, as a per-rule cron job would. A second scheduler run
+shows that catching up again records nothing.
+
+Usage:
+    uv run python -m benchmarks.recurring [--accounts N] [--rules N] [--days N]
+"""
+
+import argparse
+import random
+import tempfile
+import time
+from datetime import date, timedelta
+from decimal import Decimal
+from pathlib import Path
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from app.config import Settings
+from app.db import entries, start_mappers
+from app.dependencies import build_engine, init_database
+from app.model import Account, CategoryType, Frequency
+from app.repository import SqlAlchemyRepository
+from app.services import create_recurring_rule, record_entries, run_recurring_rules
+
+START = date(2024, 1, 1)
+FREQUENCIES = [Frequency.DAILY, Frequency.WEEKLY, Frequency.MONTHLY]
+
+
+def _setup(path: Path, accounts: int, rules: int):
+    engine = build_engine(Settings(database_url=f"sqlite:///{path}"))
+    init_database(engine, Settings(database_url=f"sqlite:///{path}"))
+    rng = random.Random(0)
+    with Session(engine) as session:
+        repo = SqlAlchemyRepository(session)
+        for n in range(accounts):
+            repo.add(Account(f"acc-{n:05d}", f"Account {n}", "EUR", Decimal(10**6)))
+        session.commit()
+        for _ in range(rules):
+            create_recurring_rule(
+                repo,
+                account_id=f"acc-{rng.randrange(accounts):05d}",
+                amount=Decimal(rng.randrange(100, 10_000)) / 100,
+                category=rng.choice(["RENT", "GYM", "FOOD", "TAXI"]),
+                category_type=CategoryType.EXPENSE,
+                frequency=rng.choice(FREQUENCIES),
+                start_date=START,
+            )
+    return engine
+
+
+def _count(engine) -> int:
+    with Session(engine) as session:
+        return session.execute(select(func.count()).select_from(entries)).scalar_one()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--accounts", type=int, default=100)
+    parser.add_argument("--rules", type=int, default=300)
+    parser.add_argument("--days", type=int, default=365)
+    parser.add_argument("--batch-size", type=int, default=500)
+    args = parser.parse_args()
+
+    start_mappers()
+    on = START + timedelta(days=args.days - 1)
+    with tempfile.TemporaryDirectory() as tmp:
+        bulk = _setup(Path(tmp) / "bulk.db", args.accounts, args.rules)
+        with Session(bulk) as session:
+            repo = SqlAlchemyRepository(session)
+            started = time.perf_counter()
+            recorded = run_recurring_rules(repo, on=on, batch_size=args.batch_size)
+            bulk_s = time.perf_counter() - started
+            started = time.perf_counter()
+            rerun = run_recurring_rules(repo, on=on, batch_size=args.batch_size)
+            rerun_ms = (time.perf_counter() - started) * 1000
+            due = [
+                (rule, rule.due(on)) for rule in repo.due_recurring_rules(on, limit=1)
+            ]
+
+        naive = _setup(Path(tmp) / "naive.db", args.accounts, args.rules)
+        with Session(naive) as session:
+            repo = SqlAlchemyRepository(session)
+            rules = repo.due_recurring_rules(on, limit=args.rules)
+            started = time.perf_counter()
+            for rule in rules:
+                for day in rule.due(on):
+                    record_entries(
+                        repo,
+                        account_id=rule.account_id,
+                        entries=[(rule.amount, day, rule.category, rule.category_type)],
+                    )
+            naive_s = time.perf_counter() - started
+
+        assert rerun == 0 and due == [], "the second run recorded occurrences"
+        assert recorded == _count(bulk) == _count(naive), "entry counts differ"
+        print(f"{args.rules} rules, {args.days} days of downtime: {recorded} entries")
+        print(f"scheduler catch-up:         {bulk_s:8.2f} s")
+        print(f"one transaction per entry:  {naive_s:8.2f} s")
+        print(f"second scheduler run:       {rerun_ms:8.2f} ms")
+        bulk.dispose()
+        naive.dispose()
+
+
+if __name__ == "__main__":
+    main()
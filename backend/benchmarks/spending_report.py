@@ -0,0 +1,96 @@
+"""
+Check the spending report against the "report generation < 2 seconds"
+target of the specification.
+
+Generates a dataset (see benchmarks.dataset) in a temporary SQLite file,
+unless --url points at an existing database, then times every grouping of
+GET /reports/spending over the whole history and over the last year.
+Exits with status 1 if any report is slower than the target.
+
+Usage:
+    uv run python -m benchmarks.spending_report [--entries N] [--url URL]
+"""
+
+import argparse
+import statistics
+import sys
+import tempfile
+import time
+from datetime import date
+from pathlib import Path
+
+from fastapi.testclient import TestClient
+from sqlalchemy import Engine
+from sqlalchemy.orm import sessionmaker
+
+from app.config import Settings
+from app.dependencies import build_engine, get_db_session
+from app.main import app
+from app.model import ReportGrouping
+from benchmarks.dataset import generate
+
+TARGET_SECONDS = 2.0
+
+
+def _run(engine: Engine, runs: int) -> bool:
+    factory = sessionmaker(bind=engine)
+
+    def override_get_db_session():
+        with factory() as session:
+            yield session
+
+    app.dependency_overrides[get_db_session] = override_get_db_session
+    today = date.today()
+    periods = {
+        "all time": {},
+        "last year": {"from": today.replace(year=today.year - 1).isoformat()},
+    }
+    ok = True
+    try:
+        client = TestClient(app)
+        for group_by in ReportGrouping:
+            for label, params in periods.items():
+                timings = []
+                for _ in range(runs):
+                    started = time.perf_counter()
+                    response = client.get(
+                        "/reports/spending",
+                        params={"group_by": group_by.value, **params},
+                    )
+                    timings.append(time.perf_counter() - started)
+                    response.raise_for_status()
+                median = statistics.median(timings)
+                ok &= median < TARGET_SECONDS
+                print(
+                    f"{group_by.value:9} {label:10} {median * 1000:8.1f} ms"
+                    f"  ({len(response.json()['items'])} rows)"
+                )
+    finally:
+        app.dependency_overrides.clear()
+    return ok
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--entries", type=int, default=1_000_000)
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--url", help="Use an existing database instead")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        url = args.url or f"sqlite:///{Path(tmp) / 'bench.db'}"
+        engine = build_engine(Settings(database_url=url))
+        if args.url is None:
+            started = time.perf_counter()
+            generate(engine, entry_count=args.entries)
+            elapsed = time.perf_counter() - started
+            print(f"Generated {args.entries} entries in {elapsed:.1f} s")
+        ok = _run(engine, args.runs)
+        engine.dispose()
+
+    print(f"Target < {TARGET_SECONDS:.0f} s: {'met' if ok else 'MISSED'}")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""
+Compare SQLite read/write throughput with and without the pragma profile.
+
+A single writer commits one entry per transaction (updating the account's
+running balance, as the app does) while reader threads keep reading the
+balance. Each run uses a fresh database file.
+
+Usage:
+    uv run python -m benchmarks.sqlite_profile [--writes N] [--readers N]
+"""
+
+import argparse
+import tempfile
+import threading
+import time
+from datetime import date
+from pathlib import Path
+
+from sqlalchemy import Engine, select, update
+
+from app.config import Settings, SqlitePragmas
+from app.db import accounts, entries, metadata
+from app.dependencies import build_engine
+from app.model import CategoryType
+
+
+def _run(engine: Engine, writes: int, readers: int) -> tuple[float, float]:
+    metadata.create_all(engine)
+    with engine.begin() as conn:
+        conn.execute(
+            accounts.insert().values(
+                id="bench",
+                name="bench",
+                currency="EUR",
+                initial_balance=0,
+                current_balance=0,
+            )
+        )
+
+    done = threading.Event()
+    reads = [0] * readers
+
+    def read(slot: int) -> None:
+        query = select(accounts.c.current_balance).where(accounts.c.id == "bench")
+        while not done.is_set():
+            with engine.connect() as conn:
+                conn.execute(query).scalar_one()
+            reads[slot] += 1
+
+    threads = [threading.Thread(target=read, args=(i,)) for i in range(readers)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for i in range(writes):
+        with engine.begin() as conn:
+            conn.execute(
+                entries.insert().values(
+                    id=f"e{i}",
+                    account_id="bench",
+                    amount=100,
+                    currency="EUR",
+                    entry_date=date(2025, 1, 1),
+                    category_type=CategoryType.INCOME,
+                )
+            )
+            conn.execute(
+                update(accounts)
+                .where(accounts.c.id == "bench")
+                .values(current_balance=accounts.c.current_balance + 100)
+            )
+    elapsed = time.perf_counter() - started
+    done.set()
+    for thread in threads:
+        thread.join()
+    engine.dispose()
+    return writes / elapsed, sum(reads) / elapsed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--writes", type=int, default=2000)
+    parser.add_argument("--readers", type=int, default=4)
+    args = parser.parse_args()
+
+    profiles: dict[str, SqlitePragmas | None] = {
+        "default": None,
+        "profile": SqlitePragmas(),
+    }
+    print(f"{'pragmas':<10}{'writes/s':>12}{'reads/s':>12}")
+    for label, pragmas in profiles.items():
+        with tempfile.TemporaryDirectory() as tmp:
+            settings = Settings(
+                database_url=f"sqlite:///{Path(tmp) / 'bench.db'}",
+                sqlite_pragmas=pragmas,
+            )
+            write_rate, read_rate = _run(
+                build_engine(settings), args.writes, args.readers
+            )
+        print(f"{label:<10}{write_rate:>12.0f}{read_rate:>12.0f}")
+
+
+if __name__ == "__main__":
+    main()
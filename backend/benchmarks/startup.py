@@ -0,0 +1,76 @@
+"""
+Measure cold-start latency of the API: import, lifespan startup and the
+first request.
+
+Every run happens in a fresh interpreter against an empty database file, the
+situation of a newly started worker. Reported times are medians.
+
+Usage:
+    uv run python -m benchmarks.startup [--runs N] [--schema auto|external]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+# Executed in the child interpreter; prints the three timings as JSON
+_PROBE = """
+import json, time
+started = time.perf_counter()
+from fastapi.testclient import TestClient
+import app.main
+imported = time.perf_counter()
+with TestClient(app.main.app) as client:
+    ready = time.perf_counter()
+    client.get("/accounts").raise_for_status()
+    answered = time.perf_counter()
+print(json.dumps({
+    "import_ms": (imported - started) * 1000,
+    "startup_ms": (ready - imported) * 1000,
+    "first_request_ms": (answered - ready) * 1000,
+}))
+"""
+
+
+def _probe(schema: str) -> dict[str, float]:
+    with tempfile.TemporaryDirectory() as tmp:
+        database_url = f"sqlite:///{Path(tmp) / 'budget.db'}"
+        if schema == "external":
+            subprocess.run(
+                [sys.executable, "-m", "app.migrations"],
+                env={**os.environ, "DATABASE_URL": database_url},
+                check=True,
+            )
+        result = subprocess.run(
+            [sys.executable, "-c", _PROBE],
+            env={
+                **os.environ,
+                "DATABASE_URL": database_url,
+                "DATABASE_SCHEMA": schema,
+            },
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+    return json.loads(result.stdout)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--schema", choices=["auto", "external"], default="auto")
+    args = parser.parse_args()
+
+    runs = [_probe(args.schema) for _ in range(args.runs)]
+    for metric in ("import_ms", "startup_ms", "first_request_ms"):
+        median = statistics.median(run[metric] for run in runs)
+        print(f"{metric:<18}{median:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""
+Time a large CSV statement import and trace its peak memory.
+
+Writes a statement of --lines transactions to a temporary file and imports
+it into a fresh SQLite database the way the background job does
+(services.import_statement), then imports it again, when every line is
+skipped as a duplicate. Peak memory is traced with tracemalloc and
+compared with the size of the file.
+
+Usage:
+    uv run python -m benchmarks.statement_import [--lines N] [--chunk-size N]
+"""
+
+import argparse
+import random
+import tempfile
+import time
+import tracemalloc
+from datetime import date, timedelta
+from decimal import Decimal
+from pathlib import Path
+
+from sqlalchemy.orm import Session
+
+from app.config import Settings
+from app.db import start_mappers
+from app.dependencies import build_engine
+from app.migrations import upgrade
+from app.model import Account, ImportJob, StatementFormat
+from app.repository import SqlAlchemyRepository
+from app.services import create_import_job, import_statement
+from benchmarks.dataset import CATEGORIES
+
+
+def _write_statement(path: Path, lines: int) -> None:
+    rng = random.Random(0)
+    start = date(2020, 1, 1)
+    with path.open("w") as statement:
+        statement.write("date,amount,category,description\n")
+        # Ordered by date, as banks export them
+        for i in range(lines):
+            day = start + timedelta(days=i * 1825 // lines)
+            amount = Decimal(-rng.randrange(100, 10_000)).scaleb(-2)
+            category = rng.choice(CATEGORIES)
+            statement.write(f"{day},{amount},{category},Card payment {i}\n")
+
+
+def _import(engine, path: Path, chunk_size: int) -> tuple[ImportJob, float, int]:
+    """Return (finished job, seconds, peak traced bytes) of one import."""
+    with Session(engine) as session:
+        repo = SqlAlchemyRepository(session)
+        job = create_import_job(
+            repo,
+            account_id="bench",
+            statement_format=StatementFormat.CSV,
+            bytes_total=path.stat().st_size,
+        )
+        tracemalloc.start()
+        started = time.perf_counter()
+        with path.open("rb") as statement:
+            job = import_statement(
+                repo, job_id=job.id, statement=statement, chunk_size=chunk_size
+            )
+        elapsed = time.perf_counter() - started
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    return job, elapsed, peak
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--lines", type=int, default=200_000)
+    parser.add_argument("--chunk-size", type=int, default=Settings.import_chunk_size)
+    args = parser.parse_args()
+
+    start_mappers()
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "statement.csv"
+        _write_statement(path, args.lines)
+        engine = build_engine(Settings(database_url=f"sqlite:///{Path(tmp) / 'b.db'}"))
+        upgrade(engine)
+        with Session(engine) as session:
+            session.add(Account("bench", "bench", "EUR", Decimal(10**9)))
+            session.commit()
+
+        size = path.stat().st_size / 2**20
+        print(f"{args.lines} lines, {size:.1f} MiB, chunks of {args.chunk_size}")
+        for label in ("import", "re-import"):
+            job, elapsed, peak = _import(engine, path, args.chunk_size)
+            print(
+                f"{label:9} {elapsed:6.2f} s  peak {peak / 2**20:6.1f} MiB  "
+                f"imported {job.imported}, duplicates {job.duplicates}  (traced)"
+            )
+            assert job.lines_read == args.lines, job.error
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
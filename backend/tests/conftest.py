@@ -1,3 +1,5 @@
+import os
+
 import pytest
 from decimal import Decimal
 from datetime import date
@@ -10,10 +12,22 @@ from app.db import mapper_registry
 from app.model import Account
 from app.model import Entry
 from app.model import CategoryType
+from app.money import Money
 from app.main import app
+from app.main import get_category_index
 from app.main import get_db_session
+from app.main import get_rate_book
+from app.main import get_session_factory
+from app.autocomplete import CategoryIndex
+from app.dependencies import get_account_cache
+from app.fx import RateBook
+from app.repository import AccountCache
 from fastapi.testclient import TestClient
 
+# Tests run against in-memory SQLite unless TEST_DATABASE_URL points to another
+# database, e.g. a disposable local PostgreSQL instance.
+TEST_DATABASE_URL = os.environ.get("TEST_DATABASE_URL", "sqlite:///:memory:")
+
 # Shared date constants
 JAN_01 = date.fromisoformat("2025-01-01")
 JAN_02 = date.fromisoformat("2025-01-02")
@@ -28,21 +42,35 @@ def client(session):
         yield session
 
     app.dependency_overrides[get_db_session] = override_get_db_session
+    account_cache = AccountCache()
+    app.dependency_overrides[get_account_cache] = lambda: account_cache
+    # Background jobs open their own sessions on the test database
+    app.dependency_overrides[get_session_factory] = lambda: sessionmaker(
+        bind=session.get_bind()
+    )
+    # Cached exchange rates must not outlive the test database
+    rate_book = RateBook()
+    app.dependency_overrides[get_rate_book] = lambda: rate_book
+    category_index = CategoryIndex()
+    app.dependency_overrides[get_category_index] = lambda: category_index
     yield TestClient(app)
     app.dependency_overrides.clear()
 
 
 @pytest.fixture
 def session():
-    """Create an in-memory SQLite database session for testing."""
-    # Create in-memory SQLite database
-    from sqlalchemy.pool import StaticPool
-
-    engine = create_engine(
-        "sqlite:///:memory:",
-        connect_args={"check_same_thread": False},
-        poolclass=StaticPool,
-    )
+    """Create a database session for testing (in-memory SQLite by default)."""
+    if TEST_DATABASE_URL.startswith("sqlite"):
+        # Create in-memory SQLite database
+        from sqlalchemy.pool import StaticPool
+
+        engine = create_engine(
+            TEST_DATABASE_URL,
+            connect_args={"check_same_thread": False},
+            poolclass=StaticPool,
+        )
+    else:
+        engine = create_engine(TEST_DATABASE_URL)
 
     # Create all tables from metadata
     metadata.create_all(engine)
@@ -59,6 +87,7 @@ def session():
 
     # Cleanup
     session.close()
+    metadata.drop_all(engine)
     engine.dispose()
     mapper_registry.dispose()
 
@@ -79,13 +108,13 @@ def make_entry():
 
     Usage:
         def test_something(make_entry):
-            entry = make_entry(id="tx-1", amount=Decimal(100))
+            entry = make_entry(id="tx-1", amount=Money(10000, "EUR"))
     """
 
     def _make_entry(
         id: str = "tx-1",
         account_id: str = "a-1",
-        amount: Decimal = Decimal(0),
+        amount: Money = Money(0, "EUR"),
         entry_date: date = JAN_01,
         category: str | None = "test",
         category_type: CategoryType = CategoryType.EXPENSE,
@@ -98,16 +127,16 @@ def make_entry():
 @pytest.fixture
 def entry_1() -> Entry:
     """Entry on Jan 01 for testing (taxi expense)."""
-    return Entry("tx-1", "a-1", Decimal(0), JAN_01, "taxi", CategoryType.EXPENSE)
+    return Entry("tx-1", "a-1", Money(0, "EUR"), JAN_01, "taxi", CategoryType.EXPENSE)
 
 
 @pytest.fixture
 def entry_2() -> Entry:
     """Entry on Jan 02 for testing (food expense)."""
-    return Entry("tx-2", "a-1", Decimal(3), JAN_02, "food", CategoryType.EXPENSE)
+    return Entry("tx-2", "a-1", Money(300, "EUR"), JAN_02, "food", CategoryType.EXPENSE)
 
 
 @pytest.fixture
 def entry_3() -> Entry:
     """Entry on Jan 03 for testing (taxi expense)."""
-    return Entry("tx-3", "a-2", Decimal(1), JAN_03, "taxi", CategoryType.EXPENSE)
+    return Entry("tx-3", "a-2", Money(100, "EUR"), JAN_03, "taxi", CategoryType.EXPENSE)
@@ -2,6 +2,7 @@ from decimal import Decimal
 
 from app.model import Account
 from app.model import CategoryType
+from app.money import Money
 from conftest import JAN_01
 
 
@@ -30,4 +31,32 @@ def test_account_balance_is_sum_of_init_balance_and_entries(
 
     # Assert: Balance equals initial balance plus sum of entries
     # Initial: 35, Expenses: -5, Income: +500, Total: 530
-    assert balance == Decimal(530)
+    assert balance.amount == Decimal(530)
+
+
+def test_account_balance_is_cached_and_updated_incrementally(acc_eur: Account):
+    # Arrange: Record an expense so the cached balance diverges from initial
+    acc_eur.record_entry(
+        Decimal(5), JAN_01, category="TAXI", category_type=CategoryType.EXPENSE
+    )
+
+    # Act: Tamper with the stored amount to prove balance is not re-summed
+    acc_eur._entries[-1]._amount = -100000
+
+    # Assert: Balance comes from the running total, not from the entries
+    assert acc_eur.current_balance == Money(3000, "EUR")
+    assert acc_eur.balance.amount == Decimal(30)
+
+
+def test_account_balance_falls_back_to_entries_when_cache_missing(
+    acc_eur: Account,
+):
+    # Arrange: Simulate an account persisted before the cache existed
+    acc_eur.record_entry(
+        Decimal(5), JAN_01, category="TAXI", category_type=CategoryType.EXPENSE
+    )
+    acc_eur.current_balance = None
+
+    # Act & Assert: Balance is recomputed from entries and cached again
+    assert acc_eur.balance.amount == Decimal(30)
+    assert acc_eur.current_balance == Money(3000, "EUR")
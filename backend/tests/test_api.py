@@ -1,5 +1,13 @@
+import json
 import pytest
+from datetime import date
 from decimal import Decimal
+from sqlalchemy import text
+
+from app.dependencies import get_account_cache
+from app.main import app
+from app.model import CategoryType
+from app.repository import AccountCache, SqlAlchemyRepository
 
 
 def test_get_accounts(client, session, acc_eur):
@@ -16,6 +24,7 @@ def test_get_accounts(client, session, acc_eur):
     assert len(data) == 1
     assert data[0]["id"] == acc_eur.id
     assert data[0]["name"] == acc_eur.name
+    assert Decimal(data[0]["balance"]) == acc_eur.balance.amount
 
 
 def test_get_accounts_empty_database(client):
@@ -30,6 +39,22 @@ def test_get_accounts_empty_database(client):
     assert data == []
 
 
+def test_account_details_are_cached_across_requests(client, session, acc_eur):
+    # 1. Arrange: One cache for the whole process, as in production
+    session.add(acc_eur)
+    session.commit()
+    cache = AccountCache()
+    app.dependency_overrides[get_account_cache] = lambda: cache
+
+    # 2. Act: Two requests that look up the same account
+    first = client.get(f"/accounts/{acc_eur.id}/entries")
+    second = client.get(f"/accounts/{acc_eur.id}/entries")
+
+    # 3. Assert: The second request is served from the cache
+    assert first.status_code == second.status_code == 200
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
 def test_create_account_duplicate_name(client, session, acc_eur):
     # 1. Arrange: Add an account to the database
     session.add(acc_eur)
@@ -75,7 +100,6 @@ def test_create_account_negative_initial_balance(client):
     [
         ("100.50", "100.50"),  # Two decimal places
         ("0.01", "0.01"),  # Small decimal
-        ("123.456789", "123.456789"),  # High precision
         (100, "100"),  # Integer input
         (100.50, "100.50"),  # Float input
     ],
@@ -96,9 +120,19 @@ def test_create_account_precision_and_types(client, initial_balance, expected_ba
     assert Decimal(data["initial_balance"]) == Decimal(expected_balance)
 
 
+def test_create_account_rejects_more_decimals_than_the_currency_has(client):
+    response = client.post(
+        "/accounts",
+        json={"name": "Too Precise", "currency": "JPY", "initial_balance": "10.5"},
+    )
+
+    assert response.status_code == 400
+    assert "more than 0 decimal places" in response.json()["detail"]
+
+
 def test_decimal_precision_persistence_flow(client):
     """
-    Verify that high precision is preserved through a full save-load cycle.
+    Verify that amounts are preserved exactly through a full save-load cycle.
     """
     # Arrange & Act: Create an account with precise decimal value
     create_response = client.post(
@@ -106,7 +140,7 @@ def test_decimal_precision_persistence_flow(client):
         json={
             "name": "Precision Flow Test",
             "currency": "EUR",
-            "initial_balance": "999.99999",
+            "initial_balance": "999.99",
         },
     )
     assert create_response.status_code == 201
@@ -120,4 +154,833 @@ def test_decimal_precision_persistence_flow(client):
     accounts = get_response.json()
     saved_account = next((a for a in accounts if a["id"] == created_id), None)
     assert saved_account is not None, f"Account {created_id} not found"
-    assert Decimal(saved_account["initial_balance"]) == Decimal("999.99999")
+    assert saved_account["initial_balance"] == "999.99"
+
+
+def test_record_entries_batch(client, session, acc_eur):
+    # Arrange
+    session.add(acc_eur)
+    session.commit()
+
+    # Act
+    response = client.post(
+        f"/accounts/{acc_eur.id}/entries:batch",
+        json={
+            "entries": [
+                {
+                    "amount": "100",
+                    "entry_date": "2025-01-03",
+                    "category": "RENT",
+                    "category_type": "EXPENSE",
+                },
+                {
+                    "amount": "500",
+                    "entry_date": "2025-01-02",
+                    "category": "SALARY",
+                    "category_type": "INCOME",
+                },
+            ]
+        },
+    )
+
+    # Assert
+    assert response.status_code == 201
+    data = response.json()
+    assert data["recorded"] == 2
+    assert Decimal(data["balance"]) == Decimal(435)
+
+
+def test_record_entries_batch_insufficient_funds(client, session, acc_eur):
+    # Arrange
+    session.add(acc_eur)
+    session.commit()
+
+    # Act
+    response = client.post(
+        f"/accounts/{acc_eur.id}/entries:batch",
+        json={
+            "entries": [
+                {
+                    "amount": "100",
+                    "entry_date": "2025-01-01",
+                    "category": "RENT",
+                    "category_type": "EXPENSE",
+                }
+            ]
+        },
+    )
+
+    # Assert: Rejected with nothing written
+    assert response.status_code == 409
+    assert "Insufficient funds" in response.json()["detail"]
+    assert session.execute(text("SELECT COUNT(*) FROM entry")).scalar_one() == 0
+
+
+def test_record_entries_batch_unknown_account(client):
+    response = client.post(
+        "/accounts/missing/entries:batch",
+        json={
+            "entries": [
+                {
+                    "amount": "1",
+                    "entry_date": "2025-01-01",
+                    "category_type": "INCOME",
+                }
+            ]
+        },
+    )
+
+    assert response.status_code == 404
+
+
+def test_list_entries_paginates_with_cursor(client, session, acc_eur):
+    # Arrange: Three entries on one account
+    session.add(acc_eur)
+    session.commit()
+    client.post(
+        f"/accounts/{acc_eur.id}/entries:batch",
+        json={
+            "entries": [
+                {"amount": "1", "entry_date": day, "category_type": "EXPENSE"}
+                for day in ("2025-01-01", "2025-01-02", "2025-01-03")
+            ]
+        },
+    )
+
+    # Act: Fetch two pages of two
+    first = client.get(f"/accounts/{acc_eur.id}/entries", params={"limit": 2})
+    second = client.get(
+        f"/accounts/{acc_eur.id}/entries",
+        params={"limit": 2, "cursor": first.json()["next_cursor"]},
+    )
+
+    # Assert
+    assert first.status_code == 200
+    assert [e["entry_date"] for e in first.json()["items"]] == [
+        "2025-01-01",
+        "2025-01-02",
+    ]
+    assert [e["entry_date"] for e in second.json()["items"]] == ["2025-01-03"]
+    assert second.json()["next_cursor"] is None
+
+
+def test_list_entries_filters_by_date_range(client, session, acc_eur):
+    # Arrange
+    session.add(acc_eur)
+    session.commit()
+    client.post(
+        f"/accounts/{acc_eur.id}/entries:batch",
+        json={
+            "entries": [
+                {"amount": "1", "entry_date": day, "category_type": "EXPENSE"}
+                for day in ("2025-01-01", "2025-01-02", "2025-01-03")
+            ]
+        },
+    )
+
+    # Act
+    response = client.get(
+        f"/accounts/{acc_eur.id}/entries",
+        params={"date_from": "2025-01-02", "date_to": "2025-01-02"},
+    )
+
+    # Assert
+    assert [e["entry_date"] for e in response.json()["items"]] == ["2025-01-02"]
+
+
+def test_list_entries_invalid_cursor(client, session, acc_eur):
+    session.add(acc_eur)
+    session.commit()
+
+    response = client.get(f"/accounts/{acc_eur.id}/entries", params={"cursor": "x"})
+
+    assert response.status_code == 400
+
+
+def test_export_entries_streams_csv_and_ndjson(client, session, acc_eur):
+    # Arrange
+    session.add(acc_eur)
+    session.commit()
+    client.post(
+        f"/accounts/{acc_eur.id}/entries:batch",
+        json={
+            "entries": [
+                {"amount": "1.5", "entry_date": day, "category_type": "EXPENSE"}
+                for day in ("2025-01-02", "2025-01-01")
+            ]
+        },
+    )
+
+    # Act
+    csv_response = client.get(f"/accounts/{acc_eur.id}/entries/export")
+    ndjson_response = client.get(
+        f"/accounts/{acc_eur.id}/entries/export",
+        params={"format": "ndjson", "date_from": "2025-01-02"},
+    )
+
+    # Assert
+    assert csv_response.status_code == 200
+    assert csv_response.headers["content-type"].startswith("text/csv")
+    assert csv_response.headers["content-disposition"] == (
+        f'attachment; filename="entries-{acc_eur.id}.csv"'
+    )
+    lines = csv_response.text.splitlines()
+    assert lines[0].startswith("id,account_id,entry_date,amount")
+    assert [line.split(",")[2:4] for line in lines[1:]] == [
+        ["2025-01-01", "-1.50"],
+        ["2025-01-02", "-1.50"],
+    ]
+    assert ndjson_response.headers["content-type"] == "application/x-ndjson"
+    assert [
+        row["entry_date"] for row in map(json.loads, ndjson_response.iter_lines())
+    ] == ["2025-01-02"]
+
+
+def test_export_entries_of_all_accounts(client, session, acc_eur, acc_rub):
+    # Arrange
+    session.add_all([acc_eur, acc_rub])
+    session.commit()
+    for account in (acc_eur, acc_rub):
+        client.post(
+            f"/accounts/{account.id}/entries:batch",
+            json={
+                "entries": [
+                    {
+                        "amount": "1",
+                        "entry_date": "2025-01-01",
+                        "category_type": "INCOME",
+                    }
+                ]
+            },
+        )
+
+    # Act
+    response = client.get("/entries/export", params={"format": "ndjson"})
+
+    # Assert
+    assert response.status_code == 200
+    assert [json.loads(line)["account_id"] for line in response.iter_lines()] == [
+        acc_eur.id,
+        acc_rub.id,
+    ]
+
+
+def test_export_entries_unknown_account(client):
+    response = client.get("/accounts/missing/entries/export")
+
+    assert response.status_code == 404
+
+
+def test_import_statement_runs_in_background(client, session, acc_eur):
+    # Arrange
+    session.add(acc_eur)
+    session.commit()
+    statement = (
+        "date,amount,category\n"
+        "2025-01-01,-2.00,FOOD\n"
+        "2025-01-01,-2.00,FOOD\n"
+        "2025-01-02,10,SALARY\n"
+    )
+
+    # Act: Upload the statement twice; TestClient runs background tasks
+    # before returning the response
+    first = client.post(f"/accounts/{acc_eur.id}/imports", content=statement)
+    second = client.post(
+        f"/accounts/{acc_eur.id}/imports", params={"format": "csv"}, content=statement
+    )
+    progress = client.get(f"/imports/{second.json()['id']}")
+
+    # Assert: The second import only found duplicates
+    assert first.status_code == 202
+    assert first.json()["status"] == "PENDING"
+    assert client.get(f"/imports/{first.json()['id']}").json()["imported"] == 3
+    assert progress.status_code == 200
+    assert progress.json() | {"id": None} == {
+        "id": None,
+        "account_id": acc_eur.id,
+        "format": "csv",
+        "status": "SUCCEEDED",
+        "bytes_total": len(statement),
+        "bytes_read": len(statement),
+        "lines_read": 3,
+        "imported": 0,
+        "duplicates": 3,
+        "error": None,
+        "progress": 1.0,
+    }
+    entries = client.get(f"/accounts/{acc_eur.id}/entries").json()["items"]
+    assert len(entries) == 3
+
+
+def test_import_statement_reports_failure(client, session, acc_eur):
+    session.add(acc_eur)
+    session.commit()
+
+    created = client.post(
+        f"/accounts/{acc_eur.id}/imports",
+        params={"format": "ofx"},
+        content="<STMTTRN><DTPOSTED>20250101</STMTTRN>",
+    )
+    job = client.get(f"/imports/{created.json()['id']}").json()
+
+    assert job["status"] == "FAILED"
+    assert job["error"] == "Line 1: transaction without TRNAMT"
+
+
+def test_import_statement_unknown_account_or_job(client):
+    assert client.post("/accounts/missing/imports", content="").status_code == 404
+    assert client.get("/imports/missing").status_code == 404
+
+
+def test_get_accounts_includes_balance_after_entries(client, session, acc_eur):
+    # Arrange
+    session.add(acc_eur)
+    session.commit()
+    client.post(
+        f"/accounts/{acc_eur.id}/entries:batch",
+        json={
+            "entries": [
+                {"amount": "5", "entry_date": "2025-01-01", "category_type": "EXPENSE"}
+            ]
+        },
+    )
+
+    # Act
+    response = client.get("/accounts")
+
+    # Assert
+    assert Decimal(response.json()[0]["balance"]) == Decimal(30)
+
+
+def test_spending_report_groups_expenses_by_month(client, session, acc_eur):
+    # Arrange
+    session.add(acc_eur)
+    session.commit()
+    client.post(
+        f"/accounts/{acc_eur.id}/entries:batch",
+        json={
+            "entries": [
+                {
+                    "amount": "5.50",
+                    "entry_date": "2025-01-03",
+                    "category": "TAXI",
+                    "category_type": "EXPENSE",
+                },
+                {
+                    "amount": "4.50",
+                    "entry_date": "2025-01-20",
+                    "category": "FOOD",
+                    "category_type": "EXPENSE",
+                },
+                {
+                    "amount": "7",
+                    "entry_date": "2025-02-01",
+                    "category": "FOOD",
+                    "category_type": "EXPENSE",
+                },
+            ]
+        },
+    )
+
+    # Act
+    response = client.get(
+        "/reports/spending",
+        params={"from": "2025-01-01", "to": "2025-01-31", "group_by": "month"},
+    )
+
+    # Assert: Only January expenses, summed in the database
+    assert response.status_code == 200
+    assert response.json() == {
+        "group_by": "month",
+        "date_from": "2025-01-01",
+        "date_to": "2025-01-31",
+        "items": [{"key": "2025-01", "currency": "EUR", "total": "10.00", "entries": 2}],
+    }
+
+
+def test_spending_report_rejects_inverted_range(client):
+    response = client.get(
+        "/reports/spending", params={"from": "2025-02-01", "to": "2025-01-01"}
+    )
+
+    assert response.status_code == 400
+    assert "Invalid date range" in response.json()["detail"]
+
+
+def test_balance_history_reads_daily_balances(client, session, acc_eur):
+    # Arrange
+    session.add(acc_eur)
+    session.commit()
+    client.post(
+        f"/accounts/{acc_eur.id}/entries:batch",
+        json={
+            "entries": [
+                {
+                    "amount": "5.50",
+                    "entry_date": "2025-01-03",
+                    "category": "TAXI",
+                    "category_type": "EXPENSE",
+                },
+                {
+                    "amount": "100",
+                    "entry_date": "2025-01-20",
+                    "category": "SALARY",
+                    "category_type": "INCOME",
+                },
+            ]
+        },
+    )
+
+    # Act
+    on_date = client.get(f"/accounts/{acc_eur.id}/balance", params={"on": "2025-01-10"})
+    history = client.get(
+        f"/accounts/{acc_eur.id}/balance-history",
+        params={"date_from": "2025-01-01"},
+    )
+
+    # Assert
+    assert on_date.json() == {
+        "account_id": acc_eur.id,
+        "on": "2025-01-10",
+        "currency": "EUR",
+        "balance": "29.50",
+    }
+    assert history.json() == {
+        "account_id": acc_eur.id,
+        "currency": "EUR",
+        "items": [
+            {"balance_date": "2025-01-01", "balance": "35.00"},
+            {"balance_date": "2025-01-03", "balance": "29.50"},
+            {"balance_date": "2025-01-20", "balance": "129.50"},
+        ],
+    }
+
+
+def test_balance_unknown_account(client):
+    response = client.get("/accounts/missing/balance")
+
+    assert response.status_code == 404
+
+
+def test_transfer_moves_funds_between_accounts(client, session, acc_eur, acc_rub):
+    # Arrange
+    session.add_all([acc_eur, acc_rub])
+    session.commit()
+
+    # Act
+    response = client.post(
+        "/transfers",
+        json={
+            "from_account_id": acc_eur.id,
+            "to_account_id": acc_rub.id,
+            "entry_date": "2025-01-01",
+            "debit_amount": "10",
+            "credit_amount": "1000",
+        },
+    )
+
+    # Assert
+    assert response.status_code == 201
+    body = response.json()
+    assert (body["debit"]["amount"], body["credit"]["amount"]) == ("-10.00", "1000.00")
+    balances = {a["id"]: a["balance"] for a in client.get("/accounts").json()}
+    assert balances == {acc_eur.id: "25.00", acc_rub.id: "1000.00"}
+
+
+def test_transfer_insufficient_funds(client, session, acc_eur, acc_rub):
+    session.add_all([acc_eur, acc_rub])
+    session.commit()
+
+    response = client.post(
+        "/transfers",
+        json={
+            "from_account_id": acc_rub.id,
+            "to_account_id": acc_eur.id,
+            "entry_date": "2025-01-01",
+            "debit_amount": "1",
+            "credit_amount": "0.01",
+        },
+    )
+
+    assert response.status_code == 409
+
+
+def test_transfer_across_currencies_converts_at_stored_rate(
+    client, session, acc_eur, acc_rub
+):
+    session.add_all([acc_eur, acc_rub])
+    session.commit()
+    transfer = {
+        "from_account_id": acc_eur.id,
+        "to_account_id": acc_rub.id,
+        "entry_date": "2025-01-02",
+        "debit_amount": "10",
+    }
+
+    missing = client.post("/transfers", json=transfer)
+    client.post(
+        "/fx-rates",
+        json={
+            "rates": [
+                {
+                    "base": "EUR",
+                    "quote": "RUB",
+                    "rate_date": "2025-01-01",
+                    "rate": "98.5",
+                }
+            ]
+        },
+    )
+    response = client.post("/transfers", json=transfer)
+
+    assert missing.status_code == 422
+    assert response.status_code == 201
+    assert response.json()["credit"]["amount"] == "985.00"
+
+
+def test_fx_rates_are_stored_and_looked_up_by_date(client):
+    response = client.post(
+        "/fx-rates",
+        json={
+            "rates": [
+                {
+                    "base": "EUR",
+                    "quote": "USD",
+                    "rate_date": "2025-01-01",
+                    "rate": "1.07",
+                },
+                {
+                    "base": "EUR",
+                    "quote": "USD",
+                    "rate_date": "2025-01-03",
+                    "rate": "1.09",
+                },
+            ]
+        },
+    )
+
+    assert response.status_code == 201
+    assert response.json() == {"stored": 2}
+    rate = client.get("/fx-rates/EUR/USD", params={"on": "2025-01-02"}).json()
+    assert (rate["rate_date"], rate["rate"]) == ("2025-01-01", "1.07")
+    assert (
+        client.get("/fx-rates/USD/EUR", params={"on": "2024-12-31"}).status_code == 404
+    )
+    invalid = {"base": "EUR", "quote": "USD", "rate_date": "2025-01-01", "rate": "-1"}
+    assert client.post("/fx-rates", json={"rates": [invalid]}).status_code == 400
+
+
+def test_net_worth_converts_balances_to_one_currency(client, session, acc_eur, acc_rub):
+    # Arrange
+    session.add_all([acc_eur, acc_rub])
+    acc_rub.record_entry(
+        Decimal(1000),
+        date(2025, 1, 1),
+        category="GIFT",
+        category_type=CategoryType.INCOME,
+    )
+    session.commit()
+    client.post(
+        "/fx-rates",
+        json={
+            "rates": [
+                {"base": "EUR", "quote": "RUB", "rate_date": "2025-01-01", "rate": "100"}
+            ]
+        },
+    )
+
+    # Act
+    response = client.get("/net-worth", params={"currency": "EUR", "on": "2025-01-02"})
+
+    # Assert: RUB is valued at the inverse of the EUR/RUB rate
+    assert response.status_code == 200
+    body = response.json()
+    assert body["total"] == "45.00"
+    assert [(i["currency"], i["balance"], i["converted"]) for i in body["items"]] == [
+        ("EUR", "35.00", "35.00"),
+        ("RUB", "1000.00", "10.00"),
+    ]
+    unpriced = client.get("/net-worth", params={"currency": "USD", "on": "2025-01-02"})
+    assert unpriced.status_code == 422
+
+
+def test_budgets_report_spending_and_alert_when_exceeded(client, session, acc_eur):
+    # Arrange
+    session.add(acc_eur)
+    session.commit()
+    budget = client.put("/budgets/FOOD", json={"currency": "EUR", "limit": "10"})
+
+    # Act
+    batch = client.post(
+        f"/accounts/{acc_eur.id}/entries:batch",
+        json={
+            "entries": [
+                {
+                    "amount": "12.5",
+                    "entry_date": "2025-01-02",
+                    "category": "FOOD",
+                    "category_type": "EXPENSE",
+                }
+            ]
+        },
+    )
+    report = client.get("/budgets", params={"month": "2025-01"})
+
+    # Assert
+    assert budget.json() == {"category": "FOOD", "currency": "EUR", "limit": "10.00"}
+    [alert] = batch.json()["budget_alerts"]
+    assert (alert["spent"], alert["remaining"]) == ("12.50", "-2.50")
+    assert report.json()["items"] == [alert]
+    assert alert["over_budget"] is True
+    other = client.get("/budgets", params={"month": "2025-02", "over_budget": "true"})
+    assert other.json() == {"month": "2025-02", "items": []}
+
+
+def test_budget_errors(client):
+    invalid = client.put("/budgets/FOOD", json={"currency": "EUR", "limit": "0"})
+    month = client.get("/budgets", params={"month": "2025-13"})
+    missing = client.delete("/budgets/FOOD", params={"currency": "EUR"})
+
+    assert (invalid.status_code, month.status_code) == (400, 400)
+    assert missing.status_code == 404
+    client.put("/budgets/FOOD", json={"currency": "EUR", "limit": "1"})
+    assert client.delete("/budgets/FOOD", params={"currency": "EUR"}).status_code == 204
+    assert client.get("/budgets").json()["items"] == []
+
+
+def test_recurring_rules_are_created_listed_and_deleted(client, session, acc_eur):
+    # Arrange
+    session.add(acc_eur)
+    session.commit()
+    payload = {
+        "amount": "12.5",
+        "category": "RENT",
+        "category_type": "EXPENSE",
+        "frequency": "MONTHLY",
+        "start_date": "2025-01-31",
+        "interval": 2,
+    }
+
+    # Act
+    created = client.post(f"/accounts/{acc_eur.id}/recurring-rules", json=payload)
+    rule_id = created.json()["id"]
+    listed = client.get(f"/accounts/{acc_eur.id}/recurring-rules")
+    fetched = client.get(f"/recurring-rules/{rule_id}")
+    deleted = client.delete(f"/recurring-rules/{rule_id}")
+
+    # Assert: Nothing is recorded until the scheduler runs
+    assert created.status_code == 201
+    assert created.json() == {
+        **payload,
+        "id": rule_id,
+        "account_id": acc_eur.id,
+        "amount": "12.50",
+        "currency": "EUR",
+        "until": None,
+        "next_date": "2025-01-31",
+        "materialized": 0,
+        "error": None,
+    }
+    assert listed.json() == [created.json()] == [fetched.json()]
+    assert deleted.status_code == 204
+    assert client.get(f"/recurring-rules/{rule_id}").status_code == 404
+    assert client.get(f"/accounts/{acc_eur.id}/entries").json()["items"] == []
+
+
+def test_recurring_rule_errors(client, session, acc_eur):
+    session.add(acc_eur)
+    session.commit()
+    payload = {
+        "amount": "1",
+        "category_type": "EXPENSE",
+        "frequency": "DAILY",
+        "start_date": "2025-01-02",
+    }
+
+    missing = client.post("/accounts/missing/recurring-rules", json=payload)
+    ended = client.post(
+        f"/accounts/{acc_eur.id}/recurring-rules",
+        json={**payload, "until": "2025-01-01"},
+    )
+    interval = client.post(
+        f"/accounts/{acc_eur.id}/recurring-rules", json={**payload, "interval": 0}
+    )
+
+    assert (missing.status_code, ended.status_code) == (404, 400)
+    assert interval.status_code == 422
+    assert client.get("/accounts/missing/recurring-rules").status_code == 404
+    assert client.delete("/recurring-rules/missing").status_code == 404
+
+
+def test_search_entries_and_complete_categories(client, session, acc_eur):
+    # Arrange
+    session.add(acc_eur)
+    session.commit()
+
+    def record(*categories):
+        client.post(
+            f"/accounts/{acc_eur.id}/entries:batch",
+            json={
+                "entries": [
+                    {
+                        "amount": "1",
+                        "entry_date": f"2025-01-0{day}",
+                        "category": category,
+                        "category_type": "EXPENSE",
+                    }
+                    for day, category in enumerate(categories, start=1)
+                ]
+            },
+        )
+
+    record("COFFEE_SHOP", "Cinema", "coffee beans")
+    before = client.get("/categories/autocomplete", params={"prefix": "c"})
+
+    # Act: The index is loaded; new entries are added to it as recorded
+    record("COFFEE_SHOP")
+    after = client.get("/categories/autocomplete", params={"prefix": "C", "limit": 2})
+    found = client.get("/entries/search", params={"q": "cof shop", "limit": 1})
+    rest = client.get(
+        "/entries/search",
+        params={"q": "cof shop", "cursor": found.json()["next_cursor"]},
+    )
+
+    # Assert
+    assert [s["category"] for s in before.json()] == [
+        "COFFEE_SHOP",
+        "Cinema",
+        "coffee beans",
+    ]
+    assert after.json() == [
+        {"category": "COFFEE_SHOP", "entries": 2},
+        {"category": "Cinema", "entries": 1},
+    ]
+    assert [e["entry_date"] for e in found.json()["items"]] == ["2025-01-01"]
+    assert [e["entry_date"] for e in rest.json()["items"]] == ["2025-01-01"]
+    assert rest.json()["next_cursor"] is None
+
+
+def test_search_entries_errors(client):
+    assert client.get("/entries/search", params={"q": "--"}).status_code == 400
+    missing = client.get("/entries/search", params={"q": "a", "account_id": "x"})
+    assert missing.status_code == 404
+    too_many = client.get("/categories/autocomplete", params={"limit": 100})
+    assert too_many.status_code == 422
+
+
+def test_create_account_retry_with_idempotency_key_replays_response(client):
+    # Arrange
+    payload = {"name": "Cash", "currency": "EUR", "initial_balance": "10"}
+    headers = {"Idempotency-Key": "create-cash-1"}
+
+    # Act: The client retries after, say, a timeout
+    first = client.post("/accounts", json=payload, headers=headers)
+    retry = client.post("/accounts", json=payload, headers=headers)
+
+    # Assert: The same 201 instead of a duplicate-name 409, and one account
+    assert first.status_code == retry.status_code == 201
+    assert retry.json() == first.json()
+    assert retry.headers["Idempotent-Replayed"] == "true"
+    assert "Idempotent-Replayed" not in first.headers
+    assert len(client.get("/accounts").json()) == 1
+
+
+def test_idempotency_key_reused_for_different_request(client):
+    headers = {"Idempotency-Key": "k1"}
+    client.post("/accounts", json={"name": "Cash", "currency": "EUR"}, headers=headers)
+
+    response = client.post(
+        "/accounts", json={"name": "Bank", "currency": "EUR"}, headers=headers
+    )
+
+    assert response.status_code == 422
+    assert len(client.get("/accounts").json()) == 1
+
+
+def test_transfer_retry_with_idempotency_key_is_applied_once(
+    client, session, acc_eur, acc_rub
+):
+    # Arrange
+    session.add_all([acc_eur, acc_rub])
+    session.commit()
+    payload = {
+        "from_account_id": acc_eur.id,
+        "to_account_id": acc_rub.id,
+        "entry_date": "2025-01-01",
+        "debit_amount": "10",
+        "credit_amount": "1000",
+    }
+
+    # Act
+    for _ in range(3):
+        response = client.post(
+            "/transfers", json=payload, headers={"Idempotency-Key": "t1"}
+        )
+
+    # Assert
+    assert response.status_code == 201
+    balances = {a["id"]: a["balance"] for a in client.get("/accounts").json()}
+    assert balances == {acc_eur.id: "25.00", acc_rub.id: "1000.00"}
+
+
+def test_request_whose_response_cannot_be_stored_changes_nothing(
+    client, session, acc_eur, monkeypatch
+):
+    # Arrange
+    session.add(acc_eur)
+    session.commit()
+    add_record = SqlAlchemyRepository.add_idempotency_record
+
+    def fail_once(self, record, expires_at):
+        monkeypatch.setattr(SqlAlchemyRepository, "add_idempotency_record", add_record)
+        raise RuntimeError("database went away")
+
+    monkeypatch.setattr(SqlAlchemyRepository, "add_idempotency_record", fail_once)
+    url = f"/accounts/{acc_eur.id}/entries:batch"
+    batch = {
+        "entries": [
+            {"amount": "10", "entry_date": "2025-01-01", "category_type": "EXPENSE"}
+        ]
+    }
+    headers = {"Idempotency-Key": "b1"}
+
+    # Act: The entries were written before storing the response failed
+    failed = client.post(url, json=batch, headers=headers)
+    response = client.post(url, json=batch, headers=headers)
+    retry = client.post(url, json=batch, headers=headers)
+
+    # Assert: The batch is applied once
+    assert failed.status_code == 400
+    assert response.status_code == retry.status_code == 201
+    assert retry.headers["Idempotent-Replayed"] == "true"
+    assert response.json()["balance"] == "25.00"
+    assert client.get("/accounts").json()[0]["balance"] == "25.00"
+
+
+def test_failed_request_can_be_retried_with_its_key(client, session, acc_eur):
+    # Arrange
+    session.add(acc_eur)
+    session.commit()
+    batch = {
+        "entries": [
+            {"amount": "50", "entry_date": "2025-01-01", "category_type": "EXPENSE"}
+        ]
+    }
+    url = f"/accounts/{acc_eur.id}/entries:batch"
+    headers = {"Idempotency-Key": "b1"}
+    client.post(url, json=batch, headers=headers)
+
+    # Act: Retried after more funds arrived
+    client.post(
+        url,
+        json={
+            "entries": [
+                {"amount": "20", "entry_date": "2025-01-01", "category_type": "INCOME"}
+            ]
+        },
+    )
+    response = client.post(url, json=batch, headers=headers)
+
+    # Assert: The retry ran again instead of replaying the failure
+    assert response.status_code == 201
+    assert response.json()["balance"] == "5.00"
@@ -0,0 +1,75 @@
+from app.autocomplete import MAX_SUGGESTIONS, CategoryIndex, CategoryTrie
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class CountingRepository:
+    def __init__(self, counts):
+        self.counts = counts
+        self.loads = 0
+
+    def category_counts(self):
+        self.loads += 1
+        return list(self.counts)
+
+
+def test_trie_completes_most_used_categories_first():
+    trie = CategoryTrie([("TAXI", 2), ("Tea", 5), ("TRAVEL", 5), ("FOOD", 9)])
+
+    assert trie.complete("t") == [("TRAVEL", 5), ("Tea", 5), ("TAXI", 2)]
+    assert trie.complete("TE") == [("Tea", 5)]
+    assert trie.complete("", limit=2) == [("FOOD", 9), ("TRAVEL", 5)]
+    assert trie.complete("x") == []
+    assert len(trie) == 4
+
+
+def test_trie_reranks_categories_as_they_are_added():
+    trie = CategoryTrie([("TAXI", 2), ("TEA", 3)])
+
+    trie.add("TAXI", 2)
+    trie.add("TENNIS")
+
+    assert trie.complete("t") == [("TAXI", 4), ("TEA", 3), ("TENNIS", 1)]
+    assert trie.complete("te") == [("TEA", 3), ("TENNIS", 1)]
+
+
+def test_trie_keeps_the_top_categories_of_every_prefix():
+    # Arrange: More categories under "c" than a node keeps
+    trie = CategoryTrie((f"C{n:02d}", n + 1) for n in range(MAX_SUGGESTIONS + 5))
+
+    # Act: A rare category becomes the most used one
+    trie.add("C00", 100)
+
+    # Assert
+    top = trie.complete("c", limit=MAX_SUGGESTIONS)
+    assert len(top) == MAX_SUGGESTIONS
+    assert top[:2] == [("C00", 101), (f"C{MAX_SUGGESTIONS + 4:02d}", 25)]
+    assert trie.complete("c01") == [("C01", 2)]
+
+
+def test_index_loads_once_and_reloads_after_ttl():
+    # Arrange
+    clock = FakeClock()
+    repo = CountingRepository([("FOOD", 1)])
+    index = CategoryIndex(ttl=60, clock=clock)
+    index.add(["IGNORED"])
+
+    # Act: Entries recorded through this process update the loaded trie
+    first = index.complete(repo, "f")
+    index.add(["FOOD", "FUEL", None])
+    second = index.complete(repo, "f")
+    repo.counts = [("FOOD", 7)]
+    clock.now = 60
+    reloaded = index.complete(repo, "f")
+
+    # Assert
+    assert first == [("FOOD", 1)]
+    assert second == [("FOOD", 2), ("FUEL", 1)]
+    assert reloaded == [("FOOD", 7)]
+    assert repo.loads == 2
@@ -0,0 +1,162 @@
+from datetime import date
+from decimal import Decimal
+
+from sqlalchemy import select, text
+
+from app import balances, repository
+from app.db import CATEGORY_TYPE_CODES, daily_balances
+from app.model import Account, CategoryType, transfer
+from app.money import Money
+from conftest import JAN_01, JAN_02, JAN_03
+
+
+def _rows(session) -> list[tuple]:
+    query = select(daily_balances).order_by(
+        daily_balances.c.account_id, daily_balances.c.balance_date
+    )
+    return [tuple(row) for row in session.execute(query)]
+
+
+def test_record_entry_maintains_daily_balances(session, acc_eur):
+    # Arrange
+    session.add(acc_eur)
+    acc_eur.record_entry(
+        Decimal(5), JAN_01, category="TAXI", category_type=CategoryType.EXPENSE
+    )
+    acc_eur.record_entry(
+        Decimal(1), JAN_03, category="TAXI", category_type=CategoryType.EXPENSE
+    )
+    session.commit()
+
+    # Act: A back-dated entry lands between the existing days
+    acc_eur.record_entry(
+        Decimal(10), JAN_02, category="SALARY", category_type=CategoryType.INCOME
+    )
+    session.commit()
+
+    # Assert: Its day is opened from JAN_01 and the later day is shifted
+    assert _rows(session) == [
+        ("a1", JAN_01, 3000),
+        ("a1", JAN_02, 4000),
+        ("a1", JAN_03, 3900),
+    ]
+
+
+def test_transfer_maintains_daily_balances_of_both_accounts(session, acc_eur, acc_rub):
+    # Arrange
+    session.add_all([acc_eur, acc_rub])
+
+    # Act
+    transfer(acc_eur, acc_rub, JAN_01, debit_amt=Decimal(10), credit_amt=Decimal(1000))
+    session.commit()
+
+    # Assert
+    assert _rows(session) == [("a1", JAN_01, 2500), ("a2", JAN_01, 100000)]
+
+
+def test_bulk_added_entries_maintain_daily_balances(session, acc_eur):
+    # Arrange
+    repo = repository.SqlAlchemyRepository(session)
+    repo.add(acc_eur)
+    session.commit()
+
+    # Act
+    repo.add_entries(
+        acc_eur.record_entries(
+            [
+                (Decimal(5), JAN_02, "TAXI", CategoryType.EXPENSE),
+                (Decimal(3), JAN_01, "FOOD", CategoryType.EXPENSE),
+                (Decimal(2), JAN_02, "FOOD", CategoryType.EXPENSE),
+            ]
+        )
+    )
+    session.commit()
+
+    # Assert: One row per day, read back by date
+    assert _rows(session) == [("a1", JAN_01, 3200), ("a1", JAN_02, 2500)]
+    assert repo.balance_at("a1", date(2024, 12, 31)) == Money(3500, "EUR")
+    assert repo.balance_at("a1", JAN_03) == Money(2500, "EUR")
+    assert repo.daily_balances("a1", date_from=JAN_02) == [(JAN_02, Money(2500, "EUR"))]
+    assert repo.balance_at("missing", JAN_01) is None
+
+
+def test_bulk_entries_between_existing_days_shift_later_rows(session, acc_eur):
+    # Arrange: Rows on Jan 02 and Jan 05
+    repo = repository.SqlAlchemyRepository(session)
+    repo.add(acc_eur)
+    for day in (JAN_02, date(2025, 1, 5)):
+        acc_eur.record_entry(
+            Decimal(1), day, category="FOOD", category_type=CategoryType.EXPENSE
+        )
+    session.commit()
+
+    # Act: A batch around, between and on them
+    repo.add_entries(
+        acc_eur.record_entries(
+            [
+                (Decimal(10), day, "SALARY", CategoryType.INCOME)
+                for day in (JAN_01, JAN_03, date(2025, 1, 5), date(2025, 1, 6))
+            ]
+        )
+    )
+    session.commit()
+
+    # Assert: The same rows as rebuilt from the entries
+    rows = _rows(session)
+    assert rows == [
+        ("a1", JAN_01, 4500),
+        ("a1", JAN_02, 4400),
+        ("a1", JAN_03, 5400),
+        ("a1", date(2025, 1, 5), 6300),
+        ("a1", date(2025, 1, 6), 7300),
+    ]
+    balances.backfill(session.connection())
+    assert _rows(session) == rows
+
+
+def test_backfill_and_repair_rebuild_rows_from_entries(session, acc_eur, acc_rub):
+    # Arrange: Entries written around the app, plus a drifted row
+    session.add_all([acc_eur, acc_rub])
+    acc_rub.record_entry(
+        Decimal(1), JAN_01, category="SALARY", category_type=CategoryType.INCOME
+    )
+    session.commit()
+    session.execute(
+        text(
+            "INSERT INTO entry "
+            "(id, account_id, amount, currency, entry_date, category_type)"
+            "VALUES ('x', 'a1', -500, 'EUR', '2025-01-02', :expense)"
+        ),
+        {"expense": CATEGORY_TYPE_CODES[CategoryType.EXPENSE]},
+    )
+    session.execute(text("UPDATE daily_balance SET balance = 1 WHERE account_id = 'a2'"))
+    conn = session.connection()
+
+    # Act
+    repaired = balances.repair(conn)
+
+    # Assert: Only the affected accounts were rebuilt
+    assert repaired == ["a1", "a2"]
+    assert _rows(session) == [("a1", JAN_02, 3000), ("a2", JAN_01, 100)]
+    assert balances.repair(conn) == []
+    assert balances.backfill(conn, ["a1"]) == 1
+    assert _rows(session) == [("a1", JAN_02, 3000), ("a2", JAN_01, 100)]
+
+
+def test_balances_by_currency_sums_closing_balances_in_sql(session, acc_eur, acc_rub):
+    # Arrange
+    savings = Account("a3", "EUR_2", "EUR", Decimal(5))
+    session.add_all([acc_eur, acc_rub, savings])
+    transfer(acc_eur, acc_rub, JAN_02, debit_amt=Decimal(10), credit_amt=Decimal(1000))
+    session.commit()
+    repo = repository.SqlAlchemyRepository(session)
+
+    # Act / Assert: Before JAN_02 the initial balances are used
+    assert repo.balances_by_currency(JAN_01) == [
+        (Money(4000, "EUR"), 2),
+        (Money(0, "RUB"), 1),
+    ]
+    assert repo.balances_by_currency(JAN_03) == [
+        (Money(3000, "EUR"), 2),
+        (Money(100000, "RUB"), 1),
+    ]
@@ -0,0 +1,141 @@
+from decimal import Decimal
+
+from sqlalchemy import select
+
+from app import budgets, repository
+from app.db import budget_spend
+from app.model import Budget, CategoryType, transfer
+from app.money import Money
+from conftest import JAN_01, JAN_02, JAN_03
+
+
+def _rows(session) -> list[tuple]:
+    query = select(budget_spend).order_by(
+        budget_spend.c.category, budget_spend.c.month, budget_spend.c.currency
+    )
+    return [tuple(row) for row in session.execute(query)]
+
+
+def test_record_entry_maintains_budget_spend(session, acc_eur, acc_rub):
+    # Arrange
+    session.add_all([acc_eur, acc_rub])
+    acc_eur.record_entry(
+        Decimal(5), JAN_01, category="FOOD", category_type=CategoryType.EXPENSE
+    )
+    session.commit()
+
+    # Act: Only categorized expenses count, per currency
+    acc_eur.record_entry(
+        Decimal(2), JAN_02, category="FOOD", category_type=CategoryType.EXPENSE
+    )
+    acc_eur.record_entry(
+        Decimal(10), JAN_02, category="FOOD", category_type=CategoryType.INCOME
+    )
+    acc_eur.record_entry(
+        Decimal(1), JAN_03, category=None, category_type=CategoryType.EXPENSE
+    )
+    transfer(acc_eur, acc_rub, JAN_03, debit_amt=Decimal(1), credit_amt=Decimal(100))
+    acc_rub.record_entry(
+        Decimal(50), JAN_03, category="FOOD", category_type=CategoryType.EXPENSE
+    )
+    session.commit()
+
+    # Assert
+    assert _rows(session) == [
+        ("FOOD", "2025-01", "EUR", 700),
+        ("FOOD", "2025-01", "RUB", 5000),
+    ]
+
+
+def test_deleted_entries_are_taken_off_budget_spend(session, acc_eur):
+    # Arrange
+    session.add(acc_eur)
+    entry = acc_eur.record_entry(
+        Decimal(5), JAN_01, category="FOOD", category_type=CategoryType.EXPENSE
+    )
+    session.commit()
+
+    # Act
+    session.delete(entry)
+    session.commit()
+
+    # Assert
+    assert _rows(session) == [("FOOD", "2025-01", "EUR", 0)]
+
+
+def test_bulk_added_entries_maintain_budget_spend(session, acc_eur):
+    # Arrange
+    repo = repository.SqlAlchemyRepository(session)
+    repo.add(acc_eur)
+    session.commit()
+
+    # Act
+    repo.add_entries(
+        acc_eur.record_entries(
+            [
+                (Decimal(5), JAN_02, "TAXI", CategoryType.EXPENSE),
+                (Decimal(3), JAN_01, "FOOD", CategoryType.EXPENSE),
+                (Decimal(2), JAN_02, "FOOD", CategoryType.EXPENSE),
+            ]
+        )
+    )
+    session.commit()
+
+    # Assert: One row per category and month
+    assert _rows(session) == [
+        ("FOOD", "2025-01", "EUR", 500),
+        ("TAXI", "2025-01", "EUR", 500),
+    ]
+
+
+def test_backfill_rebuilds_budget_spend_from_entries(session, acc_eur):
+    # Arrange: Counters that drifted from the entries
+    session.add(acc_eur)
+    acc_eur.record_entry(
+        Decimal(5), JAN_01, category="FOOD", category_type=CategoryType.EXPENSE
+    )
+    session.commit()
+    session.execute(budget_spend.update().values(spent=1))
+    session.execute(
+        budget_spend.insert().values(
+            category="GONE", month="2024-12", currency="EUR", spent=1
+        )
+    )
+
+    # Act
+    written = budgets.backfill(session.connection())
+
+    # Assert
+    assert written == 1
+    assert _rows(session) == [("FOOD", "2025-01", "EUR", 500)]
+
+
+def test_repository_reads_budget_status_from_counters(session, acc_eur):
+    # Arrange
+    repo = repository.SqlAlchemyRepository(session)
+    repo.add(acc_eur)
+    acc_eur.record_entry(
+        Decimal(5), JAN_01, category="FOOD", category_type=CategoryType.EXPENSE
+    )
+    repo.set_budget(Budget("FOOD", Money(400, "EUR")))
+    repo.set_budget(Budget("FOOD", Money(2000, "JPY")))
+    repo.set_budget(Budget("TAXI", Money(300, "EUR")))
+    # Setting a budget again replaces its limit
+    repo.set_budget(Budget("TAXI", Money(900, "EUR")))
+    session.commit()
+
+    # Act
+    statuses = repo.budget_statuses("2025-01")
+
+    # Assert: Budgets without spending report zero
+    assert [(s.budget, s.spent, s.over_budget) for s in statuses] == [
+        (Budget("FOOD", Money(400, "EUR")), Money(500, "EUR"), True),
+        (Budget("FOOD", Money(2000, "JPY")), Money(0, "JPY"), False),
+        (Budget("TAXI", Money(900, "EUR")), Money(0, "EUR"), False),
+    ]
+    assert [
+        s.budget.category for s in repo.budget_statuses("2025-01", {("TAXI", "EUR")})
+    ] == ["TAXI"]
+    assert repo.budget_statuses("2025-01", set()) == []
+    assert repo.delete_budget("TAXI", "EUR") is True
+    assert repo.delete_budget("TAXI", "EUR") is False
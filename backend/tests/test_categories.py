@@ -0,0 +1,102 @@
+import pytest
+from decimal import Decimal
+
+from sqlalchemy import select, text
+
+from app import repository
+from app.categories import category_ids
+from app.db import CATEGORY_TYPE_CODES, categories, entries
+from app.model import CategoryType, Entry
+from conftest import JAN_01, JAN_02
+
+
+def _names(session) -> dict[int, str]:
+    return dict(session.execute(select(categories.c.id, categories.c.name)).all())
+
+
+def test_category_ids_add_missing_categories_once(session):
+    conn = session.connection()
+
+    # Act
+    first = category_ids(conn, ["FOOD", "TAXI", None, "FOOD"])
+    second = category_ids(conn, ["TAXI", "RENT"])
+
+    # Assert: Existing names keep their id, None is skipped
+    assert set(first) == {"FOOD", "TAXI"}
+    assert second["TAXI"] == first["TAXI"]
+    assert _names(session) == {
+        first["FOOD"]: "FOOD",
+        first["TAXI"]: "TAXI",
+        second["RENT"]: "RENT",
+    }
+    assert category_ids(conn, [None]) == {}
+
+
+def test_flushed_entries_refer_to_their_category(session, acc_eur):
+    # Arrange
+    session.add(acc_eur)
+    acc_eur.record_entry(
+        Decimal(5), JAN_01, category="FOOD", category_type=CategoryType.EXPENSE
+    )
+    acc_eur.record_entry(
+        Decimal(1), JAN_02, category=None, category_type=CategoryType.EXPENSE
+    )
+    acc_eur.record_entry(
+        Decimal(2), JAN_02, category="FOOD", category_type=CategoryType.INCOME
+    )
+
+    # Act
+    session.commit()
+
+    # Assert: One category row, types stored as their codes
+    rows = session.execute(
+        text(
+            "SELECT name, category_type FROM entry "
+            "LEFT JOIN category ON category.id = category_id ORDER BY amount"
+        )
+    ).all()
+    assert rows == [
+        ("FOOD", CATEGORY_TYPE_CODES[CategoryType.EXPENSE]),
+        (None, CATEGORY_TYPE_CODES[CategoryType.EXPENSE]),
+        ("FOOD", CATEGORY_TYPE_CODES[CategoryType.INCOME]),
+    ]
+    assert list(_names(session).values()) == ["FOOD"]
+
+
+def test_loaded_entries_read_their_category(session, acc_eur):
+    # Arrange: Written in bulk, so never in the identity map
+    repo = repository.SqlAlchemyRepository(session)
+    repo.add(acc_eur)
+    session.flush()
+    repo.add_entries(
+        acc_eur.record_entries(
+            [
+                (Decimal(5), JAN_01, "FOOD", CategoryType.EXPENSE),
+                (Decimal(3), JAN_02, None, CategoryType.INCOME),
+            ]
+        )
+    )
+    session.commit()
+
+    # Act
+    loaded = session.execute(select(Entry).order_by(entries.c.entry_date)).scalars()
+
+    # Assert
+    assert [(e.category, e.category_type) for e in loaded] == [
+        ("FOOD", CategoryType.EXPENSE),
+        (None, CategoryType.INCOME),
+    ]
+
+
+def test_category_of_stored_entry_is_read_only(session, acc_eur):
+    # Arrange
+    session.add(acc_eur)
+    entry = acc_eur.record_entry(
+        Decimal(5), JAN_01, category="FOOD", category_type=CategoryType.EXPENSE
+    )
+    session.commit()
+
+    # Act / Assert: The new category would never be written
+    with pytest.raises(AttributeError, match="read-only"):
+        entry.category = "RENT"
+    assert session.scalars(select(Entry)).one().category == "FOOD"
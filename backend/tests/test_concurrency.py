@@ -0,0 +1,158 @@
+"""
+Stress tests: concurrent writers never overdraw an account or lose money.
+
+Runs against a SQLite file (the in-memory test database is a single shared
+connection) or against TEST_DATABASE_URL when it points to PostgreSQL.
+"""
+
+import random
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import func, select
+from sqlalchemy.orm import sessionmaker
+
+from app import balances
+from app.config import Settings
+from app.db import accounts, entries, metadata
+from app.dependencies import build_engine
+from app.model import (
+    Account,
+    CategoryType,
+    ConcurrentUpdateError,
+    InsufficientFundsError,
+)
+from app.repository import SqlAlchemyRepository
+from app.services import record_entries, transfer_funds
+from conftest import JAN_01, TEST_DATABASE_URL
+
+ACCOUNTS = 4
+WORKERS = 8
+TRANSFERS_PER_WORKER = 40
+BATCHES_PER_WORKER = 25
+
+
+@pytest.fixture
+def engine(session, tmp_path):
+    # ``session`` starts the mappers and, on PostgreSQL, creates the tables
+    if TEST_DATABASE_URL.startswith("sqlite"):
+        url = f"sqlite:///{tmp_path / 'transfers.db'}"
+    else:
+        url = TEST_DATABASE_URL
+    engine = build_engine(Settings(database_url=url, pool_size=WORKERS))
+    metadata.create_all(engine)
+    yield engine
+    engine.dispose()
+
+
+def _transfer_randomly(factory, account_ids: list[str], seed: int) -> int:
+    rng = random.Random(seed)
+    succeeded = 0
+    for _ in range(TRANSFERS_PER_WORKER):
+        src, dst = rng.sample(account_ids, 2)
+        with factory() as session:
+            try:
+                transfer_funds(
+                    SqlAlchemyRepository(session),
+                    from_account_id=src,
+                    to_account_id=dst,
+                    entry_date=JAN_01,
+                    debit_amount=Decimal(rng.randrange(1, 40)),
+                )
+                succeeded += 1
+            except InsufficientFundsError:
+                session.rollback()
+    return succeeded
+
+
+def test_concurrent_transfers_keep_balances_consistent(engine):
+    # Arrange: Accounts with 100 EUR each
+    factory = sessionmaker(bind=engine)
+    account_ids = [f"acc-{i}" for i in range(ACCOUNTS)]
+    with factory() as session:
+        session.add_all(
+            Account(account_id, account_id, "EUR", Decimal(100))
+            for account_id in account_ids
+        )
+        session.commit()
+
+    # Act: Many workers move random amounts between the same accounts
+    with ThreadPoolExecutor(max_workers=WORKERS) as pool:
+        succeeded = sum(
+            pool.map(
+                lambda seed: _transfer_randomly(factory, account_ids, seed),
+                range(WORKERS),
+            )
+        )
+
+    # Assert: No money was created or lost and no account went negative
+    with engine.connect() as conn:
+        stored = dict(
+            conn.execute(select(accounts.c.id, accounts.c.current_balance)).all()
+        )
+        summed = dict(
+            conn.execute(
+                select(
+                    accounts.c.id,
+                    accounts.c.initial_balance + func.sum(entries.c.amount),
+                )
+                .join(entries, entries.c.account_id == accounts.c.id)
+                .group_by(accounts.c.id, accounts.c.initial_balance)
+            ).all()
+        )
+        entry_count = conn.execute(select(func.count()).select_from(entries)).scalar()
+        drifted = balances.repair(conn)
+    assert succeeded > 0
+    assert entry_count == 2 * succeeded
+    assert sum(stored.values()) == ACCOUNTS * 10000
+    assert min(stored.values()) >= 0
+    # Every cached balance matches the entries, and so do the daily balances
+    assert {key: int(value) for key, value in summed.items()} == {
+        key: value for key, value in stored.items() if key in summed
+    }
+    assert drifted == []
+
+
+def _spend_from_shared_account(factory, account_id: str) -> tuple[int, int]:
+    recorded = gave_up = 0
+    for _ in range(BATCHES_PER_WORKER):
+        with factory() as session:
+            try:
+                record_entries(
+                    SqlAlchemyRepository(session),
+                    account_id=account_id,
+                    entries=[(Decimal(1), JAN_01, "FOOD", CategoryType.EXPENSE)],
+                )
+                recorded += 1
+            except ConcurrentUpdateError:
+                gave_up += 1
+    return recorded, gave_up
+
+
+def test_concurrent_batches_on_shared_account_are_retried(engine):
+    # Arrange: One household account that every worker spends from
+    factory = sessionmaker(bind=engine)
+    with factory() as session:
+        session.add(Account("cash", "cash", "EUR", Decimal(1000)))
+        session.commit()
+
+    # Act: Batches race on the account row without holding locks
+    with ThreadPoolExecutor(max_workers=WORKERS) as pool:
+        results = list(
+            pool.map(
+                lambda _: _spend_from_shared_account(factory, "cash"), range(WORKERS)
+            )
+        )
+
+    # Assert: Every batch applied exactly once, after retries if needed
+    recorded = sum(result[0] for result in results)
+    gave_up = sum(result[1] for result in results)
+    with engine.connect() as conn:
+        balance = conn.execute(select(accounts.c.current_balance)).scalar_one()
+        entry_count = conn.execute(select(func.count()).select_from(entries)).scalar()
+        drifted = balances.repair(conn)
+    assert recorded + gave_up == WORKERS * BATCHES_PER_WORKER
+    assert entry_count == recorded
+    assert balance == 100000 - 100 * recorded
+    assert drifted == []
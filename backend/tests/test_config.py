@@ -0,0 +1,64 @@
+from app.config import Settings, SqlitePragmas
+
+
+def test_settings_defaults_without_environment(monkeypatch):
+    for name in (
+        "DATABASE_URL",
+        "ASYNC_DATABASE",
+        "DATABASE_POOL_SIZE",
+        "DATABASE_MAX_OVERFLOW",
+        "DATABASE_POOL_PRE_PING",
+        "DATABASE_STATEMENT_TIMEOUT_MS",
+        "ACCOUNT_CACHE_SIZE",
+        "ACCOUNT_CACHE_TTL_SECONDS",
+    ):
+        monkeypatch.delenv(name, raising=False)
+
+    assert Settings.from_env() == Settings()
+
+
+def test_settings_read_from_environment(monkeypatch):
+    monkeypatch.setenv("DATABASE_URL", "postgresql://budget@db/budget")
+    monkeypatch.setenv("ASYNC_DATABASE", "true")
+    monkeypatch.setenv("DATABASE_POOL_SIZE", "20")
+    monkeypatch.setenv("DATABASE_MAX_OVERFLOW", "0")
+    monkeypatch.setenv("DATABASE_POOL_PRE_PING", "no")
+    monkeypatch.setenv("DATABASE_STATEMENT_TIMEOUT_MS", "5000")
+
+    settings = Settings.from_env()
+
+    assert settings == Settings(
+        database_url="postgresql://budget@db/budget",
+        async_database=True,
+        pool_size=20,
+        max_overflow=0,
+        pool_pre_ping=False,
+        statement_timeout_ms=5000,
+    )
+
+
+def test_account_cache_read_from_environment(monkeypatch):
+    monkeypatch.setenv("ACCOUNT_CACHE_SIZE", "0")
+    monkeypatch.setenv("ACCOUNT_CACHE_TTL_SECONDS", "2.5")
+
+    settings = Settings.from_env()
+
+    assert settings.account_cache_size == 0
+    assert settings.account_cache_ttl_seconds == 2.5
+
+
+def test_sqlite_pragmas_can_be_disabled(monkeypatch):
+    monkeypatch.setenv("SQLITE_PRAGMAS", "0")
+
+    assert Settings.from_env().sqlite_pragmas is None
+
+
+def test_sqlite_pragmas_read_from_environment(monkeypatch):
+    monkeypatch.setenv("SQLITE_SYNCHRONOUS", "FULL")
+    monkeypatch.setenv("SQLITE_BUSY_TIMEOUT_MS", "250")
+
+    pragmas = Settings.from_env().sqlite_pragmas
+
+    assert pragmas == SqlitePragmas(synchronous="FULL", busy_timeout_ms=250)
+    assert "PRAGMA synchronous=FULL" in pragmas.statements()
+    assert "PRAGMA busy_timeout=250" in pragmas.statements()
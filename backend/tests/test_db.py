@@ -1,16 +1,22 @@
+import pytest
 from decimal import Decimal
 from sqlalchemy import select, text
 
+from app.db import CATEGORY_TYPE_CODES
 from app.model import Account
+from app.model import CategoryType
+from app.money import Money
+from conftest import JAN_01
+from conftest import TEST_DATABASE_URL
 
 
 def test_account_mapper_loads_accounts(session):
     session.execute(
         text(
             "INSERT INTO account (id, name, currency, initial_balance) VALUES "
-            '("acc-1", "Revolut 1", "EUR", "25"),'
-            '("acc-2", "Revolut 2",  "EUR", "0"),'
-            '("acc-3", "Sparkasse",    "EUR", "100")'
+            "('acc-1', 'Revolut 1', 'EUR', 25),"
+            "('acc-2', 'Revolut 2',  'EUR', 0),"
+            "('acc-3', 'Sparkasse',    'EUR', 100)"
         )
     )
     expected: set[Account] = {
@@ -30,9 +36,8 @@ def test_account_mapper_saves_account(session, acc_eur):
     assert rows[0] == acc_eur
 
 
-def test_decimal_survives_database_roundtrip(session):
-    """Verify SQLAlchemy returns proper Decimal objects after
-    database persistence roundtrip."""
+def test_money_survives_database_roundtrip(session):
+    """Verify money is stored as integer minor units and reloaded exactly."""
     # 1. Arrange: Create an Account with a Decimal initial_balance
     acc = Account(None, "Test", "EUR", Decimal("100.50"))
     session.add(acc)
@@ -41,8 +46,128 @@ def test_decimal_survives_database_roundtrip(session):
     # 2. Act: Expunge and reload the Account from database
     session.expunge_all()
     loaded = session.execute(select(Account)).scalars().first()
+    stored = session.execute(text("SELECT initial_balance FROM account")).scalar()
 
-    # 3. Assert: Verify the reloaded initial_balance is a Decimal
-    # instance with correct value
-    assert isinstance(loaded.initial_balance, Decimal)
-    assert loaded.initial_balance == Decimal("100.50")
+    # 3. Assert: The column holds cents and the model returns Money
+    assert stored == 10050
+    assert loaded.initial_balance == Money(10050, "EUR")
+    assert loaded.initial_balance.amount == Decimal("100.50")
+
+
+def test_current_balance_is_persisted_with_entries(session, acc_eur):
+    # Arrange: Persist an account and record an entry on it
+    session.add(acc_eur)
+    session.commit()
+    acc_eur.record_entry(
+        Decimal(5), JAN_01, category="TAXI", category_type=CategoryType.EXPENSE
+    )
+    session.commit()
+
+    # Act: Read the stored balance without touching the entry table
+    stored = session.execute(
+        text("SELECT current_balance FROM account WHERE id = :id"), {"id": acc_eur.id}
+    ).scalar_one()
+
+    # Assert: The running balance was written in the same transaction
+    assert stored == 3000
+
+
+def test_balance_tracks_entries_added_and_removed_through_the_mapping(session, acc_eur):
+    # Arrange: Persist an account with two entries
+    session.add(acc_eur)
+    acc_eur.record_entry(
+        Decimal(5), JAN_01, category="TAXI", category_type=CategoryType.EXPENSE
+    )
+    acc_eur.record_entry(
+        Decimal(10), JAN_01, category="SALARY", category_type=CategoryType.INCOME
+    )
+    session.commit()
+    session.expunge_all()
+
+    # Act: Reload and remove one entry through the relationship
+    loaded = session.execute(select(Account)).scalars().one()
+    income = next(e for e in loaded._entries if e.amount.minor > 0)
+    loaded._entries.remove(income)
+    session.commit()
+
+    # Assert: The cached balance followed the removal and was persisted
+    assert loaded.balance == Money(3000, "EUR")
+    session.expunge_all()
+    reloaded = session.execute(select(Account)).scalars().one()
+    assert reloaded.balance == Money(3000, "EUR")
+
+
+@pytest.mark.skipif(
+    not TEST_DATABASE_URL.startswith("sqlite"), reason="SQLite query plan"
+)
+def test_entry_lookup_by_account_and_date_uses_composite_index(session):
+    # Act: Ask SQLite how it would run a per-account date-range query
+    plan = session.execute(
+        text(
+            "EXPLAIN QUERY PLAN SELECT id FROM entry "
+            "WHERE account_id = 'a1' AND entry_date >= '2025-01-01'"
+        )
+    ).all()
+
+    # Assert: The composite index is used instead of a full table scan
+    details = " ".join(row[-1] for row in plan)
+    assert "ix_entry_account_id_entry_date" in details
+
+
+@pytest.mark.skipif(
+    not TEST_DATABASE_URL.startswith("sqlite"), reason="SQLite query plan"
+)
+def test_spending_report_is_answered_from_covering_index(session):
+    # Act: Ask SQLite how it would run the report's aggregation
+    plan = session.execute(
+        text(
+            "EXPLAIN QUERY PLAN SELECT category_id, currency, sum(amount) "
+            "FROM entry WHERE category_type = :expense "
+            "AND entry_date >= '2025-01-01' GROUP BY category_id, currency"
+        ),
+        {"expense": CATEGORY_TYPE_CODES[CategoryType.EXPENSE]},
+    ).all()
+
+    # Assert: The table itself is never read
+    details = " ".join(row[-1] for row in plan)
+    assert "COVERING INDEX ix_entry_report" in details
+
+
+def test_stale_account_update_raises_stale_data_error(session, acc_eur):
+    # Arrange: A concurrent writer bumps the version after the account loaded
+    from sqlalchemy.orm.exc import StaleDataError
+
+    session.add(acc_eur)
+    session.commit()
+    assert acc_eur.balance == Money(3500, "EUR")
+    session.execute(text("UPDATE account SET version = version + 1"))
+
+    # Act & Assert: The write based on version 1 is refused
+    acc_eur.current_balance = Money(0, "EUR")
+    with pytest.raises(StaleDataError):
+        session.flush()
+
+
+def test_schema_compiles_for_postgresql_with_exact_money_types():
+    # Arrange
+    from sqlalchemy.dialects import postgresql
+    from sqlalchemy.schema import CreateIndex, CreateTable
+
+    from app.db import accounts, entries
+
+    # Act: Render the DDL PostgreSQL would receive
+    dialect = postgresql.dialect()
+    ddl = "\n".join(
+        [
+            str(CreateTable(table).compile(dialect=dialect))
+            for table in (accounts, entries)
+        ]
+        + [str(CreateIndex(index).compile(dialect=dialect)) for index in entries.indexes]
+    )
+
+    # Assert: Money columns hold integer minor units
+    assert "initial_balance BIGINT NOT NULL" in ddl
+    assert "current_balance BIGINT" in ddl
+    assert "amount BIGINT NOT NULL" in ddl
+    assert "currency VARCHAR NOT NULL" in ddl
+    assert "ON entry (account_id, entry_date)" in ddl
@@ -0,0 +1,232 @@
+import asyncio
+import subprocess
+import sys
+from decimal import Decimal
+from pathlib import Path
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, inspect, text
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.pool import StaticPool
+
+from app.config import Settings
+from app.db import metadata
+from app.dependencies import (
+    AsyncServiceRunner,
+    async_database_url,
+    build_async_engine,
+    build_engine,
+    engine_options,
+    init_database,
+)
+from app.main import app, get_runner
+
+
+@pytest.mark.parametrize(
+    "url, expected",
+    [
+        ("sqlite:///budget.db", "sqlite+aiosqlite:///budget.db"),
+        (
+            "postgresql://user:secret@db/budget",
+            "postgresql+psycopg://user:secret@db/budget",
+        ),
+        (
+            "postgresql+psycopg://user:secret@db/budget",
+            "postgresql+psycopg://user:secret@db/budget",
+        ),
+    ],
+)
+def test_async_database_url_swaps_driver(url, expected):
+    assert async_database_url(url) == expected
+
+
+def test_engine_options_for_postgresql_configure_pool_and_timeout():
+    settings = Settings(
+        database_url="postgresql://budget@db/budget",
+        pool_size=20,
+        max_overflow=5,
+        statement_timeout_ms=5000,
+    )
+
+    assert engine_options(settings) == {
+        "pool_pre_ping": True,
+        "pool_size": 20,
+        "max_overflow": 5,
+        "connect_args": {"options": "-c statement_timeout=5000"},
+    }
+
+
+def test_engine_options_for_sqlite_skip_pool_sizing():
+    settings = Settings(database_url="sqlite:///budget.db", statement_timeout_ms=5)
+
+    assert engine_options(settings) == {"pool_pre_ping": True}
+
+
+PRAGMA_QUERIES = {
+    "journal_mode": "wal",
+    "synchronous": 1,  # NORMAL
+    "mmap_size": 256 * 1024 * 1024,
+    "cache_size": -64 * 1024,
+    "temp_store": 2,  # MEMORY
+    "busy_timeout": 5000,
+}
+
+
+def test_build_engine_applies_sqlite_pragma_profile(tmp_path):
+    engine = build_engine(Settings(database_url=f"sqlite:///{tmp_path}/budget.db"))
+
+    with engine.connect() as conn:
+        applied = {
+            name: conn.execute(text(f"PRAGMA {name}")).scalar()
+            for name in PRAGMA_QUERIES
+        }
+    engine.dispose()
+
+    assert applied == PRAGMA_QUERIES
+
+
+def test_build_engine_without_profile_keeps_sqlite_defaults(tmp_path):
+    engine = build_engine(
+        Settings(database_url=f"sqlite:///{tmp_path}/budget.db", sqlite_pragmas=None)
+    )
+
+    with engine.connect() as conn:
+        journal_mode = conn.execute(text("PRAGMA journal_mode")).scalar()
+    engine.dispose()
+
+    assert journal_mode == "delete"
+
+
+def test_build_async_engine_applies_sqlite_pragma_profile(tmp_path):
+    engine = build_async_engine(Settings(database_url=f"sqlite:///{tmp_path}/budget.db"))
+
+    async def read_pragmas():
+        async with engine.connect() as conn:
+            result = await conn.execute(text("PRAGMA synchronous"))
+            synchronous = result.scalar()
+        await engine.dispose()
+        return synchronous
+
+    assert asyncio.run(read_pragmas()) == PRAGMA_QUERIES["synchronous"]
+
+
+def test_importing_the_app_performs_no_database_io(tmp_path):
+    # Act: Import the application from a directory without a database
+    subprocess.run(
+        [sys.executable, "-c", "import app.main"],
+        cwd=tmp_path,
+        env={"PYTHONPATH": str(Path(__file__).parents[1])},
+        check=True,
+    )
+
+    # Assert: No database file was created as an import side effect
+    assert list(tmp_path.iterdir()) == []
+
+
+@pytest.mark.parametrize(
+    "schema_management, creates_tables",
+    [("auto", True), ("external", False)],
+)
+def test_init_database_respects_schema_management(
+    session, tmp_path, schema_management, creates_tables
+):
+    engine = create_engine(f"sqlite:///{tmp_path}/budget.db")
+
+    init_database(engine, Settings(schema_management=schema_management))
+
+    with engine.connect() as conn:
+        assert inspect(conn).has_table("account") is creates_tables
+    engine.dispose()
+
+
+@pytest.fixture
+def async_client(session):
+    """Test client serving requests through the asyncio-native stack."""
+    engine = create_async_engine(
+        "sqlite+aiosqlite:///:memory:",
+        poolclass=StaticPool,
+    )
+
+    async def create_schema():
+        async with engine.begin() as conn:
+            await conn.run_sync(metadata.create_all)
+
+    asyncio.run(create_schema())
+
+    async def override_get_runner():
+        async with AsyncSession(engine, expire_on_commit=False) as async_session:
+            yield AsyncServiceRunner(async_session)
+
+    app.dependency_overrides[get_runner] = override_get_runner
+    yield TestClient(app)
+    app.dependency_overrides.clear()
+    asyncio.run(engine.dispose())
+
+
+def test_async_stack_creates_and_lists_accounts(async_client):
+    # Act: Create an account and record entries through the async stack
+    created = async_client.post(
+        "/accounts",
+        json={"name": "Async Account", "currency": "EUR", "initial_balance": "10"},
+    )
+    account_id = created.json()["id"]
+    recorded = async_client.post(
+        f"/accounts/{account_id}/entries:batch",
+        json={
+            "entries": [
+                {"amount": "4", "entry_date": "2025-01-01", "category_type": "EXPENSE"}
+            ]
+        },
+    )
+    listed = async_client.get("/accounts")
+
+    # Assert
+    assert created.status_code == 201
+    assert recorded.status_code == 201
+    assert [Decimal(a["balance"]) for a in listed.json()] == [Decimal(6)]
+
+
+def test_async_stack_rolls_back_failed_commands(async_client):
+    # Arrange
+    async_client.post(
+        "/accounts",
+        json={"name": "Async Account", "currency": "EUR", "initial_balance": "10"},
+    )
+
+    # Act: A duplicate name fails inside the runner
+    response = async_client.post(
+        "/accounts",
+        json={"name": "Async Account", "currency": "EUR", "initial_balance": "10"},
+    )
+
+    # Assert: The error is mapped and the session is still usable
+    assert response.status_code == 409
+    assert len(async_client.get("/accounts").json()) == 1
+
+
+def test_async_stack_streams_exports(async_client):
+    # Arrange
+    created = async_client.post(
+        "/accounts",
+        json={"name": "Async Account", "currency": "EUR", "initial_balance": "10"},
+    )
+    account_id = created.json()["id"]
+    async_client.post(
+        f"/accounts/{account_id}/entries:batch",
+        json={
+            "entries": [
+                {"amount": "1", "entry_date": day, "category_type": "EXPENSE"}
+                for day in ("2025-01-01", "2025-01-02")
+            ]
+        },
+    )
+
+    # Act
+    response = async_client.get(f"/accounts/{account_id}/entries/export")
+    missing = async_client.get("/accounts/missing/entries/export")
+
+    # Assert: The rows are read through run_sync() while the body is sent
+    assert response.status_code == 200
+    assert len(response.text.splitlines()) == 3
+    assert missing.status_code == 404
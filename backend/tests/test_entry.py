@@ -1,4 +1,4 @@
-from app.model import Entry
+from app.model import CategoryType, Entry, EntryRecord
 from conftest import JAN_01
 from conftest import JAN_02
 from conftest import JAN_03
@@ -18,3 +18,31 @@ def test_entry_objects_sort_chronologically_by_date(
     assert entries[0].entry_date == JAN_01
     assert entries[1].entry_date == JAN_02
     assert entries[2].entry_date == JAN_03
+
+
+def test_entry_record_is_slotted_and_shares_repeated_values(make_entry):
+    entry = make_entry(category="".join(["TA", "XI"]))
+
+    record = EntryRecord(
+        entry.id,
+        entry.account_id,
+        entry.amount,
+        entry.entry_date,
+        "".join(["TA", "XI"]),
+        "EXPENSE",
+    )
+
+    assert not hasattr(record, "__dict__")
+    assert record.category is EntryRecord.from_entry(entry).category
+    assert record.category_type is CategoryType.EXPENSE
+
+
+def test_entry_record_equals_entry_with_same_id(make_entry):
+    entry = make_entry(id="tx-1")
+
+    record = EntryRecord.from_entry(entry)
+
+    assert record == entry
+    assert entry == record
+    assert hash(record) == hash(entry)
+    assert record != EntryRecord.from_entry(make_entry(id="tx-2"))
@@ -0,0 +1,51 @@
+import json
+from decimal import Decimal
+
+from app.export import ExportFormat, encode
+from app.model import CategoryType, EntryRecord
+from app.money import Money
+from conftest import JAN_01
+
+
+def _records(n: int) -> list[EntryRecord]:
+    return [
+        EntryRecord(
+            id=f"e{i}",
+            account_id="a1",
+            entry_date=JAN_01,
+            amount=Money.from_decimal(Decimal("-1.5"), "EUR"),
+            category="FOOD, DRINKS",
+            category_type=CategoryType.EXPENSE,
+        )
+        for i in range(n)
+    ]
+
+
+def test_encode_csv_quotes_values_and_starts_with_header():
+    chunks = list(encode(_records(1), ExportFormat.CSV, chunk_rows=10))
+
+    assert chunks == [
+        "id,account_id,entry_date,amount,currency,category,category_type\n"
+        'e0,a1,2025-01-01,-1.50,EUR,"FOOD, DRINKS",EXPENSE\n'
+    ]
+
+
+def test_encode_ndjson_writes_one_object_per_line():
+    (chunk,) = encode(_records(2), ExportFormat.NDJSON, chunk_rows=10)
+
+    rows = [json.loads(line) for line in chunk.splitlines()]
+    assert [row["id"] for row in rows] == ["e0", "e1"]
+    assert rows[0]["amount"] == "-1.50"
+    assert rows[0]["category_type"] == "EXPENSE"
+
+
+def test_encode_yields_bounded_chunks():
+    chunks = list(encode(_records(5), ExportFormat.NDJSON, chunk_rows=2))
+
+    assert [chunk.count("\n") for chunk in chunks] == [2, 2, 1]
+
+
+def test_encode_empty_csv_is_just_the_header():
+    assert list(encode([], ExportFormat.CSV, chunk_rows=10)) == [
+        "id,account_id,entry_date,amount,currency,category,category_type\n"
+    ]
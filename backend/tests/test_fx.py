@@ -0,0 +1,93 @@
+from datetime import date
+from decimal import Decimal
+
+import pytest
+
+from app.cache import TTLCache
+from app.fx import RateBook, RateTable
+from app.model import RateNotFoundError
+from conftest import JAN_01, JAN_02, JAN_03
+
+
+class RateRepository:
+    """Just the rate queries of a repository, counting the calls."""
+
+    def __init__(self, rates: dict[tuple[str, str], list[tuple[date, Decimal]]]):
+        self.rates = rates
+        self.queries: list[tuple[str, str]] = []
+
+    def fx_rates(self, base, quote):
+        self.queries.append((base, quote))
+        return list(self.rates.get((base, quote), []))
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_rate_table_finds_latest_rate_on_or_before_date():
+    table = RateTable([(JAN_03, Decimal(3)), (JAN_01, Decimal(1))])
+
+    assert table.lookup(date(2024, 12, 31)) is None
+    assert table.lookup(JAN_01) == (JAN_01, Decimal(1))
+    assert table.lookup(JAN_02) == (JAN_01, Decimal(1))
+    assert table.lookup(date(2030, 1, 1)) == (JAN_03, Decimal(3))
+    assert len(table) == 2
+
+
+def test_rate_book_loads_each_pair_once():
+    repo = RateRepository({("EUR", "USD"): [(JAN_01, Decimal("1.1"))]})
+    book = RateBook()
+
+    for day in (JAN_01, JAN_02, JAN_03):
+        assert book.rate(repo, "EUR", "USD", day) == (JAN_01, Decimal("1.1"))
+
+    # Assert: One load of the pair and its reverse, then served from memory
+    assert repo.queries == [("EUR", "USD"), ("USD", "EUR")]
+
+
+def test_rate_book_inverts_the_reverse_pair_on_missing_dates():
+    repo = RateRepository(
+        {
+            ("USD", "EUR"): [(JAN_01, Decimal("0.5")), (JAN_02, Decimal("0.8"))],
+            ("EUR", "USD"): [(JAN_02, Decimal("1.3"))],
+        }
+    )
+
+    book = RateBook()
+
+    assert book.rate(repo, "EUR", "USD", JAN_01) == (JAN_01, Decimal(2))
+    # The pair's own rate wins over the inverse on the same day
+    assert book.rate(repo, "EUR", "USD", JAN_03) == (JAN_02, Decimal("1.3"))
+
+
+def test_rate_book_same_currency_needs_no_rates():
+    repo = RateRepository({})
+
+    assert RateBook().rate(repo, "EUR", "EUR", JAN_01) == (JAN_01, Decimal(1))
+    assert repo.queries == []
+
+
+def test_rate_book_without_rate_raises_error():
+    repo = RateRepository({("EUR", "USD"): [(JAN_02, Decimal("1.1"))]})
+
+    with pytest.raises(RateNotFoundError, match="EUR/USD"):
+        RateBook().rate(repo, "EUR", "USD", JAN_01)
+
+
+def test_rate_book_reloads_expired_and_invalidated_pairs():
+    repo = RateRepository({("EUR", "USD"): [(JAN_01, Decimal("1.1"))]})
+    clock = FakeClock()
+    book = RateBook(TTLCache(ttl=10, clock=clock))
+    book.rate(repo, "EUR", "USD", JAN_01)
+
+    clock.now = 11
+    book.rate(repo, "EUR", "USD", JAN_01)
+    book.invalidate([("USD", "EUR")])
+    book.rate(repo, "EUR", "USD", JAN_01)
+
+    assert repo.queries.count(("EUR", "USD")) == 3
@@ -0,0 +1,97 @@
+import io
+from decimal import Decimal
+
+import pytest
+
+from app.importer import (
+    StatementLine,
+    number_repeats,
+    parse_csv,
+    parse_ofx,
+    read_lines,
+)
+from app.model import CategoryType
+from conftest import JAN_01, JAN_02
+
+OFX = """OFXHEADER:100
+DATA:OFXSGML
+
+<OFX><BANKMSGSRSV1><STMTTRNRS><STMTRS><BANKTRANLIST>
+<STMTTRN>
+<TRNTYPE>DEBIT
+<DTPOSTED>20250101120000[-5:EST]
+<TRNAMT>-12.30
+<NAME>Grocery store
+</STMTTRN>
+<STMTTRN><TRNTYPE>CREDIT</TRNTYPE><DTPOSTED>20250102</DTPOSTED>
+<TRNAMT>100.00</TRNAMT></STMTTRN>
+</BANKTRANLIST></STMTRS></STMTTRNRS></BANKMSGSRSV1></OFX>
+"""
+
+
+def test_parse_csv_infers_category_type_from_sign():
+    lines = [
+        "Date,Amount,Category,Description\n",
+        "2025-01-01,-12.30,FOOD,Grocery store\n",
+        "\n",
+        "2025-01-02,100,,Salary\n",
+    ]
+
+    assert list(parse_csv(lines)) == [
+        StatementLine(2, JAN_01, Decimal("-12.30"), "FOOD", CategoryType.EXPENSE),
+        StatementLine(4, JAN_02, Decimal("100"), None, CategoryType.INCOME),
+    ]
+
+
+def test_parse_csv_reads_exported_entries():
+    lines = [
+        "id,account_id,entry_date,amount,currency,category,category_type\n",
+        "e1,a1,2025-01-01,-5.00,EUR,,TRANSFER\n",
+    ]
+
+    (line,) = parse_csv(lines)
+
+    assert (line.amount, line.category_type) == (Decimal("-5.00"), "TRANSFER")
+
+
+@pytest.mark.parametrize(
+    "lines, message",
+    [
+        (["when,amount\n"], "date and amount columns"),
+        (["date,amount\n", "2025-01-01,12,3\n", "2025-13-01,1\n"], "Line 3:"),
+        (["date,amount\n", "2025-01-01\n"], "Line 2:"),
+    ],
+)
+def test_parse_csv_rejects_malformed_input(lines, message):
+    with pytest.raises(ValueError, match=message):
+        list(parse_csv(lines))
+
+
+def test_parse_ofx_reads_sgml_and_xml_transactions():
+    assert list(parse_ofx(OFX.splitlines(keepends=True))) == [
+        StatementLine(10, JAN_01, Decimal("-12.30"), None, CategoryType.EXPENSE),
+        StatementLine(12, JAN_02, Decimal("100.00"), None, CategoryType.INCOME),
+    ]
+
+
+def test_parse_ofx_rejects_transactions_without_amount():
+    lines = ["<STMTTRN>\n", "<DTPOSTED>20250101\n", "</STMTTRN>\n"]
+
+    with pytest.raises(ValueError, match="Line 3: transaction without TRNAMT"):
+        list(parse_ofx(lines))
+
+
+def test_read_lines_strips_byte_order_mark():
+    statement = io.BytesIO("\ufeffdate,amount\n2025-01-01,1\n".encode())
+
+    assert list(read_lines(statement)) == ["date,amount\n", "2025-01-01,1\n"]
+
+
+def test_number_repeats_counts_identical_lines_per_date():
+    food = StatementLine(1, JAN_01, Decimal(-2), "FOOD", CategoryType.EXPENSE)
+    taxi = food._replace(category="TAXI")
+    next_day = food._replace(entry_date=JAN_02)
+
+    numbered = number_repeats([food, taxi, food, next_day, next_day])
+
+    assert [occurrence for _, occurrence in numbered] == [1, 1, 2, 1, 2]
@@ -0,0 +1,113 @@
+from datetime import date
+from decimal import Decimal
+
+import pytest
+
+pytest.importorskip("numpy")
+
+from app.ledger import Ledger, load_ledger  # noqa: E402
+from app.model import Account, CategoryType  # noqa: E402
+from app.money import Money  # noqa: E402
+from app.repository import SqlAlchemyRepository  # noqa: E402
+
+ROWS = [
+    ("a1", -1230, date(2025, 1, 3), "FOOD"),
+    ("a1", 100000, date(2025, 1, 31), "SALARY"),
+    ("a2", -10, date(2025, 2, 1), "FOOD"),
+    ("a2", -20, date(2025, 2, 28), None),
+    ("a1", -705, date(2026, 1, 1), "FOOD"),
+]
+
+
+def expected_totals(key):
+    totals: dict = {}
+    for row in ROWS:
+        totals[key(row)] = totals.get(key(row), Money(0, "EUR")) + Money(row[1], "EUR")
+    return totals
+
+
+def test_ledger_encodes_columns_as_typed_arrays():
+    ledger = Ledger.from_rows(ROWS, currency="EUR")
+
+    assert ledger.amounts.dtype == "int64"
+    assert ledger.dates.dtype == "datetime64[D]"
+    assert ledger.account_codes.dtype == ledger.category_codes.dtype == "int32"
+    assert list(ledger.amounts[:2]) == [-1230, 100000]
+    assert ledger.categories == ("FOOD", "SALARY", None)
+
+
+def test_ledger_aggregates_equal_entry_by_entry_totals():
+    ledger = Ledger.from_rows(ROWS, currency="EUR")
+
+    assert ledger.sum_by_category() == expected_totals(lambda row: row[3])
+    assert ledger.sum_by_account() == expected_totals(lambda row: row[0])
+    assert ledger.sum_by_month() == expected_totals(lambda row: row[2].replace(day=1))
+    assert ledger.total() == Money(sum(row[1] for row in ROWS), "EUR")
+
+
+def test_ledger_between_filters_inclusive_date_range():
+    ledger = Ledger.from_rows(ROWS, currency="EUR").between(
+        date(2025, 1, 31), date(2025, 2, 28)
+    )
+
+    assert len(ledger) == 3
+    assert ledger.sum_by_category() == {
+        "FOOD": Money(-10, "EUR"),
+        "SALARY": Money(100000, "EUR"),
+        None: Money(-20, "EUR"),
+    }
+
+
+def test_ledger_rejects_totals_beyond_int64():
+    with pytest.raises(OverflowError):
+        Ledger.from_rows([("a1", 2**62, date(2025, 1, 1), None)] * 2, currency="EUR")
+
+
+def test_empty_ledger_has_no_groups():
+    ledger = Ledger.from_rows([], currency="EUR")
+
+    assert ledger.sum_by_month() == {}
+    assert ledger.total() == Money(0, "EUR")
+
+
+def test_load_ledger_reads_entry_table_per_currency(session, acc_eur, acc_rub):
+    repo = SqlAlchemyRepository(session)
+    repo.add(acc_eur)
+    repo.add(acc_rub)
+    eur_entries = acc_eur.record_entries(
+        [
+            (Decimal("5.25"), date(2025, 1, 1), "TAXI", CategoryType.EXPENSE),
+            (Decimal("100"), date(2025, 2, 1), "SALARY", CategoryType.INCOME),
+        ]
+    )
+    rub_entries = acc_rub.record_entries(
+        [(Decimal("300"), date(2025, 1, 1), "TAXI", CategoryType.INCOME)]
+    )
+    repo.add_entries(eur_entries + rub_entries)
+    session.commit()
+
+    ledger = load_ledger(session, currency=acc_eur.currency)
+
+    assert ledger.sum_by_category() == {
+        "TAXI": Money(-525, "EUR"),
+        "SALARY": Money(10000, "EUR"),
+    }
+    assert ledger.sum_by_account() == {acc_eur.id: Money(9475, "EUR")}
+
+
+def test_load_ledger_filters_by_date(session, acc_eur: Account):
+    repo = SqlAlchemyRepository(session)
+    repo.add(acc_eur)
+    repo.add_entries(
+        acc_eur.record_entries(
+            [
+                (Decimal("1"), date(2025, 1, 1), "TAXI", CategoryType.EXPENSE),
+                (Decimal("2"), date(2025, 3, 1), "TAXI", CategoryType.EXPENSE),
+            ]
+        )
+    )
+    session.commit()
+
+    ledger = load_ledger(session, currency="EUR", date_from=date(2025, 2, 1))
+
+    assert ledger.sum_by_month() == {date(2025, 3, 1): Money(-200, "EUR")}
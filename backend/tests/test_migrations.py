@@ -0,0 +1,175 @@
+from datetime import date
+
+from sqlalchemy import create_engine, inspect, select, text
+from sqlalchemy.orm import Session
+
+from app import migrations
+from app.db import CATEGORY_TYPE_CODES, schema_version
+from app.model import Account, CategoryType, content_hash
+from app.money import Money
+
+
+def _create_legacy_database(engine):
+    """Create the schema as it looked before any migration existed."""
+    with engine.begin() as conn:
+        conn.execute(
+            text(
+                "CREATE TABLE account (id VARCHAR PRIMARY KEY, name VARCHAR "
+                "NOT NULL UNIQUE, currency VARCHAR NOT NULL, "
+                "initial_balance NUMERIC NOT NULL)"
+            )
+        )
+        conn.execute(
+            text(
+                "CREATE TABLE entry (id VARCHAR PRIMARY KEY, account_id VARCHAR "
+                "NOT NULL REFERENCES account (id), amount NUMERIC NOT NULL, "
+                "entry_date DATE NOT NULL, category VARCHAR, "
+                "category_type VARCHAR NOT NULL)"
+            )
+        )
+        conn.execute(
+            text(
+                "INSERT INTO account (id, name, currency, initial_balance) "
+                "VALUES ('1', 'rub', 'RUB', 100), ('2', 'jpy', 'JPY', 1000)"
+            )
+        )
+        conn.execute(
+            text(
+                "INSERT INTO entry "
+                "(id, account_id, amount, entry_date, category, category_type) "
+                "VALUES ('1', '1', 50.25, '2025-12-26', 'rub', 'INCOME')"
+            )
+        )
+
+
+def test_upgrade_stamps_fresh_database_with_latest_version(session):
+    # Arrange: An empty database
+    engine = create_engine("sqlite:///:memory:")
+
+    # Act
+    migrations.upgrade(engine)
+
+    # Assert: All tables exist and the version is current
+    with engine.connect() as conn:
+        assert inspect(conn).has_table("entry")
+        version = conn.execute(select(schema_version.c.version)).scalar_one()
+    assert version == len(migrations.MIGRATIONS)
+
+
+def test_upgrade_migrates_legacy_database(session):
+    # Arrange: A database created before current_balance existed
+    engine = create_engine("sqlite:///:memory:")
+    _create_legacy_database(engine)
+
+    # Act: Upgrade twice to prove the steps only run once
+    migrations.upgrade(engine)
+    migrations.upgrade(engine)
+
+    # Assert: The column was added and the balance is derived from entries
+    with engine.connect() as conn:
+        columns = {c["name"] for c in inspect(conn).get_columns("account")}
+        indexes = {i["name"] for i in inspect(conn).get_indexes("entry")}
+    assert "current_balance" in columns
+    assert indexes == {
+        "ix_entry_account_id_entry_date",
+        "ix_entry_entry_date",
+        "ix_entry_report",
+        "ix_entry_category_id",
+        "ix_entry_content_hash",
+    }
+    with Session(engine) as db:
+        account, other = db.get(Account, "1"), db.get(Account, "2")
+        assert account is not None and other is not None
+        assert account.current_balance is None
+        assert account.balance == Money(15025, "RUB")
+        assert other.initial_balance == Money(1000, "JPY")
+        # Daily balances were backfilled from the existing entries
+        assert db.execute(text("SELECT * FROM daily_balance")).all() == [
+            ("1", "2025-12-26", 15025)
+        ]
+        # Amounts were converted to minor units of the copied currency
+        assert db.execute(text("SELECT amount, currency FROM entry")).one() == (
+            5025,
+            "RUB",
+        )
+        # Content hashes were computed for the existing entries
+        assert db.execute(text("SELECT content_hash FROM entry")).scalar_one() == (
+            content_hash(Money(5025, "RUB"), date(2025, 12, 26), "rub", "INCOME")
+        )
+        # Categories moved to their table, category types to their codes
+        assert db.execute(
+            text(
+                "SELECT category.name, entry.category_type "
+                "FROM entry JOIN category ON category.id = entry.category_id"
+            )
+        ).one() == ("rub", CATEGORY_TYPE_CODES[CategoryType.INCOME])
+
+
+def test_upgrade_backfills_budget_spend(session):
+    # Arrange: A legacy database with an expense
+    engine = create_engine("sqlite:///:memory:")
+    _create_legacy_database(engine)
+    with engine.begin() as conn:
+        conn.execute(
+            text(
+                "INSERT INTO entry "
+                "(id, account_id, amount, entry_date, category, category_type) "
+                "VALUES ('2', '1', -20.5, '2025-12-27', 'food', 'EXPENSE')"
+            )
+        )
+
+    # Act
+    migrations.upgrade(engine)
+
+    # Assert: Spending is counted in minor units of the account's currency
+    with engine.connect() as conn:
+        assert conn.execute(text("SELECT * FROM budget_spend")).all() == [
+            ("food", "2025-12", "RUB", 2050)
+        ]
+
+
+def test_upgrade_indexes_existing_categories_for_search(session):
+    # Arrange
+    engine = create_engine("sqlite:///:memory:")
+    _create_legacy_database(engine)
+
+    # Act
+    migrations.upgrade(engine)
+
+    # Assert: Existing and new categories are found
+    with engine.begin() as conn:
+        conn.execute(text("INSERT INTO category (name) VALUES ('RUBLES')"))
+        found = conn.execute(
+            text("SELECT name FROM category_search WHERE category_search MATCH 'rub*'")
+        ).scalars()
+        assert sorted(found) == ["RUBLES", "rub"]
+
+
+def test_upgrade_replaces_entry_search_index(session, monkeypatch):
+    # Arrange: A legacy database upgraded by the version before categories
+    # were normalized, which indexed the category column for search
+    engine = create_engine("sqlite:///:memory:")
+    _create_legacy_database(engine)
+    latest = migrations.MIGRATIONS
+    monkeypatch.setattr(migrations, "MIGRATIONS", latest[:-1])
+    migrations.upgrade(engine)
+    with engine.connect() as conn:
+        found = conn.execute(
+            text("SELECT category FROM entry_search WHERE entry_search MATCH 'rub*'")
+        ).scalars()
+        assert list(found) == ["rub"]
+
+    # Act
+    monkeypatch.setattr(migrations, "MIGRATIONS", latest)
+    migrations.upgrade(engine)
+
+    # Assert: The index and its triggers are gone, and entries can be written
+    with engine.begin() as conn:
+        assert not inspect(conn).has_table("entry_search")
+        conn.execute(
+            text(
+                "INSERT INTO entry (id, account_id, amount, currency, entry_date, "
+                "category_type) VALUES ('2', '1', 100, 'RUB', '2025-12-27', 2)"
+            )
+        )
+        assert conn.execute(text("SELECT count(*) FROM entry")).scalar_one() == 2
@@ -0,0 +1,75 @@
+from decimal import Decimal
+
+import pytest
+
+from app.money import CurrencyMismatchError, Money, currency_exponent
+
+
+@pytest.mark.parametrize(
+    "amount, currency, minor",
+    [
+        ("12.50", "EUR", 1250),
+        ("-0.01", "USD", -1),
+        ("1500", "JPY", 1500),
+        ("1.234", "KWD", 1234),
+        ("7.000", "EUR", 700),
+    ],
+)
+def test_money_from_decimal_uses_currency_exponent(amount, currency, minor):
+    assert Money.from_decimal(Decimal(amount), currency) == Money(minor, currency)
+
+
+@pytest.mark.parametrize(
+    "amount, currency",
+    [("0.001", "EUR"), ("10.5", "JPY"), ("NaN", "EUR"), ("Infinity", "EUR")],
+)
+def test_money_from_decimal_rejects_inexact_amounts(amount, currency):
+    with pytest.raises(ValueError):
+        Money.from_decimal(Decimal(amount), currency)
+
+
+def test_money_amount_has_currency_decimal_places():
+    assert str(Money(1250, "EUR").amount) == "12.50"
+    assert str(Money(1500, "JPY").amount) == "1500"
+    assert str(Money(-5, "EUR")) == "-0.05 EUR"
+
+
+def test_money_arithmetic_and_comparison_stay_in_integers():
+    a = Money(1050, "EUR")
+    b = Money(-50, "EUR")
+
+    assert a + b == Money(1000, "EUR")
+    assert a - b == Money(1100, "EUR")
+    assert -b == abs(b) == Money(50, "EUR")
+    assert b < a and a >= b
+
+
+def test_money_rejects_mixed_currencies():
+    with pytest.raises(CurrencyMismatchError):
+        Money(100, "EUR") + Money(100, "USD")
+    with pytest.raises(CurrencyMismatchError):
+        Money(100, "EUR") < Money(100, "USD")
+
+
+@pytest.mark.parametrize(
+    "money, currency, rate, expected",
+    [
+        (Money(1000, "EUR"), "USD", Decimal("1.0826"), Money(1083, "USD")),
+        (Money(1000, "EUR"), "JPY", Decimal("161.37"), Money(1614, "JPY")),
+        (Money(1614, "JPY"), "EUR", Decimal("0.0062"), Money(1001, "EUR")),
+        # Ties go to the even minor unit
+        (Money(1, "EUR"), "USD", Decimal("2.5"), Money(2, "USD")),
+        (Money(-3, "EUR"), "USD", Decimal("0.5"), Money(-2, "USD")),
+    ],
+)
+def test_money_convert_rounds_to_target_minor_unit(money, currency, rate, expected):
+    assert money.convert(currency, rate) == expected
+
+
+def test_money_requires_integer_minor_units():
+    with pytest.raises(TypeError):
+        Money(Decimal("1.5"), "EUR")  # type: ignore[arg-type]
+
+
+def test_unknown_currencies_default_to_two_decimal_places():
+    assert currency_exponent("XYZ") == 2
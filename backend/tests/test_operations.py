@@ -5,7 +5,10 @@ from app.model import Account
 from app.model import transfer
 from app.model import InsufficientFundsError
 from app.model import CategoryType
+from app.money import CurrencyMismatchError, Money
 from conftest import JAN_01
+from conftest import JAN_02
+from conftest import JAN_03
 
 
 class TestTransfer:
@@ -24,8 +27,8 @@ class TestTransfer:
         )
 
         # Assert: Both balances updated correctly, dates match
-        assert acc_eur.balance == Decimal(25)
-        assert acc_rub.balance == Decimal(1000)
+        assert acc_eur.balance.amount == Decimal(25)
+        assert acc_rub.balance.amount == Decimal(1000)
         assert debit_entry.entry_date == credit_entry.entry_date
 
     def test_transfer_entries_have_no_category(self, acc_eur: Account, acc_rub: Account):
@@ -92,8 +95,8 @@ class TestTransfer:
         )
 
         # Assert: Transfer succeeds with correct balances
-        assert acc_eur.balance == Decimal(25)
-        assert acc_rub.balance == Decimal(1000)
+        assert acc_eur.balance.amount == Decimal(25)
+        assert acc_rub.balance.amount == Decimal(1000)
 
 
 class TestRecordEntry:
@@ -161,5 +164,70 @@ class TestRecordEntry:
         )
 
         # Assert: Entry recorded with correct values
-        assert acc_eur.balance == Decimal(25)
-        assert entry.amount == Decimal("-10")
+        assert acc_eur.balance.amount == Decimal(25)
+        assert entry.amount == Money(-1000, "EUR")
+
+    def test_record_entry_accepts_money_in_account_currency(self, acc_eur: Account):
+        entry = acc_eur.record_entry(
+            Money(1050, "EUR"),
+            JAN_01,
+            category="TAXI",
+            category_type=CategoryType.EXPENSE,
+        )
+
+        assert entry.amount == Money(-1050, "EUR")
+        assert acc_eur.balance == Money(2450, "EUR")
+
+    def test_record_entry_rejects_money_in_other_currency(self, acc_eur: Account):
+        with pytest.raises(CurrencyMismatchError):
+            acc_eur.record_entry(
+                Money(100, "USD"),
+                JAN_01,
+                category="TAXI",
+                category_type=CategoryType.EXPENSE,
+            )
+
+    def test_record_entry_rejects_amounts_below_minor_unit(self, acc_eur: Account):
+        with pytest.raises(ValueError, match="more than 2 decimal places"):
+            acc_eur.record_entry(
+                Decimal("0.001"),
+                JAN_01,
+                category="TAXI",
+                category_type=CategoryType.EXPENSE,
+            )
+
+
+class TestRecordEntries:
+    """Tests for Account.record_entries() method."""
+
+    def test_record_entries_validates_in_date_order(self, acc_eur: Account):
+        # Arrange: The expense comes first in the batch but is dated later
+        batch = [
+            (Decimal(100), JAN_03, "RENT", CategoryType.EXPENSE),
+            (Decimal(500), JAN_02, "SALARY", CategoryType.INCOME),
+        ]
+
+        # Act
+        entries = acc_eur.record_entries(batch)
+
+        # Assert: Income was applied first, so the expense is covered
+        assert [e.entry_date for e in entries] == [JAN_02, JAN_03]
+        assert [e.amount for e in entries] == [Money(50000, "EUR"), Money(-10000, "EUR")]
+        assert acc_eur.balance.amount == Decimal(435)
+
+    def test_record_entries_rejects_whole_batch_on_insufficient_funds(
+        self, acc_eur: Account
+    ):
+        # Arrange: The expense is dated before the income that would cover it
+        batch = [
+            (Decimal(500), JAN_03, "SALARY", CategoryType.INCOME),
+            (Decimal(100), JAN_02, "RENT", CategoryType.EXPENSE),
+        ]
+
+        # Act & Assert: The batch fails and the account is untouched
+        with pytest.raises(InsufficientFundsError) as exc_info:
+            acc_eur.record_entries(batch)
+
+        assert "2025-01-02" in str(exc_info.value)
+        assert acc_eur.balance.amount == Decimal(35)
+        assert acc_eur._entries == []
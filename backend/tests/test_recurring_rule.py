@@ -0,0 +1,81 @@
+from datetime import date
+
+import pytest
+
+from app.model import CategoryType, Frequency, RecurringRule
+from app.money import Money
+from conftest import JAN_01
+
+
+def _rule(frequency: Frequency, start_date: date = JAN_01, **kwargs) -> RecurringRule:
+    return RecurringRule(
+        "r1",
+        "a1",
+        Money(100, "EUR"),
+        "RENT",
+        CategoryType.EXPENSE,
+        frequency,
+        start_date,
+        **kwargs,
+    )
+
+
+@pytest.mark.parametrize(
+    ("frequency", "interval", "expected"),
+    [
+        (Frequency.DAILY, 1, [date(2025, 1, 1), date(2025, 1, 2), date(2025, 1, 3)]),
+        (Frequency.WEEKLY, 2, [date(2025, 1, 1), date(2025, 1, 15), date(2025, 1, 29)]),
+        (Frequency.MONTHLY, 1, [date(2025, 1, 1), date(2025, 2, 1), date(2025, 3, 1)]),
+        (Frequency.YEARLY, 1, [date(2025, 1, 1), date(2026, 1, 1), date(2027, 1, 1)]),
+    ],
+)
+def test_recurring_rule_occurrences(frequency, interval, expected):
+    rule = _rule(frequency, interval=interval)
+
+    assert [rule.occurrence(n) for n in range(3)] == expected
+
+
+def test_monthly_rule_keeps_its_day_past_shorter_months():
+    # Arrange: Leap year 2024
+    rule = _rule(Frequency.MONTHLY, date(2024, 1, 31))
+    yearly = _rule(Frequency.YEARLY, date(2024, 2, 29))
+
+    # Assert: Clamped to the end of the month, not shifted for good
+    assert [rule.occurrence(n) for n in range(4)] == [
+        date(2024, 1, 31),
+        date(2024, 2, 29),
+        date(2024, 3, 31),
+        date(2024, 4, 30),
+    ]
+    assert yearly.occurrence(1) == date(2025, 2, 28)
+    assert yearly.occurrence(4) == date(2028, 2, 29)
+
+
+def test_recurring_rule_due_resumes_from_its_checkpoint():
+    rule = _rule(Frequency.WEEKLY, materialized=2, until=date(2025, 2, 5))
+
+    assert rule.next_date == date(2025, 1, 15)
+    assert rule.due(date(2025, 1, 14)) == []
+    assert rule.due(date(2025, 12, 31)) == [
+        date(2025, 1, 15),
+        date(2025, 1, 22),
+        date(2025, 1, 29),
+        date(2025, 2, 5),
+    ]
+
+
+def test_recurring_rule_ends_after_until():
+    rule = _rule(Frequency.DAILY, until=date(2025, 1, 2), materialized=2)
+
+    assert rule.next_date is None
+    assert rule.due(date(2025, 12, 31)) == []
+
+
+def test_recurring_rule_converts_stored_strings():
+    rule = RecurringRule(
+        "r1", "a1", Money(100, "EUR"), None, "INCOME", "MONTHLY", JAN_01
+    )
+
+    assert rule.category_type is CategoryType.INCOME
+    assert rule.frequency is Frequency.MONTHLY
+    assert rule.currency == "EUR"
@@ -1,7 +1,18 @@
+import pytest
+from dataclasses import replace
 from sqlalchemy import text
 from decimal import Decimal
 from app import repository
+from app.db import CATEGORY_TYPE_CODES
 from app.model import Account
+from app.model import AccountInfo
+from app.model import CategoryType
+from app.model import EntryRecord
+from app.model import IdempotencyRecord
+from app.model import ReportGrouping
+from app.money import Money
+from conftest import JAN_01
+from conftest import JAN_02
 
 
 def test_repository_save_an_account(session, acc_eur, acc_rub):
@@ -14,8 +25,8 @@ def test_repository_save_an_account(session, acc_eur, acc_rub):
         session.execute(text("SELECT id, name, currency, initial_balance FROM account"))
     )
     assert rows == {
-        (acc_eur.id, acc_eur.name, acc_eur.currency, acc_eur.initial_balance),
-        (acc_rub.id, acc_rub.name, acc_rub.currency, acc_rub.initial_balance),
+        (acc_eur.id, acc_eur.name, acc_eur.currency, acc_eur.initial_balance.minor),
+        (acc_rub.id, acc_rub.name, acc_rub.currency, acc_rub.initial_balance.minor),
     }
 
 
@@ -23,26 +34,28 @@ def test_repository_retrieve_account_with_transactions(session):
     session.execute(
         text(
             "INSERT INTO account (id, name, currency, initial_balance)"
-            "VALUES ('1', 'rub', 'RUB', 100)"
+            "VALUES ('1', 'rub', 'RUB', 10000)"
         )
     )
     session.execute(
         text(
             "INSERT INTO entry "
-            "(id, account_id, amount, entry_date, category, category_type)"
-            "VALUES ('1', '1', 100, '2025-12-26', 'rub', 'INCOME')"
-        )
+            "(id, account_id, amount, currency, entry_date, category_type)"
+            "VALUES ('1', '1', 10000, 'RUB', '2025-12-26', :income)"
+        ),
+        {"income": CATEGORY_TYPE_CODES[CategoryType.INCOME]},
     )
     session.commit()
 
     repo = repository.SqlAlchemyRepository(session)
     account = repo.get("1")
+    assert account is not None
     from decimal import Decimal
 
     assert account == Account(
         id="1", name="rub", currency="RUB", initial_balance=Decimal(100)
     )
-    assert account.balance == 200
+    assert account.balance == Money(20000, "RUB")
 
 
 def test_repository_retrieve_all_accounts(session):
@@ -62,3 +75,366 @@ def test_repository_retrieve_all_accounts(session):
         Account(id="1", name="rub", currency="RUB", initial_balance=Decimal(100)),
         Account(id="2", name="eur", currency="EUR", initial_balance=Decimal(200)),
     ]
+
+
+def test_repository_add_entries_inserts_rows_in_bulk(session, acc_eur):
+    repo = repository.SqlAlchemyRepository(session)
+    repo.add(acc_eur)
+    session.commit()
+
+    new_entries = acc_eur.record_entries(
+        [
+            (Decimal(5), JAN_01, "TAXI", CategoryType.EXPENSE),
+            (Decimal(10), JAN_01, "SALARY", CategoryType.INCOME),
+        ]
+    )
+    repo.add_entries(new_entries)
+    session.commit()
+
+    rows = set(
+        session.execute(
+            text(
+                "SELECT entry.id, account_id, name, category_type "
+                "FROM entry JOIN category ON category.id = category_id"
+            )
+        )
+    )
+    assert rows == {
+        (e.id, acc_eur.id, e.category, CATEGORY_TYPE_CODES[e.category_type])
+        for e in new_entries
+    }
+    session.expunge_all()
+    account = repo.get(acc_eur.id)
+    assert account is not None
+    assert account.balance == Money(4000, "EUR")
+
+
+def test_repository_list_entries_seeks_past_last_key(session, acc_eur):
+    repo = repository.SqlAlchemyRepository(session)
+    repo.add(acc_eur)
+    new_entries = acc_eur.record_entries(
+        [
+            (Decimal(1), JAN_01, "TAXI", CategoryType.EXPENSE),
+            (Decimal(2), JAN_02, "FOOD", CategoryType.EXPENSE),
+            (Decimal(3), JAN_02, "TAXI", CategoryType.EXPENSE),
+        ]
+    )
+    repo.add_entries(new_entries)
+    session.commit()
+    ordered = sorted(new_entries, key=lambda e: (e.entry_date, e.id))
+
+    first = repo.list_entries(acc_eur.id, limit=2)
+    second = repo.list_entries(
+        acc_eur.id, limit=2, after=(first[-1].entry_date, first[-1].id)
+    )
+
+    assert [e.id for e in first] == [e.id for e in ordered[:2]]
+    assert [e.id for e in second] == [ordered[2].id]
+    assert all(isinstance(e, EntryRecord) for e in first + second)
+
+
+def test_repository_list_with_balances_aggregates_in_sql(session):
+    session.execute(
+        text(
+            "INSERT INTO account (id, name, currency, initial_balance, current_balance)"
+            " VALUES ('1', 'rub', 'RUB', 100, NULL), ('2', 'eur', 'EUR', 200, 250),"
+            " ('3', 'usd', 'USD', 300, NULL)"
+        )
+    )
+    session.execute(
+        text(
+            "INSERT INTO entry "
+            "(id, account_id, amount, currency, entry_date, category_type)"
+            " VALUES ('e1', '1', 100, 'RUB', '2025-12-26', :income),"
+            " ('e2', '1', -30, 'RUB', '2025-12-27', :expense),"
+            " ('e3', '2', 50, 'EUR', '2025-12-26', :income)"
+        ),
+        {
+            "income": CATEGORY_TYPE_CODES[CategoryType.INCOME],
+            "expense": CATEGORY_TYPE_CODES[CategoryType.EXPENSE],
+        },
+    )
+    session.commit()
+
+    repo = repository.SqlAlchemyRepository(session)
+    balances = {account.id: balance for account, balance in repo.list_with_balances()}
+
+    assert balances == {
+        "1": Money(170, "RUB"),
+        "2": Money(250, "EUR"),
+        "3": Money(300, "USD"),
+    }
+    # The entries were summed in SQL, not loaded into the accounts
+    assert all("_entries" not in account.__dict__ for account in session)
+
+
+def test_repository_spending_totals_group_in_sql(session, acc_eur, acc_rub):
+    repo = repository.SqlAlchemyRepository(session)
+    repo.add(acc_eur)
+    repo.add(acc_rub)
+    repo.add_entries(
+        acc_eur.record_entries(
+            [
+                (Decimal(5), JAN_01, "TAXI", CategoryType.EXPENSE),
+                (Decimal(10), JAN_02, "FOOD", CategoryType.EXPENSE),
+                (Decimal(100), JAN_02, "SALARY", CategoryType.INCOME),
+            ]
+        )
+        + acc_rub.record_entries(
+            [
+                (Decimal(100), JAN_01, "SALARY", CategoryType.INCOME),
+                (Decimal(30), JAN_02, "TAXI", CategoryType.EXPENSE),
+            ]
+        )
+    )
+    session.commit()
+
+    by_category = repo.spending_totals(group_by=ReportGrouping.CATEGORY)
+    by_month = repo.spending_totals(group_by=ReportGrouping.MONTH, date_to=JAN_01)
+    by_account = repo.spending_totals(group_by=ReportGrouping.ACCOUNT)
+
+    assert by_category == [
+        ("FOOD", Money(1000, "EUR"), 1),
+        ("TAXI", Money(500, "EUR"), 1),
+        ("TAXI", Money(3000, "RUB"), 1),
+    ]
+    assert by_month == [("2025-01", Money(500, "EUR"), 1)]
+    assert by_account == [
+        (acc_eur.id, Money(1500, "EUR"), 2),
+        (acc_rub.id, Money(3000, "RUB"), 1),
+    ]
+
+
+class TestAccountCache:
+    def test_account_info_is_cached_across_units_of_work(self, session, acc_eur):
+        session.add(acc_eur)
+        session.commit()
+        cache = repository.AccountCache()
+        first = repository.SqlAlchemyRepository(session, cache)
+        info = first.get_info(acc_eur.id)
+        first.commit()
+
+        second = repository.SqlAlchemyRepository(session, cache)
+
+        assert info == AccountInfo(acc_eur.id, acc_eur.name, acc_eur.currency)
+        assert second.get_info(acc_eur.id) == info
+        assert second.get_info_by_name(acc_eur.name) == info
+        assert (cache.hits, cache.misses) == (2, 1)
+
+    def test_missing_accounts_are_not_cached(self, session, acc_eur):
+        repo = repository.SqlAlchemyRepository(session, repository.AccountCache())
+        assert repo.get_info_by_name(acc_eur.name) is None
+
+        repo.add(acc_eur)
+        repo.commit()
+
+        assert repo.get_info_by_name(acc_eur.name) == AccountInfo(
+            acc_eur.id, acc_eur.name, acc_eur.currency
+        )
+
+    def test_accounts_rolled_back_are_not_cached(self, session, acc_eur):
+        cache = repository.AccountCache()
+        repo = repository.SqlAlchemyRepository(session, cache)
+        repo.add(acc_eur)
+        assert repo.get_info(acc_eur.id) is not None
+
+        repo.rollback()
+
+        assert len(cache) == 0
+        assert repo.get_info(acc_eur.id) is None
+
+
+def test_repository_stores_idempotency_record_once(session):
+    # Arrange
+    from datetime import datetime
+
+    repo = repository.SqlAlchemyRepository(session)
+    expires_at = datetime(2025, 1, 2)
+    record = IdempotencyRecord("k1", "f1", 201, '{"id": "1"}')
+
+    # Act: The second insert hits the primary key without raising
+    first = repo.add_idempotency_record(record, expires_at)
+    second = repo.add_idempotency_record(replace(record, fingerprint="f2"), expires_at)
+    session.commit()
+
+    # Assert
+    assert (first, second) == (True, False)
+    assert repo.get_idempotency_record("k1") == record
+    repo.delete_expired_idempotency_keys(expires_at)
+    assert repo.get_idempotency_record("k1") is None
+
+
+def test_atomic_commits_once_at_the_end(session, acc_eur):
+    # Arrange
+    repo = repository.SqlAlchemyRepository(session)
+
+    # Act: commit() inside the block does not end the transaction
+    with pytest.raises(RuntimeError):
+        with repo.atomic():
+            repo.add(acc_eur)
+            repo.commit()
+            raise RuntimeError()
+    repo.rollback()
+
+    # Assert
+    assert repo.get(acc_eur.id) is None
+    with repo.atomic():
+        repo.add(acc_eur)
+        repo.commit()
+    repo.rollback()
+    assert repo.get(acc_eur.id) is not None
+
+
+def test_nested_atomic_commits_with_the_outer_block(session, acc_eur, acc_rub):
+    # Arrange
+    repo = repository.SqlAlchemyRepository(session)
+    committed = []
+    repo.after_commit(lambda: committed.append("callback"))
+
+    # Act: The outer block fails after the inner one has ended
+    with pytest.raises(RuntimeError):
+        with repo.atomic():
+            with repo.atomic():
+                repo.add(acc_eur)
+            assert committed == []
+            repo.add(acc_rub)
+            raise RuntimeError()
+    repo.rollback()
+    repo.commit()
+
+    # Assert: Neither account was committed, nor the callback run
+    assert repo.get(acc_eur.id) is None
+    assert repo.get(acc_rub.id) is None
+    assert committed == []
+
+
+def test_after_commit_callbacks_run_once_committed(session, acc_eur):
+    repo = repository.SqlAlchemyRepository(session)
+    committed = []
+
+    repo.add(acc_eur)
+    repo.after_commit(lambda: committed.append(repo.get(acc_eur.id)))
+    repo.commit()
+    repo.commit()
+
+    assert committed == [acc_eur]
+
+
+def test_repository_counts_entries_by_content_hash(session, acc_eur):
+    # Arrange: Two identical entries, one written by a flush, one in bulk
+    repo = repository.SqlAlchemyRepository(session)
+    repo.add(acc_eur)
+    food = acc_eur.record_entry(
+        Decimal(2), JAN_01, category="FOOD", category_type=CategoryType.EXPENSE
+    )
+    session.commit()
+    repo.add_entries(
+        acc_eur.record_entries(
+            [
+                (Decimal(2), JAN_01, "FOOD", CategoryType.EXPENSE),
+                (Decimal(3), JAN_02, "TAXI", CategoryType.EXPENSE),
+            ]
+        )
+    )
+    session.commit()
+
+    # Act
+    counts = repo.count_entries_by_hash(acc_eur.id, {food.content_hash, "unknown"})
+
+    # Assert
+    assert counts == {food.content_hash: 2}
+    assert repo.count_entries_by_hash("a2", {food.content_hash}) == {}
+
+
+def test_repository_saves_import_job_progress(session, acc_eur):
+    # Arrange
+    from app.model import ImportJob, ImportStatus, StatementFormat
+
+    repo = repository.SqlAlchemyRepository(session)
+    repo.add(acc_eur)
+    job = ImportJob("j1", acc_eur.id, StatementFormat.OFX, ImportStatus.PENDING, 100)
+    repo.add_import_job(job)
+
+    # Act
+    job.status, job.bytes_read, job.imported = ImportStatus.RUNNING, 40, 3
+    repo.save_import_job(job)
+    session.commit()
+
+    # Assert
+    assert repo.get_import_job("j1") == job
+    assert repo.get_import_job("missing") is None
+
+
+def test_repository_upserts_fx_rates(session):
+    # Arrange
+    from app.model import FxRate
+
+    repo = repository.SqlAlchemyRepository(session)
+    repo.add_fx_rates(
+        [
+            FxRate("EUR", "USD", JAN_02, Decimal("1.0825")),
+            FxRate("EUR", "USD", JAN_01, Decimal("1.07")),
+            FxRate("USD", "EUR", JAN_01, Decimal("0.93")),
+        ]
+    )
+    session.commit()
+
+    # Act: A second rate for the same day replaces the first
+    repo.add_fx_rates([FxRate("EUR", "USD", JAN_02, Decimal("1.0900"))])
+    session.commit()
+
+    # Assert: Exact decimals, ordered by date
+    assert repo.fx_rates("EUR", "USD") == [
+        (JAN_01, Decimal("1.07")),
+        (JAN_02, Decimal("1.0900")),
+    ]
+    assert repo.fx_rates("USD", "JPY") == []
+
+
+def test_repository_checkpoints_recurring_rules(session, acc_eur):
+    # Arrange
+    from dataclasses import replace
+    from datetime import date
+
+    from app.model import Frequency, RecurringRule
+
+    repo = repository.SqlAlchemyRepository(session)
+    repo.add(acc_eur)
+    session.flush()
+    for rule_id, start_date in (("r1", JAN_01), ("r2", JAN_02), ("r3", JAN_01)):
+        repo.add_recurring_rule(
+            RecurringRule(
+                rule_id,
+                acc_eur.id,
+                Money(100, "EUR"),
+                "RENT",
+                CategoryType.EXPENSE,
+                Frequency.MONTHLY,
+                start_date,
+            )
+        )
+    session.commit()
+
+    # Act: r1 records January; a stale run then tries to do the same
+    rule = repo.get_recurring_rule("r1")
+    saved = repo.save_recurring_rule(replace(rule, materialized=1), materialized=0)
+    stale = repo.save_recurring_rule(replace(rule, materialized=1), materialized=0)
+    session.commit()
+
+    # Assert: Due rules page by id; r1 is next due in February
+    assert (saved, stale) == (True, False)
+    assert [r.id for r in repo.due_recurring_rules(JAN_02, limit=10)] == ["r2", "r3"]
+    assert [r.id for r in repo.due_recurring_rules(JAN_02, after="r2", limit=1)] == [
+        "r3"
+    ]
+    assert [r.id for r in repo.due_recurring_rules(date(2025, 2, 1), limit=10)] == [
+        "r1",
+        "r2",
+        "r3",
+    ]
+    rule = repo.get_recurring_rule("r1")
+    assert rule is not None
+    assert rule.next_date == date(2025, 2, 1)
+    assert [r.id for r in repo.list_recurring_rules(acc_eur.id)] == ["r1", "r3", "r2"]
+    assert repo.delete_recurring_rule("r2") is True
+    assert repo.get_recurring_rule("r2") is None
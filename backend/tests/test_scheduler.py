@@ -0,0 +1,81 @@
+import asyncio
+from datetime import date
+from decimal import Decimal
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import sessionmaker
+
+from app import repository, scheduler
+from app.db import budget_spend, entries
+from app.model import CategoryType, Frequency
+from app.money import Money
+from app.services import create_recurring_rule
+from conftest import JAN_01
+
+
+def _add_rules(session, acc_eur):
+    repo = repository.SqlAlchemyRepository(session)
+    repo.add(acc_eur)
+    session.commit()
+    for amount, category_type, frequency in (
+        (Decimal(1), CategoryType.EXPENSE, Frequency.WEEKLY),
+        (Decimal(10), CategoryType.INCOME, Frequency.MONTHLY),
+    ):
+        create_recurring_rule(
+            repo,
+            account_id=acc_eur.id,
+            amount=amount,
+            category=category_type.value,
+            category_type=category_type,
+            frequency=frequency,
+            start_date=JAN_01,
+        )
+
+
+def test_run_once_catches_up_after_downtime(session, acc_eur):
+    # Arrange: Rules that have not run since January
+    _add_rules(session, acc_eur)
+    sessions = sessionmaker(bind=session.get_bind())
+
+    # Act
+    recorded = scheduler.run_once(sessions, batch_size=1, on=date(2025, 3, 31))
+    rerun = scheduler.run_once(sessions, batch_size=1, on=date(2025, 3, 31))
+
+    # Assert: 13 weekly and 3 monthly occurrences, recorded once, with the
+    # materialized balances and budget spending kept up to date
+    session.expire_all()
+    repo = repository.SqlAlchemyRepository(session)
+    account = repo.get(acc_eur.id)
+    assert account is not None
+    assert (recorded, rerun) == (16, 0)
+    assert session.execute(select(func.count()).select_from(entries)).scalar() == 16
+    assert account.balance == Money(3500 - 1300 + 3000, "EUR")
+    assert repo.balance_at(acc_eur.id, date(2025, 3, 31)) == Money(5200, "EUR")
+    assert session.execute(select(func.sum(budget_spend.c.spent))).scalar() == 1300
+    assert {rule.next_date for rule in repo.list_recurring_rules(acc_eur.id)} == {
+        date(2025, 4, 1),
+        date(2025, 4, 2),
+    }
+
+
+def test_run_periodically_survives_failed_runs(monkeypatch):
+    # Arrange: The first run fails, the second stops the loop
+    runs = []
+
+    def run_once(sessions, *, batch_size):
+        runs.append(batch_size)
+        if len(runs) == 1:
+            raise RuntimeError("database is down")
+        raise asyncio.CancelledError
+
+    monkeypatch.setattr(scheduler, "run_once", run_once)
+
+    # Act
+    async def main():
+        try:
+            await scheduler.run_periodically(None, interval_seconds=0, batch_size=7)
+        except asyncio.CancelledError:
+            return runs
+
+    # Assert
+    assert asyncio.run(main()) == [7, 7]
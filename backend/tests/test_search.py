@@ -0,0 +1,110 @@
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import text
+
+from app import repository, search
+from app.db import CATEGORY_TYPE_CODES
+from app.model import CategoryType
+from conftest import JAN_01, JAN_02, JAN_03
+
+
+@pytest.fixture
+def repo(session, acc_eur, acc_rub):
+    repo = repository.SqlAlchemyRepository(session)
+    repo.add(acc_eur)
+    repo.add(acc_rub)
+    session.flush()
+    repo.add_entries(
+        acc_eur.record_entries(
+            [
+                (Decimal(1), JAN_03, "COFFEE_SHOP", CategoryType.EXPENSE),
+                (Decimal(2), JAN_01, "coffee beans", CategoryType.EXPENSE),
+                (Decimal(3), JAN_02, "Office supplies", CategoryType.EXPENSE),
+                (Decimal(4), JAN_02, None, CategoryType.INCOME),
+            ]
+        )
+    )
+    # Flushed by the ORM rather than inserted in bulk
+    acc_rub.record_entry(
+        Decimal(5), JAN_01, category="COFFEE", category_type=CategoryType.INCOME
+    )
+    session.commit()
+    return repo
+
+
+def _categories(entries) -> list[str | None]:
+    return [entry.category for entry in entries]
+
+
+@pytest.mark.parametrize(
+    ("query", "expected"),
+    [
+        ("coffee", ["COFFEE", "COFFEE_SHOP", "coffee beans"]),
+        ("COF", ["COFFEE", "COFFEE_SHOP", "coffee beans"]),
+        ("shop", ["COFFEE_SHOP"]),
+        ("cof be", ["coffee beans"]),
+        ("office", ["Office supplies"]),
+        ("tea", []),
+    ],
+)
+def test_search_entries_matches_words_by_prefix(repo, query, expected):
+    found = repo.search_entries(search.search_terms(query), limit=10)
+
+    # Ties on the date are ordered by the random entry ids
+    assert sorted(_categories(found)) == sorted(expected)
+
+
+def test_search_entries_pages_by_date_and_id(repo, acc_eur):
+    terms = search.search_terms("coffee")
+
+    first = repo.search_entries(terms, limit=1, account_id=acc_eur.id)
+    rest = repo.search_entries(
+        terms,
+        limit=10,
+        after=(first[-1].entry_date, first[-1].id),
+        account_id=acc_eur.id,
+    )
+
+    assert _categories(first + rest) == ["coffee beans", "COFFEE_SHOP"]
+
+
+def test_search_index_follows_rows_written_around_the_app(session, repo):
+    # Act: Renamed, deleted and inserted with plain SQL
+    session.execute(
+        text("UPDATE category SET name = 'TEA_SHOP' WHERE name = 'COFFEE_SHOP'")
+    )
+    session.execute(
+        text(
+            "DELETE FROM entry WHERE category_id = "
+            "(SELECT id FROM category WHERE name = 'coffee beans')"
+        )
+    )
+    session.execute(text("DELETE FROM category WHERE name = 'coffee beans'"))
+    session.execute(text("INSERT INTO category (id, name) VALUES (100, 'Coffee')"))
+    session.execute(
+        text(
+            "INSERT INTO entry "
+            "(id, account_id, amount, currency, entry_date, category_id, category_type)"
+            "VALUES ('x', 'a1', -100, 'EUR', '2025-01-04', 100, :expense)"
+        ),
+        {"expense": CATEGORY_TYPE_CODES[CategoryType.EXPENSE]},
+    )
+
+    # Assert
+    assert _categories(repo.search_entries(["coffee"], limit=10)) == [
+        "COFFEE",
+        "Coffee",
+    ]
+    assert _categories(repo.search_entries(["shop"], limit=10)) == ["TEA_SHOP"]
+
+
+def test_rebuild_reindexes_every_category(session, repo):
+    search.rebuild(session.connection())
+
+    assert len(repo.search_entries(["coffee"], limit=10)) == 3
+
+
+def test_search_terms_keep_letters_and_digits():
+    assert search.search_terms(' Café-"2025" OR_x* ') == ["café", "2025", "or", "x"]
+    assert search.search_terms("*&!") == []
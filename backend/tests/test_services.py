@@ -1,37 +1,412 @@
+import io
+import json
 import pytest
+from contextlib import contextmanager
+from dataclasses import replace
+from datetime import date, datetime
 from decimal import Decimal
+from sqlalchemy.orm.exc import StaleDataError
 
+from app import services
+
+from app.autocomplete import CategoryIndex
+from app.budgets import spend_deltas
+from app.export import ExportFormat
+from app.fx import RateBook
 from app.model import (
     Account,
+    AccountInfo,
+    AccountNotFoundError,
+    Budget,
+    BudgetNotFoundError,
+    BudgetStatus,
+    CategoryType,
+    ConcurrentUpdateError,
     DuplicateAccountNameError,
+    Entry,
+    EntryRecord,
+    Frequency,
+    FxRate,
+    IdempotencyKeyConflictError,
+    IdempotencyKeyMismatchError,
+    IdempotencyRecord,
+    ImportJob,
+    ImportStatus,
+    InsufficientFundsError,
     InvalidInitialBalanceError,
+    RateNotFoundError,
+    RecurringRule,
+    RecurringRuleNotFoundError,
+    ReportGrouping,
+    StatementFormat,
+)
+from app.money import Money
+from app.repository import (
+    AbstractRepository,
+    BudgetRepository,
+    IdempotencyRepository,
+    ImportJobRepository,
+    RateRepository,
+    RecurringRuleRepository,
+    UnitOfWork,
+    ValuationRepository,
+)
+from app.search import search_terms
+from app.services import (
+    add_fx_rates,
+    balance_at,
+    balance_history,
+    begin_idempotent_request,
+    budget_alerts,
+    budget_status,
+    complete_category,
+    create_account,
+    create_import_job,
+    create_recurring_rule,
+    delete_budget,
+    delete_recurring_rule,
+    export_entries,
+    finish_idempotent_request,
+    import_statement,
+    list_entries,
+    net_worth,
+    record_entries,
+    retry_on_conflict,
+    run_recurring_rules,
+    search_entries,
+    set_budget,
+    spending_report,
+    transfer_funds,
 )
-from app.repository import AbstractRepository
-from app.services import create_account
+from conftest import JAN_01, JAN_02, JAN_03
+
+
+def _info(account: Account) -> AccountInfo:
+    return AccountInfo(account.id, account.name, account.currency)
+
+
+class FakeUnitOfWork(UnitOfWork):
+    def __init__(self):
+        self.committed = False
+        self.atomic_depth = 0
+        self.callbacks = []
+
+    def commit(self):
+        if not self.atomic_depth:
+            self.committed = True
+            callbacks, self.callbacks = self.callbacks, []
+            for callback in callbacks:
+                callback()
+
+    def rollback(self):
+        self.committed = False
+        self.callbacks = []
+
+    def after_commit(self, callback):
+        self.callbacks.append(callback)
+
+    @contextmanager
+    def atomic(self):
+        self.atomic_depth += 1
+        try:
+            yield
+        finally:
+            self.atomic_depth -= 1
+        self.commit()
 
 
-class FakeRepository(AbstractRepository):
+class FakeRepository(FakeUnitOfWork, AbstractRepository):
     def __init__(self, accounts: list[Account] | None = None):
+        super().__init__()
         self.accounts = accounts or []
-        self.committed = False
+        self.entries: list[Entry] = []
 
     def add(self, account: Account):
         self.accounts.append(account)
 
-    def get(self, account_id: str) -> Account:
-        return next(acc for acc in self.accounts if acc.id == account_id)
+    def get(self, account_id: str) -> Account | None:
+        return next((acc for acc in self.accounts if acc.id == account_id), None)
 
     def get_by_name(self, name: str) -> Account | None:
         return next((acc for acc in self.accounts if acc.name == name), None)
 
+    def get_info(self, account_id: str) -> AccountInfo | None:
+        account = self.get(account_id)
+        return None if account is None else _info(account)
+
+    def get_info_by_name(self, name: str) -> AccountInfo | None:
+        account = self.get_by_name(name)
+        return None if account is None else _info(account)
+
+    def lock_accounts(self, account_ids) -> dict[str, Account]:
+        self.locked = sorted(set(account_ids))
+        return {
+            account.id: account for account in self.accounts if account.id in self.locked
+        }
+
     def list_all(self) -> list[Account]:
         return list(self.accounts)
 
-    def commit(self):
-        self.committed = True
+    def list_with_balances(self) -> list[tuple[Account, Money]]:
+        return [(acc, acc.balance) for acc in self.accounts]
 
-    def rollback(self):
-        self.committed = False
+    def add_entries(self, new_entries: list[Entry]):
+        self.entries.extend(new_entries)
+
+    def list_entries(
+        self,
+        account_id: str,
+        *,
+        limit: int,
+        after: tuple[date, str] | None = None,
+        date_from: date | None = None,
+        date_to: date | None = None,
+        category: str | None = None,
+        category_type: CategoryType | None = None,
+    ) -> list[EntryRecord]:
+        matching = sorted(
+            (
+                entry
+                for entry in self.entries
+                if entry.account_id == account_id
+                and (after is None or (entry.entry_date, entry.id) > after)
+                and (date_from is None or entry.entry_date >= date_from)
+                and (date_to is None or entry.entry_date <= date_to)
+                and (category is None or entry.category == category)
+                and (category_type is None or entry.category_type == category_type)
+            ),
+            key=lambda entry: (entry.entry_date, entry.id),
+        )
+        return [EntryRecord.from_entry(entry) for entry in matching[:limit]]
+
+    def iter_entries(self, account_id=None, *, date_from=None, date_to=None, **_):
+        yield from sorted(
+            (
+                entry
+                for entry in self.entries
+                if (account_id is None or entry.account_id == account_id)
+                and (date_from is None or entry.entry_date >= date_from)
+                and (date_to is None or entry.entry_date <= date_to)
+            ),
+            key=lambda entry: (entry.account_id, entry.entry_date, entry.id),
+        )
+
+    def search_entries(self, terms, *, limit, after=None, account_id=None):
+        def words(entry):
+            return search_terms(entry.category or "")
+
+        matching = sorted(
+            (
+                entry
+                for entry in self.entries
+                if all(any(w.startswith(t) for w in words(entry)) for t in terms)
+                and (account_id is None or entry.account_id == account_id)
+                and (after is None or (entry.entry_date, entry.id) > after)
+            ),
+            key=lambda entry: (entry.entry_date, entry.id),
+        )
+        return matching[:limit]
+
+    def category_counts(self):
+        counts: dict[str, int] = {}
+        for entry in self.entries:
+            if entry.category is not None:
+                counts[entry.category] = counts.get(entry.category, 0) + 1
+        return sorted(counts.items())
+
+    def count_entries_by_hash(self, account_id, hashes):
+        counts: dict[str, int] = {}
+        for entry in self.entries:
+            if entry.account_id == account_id and entry.content_hash in hashes:
+                counts[entry.content_hash] = counts.get(entry.content_hash, 0) + 1
+        return counts
+
+    def spending_totals(self, *, group_by, date_from=None, date_to=None):
+        keys = {
+            ReportGrouping.CATEGORY: lambda entry: entry.category,
+            ReportGrouping.MONTH: lambda entry: entry.entry_date.strftime("%Y-%m"),
+            ReportGrouping.ACCOUNT: lambda entry: entry.account_id,
+        }
+        totals: dict[tuple[str | None, str], tuple[Money, int]] = {}
+        for entry in self.entries:
+            if entry.category_type != CategoryType.EXPENSE:
+                continue
+            if date_from is not None and entry.entry_date < date_from:
+                continue
+            if date_to is not None and entry.entry_date > date_to:
+                continue
+            group = (keys[group_by](entry), entry.currency)
+            spent, count = totals.get(group, (Money.zero(entry.currency), 0))
+            totals[group] = (spent - entry.amount, count + 1)
+        return [
+            (key, spent, count)
+            for (key, _), (spent, count) in sorted(totals.items(), key=str)
+        ]
+
+    def balance_at(self, account_id, on):
+        account = self.get(account_id)
+        if account is None:
+            return None
+        return sum(
+            (
+                entry.amount
+                for entry in self.entries
+                if entry.account_id == account_id and entry.entry_date <= on
+            ),
+            account.initial_balance,
+        )
+
+    def daily_balances(self, account_id, *, date_from=None, date_to=None):
+        days = sorted(
+            {
+                entry.entry_date
+                for entry in self.entries
+                if entry.account_id == account_id
+                and (date_from is None or entry.entry_date >= date_from)
+                and (date_to is None or entry.entry_date <= date_to)
+            }
+        )
+        return [(day, self.balance_at(account_id, day)) for day in days]
+
+    def balances_by_currency(self, on):
+        totals: dict[str, tuple[Money, int]] = {}
+        for account in self.accounts:
+            total, count = totals.get(
+                account.currency, (Money.zero(account.currency), 0)
+            )
+            totals[account.currency] = (
+                total + self.balance_at(account.id, on),
+                count + 1,
+            )
+        return [totals[currency] for currency in sorted(totals)]
+
+
+class FakeRateRepository(FakeUnitOfWork, RateRepository):
+    def __init__(self):
+        super().__init__()
+        self.rates: dict[tuple[str, str, date], Decimal] = {}
+        self.fx_queries: list[tuple[str, str]] = []
+
+    def fx_rates(self, base, quote):
+        self.fx_queries.append((base, quote))
+        return sorted(
+            (day, rate)
+            for (b, q, day), rate in self.rates.items()
+            if (b, q) == (base, quote)
+        )
+
+    def add_fx_rates(self, rates):
+        for rate in rates:
+            self.rates[rate.base, rate.quote, rate.rate_date] = rate.rate
+
+
+class FakeValuationRepository(FakeRepository, FakeRateRepository, ValuationRepository):
+    pass
+
+
+class FakeBudgetRepository(FakeRepository, BudgetRepository):
+    """Budgets whose spending is counted from the entries of the fake."""
+
+    def __init__(self, accounts: list[Account] | None = None):
+        super().__init__(accounts)
+        self.budgets: dict[tuple[str, str], Budget] = {}
+
+    def set_budget(self, budget):
+        self.budgets[budget.category, budget.limit.currency] = budget
+
+    def delete_budget(self, category, currency):
+        return self.budgets.pop((category, currency), None) is not None
+
+    def budget_statuses(self, month, keys=None):
+        spent = spend_deltas(self.entries)
+        return [
+            BudgetStatus(
+                budget,
+                month,
+                Money(spent.get((category, month, currency), 0), currency),
+            )
+            for (category, currency), budget in sorted(self.budgets.items())
+            if keys is None or (category, currency) in keys
+        ]
+
+
+class FakeImportJobRepository(FakeRepository, ImportJobRepository):
+    def __init__(self, accounts: list[Account] | None = None):
+        super().__init__(accounts)
+        self.import_jobs: dict[str, ImportJob] = {}
+
+    def add_import_job(self, job):
+        self.import_jobs[job.id] = replace(job)
+
+    def get_import_job(self, job_id):
+        job = self.import_jobs.get(job_id)
+        return None if job is None else replace(job)
+
+    def save_import_job(self, job):
+        self.import_jobs[job.id] = replace(job)
+
+
+class FakeRecurringRuleRepository(FakeRepository, RecurringRuleRepository):
+    def __init__(self, accounts: list[Account] | None = None):
+        super().__init__(accounts)
+        self.recurring_rules: dict[str, RecurringRule] = {}
+
+    def add_recurring_rule(self, rule):
+        self.recurring_rules[rule.id] = replace(rule)
+
+    def get_recurring_rule(self, rule_id):
+        rule = self.recurring_rules.get(rule_id)
+        return None if rule is None else replace(rule)
+
+    def list_recurring_rules(self, account_id):
+        return sorted(
+            (
+                replace(rule)
+                for rule in self.recurring_rules.values()
+                if rule.account_id == account_id
+            ),
+            key=lambda rule: (rule.start_date, rule.id),
+        )
+
+    def delete_recurring_rule(self, rule_id):
+        return self.recurring_rules.pop(rule_id, None) is not None
+
+    def due_recurring_rules(self, on, *, after=None, limit):
+        due = [
+            replace(rule)
+            for rule_id, rule in sorted(self.recurring_rules.items())
+            if rule.next_date is not None
+            and rule.next_date <= on
+            and (after is None or rule_id > after)
+        ]
+        return due[:limit]
+
+    def save_recurring_rule(self, rule, *, materialized):
+        if self.recurring_rules[rule.id].materialized != materialized:
+            return False
+        self.recurring_rules[rule.id] = replace(rule)
+        return True
+
+
+class FakeIdempotencyRepository(FakeUnitOfWork, IdempotencyRepository):
+    def __init__(self):
+        super().__init__()
+        self.idempotency: dict[str, tuple[IdempotencyRecord, datetime]] = {}
+
+    def get_idempotency_record(self, key):
+        stored = self.idempotency.get(key)
+        return None if stored is None else stored[0]
+
+    def add_idempotency_record(self, record, expires_at) -> bool:
+        if record.key in self.idempotency:
+            return False
+        self.idempotency[record.key] = (record, expires_at)
+        return True
+
+    def delete_expired_idempotency_keys(self, now):
+        for key, (_, expires_at) in list(self.idempotency.items()):
+            if expires_at <= now:
+                del self.idempotency[key]
 
 
 class TestCreateAccount:
@@ -50,7 +425,7 @@ class TestCreateAccount:
         # Assert
         assert account.name == "Test Account"
         assert account.currency == "USD"
-        assert account.initial_balance == Decimal(100)
+        assert account.initial_balance.amount == Decimal(100)
         assert repo.committed is True
         assert len(repo.accounts) == 1
 
@@ -67,7 +442,7 @@ class TestCreateAccount:
         )
 
         # Assert
-        assert account.initial_balance == Decimal(0)
+        assert account.initial_balance.amount == Decimal(0)
         assert repo.committed is True
 
     def test_create_account_duplicate_name_raises_error(self):
@@ -110,3 +485,874 @@ class TestCreateAccount:
         assert "-100" in str(exc_info.value)
         assert repo.committed is False  # Should not commit on error
         assert len(repo.accounts) == 0  # Should not add account
+
+
+class TestRecordEntries:
+    def test_record_entries_stores_batch_and_commits(self, acc_eur):
+        # Arrange
+        repo = FakeRepository(accounts=[acc_eur])
+
+        # Act
+        recorded = record_entries(
+            repo,
+            account_id=acc_eur.id,
+            entries=[
+                (Decimal(5), JAN_01, "TAXI", CategoryType.EXPENSE),
+                (Decimal(10), JAN_01, "SALARY", CategoryType.INCOME),
+            ],
+        )
+
+        # Assert
+        assert repo.entries == recorded
+        assert acc_eur.balance.amount == Decimal(40)
+        assert repo.committed is True
+
+    def test_record_entries_insufficient_funds_stores_nothing(self, acc_eur):
+        # Arrange
+        repo = FakeRepository(accounts=[acc_eur])
+
+        # Act & Assert
+        with pytest.raises(InsufficientFundsError):
+            record_entries(
+                repo,
+                account_id=acc_eur.id,
+                entries=[(Decimal(50), JAN_01, "RENT", CategoryType.EXPENSE)],
+            )
+
+        assert repo.entries == []
+        assert repo.committed is False
+
+    def test_record_entries_counts_categories_once_committed(self, acc_eur):
+        # Arrange: The index is loaded before the batch
+        repo = FakeRepository(accounts=[acc_eur])
+        index = CategoryIndex()
+        index.complete(repo, "t")
+        batch = [(Decimal(5), JAN_01, "TAXI", CategoryType.EXPENSE)]
+
+        # Act
+        with repo.atomic():
+            record_entries(repo, account_id=acc_eur.id, entries=batch, index=index)
+            uncommitted = index.complete(repo, "t")
+
+        # Assert
+        assert uncommitted == []
+        assert index.complete(repo, "t") == [("TAXI", 1)]
+
+    def test_record_entries_rolled_back_are_not_counted(self, acc_eur):
+        repo = FakeRepository(accounts=[acc_eur])
+        index = CategoryIndex()
+        index.complete(repo, "t")
+        batch = [(Decimal(5), JAN_01, "TAXI", CategoryType.EXPENSE)]
+
+        with pytest.raises(RuntimeError):
+            with repo.atomic():
+                record_entries(repo, account_id=acc_eur.id, entries=batch, index=index)
+                raise RuntimeError()
+        repo.rollback()
+        repo.commit()
+
+        assert index.complete(repo, "t") == []
+
+    def test_record_entries_unknown_account_raises_error(self):
+        # Arrange
+        repo = FakeRepository()
+
+        # Act & Assert
+        with pytest.raises(AccountNotFoundError):
+            record_entries(repo, account_id="missing", entries=[])
+
+
+class TestTransferFunds:
+    def test_transfer_funds_locks_both_accounts_in_id_order(self, acc_eur):
+        # Arrange
+        savings = Account("a0", "Savings", "EUR", Decimal(0))
+        repo = FakeValuationRepository(accounts=[acc_eur, savings])
+
+        # Act
+        debit, credit = transfer_funds(
+            repo,
+            from_account_id=acc_eur.id,
+            to_account_id=savings.id,
+            entry_date=JAN_01,
+            debit_amount=Decimal(10),
+        )
+
+        # Assert: Locked lowest id first; credit defaults to the debit
+        assert repo.locked == ["a0", "a1"]
+        assert (debit.amount, credit.amount) == (Money(-1000, "EUR"), Money(1000, "EUR"))
+        assert repo.entries == [debit, credit]
+        assert acc_eur.balance == Money(2500, "EUR")
+        assert savings.balance == Money(1000, "EUR")
+        assert repo.committed is True
+
+    def test_transfer_funds_insufficient_funds_stores_nothing(self, acc_eur, acc_rub):
+        repo = FakeValuationRepository(accounts=[acc_eur, acc_rub])
+
+        with pytest.raises(InsufficientFundsError):
+            transfer_funds(
+                repo,
+                from_account_id=acc_rub.id,
+                to_account_id=acc_eur.id,
+                entry_date=JAN_01,
+                debit_amount=Decimal(1),
+                credit_amount=Decimal("0.01"),
+            )
+
+        assert repo.entries == []
+        assert repo.committed is False
+
+    def test_transfer_funds_requires_credit_amount_across_currencies(
+        self, acc_eur, acc_rub
+    ):
+        repo = FakeValuationRepository(accounts=[acc_eur, acc_rub])
+
+        with pytest.raises(ValueError, match="credit_amount is required"):
+            transfer_funds(
+                repo,
+                from_account_id=acc_eur.id,
+                to_account_id=acc_rub.id,
+                entry_date=JAN_01,
+                debit_amount=Decimal(1),
+            )
+
+    def test_transfer_funds_converts_credit_at_the_rate_of_the_day(
+        self, acc_eur, acc_rub
+    ):
+        repo = FakeValuationRepository(accounts=[acc_eur, acc_rub])
+        repo.add_fx_rates([FxRate("EUR", "RUB", JAN_01, Decimal("98.765"))])
+
+        debit, credit = transfer_funds(
+            repo,
+            from_account_id=acc_eur.id,
+            to_account_id=acc_rub.id,
+            entry_date=JAN_02,
+            debit_amount=Decimal(10),
+            rates=RateBook(),
+        )
+
+        # Assert: 987.65 RUB at the latest rate on or before JAN_02
+        assert (debit.amount, credit.amount) == (
+            Money(-1000, "EUR"),
+            Money(98765, "RUB"),
+        )
+
+    def test_transfer_funds_without_rate_stores_nothing(self, acc_eur, acc_rub):
+        repo = FakeValuationRepository(accounts=[acc_eur, acc_rub])
+
+        with pytest.raises(RateNotFoundError):
+            transfer_funds(
+                repo,
+                from_account_id=acc_eur.id,
+                to_account_id=acc_rub.id,
+                entry_date=JAN_01,
+                debit_amount=Decimal(1),
+                rates=RateBook(),
+            )
+
+        assert repo.entries == []
+
+    def test_transfer_funds_unknown_account_raises_error(self, acc_eur):
+        repo = FakeValuationRepository(accounts=[acc_eur])
+
+        with pytest.raises(AccountNotFoundError, match="missing"):
+            transfer_funds(
+                repo,
+                from_account_id=acc_eur.id,
+                to_account_id="missing",
+                entry_date=JAN_01,
+                debit_amount=Decimal(1),
+            )
+
+    def test_transfer_funds_rejects_same_account(self, acc_eur):
+        repo = FakeValuationRepository(accounts=[acc_eur])
+
+        with pytest.raises(ValueError, match="same account"):
+            transfer_funds(
+                repo,
+                from_account_id=acc_eur.id,
+                to_account_id=acc_eur.id,
+                entry_date=JAN_01,
+                debit_amount=Decimal(1),
+            )
+
+
+class TestRetryOnConflict:
+    @pytest.fixture(autouse=True)
+    def no_backoff(self, monkeypatch):
+        monkeypatch.setattr(services, "CONFLICT_BACKOFF_SECONDS", 0)
+
+    def test_retry_on_conflict_reruns_service_after_rollback(self):
+        # Arrange: A service that loses the race twice
+        repo = FakeRepository()
+        calls = []
+
+        @retry_on_conflict
+        def service(repo, value):
+            calls.append(repo.committed)
+            if len(calls) < 3:
+                repo.committed = True
+                raise StaleDataError("account was updated concurrently")
+            return value
+
+        # Act
+        result = service(repo, "done")
+
+        # Assert: Every retry started from a rolled back unit of work
+        assert result == "done"
+        assert calls == [False, False, False]
+
+    def test_retry_on_conflict_gives_up_after_max_attempts(self):
+        repo = FakeRepository()
+        calls = []
+
+        @retry_on_conflict
+        def service(repo):
+            calls.append(1)
+            raise StaleDataError("account was updated concurrently")
+
+        with pytest.raises(ConcurrentUpdateError):
+            service(repo)
+
+        assert len(calls) == services.CONFLICT_ATTEMPTS
+
+
+class TestListEntries:
+    @pytest.fixture
+    def repo(self, acc_eur):
+        repo = FakeRepository(accounts=[acc_eur])
+        record_entries(
+            repo,
+            account_id=acc_eur.id,
+            entries=[
+                (Decimal(1), JAN_01, "TAXI", CategoryType.EXPENSE),
+                (Decimal(2), JAN_02, "FOOD", CategoryType.EXPENSE),
+                (Decimal(3), JAN_02, "TAXI", CategoryType.EXPENSE),
+                (Decimal(4), JAN_03, "SALARY", CategoryType.INCOME),
+            ],
+        )
+        return repo
+
+    def test_list_entries_pages_through_all_entries(self, repo, acc_eur):
+        # Act: Walk the pages until the cursor runs out
+        seen, cursor = [], None
+        while True:
+            page, cursor = list_entries(
+                repo, account_id=acc_eur.id, limit=3, cursor=cursor
+            )
+            seen.extend(page)
+            if cursor is None:
+                break
+
+        # Assert: Every entry is returned exactly once, in key order
+        assert seen == sorted(repo.entries, key=lambda e: (e.entry_date, e.id))
+
+    def test_list_entries_last_page_has_no_cursor(self, repo, acc_eur):
+        page, cursor = list_entries(repo, account_id=acc_eur.id, limit=4)
+
+        assert len(page) == 4
+        assert cursor is None
+
+    def test_list_entries_applies_filters(self, repo, acc_eur):
+        page, _ = list_entries(
+            repo,
+            account_id=acc_eur.id,
+            limit=10,
+            date_from=JAN_02,
+            category="TAXI",
+        )
+
+        assert [entry.amount for entry in page] == [Money(-300, "EUR")]
+
+    def test_list_entries_rejects_malformed_cursor(self, repo, acc_eur):
+        with pytest.raises(ValueError, match="Invalid cursor"):
+            list_entries(repo, account_id=acc_eur.id, limit=10, cursor="???")
+
+
+class TestSearchEntries:
+    @pytest.fixture
+    def repo(self, acc_eur):
+        repo = FakeRepository(accounts=[acc_eur])
+        record_entries(
+            repo,
+            account_id=acc_eur.id,
+            entries=[
+                (Decimal(1), JAN_01, "COFFEE_SHOP", CategoryType.EXPENSE),
+                (Decimal(1), JAN_02, "Coffee", CategoryType.EXPENSE),
+                (Decimal(1), JAN_03, "COFFEE_SHOP", CategoryType.EXPENSE),
+                (Decimal(1), JAN_03, "TAXI", CategoryType.EXPENSE),
+            ],
+        )
+        return repo
+
+    def test_search_entries_pages_through_matches(self, repo):
+        first, cursor = search_entries(repo, query="coffee", limit=2)
+        rest, last = search_entries(repo, query="coffee", limit=2, cursor=cursor)
+
+        assert [e.entry_date for e in first + rest] == [JAN_01, JAN_02, JAN_03]
+        assert last is None
+
+    def test_search_entries_rejects_queries_without_words(self, repo):
+        with pytest.raises(ValueError, match="no words"):
+            search_entries(repo, query="* -", limit=10)
+
+    def test_search_entries_of_unknown_account(self, repo):
+        with pytest.raises(AccountNotFoundError):
+            search_entries(repo, query="coffee", limit=10, account_id="missing")
+
+    def test_complete_category_counts_entries(self, repo):
+        index = CategoryIndex()
+
+        completions = complete_category(repo, prefix="c", limit=5, index=index)
+
+        assert completions == [("COFFEE_SHOP", 2), ("Coffee", 1)]
+
+
+class TestExportEntries:
+    @pytest.fixture
+    def repo(self, acc_eur, acc_rub):
+        repo = FakeRepository(accounts=[acc_eur, acc_rub])
+        record_entries(
+            repo,
+            account_id=acc_eur.id,
+            entries=[
+                (Decimal(2), JAN_02, "FOOD", CategoryType.EXPENSE),
+                (Decimal(1), JAN_01, "TAXI", CategoryType.EXPENSE),
+            ],
+        )
+        record_entries(
+            repo,
+            account_id=acc_rub.id,
+            entries=[(Decimal(7), JAN_01, "SALARY", CategoryType.INCOME)],
+        )
+        return repo
+
+    def test_export_entries_of_one_account_in_date_order(self, repo, acc_eur):
+        chunks = export_entries(
+            repo, export_format=ExportFormat.CSV, account_id=acc_eur.id
+        )
+
+        lines = "".join(chunks).splitlines()
+        assert (
+            lines[0] == "id,account_id,entry_date,amount,currency,category,category_type"
+        )
+        assert [line.split(",")[2:6] for line in lines[1:]] == [
+            ["2025-01-01", "-1.00", "EUR", "TAXI"],
+            ["2025-01-02", "-2.00", "EUR", "FOOD"],
+        ]
+
+    def test_export_entries_of_all_accounts(self, repo):
+        chunks = export_entries(repo, export_format=ExportFormat.NDJSON, date_to=JAN_01)
+
+        rows = [json.loads(line) for line in "".join(chunks).splitlines()]
+        assert [(row["account_id"], row["amount"]) for row in rows] == [
+            ("a1", "-1.00"),
+            ("a2", "7.00"),
+        ]
+
+    def test_export_entries_checks_account_before_streaming(self, repo):
+        with pytest.raises(AccountNotFoundError):
+            export_entries(repo, export_format=ExportFormat.CSV, account_id="missing")
+
+
+class TestImportStatement:
+    STATEMENT = (
+        b"date,amount,category\n"
+        b"2025-01-01,-2.00,FOOD\n"
+        b"2025-01-01,-2.00,FOOD\n"
+        b"2025-01-02,10,SALARY\n"
+        b"2025-01-03,-1.50,TAXI\n"
+    )
+
+    @pytest.fixture
+    def repo(self, acc_eur):
+        return FakeImportJobRepository(accounts=[acc_eur])
+
+    def _import(self, repo, statement: bytes, chunk_size: int = 2) -> ImportJob:
+        job = create_import_job(
+            repo,
+            account_id="a1",
+            statement_format=StatementFormat.CSV,
+            bytes_total=len(statement),
+        )
+        return import_statement(
+            repo, job_id=job.id, statement=io.BytesIO(statement), chunk_size=chunk_size
+        )
+
+    def test_import_statement_records_every_line(self, repo, acc_eur):
+        job = self._import(repo, self.STATEMENT)
+
+        assert job.status == ImportStatus.SUCCEEDED
+        assert (job.lines_read, job.imported, job.duplicates) == (4, 4, 0)
+        assert job.bytes_read == job.bytes_total
+        assert repo.import_jobs[job.id] == job
+        assert acc_eur.balance == Money(3950, "EUR")
+
+    def test_import_statement_skips_lines_imported_before(self, repo, acc_eur):
+        # Arrange: The first two lines were imported already
+        head = b"".join(self.STATEMENT.splitlines(keepends=True)[:3])
+        self._import(repo, head)
+
+        # Act
+        job = self._import(repo, self.STATEMENT)
+
+        # Assert: Only the remaining lines, including the repeated FOOD line
+        assert (job.lines_read, job.imported, job.duplicates) == (4, 2, 2)
+        assert len(repo.entries) == 4
+        assert acc_eur.balance == Money(3950, "EUR")
+
+    def test_import_statement_failure_keeps_committed_chunks(self, repo, acc_eur):
+        # Arrange: The second chunk would overdraw the account
+        statement = self.STATEMENT + b"2025-01-04,-100,RENT\n"
+
+        # Act
+        job = self._import(repo, statement, chunk_size=4)
+
+        # Assert
+        assert job.status == ImportStatus.FAILED
+        assert job.error is not None
+        assert "Insufficient funds" in job.error
+        assert (job.lines_read, job.imported) == (4, 4)
+        assert len(repo.entries) == 4
+
+    def test_import_statement_reports_malformed_lines(self, repo):
+        job = self._import(repo, b"date,amount\n2025-01-01,abc\n")
+
+        assert job.status == ImportStatus.FAILED
+        assert job.error is not None
+        assert job.error.startswith("Line 2:")
+
+    def test_interrupted_import_is_failed_and_resumes(self, repo, acc_eur, monkeypatch):
+        # Arrange: The process is stopped while importing the second chunk
+        job = create_import_job(
+            repo,
+            account_id="a1",
+            statement_format=StatementFormat.CSV,
+            bytes_total=len(self.STATEMENT),
+        )
+        count = repo.count_entries_by_hash
+        chunks = []
+
+        def interrupt(account_id, hashes):
+            if chunks:
+                raise KeyboardInterrupt
+            chunks.append(hashes)
+            return count(account_id, hashes)
+
+        monkeypatch.setattr(repo, "count_entries_by_hash", interrupt)
+        with pytest.raises(KeyboardInterrupt):
+            import_statement(
+                repo, job_id=job.id, statement=io.BytesIO(self.STATEMENT), chunk_size=2
+            )
+        stopped = repo.import_jobs[job.id]
+        monkeypatch.undo()
+
+        # Act: Run the job again
+        resumed = import_statement(
+            repo, job_id=job.id, statement=io.BytesIO(self.STATEMENT), chunk_size=2
+        )
+
+        # Assert: Not left RUNNING; resumed after the committed chunk
+        assert (stopped.status, stopped.error) == (
+            ImportStatus.FAILED,
+            "KeyboardInterrupt",
+        )
+        assert stopped.lines_read == 2
+        assert resumed.status == ImportStatus.SUCCEEDED
+        assert (resumed.lines_read, resumed.imported, resumed.duplicates) == (4, 4, 0)
+        assert acc_eur.balance == Money(3950, "EUR")
+
+
+class TestSpendingReport:
+    @pytest.fixture
+    def repo(self, acc_eur):
+        repo = FakeRepository(accounts=[acc_eur])
+        record_entries(
+            repo,
+            account_id=acc_eur.id,
+            entries=[
+                (Decimal(1), JAN_01, "TAXI", CategoryType.EXPENSE),
+                (Decimal(2), JAN_02, "FOOD", CategoryType.EXPENSE),
+                (Decimal(3), JAN_02, "TAXI", CategoryType.EXPENSE),
+                (Decimal(4), JAN_03, "SALARY", CategoryType.INCOME),
+            ],
+        )
+        return repo
+
+    def test_spending_report_sums_expenses_per_group(self, repo):
+        rows = spending_report(repo, group_by=ReportGrouping.CATEGORY, date_from=JAN_02)
+
+        assert rows == [("FOOD", Money(200, "EUR"), 1), ("TAXI", Money(300, "EUR"), 1)]
+
+    def test_spending_report_rejects_inverted_date_range(self, repo):
+        with pytest.raises(ValueError, match="Invalid date range"):
+            spending_report(
+                repo,
+                group_by=ReportGrouping.MONTH,
+                date_from=JAN_03,
+                date_to=JAN_01,
+            )
+
+
+class TestBudgets:
+    @pytest.fixture
+    def repo(self, acc_eur):
+        repo = FakeBudgetRepository(accounts=[acc_eur])
+        set_budget(repo, category="FOOD", currency="EUR", limit=Decimal(10))
+        set_budget(repo, category="TAXI", currency="EUR", limit=Decimal(5))
+        return repo
+
+    def test_budget_status_reports_spending_of_the_month(self, repo, acc_eur):
+        record_entries(
+            repo,
+            account_id=acc_eur.id,
+            entries=[
+                (Decimal(4), JAN_01, "FOOD", CategoryType.EXPENSE),
+                (Decimal(9), JAN_02, "FOOD", CategoryType.INCOME),
+                (Decimal(6), JAN_03, "TAXI", CategoryType.EXPENSE),
+            ],
+        )
+
+        statuses = budget_status(repo, month="2025-01")
+
+        assert [(s.budget.category, s.spent, s.remaining) for s in statuses] == [
+            ("FOOD", Money(400, "EUR"), Money(600, "EUR")),
+            ("TAXI", Money(600, "EUR"), Money(-100, "EUR")),
+        ]
+        over = budget_status(repo, month="2025-01", over_budget_only=True)
+        assert [s.budget.category for s in over] == ["TAXI"]
+        assert budget_status(repo, month="2025-02", over_budget_only=True) == []
+
+    def test_budget_alerts_cover_only_the_budgets_spent_from(self, repo, acc_eur):
+        recorded = record_entries(
+            repo,
+            account_id=acc_eur.id,
+            entries=[
+                (Decimal(11), JAN_01, "FOOD", CategoryType.EXPENSE),
+                (Decimal(1), JAN_01, "TAXI", CategoryType.EXPENSE),
+            ],
+        )
+        set_budget(repo, category="RENT", currency="EUR", limit=Decimal("0.01"))
+        repo.add_entries(
+            [
+                Entry(
+                    None,
+                    acc_eur.id,
+                    Money(-5, "EUR"),
+                    JAN_01,
+                    "RENT",
+                    CategoryType.EXPENSE,
+                )
+            ]
+        )
+
+        alerts = budget_alerts(repo, new_entries=recorded)
+
+        assert [(s.budget.category, s.month) for s in alerts] == [("FOOD", "2025-01")]
+
+    @pytest.mark.parametrize(
+        ("limit", "currency", "match"),
+        [
+            (Decimal(0), "EUR", "must be positive"),
+            (Decimal("0.001"), "EUR", "decimal places"),
+        ],
+    )
+    def test_set_budget_rejects_invalid_limits(self, limit, currency, match):
+        with pytest.raises(ValueError, match=match):
+            set_budget(
+                FakeBudgetRepository(), category="FOOD", currency=currency, limit=limit
+            )
+
+    @pytest.mark.parametrize("month", ["2025-1", "2025-13", "January"])
+    def test_budget_status_rejects_invalid_month(self, repo, month):
+        with pytest.raises(ValueError, match="Invalid month"):
+            budget_status(repo, month=month)
+
+    def test_delete_budget(self, repo):
+        delete_budget(repo, category="FOOD", currency="EUR")
+
+        assert list(repo.budgets) == [("TAXI", "EUR")]
+        with pytest.raises(BudgetNotFoundError):
+            delete_budget(repo, category="FOOD", currency="EUR")
+
+
+class TestRecurringRules:
+    @pytest.fixture
+    def repo(self, acc_eur):
+        return FakeRecurringRuleRepository(accounts=[acc_eur])
+
+    def _rule(self, repo, amount, category_type, frequency, **kwargs):
+        return create_recurring_rule(
+            repo,
+            account_id="a1",
+            amount=Decimal(amount),
+            category=kwargs.pop("category", "RENT"),
+            category_type=category_type,
+            frequency=frequency,
+            start_date=kwargs.pop("start_date", JAN_01),
+            **kwargs,
+        )
+
+    def test_run_catches_up_on_every_due_occurrence_at_once(self, repo, acc_eur):
+        # Arrange: A weekly expense and a monthly income, never run before
+        self._rule(repo, 1, CategoryType.EXPENSE, Frequency.WEEKLY)
+        salary = self._rule(
+            repo, 10, CategoryType.INCOME, Frequency.MONTHLY, category="SALARY"
+        )
+        batches = []
+        repo.add_entries = lambda new_entries: batches.append(new_entries)
+
+        # Act: Two months of downtime
+        recorded = run_recurring_rules(repo, on=date(2025, 2, 28), batch_size=10)
+
+        # Assert: Nine weekly and two monthly occurrences, in one insert
+        assert recorded == 11
+        assert [len(batch) for batch in batches] == [11]
+        assert acc_eur.balance == Money(3500 - 900 + 2000, "EUR")
+        saved = repo.recurring_rules[salary.id]
+        assert (saved.materialized, saved.next_date) == (2, date(2025, 3, 1))
+
+    def test_run_is_idempotent(self, repo, acc_eur):
+        self._rule(repo, 1, CategoryType.EXPENSE, Frequency.DAILY, until=JAN_03)
+        run_recurring_rules(repo, on=date(2025, 1, 31), batch_size=10)
+
+        recorded = run_recurring_rules(repo, on=date(2025, 1, 31), batch_size=10)
+
+        assert recorded == 0
+        assert len(repo.entries) == 3
+        assert repo.due_recurring_rules(date(2026, 1, 1), limit=10) == []
+
+    def test_run_goes_through_every_batch(self, repo):
+        for _ in range(5):
+            self._rule(repo, 1, CategoryType.INCOME, Frequency.DAILY, until=JAN_02)
+
+        recorded = run_recurring_rules(repo, on=JAN_03, batch_size=2)
+
+        assert recorded == 10
+        assert {rule.materialized for rule in repo.recurring_rules.values()} == {2}
+
+    def test_insufficient_funds_stops_only_that_rule(self, repo, acc_eur):
+        # Arrange: 35 EUR covers two rent payments
+        rent = self._rule(repo, 15, CategoryType.EXPENSE, Frequency.MONTHLY)
+        gym = self._rule(
+            repo, "0.5", CategoryType.EXPENSE, Frequency.MONTHLY, category="GYM"
+        )
+
+        # Act
+        recorded = run_recurring_rules(repo, on=date(2025, 3, 31), batch_size=10)
+
+        # Assert: The third rent payment is retried by the next run
+        assert recorded == 5
+        saved = repo.recurring_rules[rent.id]
+        assert (saved.materialized, saved.next_date) == (2, date(2025, 3, 1))
+        assert "Insufficient funds" in saved.error
+        assert repo.recurring_rules[gym.id].error is None
+        assert acc_eur.balance == Money(350, "EUR")
+
+    def test_rule_saved_by_a_concurrent_run_is_retried(self, repo):
+        # Arrange: Another run records the occurrence between read and save
+        self._rule(repo, 1, CategoryType.INCOME, Frequency.DAILY, until=JAN_01)
+        due = repo.due_recurring_rules
+        raced = []
+
+        def due_recurring_rules(on, **kwargs):
+            rules = due(on, **kwargs)
+            if rules and not raced:
+                repo.due_recurring_rules = due
+                raced.append(run_recurring_rules(repo, on=on, batch_size=10))
+            return rules
+
+        repo.due_recurring_rules = due_recurring_rules
+
+        # Act
+        recorded = run_recurring_rules(repo, on=JAN_03, batch_size=10)
+
+        # Assert: The stale batch was dropped and the retry found nothing
+        # left to record
+        assert (raced, recorded) == ([1], 0)
+        assert [rule.materialized for rule in repo.recurring_rules.values()] == [1]
+
+    @pytest.mark.parametrize(
+        ("amount", "kwargs", "match"),
+        [
+            (0, {}, "greater than zero"),
+            (1, {"interval": 0}, "Interval"),
+            (1, {"until": date(2024, 12, 31)}, "before it starts"),
+        ],
+    )
+    def test_create_recurring_rule_rejects_invalid_rules(
+        self, repo, amount, kwargs, match
+    ):
+        with pytest.raises(ValueError, match=match):
+            self._rule(repo, amount, CategoryType.EXPENSE, Frequency.DAILY, **kwargs)
+
+    def test_delete_recurring_rule(self, repo):
+        rule = self._rule(repo, 1, CategoryType.EXPENSE, Frequency.DAILY)
+
+        delete_recurring_rule(repo, rule_id=rule.id)
+
+        assert repo.recurring_rules == {}
+        with pytest.raises(RecurringRuleNotFoundError):
+            delete_recurring_rule(repo, rule_id=rule.id)
+
+
+class TestFxRates:
+    def test_add_fx_rates_drops_cached_tables_of_the_pairs(self):
+        repo = FakeRateRepository()
+        book = RateBook()
+        add_fx_rates(
+            repo, rates=[FxRate("EUR", "USD", JAN_01, Decimal("1.1"))], book=book
+        )
+        assert book.rate(repo, "USD", "EUR", JAN_02)[1] == 1 / Decimal("1.1")
+
+        stored = add_fx_rates(
+            repo, rates=[FxRate("USD", "EUR", JAN_02, Decimal("0.8"))], book=book
+        )
+
+        assert stored == 1
+        assert repo.committed is True
+        assert book.rate(repo, "USD", "EUR", JAN_02) == (JAN_02, Decimal("0.8"))
+
+    def test_add_fx_rates_drops_cached_tables_once_committed(self):
+        repo = FakeRateRepository()
+        book = RateBook()
+        add_fx_rates(
+            repo, rates=[FxRate("EUR", "USD", JAN_01, Decimal("1.1"))], book=book
+        )
+        book.rate(repo, "EUR", "USD", JAN_02)
+
+        with repo.atomic():
+            add_fx_rates(
+                repo, rates=[FxRate("EUR", "USD", JAN_02, Decimal("1.2"))], book=book
+            )
+            # Readers meanwhile keep the table of the committed rates
+            assert book.rate(repo, "EUR", "USD", JAN_02) == (JAN_01, Decimal("1.1"))
+
+        assert book.rate(repo, "EUR", "USD", JAN_02) == (JAN_02, Decimal("1.2"))
+
+    @pytest.mark.parametrize(
+        ("rate", "match"),
+        [
+            (FxRate("EUR", "EUR", JAN_01, Decimal(1)), "to itself"),
+            (FxRate("EUR", "USD", JAN_01, Decimal(0)), "must be positive"),
+        ],
+    )
+    def test_add_fx_rates_rejects_invalid_rates(self, rate, match):
+        repo = FakeRateRepository()
+
+        with pytest.raises(ValueError, match=match):
+            add_fx_rates(repo, rates=[rate], book=RateBook())
+
+        assert repo.rates == {}
+
+    def test_net_worth_queries_rates_once_per_currency(self, acc_eur):
+        accounts = [acc_eur] + [
+            Account(f"u{i}", f"USD_{i}", "USD", Decimal(i)) for i in range(1, 51)
+        ]
+        repo = FakeValuationRepository(accounts=accounts)
+        repo.add_fx_rates(
+            [
+                FxRate("USD", "EUR", JAN_01, Decimal("0.5")),
+                FxRate("USD", "EUR", JAN_03, Decimal("0.9")),
+            ]
+        )
+
+        rows = net_worth(repo, currency="EUR", on=JAN_02, book=RateBook())
+
+        # Assert: 1275 USD over 50 accounts, valued at the JAN_01 rate
+        assert rows == [
+            (Money(3500, "EUR"), 1, Decimal(1), Money(3500, "EUR")),
+            (Money(127500, "USD"), 50, Decimal("0.5"), Money(63750, "EUR")),
+        ]
+        assert repo.fx_queries == [("USD", "EUR"), ("EUR", "USD")]
+
+    def test_net_worth_without_rate_raises_error(self, acc_eur, acc_rub):
+        repo = FakeValuationRepository(accounts=[acc_eur, acc_rub])
+
+        with pytest.raises(RateNotFoundError, match="RUB/EUR"):
+            net_worth(repo, currency="EUR", on=JAN_01, book=RateBook())
+
+
+class TestBalanceHistory:
+    @pytest.fixture
+    def repo(self, acc_eur):
+        repo = FakeRepository(accounts=[acc_eur])
+        record_entries(
+            repo,
+            account_id=acc_eur.id,
+            entries=[
+                (Decimal(5), JAN_01, "TAXI", CategoryType.EXPENSE),
+                (Decimal(10), JAN_03, "SALARY", CategoryType.INCOME),
+            ],
+        )
+        return repo
+
+    def test_balance_at_unknown_account_raises_error(self, repo):
+        with pytest.raises(AccountNotFoundError):
+            balance_at(repo, account_id="missing", on=JAN_01)
+
+    def test_balance_history_starts_on_date_from(self, repo, acc_eur):
+        points = balance_history(repo, account_id=acc_eur.id, date_from=JAN_02)
+
+        # Assert: JAN_02 has no entries and carries the balance of JAN_01
+        assert points == [(JAN_02, Money(3000, "EUR")), (JAN_03, Money(4000, "EUR"))]
+
+    def test_balance_history_rejects_inverted_date_range(self, repo, acc_eur):
+        with pytest.raises(ValueError, match="Invalid date range"):
+            balance_history(
+                repo, account_id=acc_eur.id, date_from=JAN_03, date_to=JAN_01
+            )
+
+
+class TestIdempotentRequests:
+    NOW = datetime(2025, 1, 1, 12, 0)
+
+    def _begin(self, repo, fingerprint="f1", now=NOW):
+        return begin_idempotent_request(repo, key="k1", fingerprint=fingerprint, now=now)
+
+    def _finish(self, repo, fingerprint="f1", now=NOW):
+        finish_idempotent_request(
+            repo,
+            key="k1",
+            fingerprint=fingerprint,
+            status_code=201,
+            response_body="{}",
+            ttl_seconds=60,
+            now=now,
+        )
+
+    def test_retry_gets_stored_response(self):
+        repo = FakeIdempotencyRepository()
+
+        assert self._begin(repo) is None
+        self._finish(repo)
+
+        assert self._begin(repo) == IdempotencyRecord("k1", "f1", 201, "{}")
+
+    def test_nothing_is_committed(self):
+        repo = FakeIdempotencyRepository()
+
+        self._begin(repo)
+        self._finish(repo)
+
+        assert not repo.committed
+
+    def test_request_racing_the_first_one_raises_error(self):
+        repo = FakeIdempotencyRepository()
+        self._finish(repo)
+
+        with pytest.raises(IdempotencyKeyConflictError):
+            self._finish(repo)
+
+    def test_key_reused_for_another_request_raises_error(self):
+        repo = FakeIdempotencyRepository()
+        self._finish(repo)
+
+        with pytest.raises(IdempotencyKeyMismatchError):
+            self._begin(repo, fingerprint="f2")
+
+    def test_expired_key_can_be_used_again(self):
+        repo = FakeIdempotencyRepository()
+        self._finish(repo)
+
+        later = datetime(2025, 1, 1, 12, 1)
+        assert self._begin(repo, fingerprint="f2", now=later) is None